@@ -76,7 +76,8 @@ class Task(object):
             raise TypeError("data must be an instance of Shareable, but got {}.".format(type(data)))
 
         self.name = name  # name of the task
-        self.data = data  # task data to be sent to client(s)
+        self._data = data  # task data to be sent to client(s)
+        self.data_version = 0  # incremented when the task data changes
         self.cb_lock = threading.Lock()
 
         if props is None:
@@ -122,6 +123,24 @@ class Task(object):
         self.schedule_time = None  # when the task was scheduled
         self.create_time = time.time()
 
+    @property
+    def data(self) -> Shareable:
+        return self._data
+
+    @data.setter
+    def data(self, data: Shareable):
+        self._data = data
+        self.data_changed()
+
+    def data_changed(self):
+        """Mark the task data as changed.
+
+        Replacing the task data marks it automatically. Code modifying the task data in place
+        (e.g. in before_task_sent_cb) must call this method, so the serialized task data shared by the
+        clients is not reused.
+        """
+        self.data_version += 1
+
     def set_prop(self, key, value):
         if key.startswith("__"):
             raise ValueError("Keys start with __ is reserved. Please use other key instead of {}.".format(key))
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 import copy
-from typing import List, Union
+from typing import BinaryIO, List, Union
 
 from nvflare.apis.shareable import ReservedHeaderKey, Shareable
 from nvflare.fuel.utils import fobs
@@ -116,6 +116,15 @@ class DXO(object):
         """
         return fobs.dumps(self)
 
+    def to_stream(self, stream: BinaryIO):
+        """Serialize the DXO object and write it to a stream without building the whole data in memory.
+
+        Args:
+            stream: a binary stream, like a file opened for writing
+
+        """
+        fobs.dump(self, stream)
+
     def validate(self) -> str:
         if self.data is None:
             return "missing data"
@@ -189,3 +198,20 @@ def from_bytes(data: bytes) -> DXO:
         return x
     else:
         raise ValueError("Data bytes are from type {} and do not represent a valid DXO instance.".format(type(x)))
+
+
+def from_stream(stream: BinaryIO) -> DXO:
+    """Read a DXO object from a stream incrementally.
+
+    Args:
+        stream: a binary stream, like a file opened for reading
+
+    Returns:
+        an object loaded by FOBS from the stream
+
+    """
+    x = fobs.load(stream)
+    if isinstance(x, DXO):
+        return x
+    else:
+        raise ValueError("Data stream is from type {} and does not represent a valid DXO instance.".format(type(x)))
@@ -27,6 +27,7 @@ class EventType(object):
     START_WORKFLOW = "_start_workflow"
     END_WORKFLOW = "_end_workflow"
     ABORT_TASK = "_abort_task"
+    TASK_SCHEDULED = "_task_scheduled"
     FATAL_SYSTEM_ERROR = "_fatal_system_error"
     FATAL_TASK_ERROR = "_fatal_task_error"
     JOB_DEPLOYED = "_job_deployed"
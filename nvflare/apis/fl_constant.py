@@ -147,6 +147,9 @@ class FLContextKey(object):
     JOB_PARTICIPANTS = "__job_participants"
     JOB_BLOCK_REASON = "__job_block_reason"  # why the job should be blocked from scheduling
     SSID = "__ssid__"
+    TASK_OBJECT = "__task_object__"  # the Task a client task data is created from
+    TASK_PAYLOAD = "__task_payload__"  # serialized task data content shared by the clients of the task
+    TASK_PAYLOAD_CACHE = "__task_payload_cache__"
 
 
 class ReservedTopic(object):
@@ -252,6 +255,9 @@ class NonSerializableKeys(object):
         FLContextKey.WORKSPACE_OBJECT,
         FLContextKey.TASK_DATA,
         FLContextKey.SHAREABLE,
+        FLContextKey.TASK_OBJECT,
+        FLContextKey.TASK_PAYLOAD,
+        FLContextKey.TASK_PAYLOAD_CACHE,
     ]
 
 
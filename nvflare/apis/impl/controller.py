@@ -14,11 +14,13 @@
 import threading
 import time
 from abc import ABC
+from collections import deque
 from threading import Lock
 from typing import List, Optional, Tuple, Union
 
 from nvflare.apis.client import Client
 from nvflare.apis.controller_spec import ClientTask, ControllerSpec, SendOrder, Task, TaskCompletionStatus
+from nvflare.apis.event_type import EventType
 from nvflare.apis.fl_constant import FLContextKey, ReservedTopic
 from nvflare.apis.fl_context import FLContext
 from nvflare.apis.responder import Responder
@@ -37,6 +39,8 @@ from .task_manager import TaskCheckStatus, TaskManager
 _TASK_KEY_ENGINE = "___engine"
 _TASK_KEY_MANAGER = "___mgr"
 _TASK_KEY_DONE = "___done"
+_TASK_KEY_DONE_EVENT = "___done_event"
+_TASK_KEY_CLIENTS = "___clients"
 
 # wait this long since client death report before treating the client as dead
 _CONFIG_VAR_DEAD_CLIENT_GRACE_PERIOD = "dead_client_grace_period"
@@ -82,7 +86,8 @@ class Controller(Responder, ControllerSpec, ABC):
         """Manage life cycles of tasks and their destinations.
 
         Args:
-            task_check_period (float, optional): interval for checking status of tasks. Defaults to 0.2.
+            task_check_period (float, optional): interval for checking status of tasks. Tasks are also checked
+                as soon as their results are received or they are cancelled. Defaults to 0.2.
         """
         super().__init__()
         self._engine = None
@@ -92,6 +97,8 @@ class Controller(Responder, ControllerSpec, ABC):
         self._task_lock = Lock()
         self._task_monitor = threading.Thread(target=self._monitor_tasks, args=())
         self._task_check_period = task_check_period
+        self._changed_tasks = deque()  # tasks that may have finished, checked by the monitor right away
+        self._task_changed = threading.Event()
         self._dead_client_reports = {}  # clients that reported the job is dead on it: name => report time
         self._dead_clients_lock = Lock()  # need lock since dead_clients can be modified from different threads
         # make sure _check_tasks, process_task_request, process_submission does not interfere with each other
@@ -285,10 +292,13 @@ class Controller(Responder, ControllerSpec, ABC):
                 can_send_task = False
 
             if not can_send_task:
+                self._task_updated(task)
                 return self._try_again()
 
             self.logger.debug("after_task_sent_cb done on client_task_to_send: {}".format(client_task_to_send))
 
+        # the task data is shared by all clients of the task, the engine may serialize it only once
+        fl_ctx.set_prop(FLContextKey.TASK_OBJECT, task, private=True, sticky=False)
         with self._task_lock:
             # sent the ClientTask and remember it
             now = time.time()
@@ -422,6 +432,11 @@ class Controller(Responder, ControllerSpec, ABC):
                 self.log_debug(fl_ctx, "no result_received_cb")
 
             client_task.result_received_time = time.time()
+            self._task_updated(task)
+
+        if isinstance(manager, (SequentialRelayTaskManager, AnyRelayTaskManager)):
+            # the result passes the task on to the next target
+            self._fire_task_available(task, fl_ctx)
 
     def _schedule_task(
         self,
@@ -430,6 +445,7 @@ class Controller(Responder, ControllerSpec, ABC):
         manager: TaskManager,
         targets: Union[List[Client], List[str], None],
         allow_dup_targets: bool = False,
+        dynamic_targets: bool = False,
     ):
         if task.schedule_time is not None:
             # this task was scheduled before
@@ -459,6 +475,8 @@ class Controller(Responder, ControllerSpec, ABC):
 
         task.props[_TASK_KEY_MANAGER] = manager
         task.props[_TASK_KEY_ENGINE] = self._engine
+        # clients that may get the task, any client if the targets are dynamic
+        task.props[_TASK_KEY_CLIENTS] = None if targets is None or dynamic_targets else list(set(target_names))
         task.is_standing = True
         task.schedule_time = time.time()
 
@@ -466,6 +484,13 @@ class Controller(Responder, ControllerSpec, ABC):
             self._tasks.append(task)
             self.log_info(fl_ctx, "scheduled task {}".format(task.name))
 
+        self._fire_task_available(task, fl_ctx)
+
+    def _fire_task_available(self, task: Task, fl_ctx: FLContext):
+        # let the runner hand the task to the clients waiting for one
+        fl_ctx.set_prop(FLContextKey.EVENT_DATA, task.props.get(_TASK_KEY_CLIENTS), private=True, sticky=False)
+        self.fire_event(EventType.TASK_SCHEDULED, fl_ctx)
+
     def broadcast(
         self,
         task: Task,
@@ -657,6 +682,7 @@ class Controller(Responder, ControllerSpec, ABC):
             fl_ctx (Optional[FLContext], optional): FLContext associated with this cancellation. Defaults to None.
         """
         task.completion_status = completion_status
+        self._task_updated(task)
 
     def cancel_all_tasks(self, completion_status=TaskCompletionStatus.CANCELLED, fl_ctx: Optional[FLContext] = None):
         """Cancel all standing tasks in this controller.
@@ -668,6 +694,8 @@ class Controller(Responder, ControllerSpec, ABC):
         with self._task_lock:
             for t in self._tasks:
                 t.completion_status = completion_status
+                self._changed_tasks.append(t)
+        self._task_changed.set()
 
     def abort_task(self, task, fl_ctx: FLContext):
         """Ask all clients to abort the execution of the specified task.
@@ -711,6 +739,7 @@ class Controller(Responder, ControllerSpec, ABC):
         """
         self.cancel_all_tasks()  # unconditionally cancel all tasks
         self._all_done = True
+        self._task_changed.set()
         try:
             if self._task_monitor.is_alive():
                 self._task_monitor.join()
@@ -794,6 +823,7 @@ class Controller(Responder, ControllerSpec, ABC):
             manager=manager,
             targets=targets,
             allow_dup_targets=True,
+            dynamic_targets=dynamic_targets,
         )
 
     def relay_and_wait(
@@ -833,21 +863,45 @@ class Controller(Responder, ControllerSpec, ABC):
         )
         self.wait_for_task(task, abort_signal)
 
+    def _task_updated(self, task: Task):
+        # the task may have finished, let the monitor check it without waiting for the next round
+        self._changed_tasks.append(task)
+        self._task_changed.set()
+
     def _monitor_tasks(self):
+        # changed tasks are checked as soon as they are reported. All tasks are still checked every
+        # task_check_period for the time based exit conditions of the task managers and for dead clients.
+        next_check_time = 0.0
         while not self._all_done:
-            clients_all_dead = self._check_dead_clients()
-            if not clients_all_dead:
-                self._check_tasks()
-            time.sleep(self._task_check_period)
-
-    def _check_tasks(self):
+            self._task_changed.clear()
+            changed_tasks = {}
+            while self._changed_tasks:
+                task = self._changed_tasks.popleft()
+                changed_tasks[id(task)] = task
+
+            if time.time() >= next_check_time:
+                next_check_time = time.time() + self._task_check_period
+                clients_all_dead = self._check_dead_clients()
+                if not clients_all_dead:
+                    self._check_tasks()
+            elif changed_tasks:
+                self._check_tasks(list(changed_tasks.values()))
+            self._task_changed.wait(max(0.0, next_check_time - time.time()))
+
+    def _check_tasks(self, tasks: Optional[List[Task]] = None):
         with self._controller_lock:
-            self._do_check_tasks()
+            self._do_check_tasks(tasks)
 
-    def _do_check_tasks(self):
+    def _do_check_tasks(self, tasks: Optional[List[Task]] = None):
         exit_tasks = []
         with self._task_lock:
-            for task in self._tasks:
+            if tasks is None:
+                tasks = self._tasks
+            else:
+                # the tasks may have exited since they were reported
+                tasks = [t for t in tasks if t.is_standing]
+
+            for task in tasks:
                 if task.completion_status is not None:
                     exit_tasks.append(task)
                     continue
@@ -896,7 +950,11 @@ class Controller(Responder, ControllerSpec, ABC):
             return
 
         with self._engine.new_context() as fl_ctx:
+            payload_cache = fl_ctx.get_prop(FLContextKey.TASK_PAYLOAD_CACHE)
             for exit_task in exit_tasks:
+                if payload_cache:
+                    payload_cache.evict(exit_task)
+
                 with exit_task.cb_lock:
                     self.log_info(
                         fl_ctx, "task {} exit with status {}".format(exit_task.name, exit_task.completion_status)
@@ -952,11 +1010,16 @@ class Controller(Responder, ControllerSpec, ABC):
             if func:
                 func(*args, **kwargs)
             task.props[_TASK_KEY_DONE] = True
+            done_event = task.props.get(_TASK_KEY_DONE_EVENT)
+            if done_event:
+                done_event.set()
 
         return wrap
 
     def wait_for_task(self, task: Task, abort_signal: Signal):
+        task_done = threading.Event()
         task.props[_TASK_KEY_DONE] = False
+        task.props[_TASK_KEY_DONE_EVENT] = task_done
         task.task_done_cb = self._process_finished_task(task=task, func=task.task_done_cb)
         while True:
             if task.completion_status is not None:
@@ -966,10 +1029,9 @@ class Controller(Responder, ControllerSpec, ABC):
                 self.cancel_task(task, fl_ctx=None, completion_status=TaskCompletionStatus.ABORTED)
                 break
 
-            task_done = task.props[_TASK_KEY_DONE]
-            if task_done:
+            # the abort signal can only be polled
+            if task_done.wait(self._task_check_period):
                 break
-            time.sleep(self._task_check_period)
 
     def _check_dead_clients(self):
         if self._engine:
@@ -12,14 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import datetime
 import os
 import pathlib
 import shutil
 import tempfile
+import threading
 import time
 import uuid
-from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 
 from nvflare.apis.fl_context import FLContext
@@ -28,46 +29,64 @@ from nvflare.apis.job_def_manager_spec import JobDefManagerSpec, RunStatus
 from nvflare.apis.server_engine_spec import ServerEngineSpec
 from nvflare.apis.storage import StorageException, StorageSpec
 from nvflare.fuel.utils import fobs
-from nvflare.fuel.utils.zip_utils import unzip_all_from_bytes, zip_directory_to_bytes
+from nvflare.fuel.utils.zip_utils import unzip_all_from_file, zip_directory_to_bytes
 
+# the job content is stored as is, it's a zip file.
+# jobs stored by older versions have the content and the workspace in a single fobs-encoded dict.
+_ZIP_SIGNATURE = b"PK"
 
-class _JobFilter(ABC):
-    @abstractmethod
-    def filter_job(self, meta: dict) -> bool:
-        pass
-
+# the saved workspace is a separate object under the job
+_WORKSPACE_OBJECT = "workspace"
 
-class _StatusFilter(_JobFilter):
-    def __init__(self, status_to_check):
-        self.result = []
-        self.status_to_check = status_to_check
-
-    def filter_job(self, meta: dict):
-        if meta[JobMetaKey.STATUS] == self.status_to_check:
-            self.result.append(job_from_meta(meta))
-        return True
 
+class _JobMetaIndex:
+    def __init__(self, store: StorageSpec):
+        """Metas of all jobs in the job store, indexed by status, submitter and reviewer.
 
-class _AllJobsFilter(_JobFilter):
-    def __init__(self):
-        self.result = []
-
-    def filter_job(self, meta: dict):
-        self.result.append(job_from_meta(meta))
-        return True
-
+        The job manager must be the only writer of the job store, it updates the index after every write.
 
-class _ReviewerFilter(_JobFilter):
-    def __init__(self, reviewer_name, fl_ctx: FLContext):
-        """Not used yet, for use in future implementations."""
-        self.result = []
-        self.reviewer_name = reviewer_name
+        Args:
+            store: the job store the metas are loaded from
+        """
+        self.store = store
+        self.metas = {}  # jid => meta
+        self.by_status = {}  # status => {jid: None}
+        self.by_submitter = {}  # submitter name => {jid: None}
+        self.by_reviewer = {}  # reviewer name => {jid: None}, the jobs reviewed by the reviewer
+
+    @staticmethod
+    def _add_key(index: dict, key, jid: str):
+        if key:
+            index.setdefault(key, {})[jid] = None
+
+    @staticmethod
+    def _remove_key(index: dict, key, jid: str):
+        jids = index.get(key)
+        if jids is not None:
+            jids.pop(jid, None)
+            if not jids:
+                index.pop(key)
+
+    def put(self, jid: str, meta: dict):
+        self.remove(jid)
+        self.metas[jid] = meta
+        self._add_key(self.by_status, meta.get(JobMetaKey.STATUS), jid)
+        self._add_key(self.by_submitter, meta.get(JobMetaKey.SUBMITTER_NAME), jid)
+        for reviewer in meta.get(JobMetaKey.APPROVALS) or {}:
+            self._add_key(self.by_reviewer, reviewer, jid)
+
+    def remove(self, jid: str):
+        meta = self.metas.pop(jid, None)
+        if meta is None:
+            return
+        self._remove_key(self.by_status, meta.get(JobMetaKey.STATUS), jid)
+        self._remove_key(self.by_submitter, meta.get(JobMetaKey.SUBMITTER_NAME), jid)
+        for reviewer in meta.get(JobMetaKey.APPROVALS) or {}:
+            self._remove_key(self.by_reviewer, reviewer, jid)
 
-    def filter_job(self, meta: dict):
-        approvals = meta.get(JobMetaKey.APPROVALS)
-        if not approvals or self.reviewer_name not in approvals:
-            self.result.append(job_from_meta(meta))
-        return True
+    def get_jobs(self, jids) -> List[Job]:
+        # the callers may change the meta of the jobs, they get copies
+        return [job_from_meta(copy.deepcopy(self.metas[jid])) for jid in jids]
 
 
 # TODO:: use try block around storage calls
@@ -79,6 +98,8 @@ class SimpleJobDefManager(JobDefManagerSpec):
         self.uri_root = uri_root
         os.makedirs(uri_root, exist_ok=True)
         self.job_store_id = job_store_id
+        self._index = None
+        self._index_lock = threading.Lock()
 
     def _get_job_store(self, fl_ctx):
         engine = fl_ctx.get_engine()
@@ -92,9 +113,43 @@ class SimpleJobDefManager(JobDefManagerSpec):
     def job_uri(self, jid: str):
         return os.path.join(self.uri_root, jid)
 
-    def create(self, meta: dict, uploaded_content: bytes, fl_ctx: FLContext) -> Dict[str, Any]:
-        # validate meta to make sure it has:
+    def _workspace_uri(self, jid: str):
+        return os.path.join(self.job_uri(jid), _WORKSPACE_OBJECT)
+
+    def _get_index(self, fl_ctx: FLContext) -> _JobMetaIndex:
+        """Get the job meta index, it's loaded from the job store on first use. Must be called with the index lock."""
+        store = self._get_job_store(fl_ctx)
+        if self._index is None or self._index.store is not store:
+            index = _JobMetaIndex(store)
+            for jid_path in store.list_objects(self.uri_root):
+                jid = pathlib.PurePath(jid_path).name
+                meta = store.get_meta(self.job_uri(jid))
+                if meta:
+                    index.put(jid, meta)
+            self._index = index
+        return self._index
+
+    def reset_index(self):
+        """Drop the job meta index, it's reloaded from the job store on next use.
+
+        Called when the job store may have been changed by others, e.g. by the previous hot server in HA mode.
+        """
+        with self._index_lock:
+            self._index = None
+
+    def _update_index(self, jid: str, fl_ctx: FLContext):
+        # reload the stored meta so the index has exactly what a scan of the store would get
+        with self._index_lock:
+            if self._index is None:
+                return
+            store = self._get_job_store(fl_ctx)
+            try:
+                self._index.put(jid, store.get_meta(self.job_uri(jid)))
+            except StorageException:
+                self._index.remove(jid)
 
+    @staticmethod
+    def _init_meta(meta: dict) -> str:
         jid = str(uuid.uuid4())
         now = time.time()
         meta[JobMetaKey.JOB_ID.value] = jid
@@ -103,16 +158,34 @@ class SimpleJobDefManager(JobDefManagerSpec):
         meta[JobMetaKey.START_TIME.value] = ""
         meta[JobMetaKey.DURATION.value] = "N/A"
         meta[JobMetaKey.STATUS.value] = RunStatus.SUBMITTED.value
+        return jid
+
+    def create(self, meta: dict, uploaded_content: bytes, fl_ctx: FLContext) -> Dict[str, Any]:
+        # validate meta to make sure it has:
+
+        jid = self._init_meta(meta)
 
         # write it to the store
-        stored_data = {JobDataKey.JOB_DATA.value: uploaded_content, JobDataKey.WORKSPACE_DATA.value: None}
         store = self._get_job_store(fl_ctx)
-        store.create_object(self.job_uri(jid), fobs.dumps(stored_data), meta, overwrite_existing=True)
+        store.create_object(self.job_uri(jid), uploaded_content, meta, overwrite_existing=True)
+        self._update_index(jid, fl_ctx)
+        return meta
+
+    def create_from_file(self, meta: dict, content_file: str, fl_ctx: FLContext) -> Dict[str, Any]:
+        jid = self._init_meta(meta)
+        store = self._get_job_store(fl_ctx)
+        store.create_object_from_file(self.job_uri(jid), content_file, meta, overwrite_existing=True)
+        self._update_index(jid, fl_ctx)
         return meta
 
     def delete(self, jid: str, fl_ctx: FLContext):
         store = self._get_job_store(fl_ctx)
-        store.delete_object(self.job_uri(jid))
+        try:
+            if self._has_workspace_object(store, jid):
+                store.delete_object(self._workspace_uri(jid))
+            store.delete_object(self.job_uri(jid))
+        finally:
+            self._update_index(jid, fl_ctx)
 
     def _validate_meta(self, meta):
         """Validate meta
@@ -136,60 +209,121 @@ class SimpleJobDefManager(JobDefManagerSpec):
         pass
 
     def get_job(self, jid: str, fl_ctx: FLContext) -> Optional[Job]:
-        store = self._get_job_store(fl_ctx)
-        try:
-            job_meta = store.get_meta(self.job_uri(jid))
-            return job_from_meta(job_meta)
-        except StorageException:
-            return None
+        with self._index_lock:
+            index = self._get_index(fl_ctx)
+            if jid not in index.metas:
+                return None
+            return index.get_jobs([jid])[0]
 
     def set_results_uri(self, jid: str, result_uri: str, fl_ctx: FLContext):
         store = self._get_job_store(fl_ctx)
         updated_meta = {JobMetaKey.RESULT_LOCATION.value: result_uri}
         store.update_meta(self.job_uri(jid), updated_meta, replace=False)
+        self._update_index(jid, fl_ctx)
         return self.get_job(jid, fl_ctx)
 
     def get_app(self, job: Job, app_name: str, fl_ctx: FLContext) -> bytes:
         temp_dir = tempfile.mkdtemp()
-        job_id_dir = self._load_job_data_from_store(job.job_id, temp_dir, fl_ctx)
-        job_folder = os.path.join(job_id_dir, job.meta[JobMetaKey.JOB_FOLDER_NAME.value])
-        fullpath_src = os.path.join(job_folder, app_name)
-        result = zip_directory_to_bytes(fullpath_src, "")
-        shutil.rmtree(temp_dir)
-        return result
+        try:
+            job_id_dir = self._load_job_data_from_store(job.job_id, temp_dir, fl_ctx)
+            job_folder = os.path.join(job_id_dir, job.meta[JobMetaKey.JOB_FOLDER_NAME.value])
+            fullpath_src = os.path.join(job_folder, app_name)
+            return zip_directory_to_bytes(fullpath_src, "")
+        finally:
+            shutil.rmtree(temp_dir)
 
     def get_apps(self, job: Job, fl_ctx: FLContext) -> Dict[str, bytes]:
         temp_dir = tempfile.mkdtemp()
-        job_id_dir = self._load_job_data_from_store(job.job_id, temp_dir, fl_ctx)
-        job_folder = os.path.join(job_id_dir, job.meta[JobMetaKey.JOB_FOLDER_NAME.value])
-        result_dict = {}
-        for app in job.get_deployment():
-            fullpath_src = os.path.join(job_folder, app)
-            result_dict[app] = zip_directory_to_bytes(fullpath_src, "")
-        shutil.rmtree(temp_dir)
-        return result_dict
+        try:
+            job_id_dir = self._load_job_data_from_store(job.job_id, temp_dir, fl_ctx)
+            job_folder = os.path.join(job_id_dir, job.meta[JobMetaKey.JOB_FOLDER_NAME.value])
+            result_dict = {}
+            for app in job.get_deployment():
+                fullpath_src = os.path.join(job_folder, app)
+                result_dict[app] = zip_directory_to_bytes(fullpath_src, "")
+            return result_dict
+        finally:
+            shutil.rmtree(temp_dir)
 
     def _load_job_data_from_store(self, jid: str, temp_dir: str, fl_ctx: FLContext):
-        data_bytes = self.get_content(jid, fl_ctx)
         job_id_dir = os.path.join(temp_dir, jid)
         if os.path.exists(job_id_dir):
             shutil.rmtree(job_id_dir)
         os.mkdir(job_id_dir)
-        unzip_all_from_bytes(data_bytes, job_id_dir)
+        content_file = os.path.join(temp_dir, jid + ".zip")
+        if not self.get_content_to_file(jid, content_file, fl_ctx):
+            raise StorageException(f"job {jid} does not exist")
+        unzip_all_from_file(content_file, job_id_dir)
+        os.remove(content_file)
         return job_id_dir
 
+    def _load_legacy_data(self, store: StorageSpec, jid: str) -> Optional[dict]:
+        """Load the stored data of a job stored by an older version, returns None if the job is not."""
+        with store.open_data(self.job_uri(jid)) as f:
+            if f.read(len(_ZIP_SIGNATURE)) == _ZIP_SIGNATURE:
+                return None
+        return fobs.loads(store.get_data(self.job_uri(jid)))
+
+    def _has_workspace_object(self, store: StorageSpec, jid: str) -> bool:
+        try:
+            return bool(store.get_meta(self._workspace_uri(jid)))
+        except StorageException:
+            return False
+
     def get_content(self, jid: str, fl_ctx: FLContext) -> Optional[bytes]:
         store = self._get_job_store(fl_ctx)
         try:
-            stored_data = store.get_data(self.job_uri(jid))
+            legacy_data = self._load_legacy_data(store, jid)
+            if legacy_data is not None:
+                return legacy_data.get(JobDataKey.JOB_DATA.value)
+            return store.get_data(self.job_uri(jid))
         except StorageException:
             return None
-        return fobs.loads(stored_data).get(JobDataKey.JOB_DATA.value)
+
+    def get_content_to_file(self, jid: str, file_path: str, fl_ctx: FLContext) -> bool:
+        store = self._get_job_store(fl_ctx)
+        try:
+            legacy_data = self._load_legacy_data(store, jid)
+            if legacy_data is None:
+                store.get_data_to_file(self.job_uri(jid), file_path)
+                return True
+        except StorageException:
+            return False
+
+        data = legacy_data.get(JobDataKey.JOB_DATA.value)
+        if data is None:
+            return False
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def get_workspace_to_file(self, jid: str, file_path: str, fl_ctx: FLContext) -> bool:
+        store = self._get_job_store(fl_ctx)
+        if self._has_workspace_object(store, jid):
+            store.get_data_to_file(self._workspace_uri(jid), file_path)
+            return True
+
+        legacy_data = self._load_legacy_data(store, jid)
+        data = legacy_data.get(JobDataKey.WORKSPACE_DATA.value) if legacy_data else None
+        if data is None:
+            return False
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return True
 
     def get_job_data(self, jid: str, fl_ctx: FLContext) -> dict:
         store = self._get_job_store(fl_ctx)
-        stored_data = store.get_data(self.job_uri(jid))
-        return fobs.loads(stored_data)
+        legacy_data = self._load_legacy_data(store, jid)
+        if legacy_data is not None:
+            return legacy_data
+
+        workspace_data = None
+        if self._has_workspace_object(store, jid):
+            workspace_data = store.get_data(self._workspace_uri(jid))
+        return {
+            JobDataKey.JOB_DATA.value: store.get_data(self.job_uri(jid)),
+            JobDataKey.WORKSPACE_DATA.value: workspace_data,
+        }
 
     def set_status(self, jid: str, status: RunStatus, fl_ctx: FLContext):
         meta = {JobMetaKey.STATUS.value: status.value}
@@ -209,10 +343,12 @@ class SimpleJobDefManager(JobDefManagerSpec):
                 )
                 meta[JobMetaKey.DURATION.value] = str(datetime.datetime.now() - start_time)
         store.update_meta(uri=self.job_uri(jid), meta=meta, replace=False)
+        self._update_index(jid, fl_ctx)
 
     def update_meta(self, jid: str, meta, fl_ctx: FLContext):
         store = self._get_job_store(fl_ctx)
         store.update_meta(uri=self.job_uri(jid), meta=meta, replace=False)
+        self._update_index(jid, fl_ctx)
 
     def refresh_meta(self, job: Job, meta_keys: list, fl_ctx: FLContext):
         """Refresh meta of the job as specified in the meta keys
@@ -235,34 +371,25 @@ class SimpleJobDefManager(JobDefManagerSpec):
             self.update_meta(job.job_id, meta, fl_ctx)
 
     def get_all_jobs(self, fl_ctx: FLContext) -> List[Job]:
-        job_filter = _AllJobsFilter()
-        self._scan(job_filter, fl_ctx)
-        return job_filter.result
-
-    def _scan(self, job_filter: _JobFilter, fl_ctx: FLContext):
-        store = self._get_job_store(fl_ctx)
-        jid_paths = store.list_objects(self.uri_root)
-        if not jid_paths:
-            return
-
-        for jid_path in jid_paths:
-            jid = pathlib.PurePath(jid_path).name
-
-            meta = store.get_meta(self.job_uri(jid))
-            if meta:
-                ok = job_filter.filter_job(meta)
-                if not ok:
-                    break
+        with self._index_lock:
+            index = self._get_index(fl_ctx)
+            return index.get_jobs(index.metas)
 
     def get_jobs_by_status(self, status, fl_ctx: FLContext) -> List[Job]:
-        job_filter = _StatusFilter(status)
-        self._scan(job_filter, fl_ctx)
-        return job_filter.result
+        with self._index_lock:
+            index = self._get_index(fl_ctx)
+            return index.get_jobs(index.by_status.get(status, {}))
+
+    def get_jobs_by_submitter(self, submitter_name: str, fl_ctx: FLContext) -> List[Job]:
+        with self._index_lock:
+            index = self._get_index(fl_ctx)
+            return index.get_jobs(index.by_submitter.get(submitter_name, {}))
 
     def get_jobs_waiting_for_review(self, reviewer_name: str, fl_ctx: FLContext) -> List[Job]:
-        job_filter = _ReviewerFilter(reviewer_name, fl_ctx)
-        self._scan(job_filter, fl_ctx)
-        return job_filter.result
+        with self._index_lock:
+            index = self._get_index(fl_ctx)
+            reviewed = index.by_reviewer.get(reviewer_name, {})
+            return index.get_jobs([jid for jid in index.metas if jid not in reviewed])
 
     def set_approval(
         self, jid: str, reviewer_name: str, approved: bool, note: str, fl_ctx: FLContext
@@ -277,11 +404,31 @@ class SimpleJobDefManager(JobDefManagerSpec):
             updated_meta = {JobMetaKey.APPROVALS.value: approvals}
             store = self._get_job_store(fl_ctx)
             store.update_meta(self.job_uri(jid), updated_meta, replace=False)
+            self._update_index(jid, fl_ctx)
         return meta
 
     def save_workspace(self, jid: str, data: bytes, fl_ctx: FLContext):
         store = self._get_job_store(fl_ctx)
-        stored_data = store.get_data(self.job_uri(jid))
-        job_data = fobs.loads(stored_data)
-        job_data[JobDataKey.WORKSPACE_DATA.value] = data
-        store.update_data(self.job_uri(jid), fobs.dumps(job_data))
+        self._prepare_workspace_object(store, jid)
+        workspace_uri = self._workspace_uri(jid)
+        if self._has_workspace_object(store, jid):
+            store.update_data(workspace_uri, data)
+        else:
+            store.create_object(workspace_uri, data, {JobMetaKey.JOB_ID.value: jid}, overwrite_existing=True)
+
+    def save_workspace_from_file(self, jid: str, file_path: str, fl_ctx: FLContext):
+        store = self._get_job_store(fl_ctx)
+        self._prepare_workspace_object(store, jid)
+        workspace_uri = self._workspace_uri(jid)
+        if self._has_workspace_object(store, jid):
+            store.update_data_from_file(workspace_uri, file_path)
+        else:
+            store.create_object_from_file(
+                workspace_uri, file_path, {JobMetaKey.JOB_ID.value: jid}, overwrite_existing=True
+            )
+
+    def _prepare_workspace_object(self, store: StorageSpec, jid: str):
+        # a job stored by an older version is moved to the current layout before its workspace is saved
+        legacy_data = self._load_legacy_data(store, jid)
+        if legacy_data is not None:
+            store.update_data(self.job_uri(jid), legacy_data.get(JobDataKey.JOB_DATA.value))
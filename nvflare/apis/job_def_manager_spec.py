@@ -17,7 +17,7 @@ from typing import Any, Dict, List, Optional
 
 from nvflare.apis.fl_component import FLComponent
 from nvflare.apis.fl_context import FLContext
-from nvflare.apis.job_def import Job, RunStatus
+from nvflare.apis.job_def import Job, JobDataKey, JobMetaKey, RunStatus
 
 
 class JobDefManagerSpec(FLComponent, ABC):
@@ -41,6 +41,25 @@ class JobDefManagerSpec(FLComponent, ABC):
         """
         pass
 
+    def create_from_file(self, meta: dict, content_file: str, fl_ctx: FLContext) -> Dict[str, Any]:
+        """Create a new job permanently from the zip file of the job definition.
+
+        Same as create, but the content is in a local file so that big jobs don't have to be loaded into memory.
+        The default implementation reads the file and calls create.
+
+        Args:
+            meta: caller-provided meta info
+            content_file: zip file of the job definition
+            fl_ctx (FLContext): FLContext information
+
+        Returns:
+            A dict containing meta info. Additional meta info are added, especially
+            a unique Job ID (jid) which has been created.
+        """
+        with open(content_file, "rb") as f:
+            uploaded_content = f.read()
+        return self.create(meta, uploaded_content, fl_ctx)
+
     @abstractmethod
     def get_job(self, jid: str, fl_ctx: FLContext) -> Job:
         """Gets the Job object through the job ID.
@@ -108,6 +127,46 @@ class JobDefManagerSpec(FLComponent, ABC):
         """
         pass
 
+    def get_content_to_file(self, jid: str, file_path: str, fl_ctx: FLContext) -> bool:
+        """Writes the entire uploaded content of a job to a local file.
+
+        The default implementation gets the content in memory with get_content.
+
+        Args:
+            jid (str): Job ID
+            file_path: the file to write to
+            fl_ctx (FLContext): FLContext information
+
+        Returns:
+            whether the job has content
+        """
+        data = self.get_content(jid, fl_ctx)
+        if data is None:
+            return False
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def get_workspace_to_file(self, jid: str, file_path: str, fl_ctx: FLContext) -> bool:
+        """Writes the saved workspace of a job to a local file.
+
+        The default implementation gets the workspace in memory with get_job_data.
+
+        Args:
+            jid (str): Job ID
+            file_path: the file to write to
+            fl_ctx (FLContext): FLContext information
+
+        Returns:
+            whether the job has a saved workspace
+        """
+        data = self.get_job_data(jid, fl_ctx).get(JobDataKey.WORKSPACE_DATA.value)
+        if data is None:
+            return False
+        with open(file_path, "wb") as f:
+            f.write(data)
+        return True
+
     @abstractmethod
     def update_meta(self, jid: str, meta, fl_ctx: FLContext):
         """Update the meta of an existing Job.
@@ -170,6 +229,18 @@ class JobDefManagerSpec(FLComponent, ABC):
         """
         pass
 
+    def get_jobs_by_submitter(self, submitter_name: str, fl_ctx: FLContext) -> List[Job]:
+        """Gets Jobs submitted by the specified user.
+
+        Args:
+            submitter_name (str): submitter name
+            fl_ctx (FLContext): FLContext information
+
+        Returns:
+            A list of Jobs submitted by the specified user
+        """
+        return [job for job in self.get_all_jobs(fl_ctx) if job.meta.get(JobMetaKey.SUBMITTER_NAME) == submitter_name]
+
     @abstractmethod
     def get_jobs_waiting_for_review(self, reviewer_name: str, fl_ctx: FLContext) -> List[Job]:
         """Gets Jobs waiting for review for the specified user.
@@ -223,3 +294,18 @@ class JobDefManagerSpec(FLComponent, ABC):
 
         """
         pass
+
+    def save_workspace_from_file(self, jid: str, file_path: str, fl_ctx: FLContext):
+        """Save the job workspace in a local zip file to the job storage.
+
+        The default implementation reads the file and calls save_workspace.
+
+        Args:
+            jid (str): Job ID
+            file_path: zip file of the job workspace
+            fl_ctx (FLContext): FLContext information
+
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+        self.save_workspace(jid, data, fl_ctx)
@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
+import shutil
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import BinaryIO, List, Tuple
 
 
 class StorageException(Exception):
@@ -163,3 +165,82 @@ class StorageSpec(ABC):
 
         """
         pass
+
+    def create_object_from_file(self, uri: str, file_path: str, meta: dict, overwrite_existing: bool):
+        """Creates an object with the content of a local file.
+
+        The default implementation reads the whole file into memory. Storages that can copy the file
+        incrementally should override it.
+
+        Args:
+            uri: URI of the object
+            file_path: the file that has the content of the object
+            meta: meta info of the object
+            overwrite_existing: whether to overwrite the object if already exists
+
+        Raises StorageException when:
+            - invalid args
+            - object already exists and overwrite_existing is False
+            - error creating the object
+
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+        self.create_object(uri, data, meta, overwrite_existing)
+
+    def update_data_from_file(self, uri: str, file_path: str):
+        """Updates the data of the specified object with the content of a local file.
+
+        The default implementation reads the whole file into memory. Storages that can copy the file
+        incrementally should override it.
+
+        Args:
+            uri: URI of the object
+            file_path: the file that has the new data
+
+        Raises StorageException when:
+            - invalid args
+            - no such object
+            - error updating the object
+
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+        self.update_data(uri, data)
+
+    def open_data(self, uri: str) -> BinaryIO:
+        """Opens the data of the specified object for reading.
+
+        The default implementation reads the whole data into memory. Storages that can read the data
+        incrementally should override it.
+
+        Args:
+            uri: URI of the object
+
+        Returns:
+            a binary file-like object, to be closed by the caller
+
+        Raises StorageException when:
+            - invalid args
+            - no such object
+
+        """
+        data = self.get_data(uri)
+        if data is None:
+            raise StorageException(f"object {uri} does not exist")
+        return io.BytesIO(data)
+
+    def get_data_to_file(self, uri: str, file_path: str):
+        """Writes the data of the specified object to a local file.
+
+        Args:
+            uri: URI of the object
+            file_path: the file to write to
+
+        Raises StorageException when:
+            - invalid args
+            - no such object
+
+        """
+        with self.open_data(uri) as src, open(file_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
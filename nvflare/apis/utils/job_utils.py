@@ -15,8 +15,9 @@
 import io
 import json
 import os
+import shutil
 from typing import Optional
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 
 from nvflare.apis.fl_constant import JobConstants
 from nvflare.apis.job_def import ALL_SITES, JobMetaKey
@@ -36,6 +37,52 @@ def _get_default_meta(job_folder_name: str) -> str:
     return meta
 
 
+def _copy_zip_entry(in_zip: ZipFile, out_zip: ZipFile, info: ZipInfo, new_name: Optional[str] = None):
+    # entries are copied in chunks, so a big file in the job doesn't have to fit in memory
+    with in_zip.open(info) as src:
+        if new_name:
+            info.filename = new_name
+        if info.is_dir():
+            out_zip.writestr(info, b"")
+        else:
+            with out_zip.open(info, "w") as dst:
+                shutil.copyfileobj(src, dst)
+
+
+def _convert_legacy_zip(in_zip: ZipFile, writer) -> bool:
+    """Write the job layout of a legacy app into writer.
+
+    Returns: False if the app is already in job layout, nothing is written then
+    """
+    meta: Optional[dict] = None
+    info_list = in_zip.infolist()
+    folder_name = info_list[0].filename.split("/")[0]
+    meta_path = normpath_for_zip(os.path.join(folder_name, JobConstants.META_FILE))
+    if next((info for info in info_list if info.filename == meta_path), None):
+        # Already in job layout
+        meta_data = in_zip.read(meta_path)
+        meta = json.loads(meta_data)
+        if JobMetaKey.JOB_FOLDER_NAME.value not in meta:
+            meta[JobMetaKey.JOB_FOLDER_NAME.value] = folder_name
+        else:
+            return False
+
+    with ZipFile(writer, "w") as out_zip:
+        if meta:
+            out_zip.writestr(meta_path, json.dumps(meta))
+            out_zip.comment = in_zip.comment  # preserve the comment
+            for info in info_list:
+                if info.filename != meta_path:
+                    _copy_zip_entry(in_zip, out_zip, info)
+        else:
+            out_zip.writestr(meta_path, _get_default_meta(folder_name))
+            # Push everything else to a sub folder with the same name:
+            # hello-pt/README.md -> hello-pt/hello-pt/README.md
+            for info in info_list:
+                _copy_zip_entry(in_zip, out_zip, info, folder_name + "/" + info.filename)
+    return True
+
+
 def convert_legacy_zipped_app_to_job(zip_data: bytes) -> bytes:
     """Convert a legacy app in zip into job layout in memory.
 
@@ -45,39 +92,25 @@ def convert_legacy_zipped_app_to_job(zip_data: bytes) -> bytes:
     Returns:
         The converted zip data
     """
+    writer = io.BytesIO()
+    with ZipFile(io.BytesIO(zip_data), "r") as in_zip:
+        if not _convert_legacy_zip(in_zip, writer):
+            return zip_data
+    return writer.getvalue()
 
-    meta: Optional[dict] = None
-    reader = io.BytesIO(zip_data)
-    with ZipFile(reader, "r") as in_zip:
-        info_list = in_zip.infolist()
-        folder_name = info_list[0].filename.split("/")[0]
-        meta_path = normpath_for_zip(os.path.join(folder_name, JobConstants.META_FILE))
-        if next((info for info in info_list if info.filename == meta_path), None):
-            # Already in job layout
-            meta_data = in_zip.read(meta_path)
-            meta = json.loads(meta_data)
-            if JobMetaKey.JOB_FOLDER_NAME.value not in meta:
-                meta[JobMetaKey.JOB_FOLDER_NAME.value] = folder_name
-            else:
-                return zip_data
-
-        writer = io.BytesIO()
-        with ZipFile(writer, "w") as out_zip:
-            if meta:
-                out_zip.writestr(meta_path, json.dumps(meta))
-                out_zip.comment = in_zip.comment  # preserve the comment
-                for info in info_list:
-                    if info.filename != meta_path:
-                        out_zip.writestr(info, in_zip.read(info.filename))
-            else:
-                out_zip.writestr(meta_path, _get_default_meta(folder_name))
-                # Push everything else to a sub folder with the same name:
-                # hello-pt/README.md -> hello-pt/hello-pt/README.md
-                for info in info_list:
-                    name = info.filename
-                    content = in_zip.read(name)
-                    path = folder_name + "/" + name
-                    info.filename = path
-                    out_zip.writestr(info, content)
-
-        return writer.getvalue()
+
+def convert_legacy_zipped_app_file_to_job(zip_file: str):
+    """Convert a legacy app in a zip file into job layout, the file is replaced with the converted one.
+
+    Args:
+        zip_file: path of the zip file
+    """
+    tmp_file = zip_file + ".converting"
+    try:
+        with ZipFile(zip_file, "r") as in_zip, open(tmp_file, "wb") as writer:
+            converted = _convert_legacy_zip(in_zip, writer)
+        if converted:
+            os.replace(tmp_file, zip_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
@@ -20,6 +20,7 @@ from nvflare.apis.fl_component import FLComponent
 from nvflare.apis.fl_context import FLContext
 from nvflare.app_common.aggregators.weighted_aggregation_helper import WeightedAggregationHelper
 from nvflare.app_common.app_constant import AppConstants
+from nvflare.app_common.utils.sparse_utils import SparseKey
 
 
 class DXOAggregator(FLComponent):
@@ -30,6 +31,9 @@ class DXOAggregator(FLComponent):
         expected_data_kind: DataKind = DataKind.WEIGHT_DIFF,
         name_postfix: str = "",
         weigh_by_local_iter: bool = True,
+        accumulator_dtype: Optional[str] = None,
+        num_workers: int = 0,
+        release_contributions: bool = False,
     ):
         """Perform accumulated weighted aggregation for one kind of corresponding DXO from contributors.
 
@@ -45,6 +49,12 @@ class DXOAggregator(FLComponent):
                 the number of computations on encrypted ciphertext.
                 The aggregated sum will still be divided by the provided weights and `aggregation_weights` for the
                 resulting weighted sum to be valid.
+            accumulator_dtype (str, optional): numpy dtype used to accumulate array contributions, e.g. "float64".
+                Defaults to None, the dtype of the weighted contributions.
+            num_workers (int, optional): number of workers folding the variables of a DXO in parallel.
+                Defaults to 0, the variables are folded by the thread accepting the DXO.
+            release_contributions (bool, optional): remove the variables from the accepted DXO as they are folded
+                so the received buffers are freed once the DXO is folded. Defaults to False.
         """
         super().__init__()
         self.expected_data_kind = expected_data_kind
@@ -52,7 +62,11 @@ class DXOAggregator(FLComponent):
         self.logger.debug(f"aggregation weights control: {aggregation_weights}")
 
         self.aggregation_helper = WeightedAggregationHelper(
-            exclude_vars=exclude_vars, weigh_by_local_iter=weigh_by_local_iter
+            exclude_vars=exclude_vars,
+            weigh_by_local_iter=weigh_by_local_iter,
+            accumulator_dtype=accumulator_dtype,
+            num_workers=num_workers,
+            release_contributions=release_contributions,
         )
 
         self.warning_count = {}
@@ -67,6 +81,10 @@ class DXOAggregator(FLComponent):
         if self.aggregation_helper:
             self.aggregation_helper.reset_stats()
 
+    def shutdown(self):
+        if self.aggregation_helper:
+            self.aggregation_helper.shutdown()
+
     def accept(self, dxo: DXO, contributor_name, contribution_round, fl_ctx: FLContext) -> bool:
         """Store DXO and update aggregator's internal state
         Args:
@@ -156,8 +174,14 @@ class DXOAggregator(FLComponent):
                     self.warning_count[contributor_name] = 0
             aggregation_weight = 1.0
 
-        # aggregate
-        self.aggregation_helper.add(data, aggregation_weight * float_n_iter, contributor_name, contribution_round)
+        # aggregate, sparse arrays are folded directly without densifying them
+        self.aggregation_helper.add(
+            data,
+            aggregation_weight * float_n_iter,
+            contributor_name,
+            contribution_round,
+            sparse_vars=dxo.get_meta_prop(SparseKey.META),
+        )
         self.log_debug(fl_ctx, "End accept")
         return True
 
@@ -12,9 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
 from nvflare.apis.dxo import DXO, DataKind, from_shareable
+from nvflare.apis.event_type import EventType
 from nvflare.apis.fl_constant import ReservedKey, ReturnCode
 from nvflare.apis.fl_context import FLContext
 from nvflare.apis.shareable import Shareable
@@ -49,6 +50,9 @@ class InTimeAccumulateWeightedAggregator(Aggregator):
         aggregation_weights: Union[Dict[str, Any], Dict[str, Dict[str, Any]], None] = None,
         expected_data_kind: Union[DataKind, Dict[str, DataKind]] = DataKind.WEIGHT_DIFF,
         weigh_by_local_iter: bool = True,
+        accumulator_dtype: Optional[str] = None,
+        num_workers: int = 0,
+        release_contributions: bool = False,
     ):
         """Perform accumulated weighted aggregation.
 
@@ -74,6 +78,15 @@ class InTimeAccumulateWeightedAggregator(Aggregator):
                 the number of computations on encrypted ciphertext.
                 The aggregated sum will still be divided by the provided weights and `aggregation_weights` for the
                 resulting weighted sum to be valid.
+            accumulator_dtype (str, optional): numpy dtype used to accumulate array contributions, e.g. "float64"
+                for higher precision. The aggregated result keeps the dtype of the contributions.
+                Defaults to None, the dtype of the weighted contributions.
+            num_workers (int, optional): number of workers folding the layers of a contribution into the running
+                sum in parallel. Defaults to 0, the layers are folded by the thread accepting the contribution.
+            release_contributions (bool, optional): remove each layer from the accepted contribution as soon as
+                it is folded, so the received buffer is freed once the contribution is folded instead of being
+                held by the workflow until the end of the round.
+                The accepted shareable no longer holds the data afterwards. Defaults to False.
         """
         super().__init__()
         self.logger.debug(f"exclude vars: {exclude_vars}")
@@ -82,6 +95,9 @@ class InTimeAccumulateWeightedAggregator(Aggregator):
 
         self._single_dxo_key = ""
         self._weigh_by_local_iter = weigh_by_local_iter
+        self._accumulator_dtype = accumulator_dtype
+        self._num_workers = num_workers
+        self._release_contributions = release_contributions
 
         # Check expected data kind
         if isinstance(expected_data_kind, dict):
@@ -158,10 +174,18 @@ class InTimeAccumulateWeightedAggregator(Aggregator):
                         expected_data_kind=self.expected_data_kind[k],
                         name_postfix=k,
                         weigh_by_local_iter=self._weigh_by_local_iter,
+                        accumulator_dtype=self._accumulator_dtype,
+                        num_workers=self._num_workers,
+                        release_contributions=self._release_contributions,
                     )
                 }
             )
 
+    def handle_event(self, event_type: str, fl_ctx: FLContext):
+        if event_type == EventType.END_RUN:
+            for aggregator in self.dxo_aggregators.values():
+                aggregator.shutdown()
+
     def accept(self, shareable: Shareable, fl_ctx: FLContext) -> bool:
         """Store shareable and update aggregator's internal state
 
@@ -14,13 +14,35 @@
 
 import re
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+import numpy as np
+
+from nvflare.app_common.utils.sparse_utils import SparseKey, to_dense
+
+# Number of elements multiplied at a time when a weighted array is added to its accumulator.
+# The weighted chunk goes to a small scratch buffer instead of a temporary array of the full layer size.
+ACCUMULATE_CHUNK_SIZE = 1024 * 1024
+
 
 class WeightedAggregationHelper(object):
-    def __init__(self, exclude_vars: Optional[str] = None, weigh_by_local_iter: bool = True):
+    def __init__(
+        self,
+        exclude_vars: Optional[str] = None,
+        weigh_by_local_iter: bool = True,
+        accumulator_dtype: Optional[str] = None,
+        num_lock_stripes: int = 16,
+        num_workers: int = 0,
+        release_contributions: bool = False,
+    ):
         """Perform weighted aggregation.
 
+        Numpy arrays are accumulated in place into buffers allocated at the first contribution,
+        so the memory used stays at about one model size regardless of the number of contributors.
+        The variables are guarded by striped locks so contributions can be added concurrently.
+        With workers, the variables of one contribution are also folded in parallel.
+
         Args:
             exclude_vars (str, optional): regex string to match excluded vars during aggregation. Defaults to None.
             weigh_by_local_iter (bool, optional): Whether to weight the contributions by the number of iterations
@@ -29,38 +51,152 @@ class WeightedAggregationHelper(object):
                 the number of computations on encrypted ciphertext.
                 The aggregated sum will still be divided by the provided weights and `aggregation_weights` for the
                 resulting weighted sum to be valid.
+            accumulator_dtype (str, optional): numpy dtype of the accumulators, e.g. "float64" for higher precision.
+                The result is converted back to the dtype of the contributions. Defaults to None, the accumulators
+                use the dtype of the weighted contributions.
+            num_lock_stripes (int, optional): number of locks the variables are distributed over. Defaults to 16.
+            num_workers (int, optional): size of the worker pool folding the variables of a contribution
+                in parallel. Defaults to 0, the variables are folded by the calling thread.
+            release_contributions (bool, optional): remove each variable from the contribution as soon as it is
+                folded so its buffer can be freed before the whole contribution is processed. Arrays decoded from
+                a received message are views on the message buffer, which is freed once all of them are released,
+                so excluded arrays that are views are copied to not keep the buffer alive. Defaults to False.
         """
         super().__init__()
+        if num_lock_stripes < 1:
+            raise ValueError(f"num_lock_stripes must be positive but got {num_lock_stripes}")
+        if num_workers < 0:
+            raise ValueError(f"num_workers must not be negative but got {num_workers}")
+
         self.lock = threading.Lock()
+        self.stripes = [threading.Lock() for _ in range(num_lock_stripes)]
         self.exclude_vars = re.compile(exclude_vars) if exclude_vars else None
         self.weigh_by_local_iter = weigh_by_local_iter
+        self.accumulator_dtype = np.dtype(accumulator_dtype) if accumulator_dtype else None
+        self.release_contributions = release_contributions
+        self.executor = None
+        if num_workers > 0:
+            self.executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="aggr")
         self.reset_stats()
         self.total = dict()
         self.counts = dict()
+        self.result_dtypes = dict()
         self.history = list()
 
     def reset_stats(self):
         self.total = dict()
         self.counts = dict()
+        self.result_dtypes = dict()
         self.history = list()
 
-    def add(self, data, weight, contributor_name, contribution_round):
-        """Compute weighted sum and sum of weights."""
+    def _get_stripe(self, key) -> threading.Lock:
+        return self.stripes[hash(key) % len(self.stripes)]
+
+    def _is_accumulated_in_place(self, key, value) -> bool:
+        if not isinstance(value, np.ndarray) or value.dtype.kind not in "iuf":
+            return False
+        current_total = self.total.get(key, None)
+        return current_total is None or (key in self.result_dtypes and current_total.shape == value.shape)
+
+    def _accumulate(self, key, value, weight):
+        current_total = self.total.get(key, None)
+        if not self._is_accumulated_in_place(key, value):
+            if self.weigh_by_local_iter:
+                weighted_value = value * weight
+            else:
+                weighted_value = value  # used in homomorphic encryption to reduce computations on ciphertext
+            if current_total is None:
+                self.total[key] = weighted_value
+                self.counts[key] = weight
+            else:
+                self.total[key] = current_total + weighted_value
+                self.counts[key] = self.counts[key] + weight
+            return
+
+        if current_total is None:
+            result_dtype = np.result_type(value, weight) if self.weigh_by_local_iter else value.dtype
+            if result_dtype.kind != "f":
+                result_dtype = np.dtype(np.float64)
+            current_total = np.empty(value.shape, dtype=self.accumulator_dtype or result_dtype)
+            if self.weigh_by_local_iter:
+                np.multiply(value, weight, out=current_total)
+            else:
+                current_total[...] = value
+            self.total[key] = current_total
+            self.counts[key] = weight
+            self.result_dtypes[key] = result_dtype
+            return
+
+        if self.weigh_by_local_iter:
+            total = current_total.reshape(-1)
+            value = value.reshape(-1)
+            scratch = np.empty(min(ACCUMULATE_CHUNK_SIZE, total.size), dtype=total.dtype)
+            for start in range(0, total.size, ACCUMULATE_CHUNK_SIZE):
+                end = min(start + ACCUMULATE_CHUNK_SIZE, total.size)
+                chunk = scratch[: end - start]
+                np.multiply(value[start:end], weight, out=chunk)
+                np.add(total[start:end], chunk, out=total[start:end])
+        else:
+            np.add(current_total, value, out=current_total)
+        self.counts[key] = self.counts[key] + weight
+
+    def _accumulate_sparse(self, key, value: dict, params: dict, weight):
+        current_total = self.total.get(key, None)
+        shape = tuple(params[SparseKey.SHAPE])
+        if current_total is not None and (key not in self.result_dtypes or current_total.shape != shape):
+            self._accumulate(key, to_dense(value, params), weight)
+            return
+
+        if current_total is None:
+            dtype = np.dtype(params[SparseKey.DTYPE])
+            result_dtype = np.result_type(dtype, weight) if self.weigh_by_local_iter else dtype
+            current_total = np.zeros(shape, dtype=self.accumulator_dtype or result_dtype)
+            self.total[key] = current_total
+            self.counts[key] = weight
+            self.result_dtypes[key] = result_dtype
+        else:
+            self.counts[key] = self.counts[key] + weight
+
+        # the indices are unique, the entries not sent are 0 and don't change the sum
+        values = value[SparseKey.VALUES].astype(current_total.dtype)
+        if self.weigh_by_local_iter:
+            values *= weight
+        current_total.reshape(-1)[value[SparseKey.INDICES]] += values
+
+    def _fold(self, data, key, weight, sparse_vars):
+        with self._get_stripe(key):
+            if sparse_vars and key in sparse_vars:
+                self._accumulate_sparse(key, data[key], sparse_vars[key], weight)
+            else:
+                self._accumulate(key, data[key], weight)
+        if self.release_contributions:
+            data.pop(key, None)
+
+    def add(self, data, weight, contributor_name, contribution_round, sparse_vars: Optional[dict] = None):
+        """Compute weighted sum and sum of weights.
+
+        Args:
+            data: dict of the variables to aggregate
+            weight: weight of the contribution
+            contributor_name: name of the contributor
+            contribution_round: round of the contribution
+            sparse_vars: shape and dtype of the variables sent as sparse (index, value) arrays, from the DXO meta
+        """
+        keys = []
+        for k, v in data.items():
+            if self.exclude_vars is None or not self.exclude_vars.search(k):
+                keys.append(k)
+            elif self.release_contributions and isinstance(v, np.ndarray) and v.base is not None:
+                data[k] = v.copy()
+        if self.executor and len(keys) > 1:
+            futures = [self.executor.submit(self._fold, data, k, weight, sparse_vars) for k in keys]
+            for f in futures:
+                f.result()
+        else:
+            for k in keys:
+                self._fold(data, k, weight, sparse_vars)
+
         with self.lock:
-            for k, v in data.items():
-                if self.exclude_vars is not None and self.exclude_vars.search(k):
-                    continue
-                if self.weigh_by_local_iter:
-                    weighted_value = v * weight
-                else:
-                    weighted_value = v  # used in homomorphic encryption to reduce computations on ciphertext
-                current_total = self.total.get(k, None)
-                if current_total is None:
-                    self.total[k] = weighted_value
-                    self.counts[k] = weight
-                else:
-                    self.total[k] = current_total + weighted_value
-                    self.counts[k] = self.counts[k] + weight
             self.history.append(
                 {
                     "contributor_name": contributor_name,
@@ -69,12 +205,39 @@ class WeightedAggregationHelper(object):
                 }
             )
 
+    def shutdown(self):
+        """Stop the worker pool, the contributions are then folded by the calling thread."""
+        executor, self.executor = self.executor, None
+        if executor:
+            executor.shutdown(wait=False)
+
+    def _acquire_all(self):
+        self.lock.acquire()
+        for stripe in self.stripes:
+            stripe.acquire()
+
+    def _release_all(self):
+        for stripe in reversed(self.stripes):
+            stripe.release()
+        self.lock.release()
+
     def get_result(self):
         """Divide weighted sum by sum of weights."""
-        with self.lock:
-            aggregated_dict = {k: v * (1.0 / self.counts[k]) for k, v in self.total.items()}
+        self._acquire_all()
+        try:
+            aggregated_dict = {}
+            for k, v in self.total.items():
+                result_dtype = self.result_dtypes.get(k)
+                if result_dtype is None:
+                    aggregated_dict[k] = v * (1.0 / self.counts[k])
+                else:
+                    # the accumulator is owned by this helper and not used after reset, divide it in place
+                    np.multiply(v, 1.0 / self.counts[k], out=v)
+                    aggregated_dict[k] = v.astype(result_dtype, copy=False)
             self.reset_stats()
             return aggregated_dict
+        finally:
+            self._release_all()
 
     def get_history(self):
         return self.history
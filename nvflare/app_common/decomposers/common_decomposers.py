@@ -72,17 +72,37 @@ class Int32ScalarDecomposer(NumpyScalarDecomposer):
 
 
 class NumpyArrayDecomposer(Decomposer):
+    """Decomposer for numpy arrays.
+
+    The array memory is serialized as an out-of-band buffer. The recomposed array is a view of the
+    serialized data if the data is writable (e.g. a received frame), otherwise it's copied once.
+    """
+
     def supported_type(self):
         return np.ndarray
 
     def decompose(self, target: np.ndarray) -> Any:
-        stream = BytesIO()
-        np.save(stream, target, allow_pickle=False)
-        return stream.getvalue()
+        if target.dtype.hasobject:
+            raise TypeError(f"Numpy array of object dtype {target.dtype} is not serializable")
+
+        array = np.ascontiguousarray(target)
+        return {
+            "dtype": np.lib.format.dtype_to_descr(array.dtype),
+            "shape": list(target.shape),
+            "data": fobs.OobBuffer(array.reshape(-1).view(np.uint8)),
+        }
 
     def recompose(self, data: Any) -> np.ndarray:
-        stream = BytesIO(data)
-        return np.load(stream, allow_pickle=False)
+        if not isinstance(data, dict):
+            # Arrays serialized with np.save by previous versions
+            stream = BytesIO(data)
+            return np.load(stream, allow_pickle=False)
+
+        dtype = np.lib.format.descr_to_dtype(data["dtype"])
+        array = np.frombuffer(data["data"], dtype=dtype).reshape(tuple(data["shape"]))
+        if not array.flags.writeable:
+            array = array.copy()
+        return array
 
 
 def register():
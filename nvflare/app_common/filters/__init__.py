@@ -13,7 +13,19 @@
 # limitations under the License.
 
 from .exclude_vars import ExcludeVars
+from .model_dequantizer import ModelDequantizer
+from .model_quantizer import ModelQuantizer
 from .percentile_privacy import PercentilePrivacy
+from .sparse_diff_decoder import SparseDiffDecoder
+from .sparse_diff_encoder import SparseDiffEncoder
 from .svt_privacy import SVTPrivacy
 
-__all__ = ["PercentilePrivacy", "SVTPrivacy", "ExcludeVars"]
+__all__ = [
+    "PercentilePrivacy",
+    "SVTPrivacy",
+    "ExcludeVars",
+    "ModelQuantizer",
+    "ModelDequantizer",
+    "SparseDiffEncoder",
+    "SparseDiffDecoder",
+]
@@ -0,0 +1,58 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Union
+
+from nvflare.apis.dxo import DataKind, MetaKey
+from nvflare.apis.dxo_filter import DXO, DXOFilter
+from nvflare.apis.fl_context import FLContext
+from nvflare.apis.shareable import Shareable
+from nvflare.app_common.utils.quantization_utils import QuantizationKey, dequantize
+
+
+class ModelDequantizer(DXOFilter):
+    def __init__(self, data_kinds: List[str] = None):
+        """Restore the arrays quantized by the ModelQuantizer filter to their original dtype.
+
+        Args:
+            data_kinds: kinds of DXO object to filter
+        """
+        if not data_kinds:
+            data_kinds = [DataKind.WEIGHT_DIFF, DataKind.WEIGHTS]
+
+        super().__init__(supported_data_kinds=[DataKind.WEIGHTS, DataKind.WEIGHT_DIFF], data_kinds_to_filter=data_kinds)
+
+    def process_dxo(self, dxo: DXO, shareable: Shareable, fl_ctx: FLContext) -> Union[None, DXO]:
+        """Dequantize the arrays listed in the quantization meta of the DXO.
+
+        Args:
+            dxo (DXO): DXO to be filtered.
+            shareable: that the dxo belongs to
+            fl_ctx (FLContext): only used for logging.
+
+        Returns: a new dequantized DXO or None if the DXO is not quantized
+        """
+        params = dxo.get_meta_prop(QuantizationKey.META)
+        if not params:
+            return None
+
+        data = dict(dxo.data)
+        for k, p in params.items():
+            if k in data:
+                data[k] = dequantize(data[k], p)
+            else:
+                self.log_warning(fl_ctx, f"quantized variable {k} is missing in DXO")
+
+        meta = {k: v for k, v in dxo.meta.items() if k not in (QuantizationKey.META, MetaKey.FILTER_HISTORY)}
+        self.log_debug(fl_ctx, f"dequantized {len(params)} arrays")
+        return DXO(data_kind=dxo.data_kind, data=data, meta=meta)
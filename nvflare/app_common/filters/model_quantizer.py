@@ -0,0 +1,88 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import List, Union
+
+import numpy as np
+
+from nvflare.apis.dxo import DataKind, MetaKey
+from nvflare.apis.dxo_filter import DXO, DXOFilter
+from nvflare.apis.fl_context import FLContext
+from nvflare.apis.shareable import Shareable
+from nvflare.app_common.utils.quantization_utils import QuantizationKey, QuantizationType, quantize
+
+
+class ModelQuantizer(DXOFilter):
+    def __init__(self, quantization_type: str = QuantizationType.FLOAT16, data_kinds: List[str] = None):
+        """Quantize the floating point arrays of the model to reduce the size of the message.
+
+        The arrays are cast to float16/bfloat16 or quantized per array to 8 or 4 bits with a scale and zero point.
+        The parameters needed to restore the arrays are kept in the DXO meta.
+        Arrays with NaN or infinite values are sent as they are when quantized to integers,
+        and so are arrays with values out of the float16 range when quantized to float16.
+        The filter returns a new DXO, the arrays of the input DXO are not changed.
+        The receiving side must apply the ModelDequantizer filter before the model is used or aggregated.
+
+        Args:
+            quantization_type: one of "float16", "bfloat16", "int8" or "int4". Defaults to "float16".
+            data_kinds: kinds of DXO object to filter
+        """
+        if not data_kinds:
+            data_kinds = [DataKind.WEIGHT_DIFF, DataKind.WEIGHTS]
+
+        super().__init__(supported_data_kinds=[DataKind.WEIGHTS, DataKind.WEIGHT_DIFF], data_kinds_to_filter=data_kinds)
+        if quantization_type not in QuantizationType.ALL:
+            raise ValueError(f"invalid quantization type {quantization_type}: must be in {QuantizationType.ALL}")
+
+        self.quantization_type = quantization_type
+
+    def process_dxo(self, dxo: DXO, shareable: Shareable, fl_ctx: FLContext) -> Union[None, DXO]:
+        """Quantize the floating point arrays in the weights/weight_diff dictionary.
+
+        Args:
+            dxo (DXO): DXO to be filtered.
+            shareable: that the dxo belongs to
+            fl_ctx (FLContext): only used for logging.
+
+        Returns: a new quantized DXO or None if there is nothing to quantize
+        """
+        if dxo.get_meta_prop(QuantizationKey.META):
+            self.log_warning(fl_ctx, "DXO is already quantized")
+            return None
+
+        # the data dict may be shared with the caller (e.g. the global model), so it is never changed
+        data = dict(dxo.data)
+        params = {}
+        orig_size = 0
+        new_size = 0
+        for k, v in dxo.data.items():
+            if not isinstance(v, np.ndarray) or v.dtype.kind != "f":
+                continue
+            try:
+                data[k], params[k] = quantize(v, self.quantization_type)
+            except ValueError as e:
+                self.log_warning(fl_ctx, f"variable {k} is not quantized: {e}")
+                continue
+            orig_size += v.nbytes
+            new_size += data[k].nbytes
+
+        if not params:
+            return None
+
+        meta = {k: v for k, v in dxo.meta.items() if k != MetaKey.FILTER_HISTORY}
+        meta[QuantizationKey.META] = params
+        self.log_info(
+            fl_ctx,
+            f"quantized {len(params)} arrays to {self.quantization_type}: {orig_size} bytes -> {new_size} bytes",
+        )
+        return DXO(data_kind=dxo.data_kind, data=data, meta=meta)
@@ -0,0 +1,52 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Union
+
+from nvflare.apis.dxo import DataKind
+from nvflare.apis.dxo_filter import DXO, DXOFilter
+from nvflare.apis.fl_context import FLContext
+from nvflare.apis.shareable import Shareable
+from nvflare.app_common.utils.sparse_utils import SparseKey, to_dense
+
+
+class SparseDiffDecoder(DXOFilter):
+    def __init__(self):
+        """Convert the sparse arrays created by the SparseDiffEncoder filter back to dense arrays.
+
+        Not needed in front of the aggregators of app_common, they accept the sparse arrays directly.
+        """
+        super().__init__(supported_data_kinds=[DataKind.WEIGHT_DIFF], data_kinds_to_filter=[DataKind.WEIGHT_DIFF])
+
+    def process_dxo(self, dxo: DXO, shareable: Shareable, fl_ctx: FLContext) -> Union[None, DXO]:
+        """Densify the arrays listed in the sparse meta of the DXO.
+
+        Args:
+            dxo (DXO): DXO to be filtered.
+            shareable: that the dxo belongs to
+            fl_ctx (FLContext): only used for logging.
+
+        Returns: DXO with dense arrays or None if the DXO is not sparse
+        """
+        params = dxo.get_meta_prop(SparseKey.META)
+        if not params:
+            return None
+
+        for k, p in params.items():
+            if k in dxo.data:
+                dxo.data[k] = to_dense(dxo.data[k], p)
+            else:
+                self.log_warning(fl_ctx, f"sparse variable {k} is missing in DXO")
+
+        dxo.remove_meta_props([SparseKey.META])
+        return dxo
@@ -0,0 +1,108 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Optional, Union
+
+import numpy as np
+
+from nvflare.apis.dxo import DataKind
+from nvflare.apis.dxo_filter import DXO, DXOFilter
+from nvflare.apis.fl_context import FLContext
+from nvflare.apis.shareable import Shareable
+from nvflare.app_common.utils.sparse_utils import SparseKey, select_indices, sparse_nbytes, to_sparse
+
+
+class SparseDiffEncoder(DXOFilter):
+    def __init__(
+        self,
+        top_k_fraction: Optional[float] = 0.01,
+        threshold: Optional[float] = None,
+        value_dtype: str = "float16",
+        error_feedback: bool = True,
+    ):
+        """Send only the largest entries of the WEIGHT_DIFF arrays as (index, value) pairs.
+
+        The entries not sent are accumulated in a residual kept by this filter and added to the diff of the
+        next round (error feedback), so small updates are delayed instead of lost.
+        The aggregators accept the sparse format directly. Other consumers need the SparseDiffDecoder filter.
+
+        Args:
+            top_k_fraction: fraction of the entries of each array to send, by magnitude. Defaults to 0.01.
+            threshold: if specified, send the entries with a magnitude greater than or equal to the threshold
+                instead of the top k fraction.
+            value_dtype: dtype of the values sent. Defaults to "float16".
+            error_feedback: whether to keep the entries not sent and add them to the next round. Defaults to True.
+        """
+        super().__init__(supported_data_kinds=[DataKind.WEIGHT_DIFF], data_kinds_to_filter=[DataKind.WEIGHT_DIFF])
+        if threshold is None:
+            if top_k_fraction is None or not 0.0 < top_k_fraction <= 1.0:
+                raise ValueError(f"top_k_fraction must be in (0, 1] but got {top_k_fraction}")
+        elif threshold < 0.0:
+            raise ValueError(f"threshold must not be negative but got {threshold}")
+
+        self.top_k_fraction = top_k_fraction
+        self.threshold = threshold
+        self.value_dtype = np.dtype(value_dtype)
+        self.error_feedback = error_feedback
+        self.residuals = {}
+
+    def process_dxo(self, dxo: DXO, shareable: Shareable, fl_ctx: FLContext) -> Union[None, DXO]:
+        """Encode the floating point arrays of the weight_diff dictionary as sparse arrays.
+
+        Args:
+            dxo (DXO): DXO to be filtered.
+            shareable: that the dxo belongs to
+            fl_ctx (FLContext): only used for logging.
+
+        Returns: DXO with sparse arrays or None if no array is encoded
+        """
+        if dxo.get_meta_prop(SparseKey.META):
+            self.log_warning(fl_ctx, "DXO is already sparse")
+            return None
+
+        params = {}
+        orig_size = 0
+        new_size = 0
+        for k, v in dxo.data.items():
+            if not isinstance(v, np.ndarray) or v.dtype.kind != "f":
+                continue
+
+            flat = v.reshape(-1)
+            residual = self.residuals.pop(k, None)
+            if residual is not None and residual.shape == flat.shape:
+                flat = flat + residual
+
+            sparse = to_sparse(flat, select_indices(flat, self.top_k_fraction, self.threshold), self.value_dtype)
+            orig_size += v.nbytes
+            if sparse_nbytes(sparse) >= v.nbytes:
+                # not worth it, send the whole array with the residual
+                dxo.data[k] = flat.reshape(v.shape)
+                new_size += v.nbytes
+                continue
+
+            if self.error_feedback:
+                residual = np.array(flat, copy=True)
+                indices = sparse[SparseKey.INDICES]
+                residual[indices] -= sparse[SparseKey.VALUES].astype(residual.dtype)
+                self.residuals[k] = residual
+
+            dxo.data[k] = sparse
+            params[k] = {SparseKey.SHAPE: list(v.shape), SparseKey.DTYPE: v.dtype.str}
+            new_size += sparse_nbytes(sparse)
+
+        if not params:
+            return None
+
+        dxo.set_meta_prop(SparseKey.META, params)
+        self.log_info(fl_ctx, f"encoded {len(params)} sparse arrays: {orig_size} bytes -> {new_size} bytes")
+        return dxo
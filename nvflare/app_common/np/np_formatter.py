@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from nvflare.apis.dxo import DataKind, from_bytes
+from nvflare.apis.dxo import DataKind, from_stream
 from nvflare.apis.fl_context import FLContext
 from nvflare.app_common.abstract.formatter import Formatter
 from nvflare.app_common.app_constant import AppConstants
@@ -51,7 +51,7 @@ class NPFormatter(Formatter):
 
                         # Load the shareable
                         with open(dxo_path, "rb") as f:
-                            metric_dxo = from_bytes(f.read())
+                            metric_dxo = from_stream(f)
 
                         # Get metrics from shareable
                         if metric_dxo and metric_dxo.data_kind == DataKind.METRICS:
@@ -18,19 +18,19 @@ import os
 import shutil
 import uuid
 from pathlib import Path
-from typing import List, Tuple
+from typing import BinaryIO, List, Tuple
 
 from nvflare.apis.storage import StorageException, StorageSpec
 from nvflare.apis.utils.format_check import validate_class_methods_args
 from nvflare.security.logging import secure_format_exception
 
 
-def _write(path: str, content):
+def _write_with(path: str, write_func):
     tmp_path = path + "_" + str(uuid.uuid4())
     try:
         Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
         with open(tmp_path, "wb") as f:
-            f.write(content)
+            write_func(f)
             f.flush()
             os.fsync(f.fileno())
     except Exception as e:
@@ -42,6 +42,18 @@ def _write(path: str, content):
         os.rename(tmp_path, path)
 
 
+def _write(path: str, content):
+    _write_with(path, lambda f: f.write(content))
+
+
+def _write_file(path: str, src_path: str):
+    def _copy(f):
+        with open(src_path, "rb") as src:
+            shutil.copyfileobj(src, f)
+
+    _write_with(path, _copy)
+
+
 def _read(path: str) -> bytes:
     try:
         with open(path, "rb") as f:
@@ -97,6 +109,29 @@ class FilesystemStorage(StorageSpec):
             IOError: if error writing the object
 
         """
+        return self._create_object(uri, meta, overwrite_existing, lambda path: _write(path, data))
+
+    def create_object_from_file(self, uri: str, file_path: str, meta: dict, overwrite_existing: bool = False):
+        """Creates an object with the content of a local file, the file is copied in chunks.
+
+        Args:
+            uri: URI of the object
+            file_path: the file that has the content of the object
+            meta: meta of the object
+            overwrite_existing: whether to overwrite the object if already exists
+
+        Raises:
+            TypeError: if invalid argument types
+            StorageException:
+                - if error creating the object
+                - if object already exists and overwrite_existing is False
+                - if object will be at a non-empty directory
+            IOError: if error writing the object
+
+        """
+        return self._create_object(uri, meta, overwrite_existing, lambda path: _write_file(path, file_path))
+
+    def _create_object(self, uri: str, meta: dict, overwrite_existing: bool, write_data_func):
         full_uri = os.path.join(self.root_dir, uri.lstrip(self.uri_root))
 
         if _object_exists(full_uri) and not overwrite_existing:
@@ -109,7 +144,7 @@ class FilesystemStorage(StorageSpec):
         meta_path = os.path.join(full_uri, "meta")
 
         tmp_data_path = data_path + "_" + str(uuid.uuid4())
-        _write(tmp_data_path, data)
+        write_data_func(tmp_data_path)
         try:
             _write(meta_path, json.dumps(str(meta)).encode("utf-8"))
         except Exception as e:
@@ -165,6 +200,26 @@ class FilesystemStorage(StorageSpec):
 
         _write(os.path.join(full_uri, "data"), data)
 
+    def update_data_from_file(self, uri: str, file_path: str):
+        """Updates the data of the specified object with the content of a local file, the file is copied in chunks.
+
+        Args:
+            uri: URI of the object
+            file_path: the file that has the new data
+
+        Raises:
+            TypeError: if invalid argument types
+            StorageException: if object does not exist
+            IOError: if error writing the object
+
+        """
+        full_uri = os.path.join(self.root_dir, uri.lstrip(self.uri_root))
+
+        if not _object_exists(full_uri):
+            raise StorageException("object {} does not exist".format(uri))
+
+        _write_file(os.path.join(full_uri, "data"), file_path)
+
     def list_objects(self, path: str) -> List[str]:
         """List all objects in the specified path.
 
@@ -229,6 +284,30 @@ class FilesystemStorage(StorageSpec):
 
         return _read(os.path.join(full_uri, "data"))
 
+    def open_data(self, uri: str) -> BinaryIO:
+        """Opens the data of the specified object for reading.
+
+        Args:
+            uri: URI of the object
+
+        Returns:
+            the data file of the object opened in binary mode, to be closed by the caller.
+
+        Raises:
+            TypeError: if invalid argument types
+            StorageException: if object does not exist
+
+        """
+        full_uri = os.path.join(self.root_dir, uri.lstrip(self.uri_root))
+
+        if not _object_exists(full_uri):
+            raise StorageException("object {} does not exist".format(uri))
+
+        try:
+            return open(os.path.join(full_uri, "data"), "rb")
+        except Exception as e:
+            raise StorageException(f"failed to open content: {secure_format_exception(e)}")
+
     def get_detail(self, uri: str) -> Tuple[dict, bytes]:
         """Gets both data and meta of the specified object.
 
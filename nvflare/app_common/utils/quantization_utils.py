@@ -0,0 +1,156 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+from typing import Tuple
+
+import numpy as np
+
+
+class QuantizationType:
+    FLOAT16 = "float16"
+    BFLOAT16 = "bfloat16"
+    INT8 = "int8"
+    INT4 = "int4"
+
+    ALL = [FLOAT16, BFLOAT16, INT8, INT4]
+
+
+class QuantizationKey:
+    META = "quantization"
+    TYPE = "type"
+    DTYPE = "dtype"
+    SHAPE = "shape"
+    SCALE = "scale"
+    ZERO_POINT = "zero_point"
+
+
+_LEVELS = {QuantizationType.INT8: 255, QuantizationType.INT4: 15}
+
+
+def _to_bfloat16(array: np.ndarray) -> np.ndarray:
+    """Keep the upper 16 bits of the float32 values, rounded to nearest even. Returned as uint16."""
+    bits = np.ascontiguousarray(array, dtype=np.float32).view(np.uint32)
+    rounded = bits + np.uint32(0x7FFF) + ((bits >> np.uint32(16)) & np.uint32(1))
+    result = (rounded >> np.uint32(16)).astype(np.uint16)
+    nan = np.isnan(array)
+    if nan.any():
+        result[nan.reshape(result.shape)] = 0x7FC0
+    return result
+
+
+def _from_bfloat16(data: np.ndarray) -> np.ndarray:
+    return (data.astype(np.uint32) << np.uint32(16)).view(np.float32)
+
+
+def _affine_params(array: np.ndarray, levels: int) -> Tuple[float, int]:
+    # the range always includes 0 so zero is represented exactly
+    low = min(float(array.min()), 0.0) if array.size else 0.0
+    high = max(float(array.max()), 0.0) if array.size else 0.0
+    if not (math.isfinite(low) and math.isfinite(high)):
+        # min/max propagate NaN, so this also catches arrays with NaN values
+        raise ValueError("cannot quantize an array with NaN or infinite values to integers")
+    scale = (high - low) / levels
+    if scale == 0.0:
+        scale = 1.0
+    zero_point = int(round(-low / scale))
+    return scale, zero_point
+
+
+def _pack_int4(codes: np.ndarray) -> np.ndarray:
+    codes = codes.reshape(-1)
+    if codes.size % 2:
+        codes = np.append(codes, np.uint8(0))
+    return codes[0::2] | (codes[1::2] << np.uint8(4))
+
+
+def _unpack_int4(packed: np.ndarray, size: int) -> np.ndarray:
+    codes = np.empty(packed.size * 2, dtype=np.uint8)
+    codes[0::2] = packed & np.uint8(0x0F)
+    codes[1::2] = packed >> np.uint8(4)
+    return codes[:size]
+
+
+def quantize(array: np.ndarray, quantization_type: str) -> Tuple[np.ndarray, dict]:
+    """Quantize a floating point array.
+
+    Args:
+        array: the array to quantize
+        quantization_type: one of QuantizationType
+
+    Returns: a tuple of the quantized data and the parameters needed to dequantize it
+
+    Raises: ValueError if the array has NaN or infinite values and is quantized to integers,
+        or if it has finite values out of the float16 range and is quantized to float16.
+        The float16 and bfloat16 types keep NaN and infinite values.
+    """
+    params = {
+        QuantizationKey.TYPE: quantization_type,
+        QuantizationKey.DTYPE: array.dtype.str,
+        QuantizationKey.SHAPE: list(array.shape),
+    }
+
+    if quantization_type == QuantizationType.FLOAT16:
+        with np.errstate(over="ignore"):
+            result = array.astype(np.float16)
+        if np.isinf(result).any() and (np.isinf(result) != np.isinf(array)).any():
+            raise ValueError("cannot quantize an array with values out of the float16 range to float16")
+        return result, params
+
+    if quantization_type == QuantizationType.BFLOAT16:
+        return _to_bfloat16(array), params
+
+    levels = _LEVELS.get(quantization_type)
+    if levels is None:
+        raise ValueError(f"unsupported quantization type {quantization_type}, must be one of {QuantizationType.ALL}")
+
+    scale, zero_point = _affine_params(array, levels)
+    codes = np.rint(array / scale) + zero_point
+    codes = np.clip(codes, 0, levels, out=codes).astype(np.uint8)
+    if quantization_type == QuantizationType.INT4:
+        codes = _pack_int4(codes)
+
+    params[QuantizationKey.SCALE] = scale
+    params[QuantizationKey.ZERO_POINT] = zero_point
+    return codes, params
+
+
+def dequantize(data: np.ndarray, params: dict) -> np.ndarray:
+    """Restore the array quantized by :func:`quantize`.
+
+    Args:
+        data: the quantized data
+        params: the parameters returned by quantize
+
+    Returns: the dequantized array, with its original dtype and shape
+    """
+    quantization_type = params[QuantizationKey.TYPE]
+    dtype = np.dtype(params[QuantizationKey.DTYPE])
+    shape = tuple(params[QuantizationKey.SHAPE])
+
+    if quantization_type == QuantizationType.FLOAT16:
+        return data.astype(dtype).reshape(shape)
+
+    if quantization_type == QuantizationType.BFLOAT16:
+        return _from_bfloat16(data).astype(dtype, copy=False).reshape(shape)
+
+    if quantization_type not in _LEVELS:
+        raise ValueError(f"unsupported quantization type {quantization_type}, must be one of {QuantizationType.ALL}")
+
+    if quantization_type == QuantizationType.INT4:
+        data = _unpack_int4(data, int(np.prod(shape)))
+
+    result = data.astype(dtype)
+    result -= params[QuantizationKey.ZERO_POINT]
+    result *= params[QuantizationKey.SCALE]
+    return result.reshape(shape)
@@ -0,0 +1,68 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+from typing import Optional
+
+import numpy as np
+
+
+class SparseKey:
+    META = "sparse"
+    INDICES = "indices"
+    VALUES = "values"
+    SHAPE = "shape"
+    DTYPE = "dtype"
+
+
+def select_indices(flat: np.ndarray, top_k_fraction: Optional[float] = None, threshold: Optional[float] = None):
+    """Select the entries of a flat array to send.
+
+    Args:
+        flat: the flattened array
+        top_k_fraction: fraction of the entries with the largest magnitude to select
+        threshold: select the entries with a magnitude greater than or equal to the threshold
+
+    Returns: sorted flat indices of the selected entries
+    """
+    magnitude = np.abs(flat)
+    if threshold is not None:
+        return np.flatnonzero(magnitude >= threshold)
+
+    k = min(flat.size, max(1, math.ceil(flat.size * top_k_fraction)))
+    indices = np.argpartition(magnitude, flat.size - k)[flat.size - k :]
+    indices.sort()
+    return indices
+
+
+def to_sparse(flat: np.ndarray, indices: np.ndarray, value_dtype) -> dict:
+    """Encode the selected entries as (index, value) arrays.
+
+    Indices are int32 unless the array is too large to be indexed with 32 bits.
+    """
+    index_dtype = np.int32 if flat.size <= np.iinfo(np.int32).max else np.int64
+    return {
+        SparseKey.INDICES: indices.astype(index_dtype),
+        SparseKey.VALUES: flat[indices].astype(value_dtype),
+    }
+
+
+def sparse_nbytes(sparse: dict) -> int:
+    return sparse[SparseKey.INDICES].nbytes + sparse[SparseKey.VALUES].nbytes
+
+
+def to_dense(sparse: dict, params: dict) -> np.ndarray:
+    """Decode the (index, value) arrays into a dense array, the entries not sent are 0"""
+    dense = np.zeros(tuple(params[SparseKey.SHAPE]), dtype=np.dtype(params[SparseKey.DTYPE]))
+    dense.reshape(-1)[sparse[SparseKey.INDICES]] = sparse[SparseKey.VALUES]
+    return dense
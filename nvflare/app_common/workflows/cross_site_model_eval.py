@@ -19,7 +19,7 @@ from typing import Union
 
 from nvflare.apis.client import Client
 from nvflare.apis.controller_spec import ClientTask, Task
-from nvflare.apis.dxo import DXO, from_bytes, from_shareable
+from nvflare.apis.dxo import DXO, from_shareable, from_stream
 from nvflare.apis.fl_constant import ReturnCode
 from nvflare.apis.fl_context import FLContext
 from nvflare.apis.impl.controller import Controller
@@ -462,15 +462,10 @@ class CrossSiteModelEval(Controller):
         # Save the model with name as the filename to shareable directory
         data_filename = os.path.join(save_dir, name)
 
-        try:
-            bytes_to_save = dxo.to_bytes()
-        except Exception as e:
-            raise ValueError(f"Unable to extract shareable contents. Exception: {(secure_format_exception(e))}")
-
-        # Save contents to path
+        # Save contents to path, the model is streamed to the file without serializing it in memory first
         try:
             with open(data_filename, "wb") as f:
-                f.write(bytes_to_save)
+                dxo.to_stream(f)
         except Exception as e:
             raise ValueError(f"Unable to save shareable contents: {secure_format_exception(e)}")
 
@@ -485,9 +480,7 @@ class CrossSiteModelEval(Controller):
         # load shareable
         try:
             with open(shareable_filename, "rb") as f:
-                data = f.read()
-
-            dxo: DXO = from_bytes(data)
+                dxo: DXO = from_stream(f)
 
             self.log_debug(fl_ctx, f"Loading cross validation shareable content with name: {name}.")
         except Exception as e:
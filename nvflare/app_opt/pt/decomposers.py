@@ -12,27 +12,28 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from io import BytesIO
 from typing import Any
 
-import numpy as np
 import torch
 
+from nvflare.app_common.decomposers.common_decomposers import NumpyArrayDecomposer
 from nvflare.fuel.utils import fobs
 
 
 class TensorDecomposer(fobs.Decomposer):
+    """Decomposer for tensors. The tensor is decomposed as a numpy array, the memory is sent out-of-band."""
+
+    def __init__(self):
+        self.array_decomposer = NumpyArrayDecomposer()
+
     def supported_type(self):
         return torch.Tensor
 
     def decompose(self, target: torch.Tensor) -> Any:
-        stream = BytesIO()
         # torch.save uses Pickle so converting Tensor to ndarray first
         array = target.detach().cpu().numpy()
-        np.save(stream, array, allow_pickle=False)
-        return stream.getvalue()
+        return self.array_decomposer.decompose(array)
 
     def recompose(self, data: Any) -> torch.Tensor:
-        stream = BytesIO(data)
-        array = np.load(stream, allow_pickle=False)
+        array = self.array_decomposer.recompose(data)
         return torch.from_numpy(array)
@@ -24,6 +24,7 @@ from urllib.parse import urlparse
 
 from nvflare.fuel.f3.cellnet.connector_manager import ConnectorManager
 from nvflare.fuel.f3.cellnet.defs import (
+    CELLNET_PREFIX,
     AbortRun,
     AuthenticationError,
     CellPropertyKey,
@@ -37,6 +38,7 @@ from nvflare.fuel.f3.cellnet.defs import (
     ServiceUnavailable,
 )
 from nvflare.fuel.f3.cellnet.fqcn import FQCN, FqcnInfo, same_family
+from nvflare.fuel.f3.cellnet.tracer import MessageTracer, TraceStage
 from nvflare.fuel.f3.cellnet.utils import decode_payload, encode_payload, format_log_message, make_reply, new_message
 from nvflare.fuel.f3.comm_config import CommConfigurator
 from nvflare.fuel.f3.communicator import Communicator, MessageReceiver
@@ -44,6 +46,7 @@ from nvflare.fuel.f3.connection import Connection
 from nvflare.fuel.f3.drivers.driver_params import DriverParams
 from nvflare.fuel.f3.endpoint import Endpoint, EndpointMonitor, EndpointState
 from nvflare.fuel.f3.message import Message
+from nvflare.fuel.f3.metrics_exporter import start_metrics_exporter, stop_metrics_exporter
 from nvflare.fuel.f3.mpm import MainProcessMonitor
 from nvflare.fuel.f3.stats_pool import StatsPoolManager
 from nvflare.security.logging import secure_format_exception, secure_format_traceback
@@ -51,6 +54,10 @@ from nvflare.security.logging import secure_format_exception, secure_format_trac
 _CHANNEL = "cellnet.channel"
 _TOPIC_BULK = "bulk"
 _TOPIC_BYE = "bye"
+_TOPIC_RELAY = "relay"
+
+# Portion of the remaining time a relay waits for its subtree, so its replies reach the sender in time
+_RELAY_TIMEOUT_RATIO = 0.9
 
 _ONE_MB = 1024 * 1024
 
@@ -258,6 +265,8 @@ class _CounterName:
 class Cell(MessageReceiver, EndpointMonitor):
 
     APP_ID = 1
+    # Payloads are decoded from the frame buffers, raw bytes payloads are converted to bytes by decode_payload
+    accepts_buffers = True
     ERR_TYPE_MSG_TOO_BIG = "MsgTooBig"
     ERR_TYPE_COMM = "CommErr"
 
@@ -324,6 +333,9 @@ class Cell(MessageReceiver, EndpointMonitor):
         self.my_info = FqcnInfo(FQCN.normalize(fqcn))
         self.secure = secure
         self.logger.debug(f"{self.my_info.fqcn}: max_msg_size={self.max_msg_size}")
+        self.tracer = MessageTracer(
+            self.my_info.fqcn, comm_configurator.get_trace_sample_rate(), comm_configurator.get_trace_max_spans()
+        )
 
         if not root_url:
             raise ValueError(f"{self.my_info.fqcn}: root_url not provided")
@@ -411,6 +423,7 @@ class Cell(MessageReceiver, EndpointMonitor):
         self.asked_to_stop = False
         self.running = False
         self.stopping = False
+        self.metrics_exporter = None
 
         # add appropriate drivers based on roles of the cell
         # a cell can have at most two listeners: one for external, one for internal
@@ -431,6 +444,7 @@ class Cell(MessageReceiver, EndpointMonitor):
 
         self.register_request_cb(channel=_CHANNEL, topic=_TOPIC_BULK, cb=self._receive_bulk_message)
         self.register_request_cb(channel=_CHANNEL, topic=_TOPIC_BYE, cb=self._peer_goodbye)
+        self.register_request_cb(channel=_CHANNEL, topic=_TOPIC_RELAY, cb=self._relay_request)
 
         self.cleanup_waiter = None
         self.msg_stats_pool = StatsPoolManager.add_time_hist_pool(
@@ -836,6 +850,7 @@ class Cell(MessageReceiver, EndpointMonitor):
                 self._set_bb_for_client_child(self.parent_url, self.create_internal_listener)
 
         self.communicator.start()
+        self.metrics_exporter = start_metrics_exporter(self.my_info.fqcn)
         self.running = True
 
     def stop(self):
@@ -884,6 +899,10 @@ class Cell(MessageReceiver, EndpointMonitor):
                 msg=None, log_text=f"error stopping Communicator: {secure_format_exception(ex)}", log_except=True
             )
 
+        if self.metrics_exporter:
+            stop_metrics_exporter(self.metrics_exporter)
+            self.metrics_exporter = None
+
         self.logger.debug(f"{self.my_info.fqcn}: cell stopped!")
 
     def register_request_cb(self, channel: str, topic: str, cb, *args, **kwargs):
@@ -1034,7 +1053,10 @@ class Cell(MessageReceiver, EndpointMonitor):
     def _send_to_endpoint(self, to_endpoint: Endpoint, message: Message) -> str:
         err = ""
         try:
-            encode_payload(message)
+            if not message.get_header(MessageHeaderKey.PAYLOAD_ENCODING):
+                start = time.perf_counter()
+                encode_payload(message)
+                self.tracer.record(message, TraceStage.ENCODE, start)
             message.set_header(MessageHeaderKey.SEND_TIME, time.time())
             if not message.payload:
                 msg_size = 0
@@ -1053,7 +1075,9 @@ class Cell(MessageReceiver, EndpointMonitor):
                     self._send_direct_message(direct_cell, message)
 
                 else:
+                    start = time.perf_counter()
                     self.communicator.send(to_endpoint, Cell.APP_ID, message)
+                    self.tracer.record(message, TraceStage.SEND, start)
                 self.sent_msg_size_pool.record_value(
                     category=self._stats_category(message), value=self._msg_size_mbs(message)
                 )
@@ -1102,18 +1126,21 @@ class Cell(MessageReceiver, EndpointMonitor):
                     MessageHeaderKey.TO_CELL: ep.name,
                 }
             )
+            self.tracer.sample(req)
 
             # invoke outgoing req filters
             req_filters = self.out_req_filter_reg.find(tm.channel, tm.topic)
             if req_filters:
                 self.logger.debug(f"{self.my_info.fqcn}: invoking outgoing request filters")
                 assert isinstance(req_filters, list)
+                start = time.perf_counter()
                 for f in req_filters:
                     assert isinstance(f, _CB)
                     r = self._try_cb(req, f.cb, *f.args, **f.kwargs)
                     if r:
                         send_errs[t] = ReturnCode.FILTER_ERROR
                         break
+                self.tracer.record(req, TraceStage.FILTER, start)
                 if send_errs.get(t):
                     # process next target
                     continue
@@ -1260,7 +1287,14 @@ class Cell(MessageReceiver, EndpointMonitor):
         return result
 
     def broadcast_request(
-        self, channel: str, topic: str, targets: Union[str, List[str]], request: Message, timeout=None, optional=False
+        self,
+        channel: str,
+        topic: str,
+        targets: Union[str, List[str]],
+        request: Message,
+        timeout=None,
+        optional=False,
+        relay=False,
     ) -> Dict[str, Message]:
         """
         Send a message over a channel to specified destination cell(s), and wait for reply
@@ -1272,17 +1306,128 @@ class Cell(MessageReceiver, EndpointMonitor):
             request: message to be sent
             timeout: how long to wait for replies
             optional: whether the message is optional
+            relay: whether to send one copy per subtree of targets and let the top cell of the subtree fan it out
 
         Returns: a dict of: cell_id => reply message
 
         """
         if isinstance(targets, str):
             targets = [targets]
+        if relay:
+            return self._relay_broadcast(channel, topic, targets, request, timeout, optional)
+
         target_msgs = {}
         for t in targets:
             target_msgs[t] = TargetMessage(t, channel, topic, request)
         return self.broadcast_multi_requests(target_msgs, timeout, optional=optional)
 
+    def _group_by_subtree(self, targets: List[str]) -> Dict[str, List[str]]:
+        """Group the targets by the top cell of their subtree as seen from this cell
+
+        The top cell is the first cell on the path of the target that is not this cell or one of its ancestors,
+        so all the targets of a group are in the subtree of its top cell and the top cell can relay to them.
+
+        Returns: a dict of: top cell => targets in its subtree
+        """
+        my_path = FQCN.split(self.my_info.fqcn)
+        groups = {}
+        for t in targets:
+            path = FQCN.split(t)
+            n = 0
+            while n < len(path) and n < len(my_path) and path[n] == my_path[n]:
+                n += 1
+            top = t if n >= len(path) else FQCN.join(path[: n + 1])
+            groups.setdefault(top, []).append(t)
+        return groups
+
+    def _relay_broadcast(
+        self, channel: str, topic: str, targets: List[str], request: Message, timeout, optional
+    ) -> Dict[str, Message]:
+        target_msgs = {}
+        relays = {}  # top cell => targets relayed by it
+        for hop, group in self._group_by_subtree(targets).items():
+            if len(group) == 1 or hop == self.my_info.fqcn:
+                for t in group:
+                    target_msgs[t] = TargetMessage(t, channel, topic, request)
+                continue
+
+            relay_msg = Message(headers=copy.copy(request.headers), payload=request.payload)
+            relay_msg.add_headers(
+                {
+                    MessageHeaderKey.RELAY_CHANNEL: channel,
+                    MessageHeaderKey.RELAY_TOPIC: topic,
+                    MessageHeaderKey.RELAY_TARGETS: group,
+                }
+            )
+            target_msgs[hop] = TargetMessage(hop, _CHANNEL, _TOPIC_RELAY, relay_msg)
+            relays[hop] = group
+
+        # The request to myself is processed inline, send to the other cells first
+        tm = target_msgs.pop(self.my_info.fqcn, None)
+        if tm:
+            target_msgs[self.my_info.fqcn] = tm
+
+        self.logger.debug(f"{self.my_info.fqcn}: relaying {channel}:{topic} through {list(relays.keys())}")
+        replies = self.broadcast_multi_requests(target_msgs, timeout, optional=optional)
+        result = {}
+        for t, reply in replies.items():
+            group = relays.get(t)
+            if not group:
+                result[t] = reply
+                continue
+
+            rc = reply.get_header(MessageHeaderKey.RETURN_CODE, ReturnCode.OK)
+            relayed = reply.payload if rc == ReturnCode.OK and isinstance(reply.payload, dict) else {}
+            for target in group:
+                d = relayed.get(target)
+                if d:
+                    result[target] = new_message(headers=d.get("headers"), payload=d.get("payload"))
+                elif rc == ReturnCode.OK:
+                    result[target] = make_reply(ReturnCode.PROCESS_EXCEPTION, error="no reply from relay")
+                else:
+                    result[target] = make_reply(rc, error=reply.get_header(MessageHeaderKey.ERROR, ""))
+        return result
+
+    def _relay_request(self, request: Message):
+        # Only the parent cell or the server can make this cell relay, and only to the cells of its own subtree
+        my_fqcn = self.my_info.fqcn
+        origin = request.get_header(MessageHeaderKey.ORIGIN, "")
+        if origin != FQCN.get_parent(my_fqcn) and FQCN.get_root(origin) != FQCN.ROOT_SERVER:
+            self.log_error(f"relay request from {origin} rejected: not from the parent cell or the server", request)
+            return make_reply(ReturnCode.UNAUTHENTICATED, error="relay request not allowed")
+
+        channel = request.get_header(MessageHeaderKey.RELAY_CHANNEL)
+        topic = request.get_header(MessageHeaderKey.RELAY_TOPIC)
+        targets = request.get_header(MessageHeaderKey.RELAY_TARGETS)
+        if not channel or not topic or not isinstance(targets, list):
+            self.log_error("bad relay request", request)
+            return make_reply(ReturnCode.INVALID_REQUEST, error="bad relay request")
+
+        outside = [t for t in targets if t != my_fqcn and not FQCN.is_ancestor(my_fqcn, t)]
+        if outside:
+            self.log_error(f"relay request rejected: targets {outside} are not in the subtree of {my_fqcn}", request)
+            return make_reply(ReturnCode.INVALID_REQUEST, error="relay targets not in subtree")
+
+        timeout = None
+        wait_until = request.get_header(MessageHeaderKey.WAIT_UNTIL)
+        if isinstance(wait_until, float):
+            timeout = (wait_until - time.time()) * _RELAY_TIMEOUT_RATIO
+            if timeout <= 0:
+                return make_reply(ReturnCode.TIMEOUT)
+
+        # The cellnet headers are set again for the next hops
+        headers = {k: v for k, v in request.headers.items() if not k.startswith(CELLNET_PREFIX)}
+        replies = self.broadcast_request(
+            channel,
+            topic,
+            targets,
+            new_message(headers=headers, payload=request.payload),
+            timeout,
+            optional=request.get_header(MessageHeaderKey.OPTIONAL, False),
+            relay=True,
+        )
+        return new_message(payload={t: {"headers": dict(r.headers), "payload": r.payload} for t, r in replies.items()})
+
     def fire_and_forget(
         self, channel: str, topic: str, targets: Union[str, List[str]], message: Message, optional=False
     ) -> Dict[str, str]:
@@ -1401,6 +1546,8 @@ class Cell(MessageReceiver, EndpointMonitor):
             - The receiver may queue up multiple such requests
             - When ready, call this method to send the reply for all the queued requests
 
+        The outgoing reply filters are applied if the reply has the channel and topic headers of the request.
+
         Args:
             reply: the reply message
             to_cell: the target cell
@@ -1410,6 +1557,10 @@ class Cell(MessageReceiver, EndpointMonitor):
         Returns: an error message if any
 
         """
+        channel = reply.get_header(MessageHeaderKey.CHANNEL)
+        topic = reply.get_header(MessageHeaderKey.TOPIC)
+        if channel and topic:
+            reply = self._filter_outgoing_reply(channel, topic, reply)
         reply.add_headers(
             {
                 MessageHeaderKey.FROM_CELL: self.my_info.fqcn,
@@ -1448,6 +1599,10 @@ class Cell(MessageReceiver, EndpointMonitor):
             )
             return make_reply(ReturnCode.PROCESS_EXCEPTION)
 
+    def is_reply(self, headers: dict) -> bool:
+        # replies and returned requests complete the waiters of requests sent by this cell
+        return headers.get(MessageHeaderKey.MSG_TYPE) in (MessageType.REPLY, MessageType.RETURN)
+
     def process_message(self, endpoint: Endpoint, connection: Connection, app_id: int, message: Message):
         # this is the receiver callback
         try:
@@ -1459,7 +1614,9 @@ class Cell(MessageReceiver, EndpointMonitor):
 
     def _process_request(self, origin: str, message: Message) -> Union[None, Message]:
         self.logger.debug(f"{self.my_info.fqcn}: processing incoming request")
+        start = time.perf_counter()
         decode_payload(message)
+        self.tracer.record(message, TraceStage.DECODE, start)
         # this is a request for me - dispatch to the right CB
         channel = message.get_header(MessageHeaderKey.CHANNEL, "")
         topic = message.get_header(MessageHeaderKey.TOPIC, "")
@@ -1473,11 +1630,13 @@ class Cell(MessageReceiver, EndpointMonitor):
         if req_filters:
             self.logger.debug(f"{self.my_info.fqcn}: invoking incoming request filters")
             assert isinstance(req_filters, list)
+            start = time.perf_counter()
             for f in req_filters:
                 assert isinstance(f, _CB)
                 reply = self._try_cb(message, f.cb, *f.args, **f.kwargs)
                 if reply:
                     return reply
+            self.tracer.record(message, TraceStage.FILTER, start)
 
         assert isinstance(_cb, _CB)
         self.logger.debug(f"{self.my_info.fqcn}: calling registered request CB")
@@ -1485,6 +1644,7 @@ class Cell(MessageReceiver, EndpointMonitor):
         reply = self._try_cb(message, _cb.cb, *_cb.args, **_cb.kwargs)
         cb_end = time.perf_counter()
         self.req_cb_stats_pool.record_value(category=self._stats_category(message), value=cb_end - cb_start)
+        self.tracer.record(message, TraceStage.HANDLER, cb_start, cb_end)
         if not reply:
             # the CB doesn't have anything to reply
             self.logger.debug("no reply is returned from the CB")
@@ -1590,7 +1750,9 @@ class Cell(MessageReceiver, EndpointMonitor):
         topic = message.get_header(MessageHeaderKey.TOPIC, "")
         now = time.time()
         self.logger.debug(f"{self.my_info.fqcn}: processing reply from {origin} for type {msg_type}")
+        start = time.perf_counter()
         decode_payload(message)
+        self.tracer.record(message, TraceStage.DECODE, start)
 
         req_ids = message.get_header(MessageHeaderKey.REQ_ID)
         if not req_ids:
@@ -1626,9 +1788,11 @@ class Cell(MessageReceiver, EndpointMonitor):
             if reply_filters:
                 self.logger.debug(f"{self.my_info.fqcn}: invoking incoming reply filters")
                 assert isinstance(reply_filters, list)
+                start = time.perf_counter()
                 for f in reply_filters:
                     assert isinstance(f, _CB)
                     self._try_cb(message, f.cb, *f.args, **f.kwargs)
+                self.tracer.record(message, TraceStage.FILTER, start)
 
         for rid in req_ids:
             waiter = self.waiters.get(rid, None)
@@ -1646,6 +1810,9 @@ class Cell(MessageReceiver, EndpointMonitor):
                 time_taken = now - waiter.send_time
 
                 self.msg_stats_pool.record_value(category=self._stats_category(message), value=time_taken)
+                trace_id = message.get_header(MessageHeaderKey.TRACE_ID)
+                if trace_id:
+                    self.tracer.record_span(trace_id, TraceStage.REQUEST, message, waiter.send_time, time_taken)
 
                 # all targets replied?
                 all_targets_replied = True
@@ -1694,6 +1861,7 @@ class Cell(MessageReceiver, EndpointMonitor):
             self.msg_travel_stats_pool.record_value(
                 category=f"{origin_name}#{self._stats_category(message)}", value=time_taken
             )
+        self.tracer.record_transfer(message)
 
         self.logger.debug(f"{self.my_info.fqcn}: received message: {message.headers}")
         message.set_prop(MessagePropKey.ENDPOINT, endpoint)
@@ -1762,7 +1930,9 @@ class Cell(MessageReceiver, EndpointMonitor):
             self.received_msg_counter_pool.increment(
                 category=self._stats_category(message), counter_name=_CounterName.FORWARD
             )
+            start = time.perf_counter()
             self._forward(endpoint, origin, destination, msg_type, message)
+            self.tracer.record(message, TraceStage.FORWARD, start)
             return
 
         self.received_msg_size_pool.record_value(
@@ -1847,25 +2017,36 @@ class Cell(MessageReceiver, EndpointMonitor):
                 }
             )
 
+            # the reply is traced if the request is
+            trace_id = message.get_header(MessageHeaderKey.TRACE_ID)
+            if trace_id:
+                reply.set_header(MessageHeaderKey.TRACE_ID, trace_id)
+
             if my_conn_url:
                 reply.set_header(MessageHeaderKey.CONN_URL, my_conn_url)
 
-            # invoke outgoing reply filters
-            reply_filters = self.out_reply_filter_reg.find(channel, topic)
-            if reply_filters:
-                self.logger.debug(f"{self.my_info.fqcn}: invoking outgoing reply filters")
-                assert isinstance(reply_filters, list)
-                for f in reply_filters:
-                    assert isinstance(f, _CB)
-                    r = self._try_cb(reply, f.cb, *f.args, **f.kwargs)
-                    if r:
-                        reply = r
-                        break
+            reply = self._filter_outgoing_reply(channel, topic, reply)
             self._send_reply(reply, endpoint)
         else:
             # the message is either a reply or a return for a previous request: handle replies
             self._process_reply(origin, message, msg_type)
 
+    def _filter_outgoing_reply(self, channel: str, topic: str, reply: Message) -> Message:
+        # invoke outgoing reply filters
+        reply_filters = self.out_reply_filter_reg.find(channel, topic)
+        if reply_filters:
+            self.logger.debug(f"{self.my_info.fqcn}: invoking outgoing reply filters")
+            assert isinstance(reply_filters, list)
+            start = time.perf_counter()
+            for f in reply_filters:
+                assert isinstance(f, _CB)
+                r = self._try_cb(reply, f.cb, *f.args, **f.kwargs)
+                if r:
+                    reply = r
+                    break
+            self.tracer.record(reply, TraceStage.FILTER, start)
+        return reply
+
     def _send_reply(self, reply: Message, endpoint: Endpoint):
         self.logger.debug(f"{self.my_info.fqcn}: sending reply back to {endpoint.name}")
         self.logger.debug(f"Reply message: {reply.headers}")
@@ -42,6 +42,10 @@ class MessageHeaderKey:
     SEND_TIME = CELLNET_PREFIX + "send_time"
     RETURN_REASON = CELLNET_PREFIX + "return_reason"
     OPTIONAL = CELLNET_PREFIX + "optional"
+    RELAY_CHANNEL = CELLNET_PREFIX + "relay_channel"
+    RELAY_TOPIC = CELLNET_PREFIX + "relay_topic"
+    RELAY_TARGETS = CELLNET_PREFIX + "relay_targets"
+    TRACE_ID = CELLNET_PREFIX + "trace_id"
 
 
 class ReturnReason:
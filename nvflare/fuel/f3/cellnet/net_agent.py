@@ -53,6 +53,7 @@ _TOPIC_COMM_CONFIG = "comm_config"
 _TOPIC_CONFIG_VARS = "config_vars"
 _TOPIC_PROCESS_INFO = "process_info"
 _TOPIC_HEARTBEAT = "heartbeat"
+_TOPIC_TRACES = "traces"
 
 _ONE_K = bytes([1] * 1024)
 
@@ -242,6 +243,11 @@ class NetAgent:
             topic=_TOPIC_HEARTBEAT,
             cb=self._do_heartbeat,
         )
+        cell.register_request_cb(
+            channel=_CHANNEL,
+            topic=_TOPIC_TRACES,
+            cb=self._do_traces,
+        )
 
         self.heartbeat_thread = None
         self.monitor_thread = None
@@ -898,6 +904,34 @@ class NetAgent:
             return f"{rc}: {err}"
         return reply.payload
 
+    def get_traces(self, target: str):
+        """Get the message trace spans of a cell and its sub cells, or of all cells if no target is specified"""
+        if not target:
+            return self._collect_traces()
+
+        reply = self.cell.send_request(
+            channel=_CHANNEL, topic=_TOPIC_TRACES, request=new_message(), timeout=5.0, target=target
+        )
+        rc = reply.get_header(MessageHeaderKey.RETURN_CODE)
+        if rc != ReturnCode.OK:
+            err = reply.get_header(MessageHeaderKey.ERROR, "")
+            return f"{rc}: {err}"
+        return reply.payload
+
+    def _collect_traces(self) -> List[dict]:
+        spans = self.cell.tracer.get_spans()
+        replies = self._broadcast_to_subs(topic=_TOPIC_TRACES, timeout=5.0)
+        for t, r in replies.items():
+            rc = r.get_header(MessageHeaderKey.RETURN_CODE)
+            if rc == ReturnCode.OK and isinstance(r.payload, list):
+                spans.extend(r.payload)
+            else:
+                self.logger.warning(f"no traces from {t}: {rc}")
+        return spans
+
+    def _do_traces(self, request: Message) -> Union[None, Message]:
+        return new_message(payload=self._collect_traces())
+
     def _do_comm_config(self, request: Message) -> Union[None, Message]:
         info = self.cell.connector_manager.get_config_info()
         return new_message(payload=info)
@@ -11,8 +11,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
+
 from nvflare.fuel.f3.cellnet.fqcn import FQCN
 from nvflare.fuel.f3.cellnet.net_agent import NetAgent
+from nvflare.fuel.f3.cellnet.tracer import to_chrome_trace
 from nvflare.fuel.hci.conn import Connection
 from nvflare.fuel.hci.reg import CommandModule, CommandModuleSpec, CommandSpec
 from nvflare.fuel.hci.server.constants import ConnProps
@@ -142,6 +145,14 @@ class NetManager(CommandModule):
                     handler_func=self._cmd_process_info,
                     visible=self.diagnose,
                 ),
+                CommandSpec(
+                    name="traces",
+                    description="get message traces of a cell and its sub cells (all cells by default) "
+                    "in Chrome trace format",
+                    usage="traces [target]",
+                    handler_func=self._cmd_traces,
+                    visible=self.diagnose,
+                ),
                 CommandSpec(
                     name="stop_cell",
                     description="stop a cell and its children",
@@ -450,6 +461,23 @@ class NetManager(CommandModule):
             return
         self._show_table_dict(conn, reply)
 
+    def _cmd_traces(self, conn: Connection, args: [str]):
+        target = ""
+        if len(args) > 1:
+            target = args[1]
+
+        reply = self.agent.get_traces(target)
+        if isinstance(reply, str):
+            conn.append_error(reply)
+            return
+        if not isinstance(reply, list):
+            conn.append_error(f"expect list but got {type(reply)}")
+            return
+        if not reply:
+            conn.append_string("No traces recorded - set trace_sample_rate in the comm config to enable tracing")
+            return
+        conn.append_string(json.dumps(to_chrome_trace(reply)))
+
     def _cmd_change_root(self, conn: Connection, args: [str]):
         if len(args) < 2:
             cmd_entry = conn.get_prop(ConnProps.CMD_ENTRY)
@@ -0,0 +1,170 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import List
+
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey
+from nvflare.fuel.f3.message import Message
+
+
+class TraceStage:
+
+    ENCODE = "encode"
+    SEND = "send"
+    TRANSFER = "transfer"
+    FORWARD = "forward"
+    DECODE = "decode"
+    FILTER = "filter"
+    HANDLER = "handler"
+    REQUEST = "request"
+
+
+class SpanKey:
+
+    TRACE_ID = "trace_id"
+    STAGE = "stage"
+    CELL = "cell"
+    CHANNEL = "channel"
+    TOPIC = "topic"
+    MSG_TYPE = "msg_type"
+    START = "start"
+    DURATION = "duration"
+
+
+class MessageTracer:
+    """Records the time spent by sampled messages in each stage of the cell.
+
+    A message is sampled by its origin cell, which sets the TRACE_ID header. The reply carries the same
+    trace id back, so a sampled request is traced on every cell it passes in both directions. Each cell
+    keeps its own spans in a ring buffer; they are pulled with the "traces" cellnet command.
+
+    Stage durations are measured with the monotonic clock. The start of a span is in wall clock time so
+    the spans of different cells can be put on the same timeline. The transfer time is the difference
+    between the SEND_TIME header and the receive time, it includes any clock skew between the hosts.
+
+    Args:
+        fqcn: FQCN of the cell
+        sample_rate: fraction of the originated messages to trace, 0 to disable tracing
+        max_spans: number of spans kept
+    """
+
+    def __init__(self, fqcn: str, sample_rate: float, max_spans: int):
+        if sample_rate < 0.0 or sample_rate > 1.0:
+            raise ValueError(f"sample_rate must be in [0, 1] but got {sample_rate}")
+
+        self.fqcn = fqcn
+        self.sample_rate = sample_rate
+        self.spans = deque(maxlen=max(1, max_spans))
+        self.lock = threading.Lock()
+
+    def sample(self, message: Message):
+        """Start tracing a message originated by this cell, based on the sample rate"""
+        if self.sample_rate and random.random() < self.sample_rate:
+            message.set_header(MessageHeaderKey.TRACE_ID, str(uuid.uuid4()))
+        else:
+            message.remove_header(MessageHeaderKey.TRACE_ID)
+
+    def record(self, message: Message, stage: str, start: float, end: float = None):
+        """Record a stage of a traced message, untraced messages are ignored.
+
+        Args:
+            message: the message
+            stage: the stage
+            start: start of the stage, from time.perf_counter()
+            end: end of the stage, now if not specified
+        """
+        trace_id = message.get_header(MessageHeaderKey.TRACE_ID)
+        if not trace_id:
+            return
+
+        now = time.perf_counter()
+        if end is None:
+            end = now
+        self.record_span(trace_id, stage, message, time.time() - (now - start), end - start)
+
+    def record_transfer(self, message: Message):
+        """Record the time a traced message took from the previous cell to this one"""
+        trace_id = message.get_header(MessageHeaderKey.TRACE_ID)
+        send_time = message.get_header(MessageHeaderKey.SEND_TIME)
+        if not trace_id or not send_time:
+            return
+        self.record_span(trace_id, TraceStage.TRANSFER, message, send_time, time.time() - send_time)
+
+    def record_span(self, trace_id: str, stage: str, message: Message, start_time: float, duration: float):
+        span = {
+            SpanKey.TRACE_ID: trace_id,
+            SpanKey.STAGE: stage,
+            SpanKey.CELL: self.fqcn,
+            SpanKey.CHANNEL: message.get_header(MessageHeaderKey.CHANNEL, ""),
+            SpanKey.TOPIC: message.get_header(MessageHeaderKey.TOPIC, ""),
+            SpanKey.MSG_TYPE: message.get_header(MessageHeaderKey.MSG_TYPE, ""),
+            SpanKey.START: start_time,
+            SpanKey.DURATION: max(0.0, duration),
+        }
+        with self.lock:
+            self.spans.append(span)
+
+    def get_spans(self) -> List[dict]:
+        with self.lock:
+            return list(self.spans)
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+
+
+def to_chrome_trace(spans: List[dict]) -> dict:
+    """Convert spans to the Chrome trace event format, readable by chrome://tracing and Perfetto.
+
+    Each cell is shown as a process and each trace as a thread of it.
+
+    Args:
+        spans: spans collected from one or more cells
+
+    Returns: the trace as a JSON compatible dict
+    """
+    pids = {}
+    tids = {}
+    events = []
+    for s in sorted(spans, key=lambda x: x[SpanKey.START]):
+        cell = s[SpanKey.CELL]
+        pid = pids.get(cell)
+        if pid is None:
+            pid = len(pids) + 1
+            pids[cell] = pid
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": cell}})
+
+        trace_id = s[SpanKey.TRACE_ID]
+        tid = tids.get(trace_id)
+        if tid is None:
+            tid = len(tids) + 1
+            tids[trace_id] = tid
+
+        events.append(
+            {
+                "name": s[SpanKey.STAGE],
+                "cat": f"{s[SpanKey.CHANNEL]}:{s[SpanKey.TOPIC]}",
+                "ph": "X",
+                "ts": s[SpanKey.START] * 1e6,
+                "dur": s[SpanKey.DURATION] * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": {SpanKey.TRACE_ID: trace_id, SpanKey.MSG_TYPE: s[SpanKey.MSG_TYPE]},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
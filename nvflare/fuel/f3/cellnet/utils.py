@@ -11,9 +11,23 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
+
 import nvflare.fuel.utils.fobs as fobs
 from nvflare.fuel.f3.cellnet.defs import Encoding, MessageHeaderKey
 from nvflare.fuel.f3.message import Headers, Message
+from nvflare.fuel.f3.stats_pool import StatsPoolManager
+
+_serialization_stats = None
+
+
+def _record_serialization_time(category: str, start: float):
+    global _serialization_stats
+    if _serialization_stats is None:
+        _serialization_stats = StatsPoolManager.get_or_add_time_hist_pool(
+            "cell_payload_serialization", "FOBS serialization time of cell message payloads in secs"
+        )
+    _serialization_stats.record_value(category, time.perf_counter() - start)
 
 
 def make_reply(rc: str, error: str = "", body=None) -> Message:
@@ -50,11 +64,13 @@ def encode_payload(message: Message):
     if not encoding:
         if message.payload is None:
             encoding = Encoding.NONE
-        elif isinstance(message.payload, bytes) or isinstance(message.payload, bytearray):
+        elif isinstance(message.payload, (bytes, bytearray, memoryview)):
             encoding = Encoding.BYTES
         else:
             encoding = Encoding.FOBS
+            start = time.perf_counter()
             message.payload = fobs.dumps(message.payload)
+            _record_serialization_time("encode", start)
         message.set_header(MessageHeaderKey.PAYLOAD_ENCODING, encoding)
 
 
@@ -64,10 +80,12 @@ def decode_payload(message: Message):
         return
 
     if encoding == Encoding.FOBS:
+        start = time.perf_counter()
         message.payload = fobs.loads(message.payload)
+        _record_serialization_time("decode", start)
     elif encoding == Encoding.NONE:
         message.payload = None
-    else:
-        # assume to be bytes
-        pass
+    elif not isinstance(message.payload, bytes):
+        # The cell receives the payload as a buffer of the frame, the apps get bytes
+        message.payload = bytes(message.payload)
     message.remove_header(MessageHeaderKey.PAYLOAD_ENCODING)
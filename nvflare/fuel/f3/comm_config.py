@@ -20,6 +20,25 @@ _comm_config_files = ["comm_config.json", "comm_config.json.default"]
 
 
 DEFAULT_MAX_MSG_SIZE = MAX_PAYLOAD_SIZE
+DEFAULT_STREAM_CHUNK_SIZE = 16 * 1024 * 1024
+DEFAULT_STREAM_WINDOW = 4
+DEFAULT_STREAM_ACK_TIMEOUT = 60.0
+DEFAULT_CONNECTIONS_PER_ENDPOINT = 1
+DEFAULT_BULK_MESSAGE_THRESHOLD = 1024 * 1024
+DEFAULT_COMPRESSION_THRESHOLD = 4096
+DEFAULT_COMPRESSION_MAX_RATIO = 0.9
+DEFAULT_FRAME_WORKERS = 100
+DEFAULT_FRAME_QUEUE_DEPTH = 256
+DEFAULT_FRAME_WORKERS_PER_CONNECTION = 1
+DEFAULT_FRAME_BACKPRESSURE_TIMEOUT = 10.0
+DEFAULT_SEND_QUEUE_HIGH_WATERMARK = 128 * 1024 * 1024
+DEFAULT_SEND_QUEUE_LOW_WATERMARK = 64 * 1024 * 1024
+DEFAULT_SEND_QUEUE_TIMEOUT = 60.0
+DEFAULT_STATS_SAMPLE_INTERVAL = 1
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_SNAPSHOT_INTERVAL = 60.0
+DEFAULT_TRACE_SAMPLE_RATE = 0.0
+DEFAULT_TRACE_MAX_SPANS = 10000
 
 
 class VarName:
@@ -31,6 +50,30 @@ class VarName:
     BACKBONE_CONNECTION_GENERATION = "backbone_conn_gen"
     SUBNET_HEARTBEAT_INTERVAL = "subnet_heartbeat_interval"
     SUBNET_TROUBLE_THRESHOLD = "subnet_trouble_threshold"
+    STREAM_CHUNK_SIZE = "stream_chunk_size"
+    STREAM_WINDOW = "stream_window"
+    STREAM_ACK_TIMEOUT = "stream_ack_timeout"
+    CONNECTIONS_PER_ENDPOINT = "connections_per_endpoint"
+    BULK_MESSAGE_THRESHOLD = "bulk_message_threshold"
+    COMPRESSION = "compression"
+    COMPRESSION_CODECS = "compression_codecs"
+    COMPRESSION_THRESHOLD = "compression_threshold"
+    COMPRESSION_ADAPTIVE = "compression_adaptive"
+    COMPRESSION_MAX_RATIO = "compression_max_ratio"
+    FRAME_WORKERS = "frame_workers"
+    FRAME_QUEUE_DEPTH = "frame_queue_depth"
+    FRAME_WORKERS_PER_CONNECTION = "frame_workers_per_connection"
+    FRAME_BACKPRESSURE_TIMEOUT = "frame_backpressure_timeout"
+    SEND_QUEUE_HIGH_WATERMARK = "send_queue_high_watermark"
+    SEND_QUEUE_LOW_WATERMARK = "send_queue_low_watermark"
+    SEND_QUEUE_TIMEOUT = "send_queue_timeout"
+    STATS_SAMPLE_INTERVAL = "stats_sample_interval"
+    METRICS_HOST = "metrics_host"
+    METRICS_PORT = "metrics_port"
+    METRICS_SNAPSHOT_FILE = "metrics_snapshot_file"
+    METRICS_SNAPSHOT_INTERVAL = "metrics_snapshot_interval"
+    TRACE_SAMPLE_RATE = "trace_sample_rate"
+    TRACE_MAX_SPANS = "trace_max_spans"
 
 
 class CommConfigurator:
@@ -73,3 +116,76 @@ class CommConfigurator:
 
     def get_subnet_trouble_threshold(self, default):
         return ConfigService.get_int_var(VarName.SUBNET_TROUBLE_THRESHOLD, self.config, default)
+
+    def get_stream_chunk_size(self, default=DEFAULT_STREAM_CHUNK_SIZE):
+        return ConfigService.get_int_var(VarName.STREAM_CHUNK_SIZE, self.config, default)
+
+    def get_stream_window(self, default=DEFAULT_STREAM_WINDOW):
+        return ConfigService.get_int_var(VarName.STREAM_WINDOW, self.config, default)
+
+    def get_stream_ack_timeout(self, default=DEFAULT_STREAM_ACK_TIMEOUT):
+        return ConfigService.get_float_var(VarName.STREAM_ACK_TIMEOUT, self.config, default)
+
+    def get_connections_per_endpoint(self, default=DEFAULT_CONNECTIONS_PER_ENDPOINT):
+        return ConfigService.get_int_var(VarName.CONNECTIONS_PER_ENDPOINT, self.config, default)
+
+    def get_bulk_message_threshold(self, default=DEFAULT_BULK_MESSAGE_THRESHOLD):
+        return ConfigService.get_int_var(VarName.BULK_MESSAGE_THRESHOLD, self.config, default)
+
+    def compression_enabled(self, default=False):
+        return ConfigService.get_bool_var(VarName.COMPRESSION, self.config, default)
+
+    def get_compression_codecs(self, default=None):
+        """Comma-separated names of the codecs to use, all the available codecs if not configured"""
+        return ConfigService.get_str_var(VarName.COMPRESSION_CODECS, self.config, default)
+
+    def get_compression_threshold(self, default=DEFAULT_COMPRESSION_THRESHOLD):
+        return ConfigService.get_int_var(VarName.COMPRESSION_THRESHOLD, self.config, default)
+
+    def compression_adaptive(self, default=True):
+        return ConfigService.get_bool_var(VarName.COMPRESSION_ADAPTIVE, self.config, default)
+
+    def get_compression_max_ratio(self, default=DEFAULT_COMPRESSION_MAX_RATIO):
+        return ConfigService.get_float_var(VarName.COMPRESSION_MAX_RATIO, self.config, default)
+
+    def get_frame_workers(self, default=DEFAULT_FRAME_WORKERS):
+        return ConfigService.get_int_var(VarName.FRAME_WORKERS, self.config, default)
+
+    def get_frame_queue_depth(self, default=DEFAULT_FRAME_QUEUE_DEPTH):
+        return ConfigService.get_int_var(VarName.FRAME_QUEUE_DEPTH, self.config, default)
+
+    def get_frame_workers_per_connection(self, default=DEFAULT_FRAME_WORKERS_PER_CONNECTION):
+        return ConfigService.get_int_var(VarName.FRAME_WORKERS_PER_CONNECTION, self.config, default)
+
+    def get_frame_backpressure_timeout(self, default=DEFAULT_FRAME_BACKPRESSURE_TIMEOUT):
+        return ConfigService.get_float_var(VarName.FRAME_BACKPRESSURE_TIMEOUT, self.config, default)
+
+    def get_send_queue_high_watermark(self, default=DEFAULT_SEND_QUEUE_HIGH_WATERMARK):
+        return ConfigService.get_int_var(VarName.SEND_QUEUE_HIGH_WATERMARK, self.config, default)
+
+    def get_send_queue_low_watermark(self, default=DEFAULT_SEND_QUEUE_LOW_WATERMARK):
+        return ConfigService.get_int_var(VarName.SEND_QUEUE_LOW_WATERMARK, self.config, default)
+
+    def get_send_queue_timeout(self, default=DEFAULT_SEND_QUEUE_TIMEOUT):
+        return ConfigService.get_float_var(VarName.SEND_QUEUE_TIMEOUT, self.config, default)
+
+    def get_stats_sample_interval(self, default=DEFAULT_STATS_SAMPLE_INTERVAL):
+        return ConfigService.get_int_var(VarName.STATS_SAMPLE_INTERVAL, self.config, default)
+
+    def get_metrics_host(self, default=DEFAULT_METRICS_HOST):
+        return ConfigService.get_str_var(VarName.METRICS_HOST, self.config, default)
+
+    def get_metrics_port(self, default=0):
+        return ConfigService.get_int_var(VarName.METRICS_PORT, self.config, default)
+
+    def get_metrics_snapshot_file(self, default=""):
+        return ConfigService.get_str_var(VarName.METRICS_SNAPSHOT_FILE, self.config, default)
+
+    def get_metrics_snapshot_interval(self, default=DEFAULT_METRICS_SNAPSHOT_INTERVAL):
+        return ConfigService.get_float_var(VarName.METRICS_SNAPSHOT_INTERVAL, self.config, default)
+
+    def get_trace_sample_rate(self, default=DEFAULT_TRACE_SAMPLE_RATE):
+        return ConfigService.get_float_var(VarName.TRACE_SAMPLE_RATE, self.config, default)
+
+    def get_trace_max_spans(self, default=DEFAULT_TRACE_MAX_SPANS):
+        return ConfigService.get_int_var(VarName.TRACE_MAX_SPANS, self.config, default)
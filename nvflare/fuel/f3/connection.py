@@ -11,11 +11,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
 import logging
 import threading
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Union
+from typing import List, Union
 
 from nvflare.fuel.f3.drivers.connector_info import ConnectorInfo, Mode
 from nvflare.fuel.f3.drivers.driver_params import DriverParams
@@ -26,6 +27,9 @@ conn_count = 0
 
 BytesAlike = Union[bytes, bytearray, memoryview]
 
+# Interval in seconds to check if a busy frame receiver can take more frames
+BUSY_CHECK_INTERVAL = 0.01
+
 
 def create_connection_name():
     global lock, conn_count
@@ -53,6 +57,10 @@ class FrameReceiver(ABC):
         """
         pass
 
+    def is_busy(self) -> bool:
+        """Check if the receiver can't take more frames for now, the reader should pause"""
+        return False
+
 
 class Connection(ABC):
     """FCI connection spec. A connection is used to transfer opaque frames"""
@@ -93,6 +101,49 @@ class Connection(ABC):
         """
         pass
 
+    def reserve_send(self, size: int):
+        """Reserve the room for a frame before it's sent with send_frame or send_frame_parts.
+
+        It's called without holding the connection so a congested connection only blocks the senders
+        waiting for room, not the ACKs. Drivers queueing outgoing frames should override this method to block
+        while the queue is full, the reserved size is returned once the frame is written.
+
+        Args:
+            size: Size of the frame in bytes
+
+        Raises:
+            CommError: If the connection is closed or congested for too long
+        """
+        pass
+
+    def send_frame_parts(self, parts: List[BytesAlike]):
+        """Send a SFM frame given as a list of buffers, like prefix, headers and payload.
+
+        Drivers supporting vectored I/O should override this method to send the buffers
+        without joining them. This default implementation joins the parts into one frame.
+
+        Args:
+            parts: The buffers of the frame in order
+
+        Raises:
+            CommError: If any error happens while sending the frame
+        """
+        self.send_frame(b"".join(parts))
+
+    def send_control_frame(self, frame: BytesAlike):
+        """Send a small control frame, like an ACK.
+
+        It's called by the reader of the connection so it must not block on the flow control of the
+        driver. Drivers queueing outgoing frames should override this method to bypass their send budget.
+
+        Args:
+            frame: The frame to be sent
+
+        Raises:
+            CommError: If any error happens while sending the frame
+        """
+        self.send_frame(frame)
+
     def register_frame_receiver(self, receiver: FrameReceiver):
         """Register frame receiver
 
@@ -116,6 +167,15 @@ class Connection(ABC):
         else:
             log.error(f"Frame receiver not registered for {self}")
 
+    async def pause_while_busy(self):
+        """Pause the reader running in an event loop while the frame receiver is busy.
+
+        The event loop can't be blocked, the reader stops reading instead so the peer is slowed down by the transport.
+        """
+
+        while self.frame_receiver and self.frame_receiver.is_busy():
+            await asyncio.sleep(BUSY_CHECK_INTERVAL)
+
     def __str__(self):
 
         if self.state != ConnState.CONNECTED:
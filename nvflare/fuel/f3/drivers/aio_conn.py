@@ -13,6 +13,7 @@
 # limitations under the License.
 import logging
 from asyncio import CancelledError, IncompleteReadError, StreamReader, StreamWriter
+from typing import List
 
 from nvflare.fuel.f3.comm_error import CommError
 from nvflare.fuel.f3.connection import BytesAlike, Connection
@@ -20,6 +21,7 @@ from nvflare.fuel.f3.drivers.aio_context import AioContext
 from nvflare.fuel.f3.drivers.connector_info import ConnectorInfo
 from nvflare.fuel.f3.drivers.driver_params import DriverParams
 from nvflare.fuel.f3.drivers.net_utils import MAX_FRAME_SIZE
+from nvflare.fuel.f3.drivers.send_budget import new_send_budget
 from nvflare.fuel.f3.sfm.prefix import PREFIX_LEN, Prefix
 from nvflare.fuel.hci.security import get_certificate_common_name
 
@@ -42,12 +44,15 @@ class AioConnection(Connection):
         self.closing = False
         self.secure = secure
         self.conn_props = self._get_aio_properties()
+        # Bytes of the frames waiting in the event loop to be written
+        self.send_budget = new_send_budget(self.conn_props.get(DriverParams.PEER_ADDR.value, self.name))
 
     def get_conn_properties(self) -> dict:
         return self.conn_props
 
     def close(self):
         self.closing = True
+        self.send_budget.close()
 
         if not self.writer:
             return
@@ -55,17 +60,25 @@ class AioConnection(Connection):
         self.writer.close()
         self.aio_ctx.run_coro(self.writer.wait_closed())
 
+    def reserve_send(self, size: int):
+        self.send_budget.acquire(size)
+
     def send_frame(self, frame: BytesAlike):
-        try:
-            self.aio_ctx.run_coro(self._async_send_frame(frame))
-        except Exception as ex:
-            log.error(f"Error calling send coroutine for connection {self}: {ex}")
+        self._send_frame_parts([frame], len(frame))
+
+    def send_frame_parts(self, parts: List[BytesAlike]):
+        self._send_frame_parts(parts, sum(len(part) for part in parts))
+
+    def send_control_frame(self, frame: BytesAlike):
+        # Not counted in the send budget, it's never blocked
+        self._send_frame_parts([frame], 0)
 
     async def read_loop(self):
         try:
             while not self.closing:
                 frame = await self._async_read_frame()
                 self.process_frame(frame)
+                await self.pause_while_busy()
 
         except IncompleteReadError:
             if log.isEnabledFor(logging.DEBUG):
@@ -78,12 +91,29 @@ class AioConnection(Connection):
 
     # Internal methods
 
-    async def _async_send_frame(self, frame: BytesAlike):
+    def _send_frame_parts(self, parts: List[BytesAlike], size: int):
+        if self.closing:
+            self.send_budget.release(size)
+            raise CommError(CommError.CLOSED, f"Connection {self} is closed")
+
+        try:
+            self.aio_ctx.run_coro(self._async_send_frame_parts(parts, size))
+        except Exception as ex:
+            self.send_budget.release(size)
+            raise CommError(CommError.ERROR, f"Error calling send coroutine for connection {self}: {ex}")
+
+    async def _async_send_frame_parts(self, parts: List[BytesAlike], size: int):
         try:
-            self.writer.write(frame)
+            self.writer.writelines(parts)
             await self.writer.drain()
         except Exception as ex:
-            log.error(f"Error sending frame for connection {self}: {ex}")
+            if not self.closing:
+                # The frame is written after send_frame returns so the error can't be raised to the sender.
+                # The connection is closed instead, the following frames fail over to other connections.
+                log.error(f"Error sending frame for connection {self}, closing it: {ex}")
+                self.close()
+        finally:
+            self.send_budget.release(size)
 
     async def _async_read_frame(self):
 
@@ -99,7 +129,10 @@ class AioConnection(Connection):
 
         remaining = await self.reader.readexactly(prefix.length - PREFIX_LEN)
 
-        return prefix_buf + remaining
+        # Frame is writable so payload can be used in-place, e.g. arrays deserialized by FOBS
+        frame = bytearray(prefix_buf)
+        frame += remaining
+        return frame
 
     def _get_aio_properties(self) -> dict:
 
@@ -18,6 +18,15 @@ import threading
 import time
 
 
+def in_event_loop() -> bool:
+    """Check if the caller is running in an asyncio event loop, which must never be blocked"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
 class AioContext:
     """Asyncio context. Used to share the asyncio event loop among multiple classes"""
 
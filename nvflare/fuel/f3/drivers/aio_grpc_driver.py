@@ -30,6 +30,7 @@ from nvflare.fuel.f3.drivers.grpc.streamer_pb2_grpc import (
     StreamerStub,
     add_StreamerServicer_to_server,
 )
+from nvflare.fuel.f3.drivers.send_budget import new_send_budget
 
 from .base_driver import BaseDriver
 from .driver_params import DriverCap, DriverParams
@@ -64,12 +65,15 @@ class AioStreamSession(Connection):
         self.context = context  # for server side
         self.channel = channel  # for client side
         self.lock = threading.Lock()
+        # Bytes of the frames waiting in the output queue
+        self.send_budget = new_send_budget(conn_props.get(DriverParams.PEER_ADDR.value, self.name))
 
     def get_conn_properties(self) -> dict:
         return self.conn_props
 
     def close(self):
         self.closing = True
+        self.send_budget.close()
         with self.lock:
             if self.context:
                 self.aio_ctx.run_coro(self.context.abort(grpc.StatusCode.CANCELLED, "service closed"))
@@ -78,15 +82,34 @@ class AioStreamSession(Connection):
                 self.aio_ctx.run_coro(self.channel.close())
                 self.channel = None
 
+    def reserve_send(self, size: int):
+        self.send_budget.acquire(size)
+
     def send_frame(self, frame: BytesAlike):
+        self._send_frame(frame, len(frame))
+
+    def send_control_frame(self, frame: BytesAlike):
+        # Not counted in the send budget, it's never blocked
+        self._send_frame(frame, 0)
+
+    def _send_frame(self, frame: BytesAlike, size: int):
+        if self.closing:
+            self.send_budget.release(size)
+            raise CommError(CommError.CLOSED, f"Connection {self} is closed")
+
         try:
             AioStreamSession.seq_num += 1
             seq = AioStreamSession.seq_num
             f = Frame(seq=seq, data=bytes(frame))
-            self.aio_ctx.run_coro(self.oq.put(f))
+            # The reserved size is returned once the frame is taken from the queue
+            self.aio_ctx.run_coro(self.oq.put((f, size)))
         except Exception as ex:
-            if not self.closing:
-                raise CommError(CommError.ERROR, f"Error sending frame: {ex}")
+            self.send_budget.release(size)
+            raise CommError(CommError.ERROR, f"Error sending frame: {ex}")
+
+    def send_frame_parts(self, parts: List[BytesAlike]):
+        # Protobuf requires bytes, the parts are joined into the bytes directly to avoid another copy
+        self.send_frame(b"".join(parts))
 
     async def read_loop(self, msg_iter):
         ct = threading.current_thread()
@@ -96,6 +119,7 @@ class AioStreamSession(Connection):
                 if self.closing:
                     return
                 self.process_frame(f.data)
+                await self.pause_while_busy()
 
         except grpc.aio.AioRpcError as error:
             if not self.closing:
@@ -118,13 +142,16 @@ class AioStreamSession(Connection):
         self.logger.debug(f"{self}: generate_output in thread {ct.name}")
         try:
             while True:
-                item = await self.oq.get()
+                item, size = await self.oq.get()
                 yield item
+                self.send_budget.release(size)
         except Exception as ex:
             if self.closing:
                 self.logger.debug(f"{self}: connection closed by {type(ex)}: {ex}")
             else:
                 self.logger.debug(f"{self}: generate_output exception {type(ex)}: {ex}")
+                # Closed so the following frames fail over to other connections
+                self.close()
             self.logger.debug(traceback.format_exc())
 
         self.logger.debug(f"{self}: done generate_output")
@@ -140,10 +167,14 @@ class Servicer(StreamerServicer):
         self.logger.debug("started _write_loop")
         try:
             while True:
-                f = await connection.oq.get()
+                f, size = await connection.oq.get()
                 await grpc_context.write(f)
+                connection.send_budget.release(size)
         except Exception as ex:
             self.logger.debug(f"_write_loop except: {type(ex)}: {ex}")
+            if not connection.closing:
+                # Closed so the following frames fail over to other connections
+                connection.close()
         self.logger.debug("finished _write_loop")
 
     async def Stream(self, request_iterator, context):
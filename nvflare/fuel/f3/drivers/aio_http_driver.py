@@ -26,6 +26,7 @@ from nvflare.fuel.f3.drivers.base_driver import BaseDriver
 from nvflare.fuel.f3.drivers.driver import ConnectorInfo
 from nvflare.fuel.f3.drivers.driver_params import DriverCap, DriverParams
 from nvflare.fuel.f3.drivers.net_utils import MAX_FRAME_SIZE, get_tcp_urls
+from nvflare.fuel.f3.drivers.send_budget import new_send_budget
 from nvflare.fuel.f3.sfm.conn_manager import Mode
 from nvflare.fuel.hci.security import get_certificate_common_name
 
@@ -42,16 +43,37 @@ class WsConnection(Connection):
         self.closing = False
         self.secure = secure
         self.conn_props = self._get_socket_properties()
+        # Bytes of the frames waiting in the event loop to be written
+        self.send_budget = new_send_budget(self.conn_props.get(DriverParams.PEER_ADDR.value, self.name))
 
     def get_conn_properties(self) -> dict:
         return self.conn_props
 
     def close(self):
         self.closing = True
+        self.send_budget.close()
         self.aio_context.run_coro(self.websocket.close())
 
+    def reserve_send(self, size: int):
+        self.send_budget.acquire(size)
+
     def send_frame(self, frame: BytesAlike):
-        self.aio_context.run_coro(self._async_send_frame(frame))
+        self._send_frame(frame, len(frame))
+
+    def send_control_frame(self, frame: BytesAlike):
+        # Not counted in the send budget, it's never blocked
+        self._send_frame(frame, 0)
+
+    def _send_frame(self, frame: BytesAlike, size: int):
+        if self.closing:
+            self.send_budget.release(size)
+            raise CommError(CommError.CLOSED, f"Connection {self} is closed")
+
+        try:
+            self.aio_context.run_coro(self._async_send_frame(frame, size))
+        except Exception as ex:
+            self.send_budget.release(size)
+            raise CommError(CommError.ERROR, f"Error calling send coroutine for connection {self}: {ex}")
 
     def _get_socket_properties(self) -> dict:
         conn_props = {}
@@ -78,13 +100,18 @@ class WsConnection(Connection):
 
         return conn_props
 
-    async def _async_send_frame(self, frame: BytesAlike):
+    async def _async_send_frame(self, frame: BytesAlike, size: int):
         try:
             await self.websocket.send(frame)
             # This is to yield control. See bug: https://github.com/aaugustin/websockets/issues/865
             await asyncio.sleep(0)
         except Exception as ex:
-            log.error(f"Error sending frame for connection {self}: {ex}")
+            if not self.closing:
+                # The error can't be raised to the sender, the connection is closed so the following frames fail over
+                log.error(f"Error sending frame for connection {self}, closing it: {ex}")
+                self.close()
+        finally:
+            self.send_budget.release(size)
 
 
 class AioHttpDriver(BaseDriver):
@@ -114,6 +141,11 @@ class AioHttpDriver(BaseDriver):
         self.close_all()
 
         if self.stop_event:
+            # The future belongs to the event loop, it must be resolved in the loop to wake it up
+            self.aio_context.get_event_loop().call_soon_threadsafe(self._stop)
+
+    def _stop(self):
+        if not self.stop_event.done():
             self.stop_event.set_result(None)
 
     @staticmethod
@@ -181,3 +213,4 @@ class AioHttpDriver(BaseDriver):
             # Reading from websocket and call receiver CB
             frame = await conn.websocket.recv()
             conn.process_frame(frame)
+            await conn.pause_while_busy()
@@ -0,0 +1,144 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+from nvflare.fuel.f3.comm_config import CommConfigurator
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.drivers.aio_context import in_event_loop
+from nvflare.fuel.f3.metrics_exporter import register_gauge
+from nvflare.fuel.f3.stats_pool import StatsPoolManager
+from nvflare.fuel.utils.stats_utils import HistPool
+
+SEND_QUEUE_STATS = "sfm_send_queue"
+SEND_QUEUE_GAUGE = "sfm_send_queue_bytes"
+
+_budgets = weakref.WeakSet()
+
+
+class SendBudget:
+    """Byte budget of the frames queued in the event loop for sending on a connection
+
+    The sender acquires the size of the frame before queueing it and the event loop releases it once
+    the frame is written. When the queued bytes exceed the high watermark, the connection is congested
+    and senders are blocked until the queued bytes drop to the low watermark. A sender that can't
+    queue the frame within the timeout gets a CommError, with a timeout of 0 senders fail immediately.
+
+    A frame is always accepted if nothing is queued so frames larger than the high watermark can be sent.
+    The budget is acquired before the sender takes the connection so a blocked sender never holds it.
+    Callers in the event loop are never blocked. Control frames, like ACKs, are not counted.
+
+    Args:
+        peer: Peer of the connection, the stats category
+        high_watermark: Queued bytes to start blocking senders
+        low_watermark: Queued bytes to resume the senders
+        timeout: Maximum time in seconds a sender is blocked
+        stats: Optional histogram pool to record the queued size
+    """
+
+    def __init__(
+        self, peer: str, high_watermark: int, low_watermark: int, timeout: float, stats: Optional[HistPool] = None
+    ):
+        if low_watermark > high_watermark:
+            raise ValueError(f"low watermark {low_watermark} is greater than high watermark {high_watermark}")
+
+        self.peer = peer
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.timeout = timeout
+        self.stats = stats
+        self.queued = 0
+        self.congested = False
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def acquire(self, size: int):
+        """Reserve the budget for a frame, block if the connection is congested
+
+        Raises:
+            CommError: If the connection is closed or still congested after the timeout
+        """
+
+        with self.cond:
+            if self.queued and self.queued + size > self.high_watermark:
+                self.congested = True
+
+            if self.congested and not in_event_loop():
+                deadline = time.time() + self.timeout
+                while self.congested and not self.closed:
+                    remaining = deadline - time.time()
+                    if remaining <= 0 or not self.cond.wait(remaining):
+                        raise CommError(
+                            CommError.TIMEOUT,
+                            f"Connection to {self.peer} is congested, {self.queued} bytes queued for {self.timeout} secs",
+                        )
+
+            if self.closed:
+                raise CommError(CommError.CLOSED, f"Connection to {self.peer} is closed")
+
+            self.queued += size
+            queued = self.queued
+
+        if self.stats:
+            self.stats.record_value(self.peer, queued / (1024 * 1024))
+
+    def release(self, size: int):
+        """Return the budget of a frame written or dropped"""
+
+        with self.cond:
+            self.queued = max(0, self.queued - size)
+            if self.congested and self.queued <= self.low_watermark:
+                self.congested = False
+                self.cond.notify_all()
+
+    def close(self):
+        """Wake up the blocked senders, they get a CommError"""
+
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def get_queued(self) -> int:
+        return self.queued
+
+
+def _get_queued_bytes() -> Dict[str, int]:
+    queued = {}
+    for budget in list(_budgets):
+        if not budget.closed:
+            queued[budget.peer] = queued.get(budget.peer, 0) + budget.get_queued()
+    return queued
+
+
+def new_send_budget(peer: str) -> SendBudget:
+    """Create the send budget of a connection with the watermarks from the comm config"""
+
+    with StatsPoolManager.lock:
+        stats = StatsPoolManager.get_pool(SEND_QUEUE_STATS)
+        if not stats:
+            stats = StatsPoolManager.add_msg_size_pool(SEND_QUEUE_STATS, "SFM bytes queued for sending per peer")
+            register_gauge(SEND_QUEUE_GAUGE, "SFM bytes queued for sending per peer", _get_queued_bytes)
+
+    config = CommConfigurator()
+    budget = SendBudget(
+        peer,
+        config.get_send_queue_high_watermark(),
+        config.get_send_queue_low_watermark(),
+        config.get_send_queue_timeout(),
+        stats,
+    )
+    _budgets.add(budget)
+    return budget
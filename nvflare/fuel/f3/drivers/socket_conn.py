@@ -13,8 +13,9 @@
 # limitations under the License.
 import logging
 import socket
+import ssl
 from socketserver import BaseRequestHandler
-from typing import Any, Union
+from typing import Any, List, Union
 
 from nvflare.fuel.f3.comm_error import CommError
 from nvflare.fuel.f3.connection import BytesAlike, Connection
@@ -55,6 +56,28 @@ class SocketConnection(Connection):
         except Exception as ex:
             raise CommError(CommError.ERROR, f"Error sending frame: {ex}")
 
+    def send_frame_parts(self, parts: List[BytesAlike]):
+        try:
+            if isinstance(self.sock, ssl.SSLSocket):
+                # SSL sockets don't support sendmsg, buffers are sent one by one without joining
+                for part in parts:
+                    self.sock.sendall(part)
+            else:
+                self._send_vectored(parts)
+        except Exception as ex:
+            raise CommError(CommError.ERROR, f"Error sending frame: {ex}")
+
+    def _send_vectored(self, parts: List[BytesAlike]):
+        views = [memoryview(part) for part in parts if len(part)]
+        while views:
+            n = self.sock.sendmsg(views)
+            # Drop the buffers fully sent and advance the partially sent one
+            while views and n >= len(views[0]):
+                n -= len(views[0])
+                views.pop(0)
+            if n:
+                views[0] = views[0][n:]
+
     def read_loop(self):
         try:
             self.read_frame_loop()
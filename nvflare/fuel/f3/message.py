@@ -75,6 +75,19 @@ class Message:
 
 
 class MessageReceiver(ABC):
+
+    # The payload of a received message is bytes. Receivers which can handle the payload as a buffer of the
+    # received frame (memoryview or bytearray) set this to True to avoid the copy.
+    accepts_buffers = False
+
     @abstractmethod
     def process_message(self, endpoint: Endpoint, connection: Connection, app_id: int, message: Message):
         pass
+
+    def is_reply(self, headers: dict) -> bool:
+        """Check if the message with these headers is a reply to a request sent by this side.
+
+        Replies are processed right away instead of behind the received requests of the connection,
+        because the callback of a request may be waiting for a reply on the same connection.
+        """
+        return False
@@ -0,0 +1,328 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import logging
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from nvflare.fuel.f3.comm_config import CommConfigurator
+from nvflare.fuel.f3.stats_pool import StatsPoolManager
+from nvflare.fuel.utils.stats_utils import CounterPool, HistPool
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+METRIC_PREFIX = "nvflare_"
+
+log = logging.getLogger(__name__)
+
+
+class _Gauge:
+    def __init__(self, description: str):
+        self.description = description
+        self.providers = []
+
+
+_gauges: Dict[str, _Gauge] = {}
+_gauge_lock = threading.Lock()
+
+_exporter = None
+_exporter_refs = 0
+_exporter_lock = threading.Lock()
+
+
+def register_gauge(name: str, description: str, provider: Callable[[], Dict[str, float]]):
+    """Register a provider of gauge values, like queue depths.
+
+    The provider is called when the metrics are read, it must be fast and must not block.
+    Values of the providers registered with the same name are added up by key.
+
+    Args:
+        name: name of the gauge
+        description: description of the gauge
+        provider: returns the current values by key (peer, connection etc.)
+    """
+    with _gauge_lock:
+        gauge = _gauges.get(name)
+        if not gauge:
+            gauge = _Gauge(description)
+            _gauges[name] = gauge
+        if provider not in gauge.providers:
+            gauge.providers.append(provider)
+
+
+def unregister_gauge(name: str, provider: Callable[[], Dict[str, float]]):
+    with _gauge_lock:
+        gauge = _gauges.get(name)
+        if gauge and provider in gauge.providers:
+            gauge.providers.remove(provider)
+            if not gauge.providers:
+                _gauges.pop(name)
+
+
+def collect_gauges() -> dict:
+    """Get the current values of all the gauges
+
+    Returns: a dict of: gauge name => {"description": description, "values": {key: value}}
+    """
+    with _gauge_lock:
+        gauges = {name: (g.description, list(g.providers)) for name, g in _gauges.items()}
+
+    result = {}
+    for name, (description, providers) in gauges.items():
+        values = {}
+        for provider in providers:
+            try:
+                for k, v in provider().items():
+                    values[k] = values.get(k, 0) + v
+            except Exception as ex:
+                log.debug(f"gauge {name} provider error: {ex}")
+        result[name] = {"description": description, "values": values}
+    return result
+
+
+def _metric_name(name: str) -> str:
+    return METRIC_PREFIX + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _split_pool_name(name: str) -> (str, str):
+    """Pools of different cells in the same process are named pool@fqcn, the fqcn becomes a label"""
+    base, _, scope = name.partition("@")
+    return base, scope
+
+
+def _hist_lines(metric: str, pool: HistPool, scope: str) -> List[str]:
+    lines = []
+    for cat, bins in sorted(pool.cat_bins.items()):
+        labels = {"category": cat}
+        if scope:
+            labels["scope"] = scope
+        count = 0
+        total = 0.0
+        # The bins are [M1, M2), buckets are cumulative up to the upper mark
+        for i, b in enumerate(bins):
+            if b:
+                count += b.count
+                total += b.total
+            le = str(pool.marks[i]) if i < len(pool.marks) else "+Inf"
+            lines.append(f"{metric}_bucket{_labels({**labels, 'le': le})} {count}")
+        lines.append(f"{metric}_count{_labels(labels)} {count}")
+        lines.append(f"{metric}_sum{_labels(labels)} {total}")
+    return lines
+
+
+def _counter_lines(metric: str, pool: CounterPool, scope: str) -> List[str]:
+    lines = []
+    for cat, counters in sorted(pool.cat_counters.items()):
+        for counter_name, value in sorted(counters.items()):
+            labels = {"category": cat, "counter": counter_name}
+            if scope:
+                labels["scope"] = scope
+            lines.append(f"{metric}_total{_labels(labels)} {value}")
+    return lines
+
+
+def format_openmetrics() -> str:
+    """Format all the stats pools and gauges in OpenMetrics text format"""
+    with StatsPoolManager.lock:
+        pools = list(StatsPoolManager.pools.items())
+
+    # Pools with the same base name are one metric family
+    families = {}
+    for name, pool in sorted(pools):
+        base, scope = _split_pool_name(name)
+        families.setdefault(base, []).append((scope, pool))
+
+    lines = []
+    for base, members in families.items():
+        metric = _metric_name(base)
+        first = members[0][1]
+        if isinstance(first, HistPool):
+            lines.append(f"# TYPE {metric} histogram")
+        elif isinstance(first, CounterPool):
+            lines.append(f"# TYPE {metric} counter")
+        else:
+            continue
+
+        if first.description:
+            lines.append(f"# HELP {metric} {_escape(first.description)}")
+        for scope, pool in members:
+            if isinstance(pool, HistPool) and isinstance(first, HistPool):
+                lines.extend(_hist_lines(metric, pool, scope))
+            elif isinstance(pool, CounterPool) and isinstance(first, CounterPool):
+                lines.extend(_counter_lines(metric, pool, scope))
+
+    for name, gauge in sorted(collect_gauges().items()):
+        metric = _metric_name(name)
+        lines.append(f"# TYPE {metric} gauge")
+        if gauge["description"]:
+            lines.append(f"# HELP {metric} {_escape(gauge['description'])}")
+        for key, value in sorted(gauge["values"].items()):
+            lines.append(f"{metric}{_labels({'key': key})} {value}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def get_snapshot() -> dict:
+    return {"time": time.time(), "pools": StatsPoolManager.to_dict(), "gauges": collect_gauges()}
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = format_openmetrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        log.debug(fmt % args)
+
+
+class MetricsExporter:
+    """Exports the stats pools and gauges of the process.
+
+    The metrics are served as OpenMetrics text on a local HTTP port and written periodically as a JSON snapshot.
+    Both run in their own daemon threads. The pools record without lock so reading them doesn't block the
+    communication threads.
+
+    Args:
+        host: host to listen on, local only by default
+        port: HTTP port, 0 to disable the HTTP server
+        snapshot_file: path of the JSON snapshot file, empty to disable the snapshots
+        snapshot_interval: seconds between snapshots
+    """
+
+    def __init__(self, host: str, port: int, snapshot_file: str, snapshot_interval: float):
+        self.host = host
+        self.port = port
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.server = None
+        self.stopped = threading.Event()
+        self.snapshot_thread = None
+
+    def start(self):
+        if self.port:
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+                self.server.daemon_threads = True
+                threading.Thread(target=self.server.serve_forever, name="metrics_http", daemon=True).start()
+                log.info(f"Metrics are served on http://{self.host}:{self.server.server_port}/metrics")
+            except OSError as ex:
+                # Another process of the same site may have the port
+                log.warning(f"Can't serve metrics on {self.host}:{self.port}: {ex}")
+                self.server = None
+
+        if self.snapshot_file:
+            self.snapshot_thread = threading.Thread(target=self._write_snapshots, name="metrics_snapshot", daemon=True)
+            self.snapshot_thread.start()
+
+    def get_port(self) -> int:
+        return self.server.server_port if self.server else 0
+
+    def stop(self):
+        self.stopped.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.snapshot_thread:
+            self.snapshot_thread.join()
+
+    def write_snapshot(self):
+        tmp_file = self.snapshot_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(get_snapshot(), f)
+        os.replace(tmp_file, self.snapshot_file)
+
+    def _write_snapshots(self):
+        while not self.stopped.wait(self.snapshot_interval):
+            try:
+                self.write_snapshot()
+            except Exception as ex:
+                log.warning(f"Failed to write metrics snapshot {self.snapshot_file}: {ex}")
+
+        # Last snapshot on shutdown
+        try:
+            self.write_snapshot()
+        except Exception as ex:
+            log.warning(f"Failed to write metrics snapshot {self.snapshot_file}: {ex}")
+
+
+def start_metrics_exporter(fqcn: str) -> Optional[MetricsExporter]:
+    """Start the metrics exporter of the process if configured, only the first call starts it.
+
+    Every call returning the exporter must be matched by a call to stop_metrics_exporter,
+    the exporter is stopped when the last user stops it.
+    The snapshot file name may contain {fqcn} and {pid} to be unique per process.
+
+    Args:
+        fqcn: FQCN of the cell starting the exporter
+
+    Returns: the exporter of the process, None if it's not configured
+    """
+    global _exporter, _exporter_refs
+
+    config = CommConfigurator()
+    port = config.get_metrics_port()
+    snapshot_file = config.get_metrics_snapshot_file()
+    if not port and not snapshot_file:
+        return None
+
+    with _exporter_lock:
+        if _exporter:
+            _exporter_refs += 1
+            return _exporter
+
+        if snapshot_file:
+            snapshot_file = snapshot_file.format(fqcn=fqcn, pid=os.getpid())
+        _exporter = MetricsExporter(
+            config.get_metrics_host(), port, snapshot_file, config.get_metrics_snapshot_interval()
+        )
+        _exporter.start()
+        _exporter_refs = 1
+        return _exporter
+
+
+def stop_metrics_exporter(exporter: MetricsExporter):
+    """Release the exporter returned by start_metrics_exporter, it's stopped when no one uses it anymore.
+
+    Args:
+        exporter: the exporter to release
+    """
+    global _exporter, _exporter_refs
+
+    with _exporter_lock:
+        if _exporter is exporter:
+            _exporter_refs -= 1
+            if _exporter_refs > 0:
+                return
+            _exporter = None
+    exporter.stop()
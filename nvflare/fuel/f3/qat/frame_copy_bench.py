@@ -0,0 +1,119 @@
+# Copyright (c) 2021-2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import List
+
+from nvflare.fuel.f3.connection import BytesAlike, Connection
+from nvflare.fuel.f3.drivers.connector_info import ConnectorInfo, Mode
+from nvflare.fuel.f3.endpoint import Endpoint
+from nvflare.fuel.f3.sfm.constants import Types
+from nvflare.fuel.f3.sfm.prefix import PREFIX_LEN, Prefix
+from nvflare.fuel.f3.sfm.sfm_conn import SfmConnection
+from nvflare.fuel.hci.table import Table
+
+MB = 1024 * 1024
+
+
+class _NullDriverConnection(Connection):
+    """A connection that drops the frames, only the SFM framing cost is measured"""
+
+    def __init__(self):
+        super().__init__(ConnectorInfo("Bench", None, {}, Mode.ACTIVE, 0, 0, False, False))
+
+    def get_conn_properties(self) -> dict:
+        return {}
+
+    def close(self):
+        pass
+
+    def send_frame(self, frame: BytesAlike):
+        pass
+
+    def send_frame_parts(self, parts: List[BytesAlike]):
+        pass
+
+
+def _legacy_send(headers_bytes: bytes, payload: bytes):
+    """Frame assembly before vectored send: prefix, headers and payload copied into one buffer"""
+    length = PREFIX_LEN + len(headers_bytes) + len(payload)
+    buffer = bytearray(length)
+    Prefix(length, len(headers_bytes), Types.DATA, 0, 0, 1, 1, 1).to_buffer(buffer, 0)
+    buffer[PREFIX_LEN:] = headers_bytes
+    buffer[PREFIX_LEN + len(headers_bytes) :] = payload
+    return buffer
+
+
+def _legacy_receive(frame: bytearray, header_len: int):
+    return frame[PREFIX_LEN + header_len :]
+
+
+def _zero_copy_receive(frame: bytearray, header_len: int):
+    return memoryview(frame)[PREFIX_LEN + header_len :]
+
+
+def _measure(func, *args):
+    """Return (bytes allocated, seconds) of the call. Allocated bytes approximate the bytes copied"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result = func(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, duration
+
+
+def _add_row(table: Table, size: int, path: str, send_bytes, send_time, recv_bytes, recv_time):
+    table.add_row(
+        [str(size), path, f"{send_bytes / MB:.2f}", f"{send_time:.4f}", f"{recv_bytes / MB:.2f}", f"{recv_time:.4f}"]
+    )
+
+
+def main():
+    """
+    Benchmark of bytes copied per message by SFM framing, before and after zero-copy send/receive.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", "-s", type=int, nargs="+", help="payload sizes in MB", default=[1, 10, 100, 500])
+    args = parser.parse_args()
+
+    sfm_conn = SfmConnection(_NullDriverConnection(), Endpoint("bench"))
+    # Disable streaming so the whole payload goes in one frame like the legacy path
+    sfm_conn.stream_chunk_size = sys.maxsize
+    headers = {"_MSG_ID_": "1234", "_TOPIC_": "bench"}
+    headers_bytes = sfm_conn.headers_to_bytes(headers)
+
+    table = Table(["payload MB", "path", "send copied MB", "send secs", "receive copied MB", "receive secs"])
+    for size in args.sizes:
+        payload = bytes(size * MB)
+        frame = _legacy_send(headers_bytes, payload)
+
+        send_bytes, send_time = _measure(_legacy_send, headers_bytes, payload)
+        recv_bytes, recv_time = _measure(_legacy_receive, frame, len(headers_bytes))
+        _add_row(table, size, "legacy", send_bytes, send_time, recv_bytes, recv_time)
+
+        prefix = Prefix(0, 0, Types.DATA, 0, 0, 1, 1, 0)
+        send_bytes, send_time = _measure(sfm_conn.send_frame, prefix, headers, payload)
+        recv_bytes, recv_time = _measure(_zero_copy_receive, frame, len(headers_bytes))
+        _add_row(table, size, "zero-copy", send_bytes, send_time, recv_bytes, recv_time)
+
+    table.write(sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.connection import BytesAlike
+from nvflare.fuel.utils.import_utils import optional_import
+
+lz4_frame, lz4_available = optional_import("lz4.frame")
+zstandard, zstd_available = optional_import("zstandard")
+
+# Size of the sample compressed to estimate the ratio of large payloads in adaptive mode
+SAMPLE_SIZE = 64 * 1024
+
+log = logging.getLogger(__name__)
+
+
+def _too_large(codec: str, max_size: int) -> CommError:
+    return CommError(CommError.BAD_DATA, f"Payload compressed with {codec} exceeds {max_size} bytes")
+
+
+class Codec(ABC):
+    """A compression codec. The codec_id is sent in the reserved byte of the frame prefix"""
+
+    name: str = ""
+    codec_id: int = 0
+
+    @abstractmethod
+    def compress(self, data: BytesAlike) -> bytes:
+        pass
+
+    @abstractmethod
+    def decompress(self, data: BytesAlike, max_size: int) -> bytes:
+        """Decompress the data, the output is never larger than max_size
+
+        Raises:
+            CommError: If the decompressed data exceeds max_size or the data is corrupted
+        """
+        pass
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+    codec_id = 1
+
+    def compress(self, data: BytesAlike) -> bytes:
+        # Lowest level, the gain of higher levels is not worth the CPU time for network transfer
+        return zlib.compress(data, 1)
+
+    def decompress(self, data: BytesAlike, max_size: int) -> bytes:
+        decompressor = zlib.decompressobj()
+        result = decompressor.decompress(data, max_size + 1)
+        if len(result) > max_size:
+            raise _too_large(self.name, max_size)
+
+        if not decompressor.eof:
+            raise CommError(CommError.BAD_DATA, f"Truncated {self.name} data")
+
+        return result
+
+
+class Lz4Codec(Codec):
+    name = "lz4"
+    codec_id = 2
+
+    def compress(self, data: BytesAlike) -> bytes:
+        return lz4_frame.compress(data)
+
+    def decompress(self, data: BytesAlike, max_size: int) -> bytes:
+        decompressor = lz4_frame.LZ4FrameDecompressor()
+        result = decompressor.decompress(data, max_length=max_size + 1)
+        if len(result) > max_size:
+            raise _too_large(self.name, max_size)
+
+        if not decompressor.eof:
+            raise CommError(CommError.BAD_DATA, f"Truncated {self.name} data")
+
+        return result
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+    codec_id = 3
+
+    # Compressor objects are not thread-safe, a new one is created for each call
+    def compress(self, data: BytesAlike) -> bytes:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+
+    def decompress(self, data: BytesAlike, max_size: int) -> bytes:
+        # Read incrementally, the content size in the frame header can't be trusted
+        chunks = []
+        size = 0
+        with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+            while size <= max_size:
+                chunk = reader.read(max_size + 1 - size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+
+        if size > max_size:
+            raise _too_large(self.name, max_size)
+
+        return b"".join(chunks)
+
+
+# Codecs in the order of preference, only the ones with the library installed are included
+_codecs: List[Codec] = []
+if zstd_available:
+    _codecs.append(ZstdCodec())
+if lz4_available:
+    _codecs.append(Lz4Codec())
+_codecs.append(ZlibCodec())
+
+_codecs_by_id: Dict[int, Codec] = {codec.codec_id: codec for codec in _codecs}
+
+
+def available_codecs() -> List[str]:
+    """Names of the codecs supported locally, in the order of preference"""
+    return [codec.name for codec in _codecs]
+
+
+def negotiate_codec(local_codecs: List[str], remote_codecs: Optional[List[str]]) -> Optional[Codec]:
+    """Find the most preferred codec supported by both sides.
+
+    Both sides of a connection run the same negotiation so they agree on the codec
+
+    Args:
+        local_codecs: Codecs enabled locally
+        remote_codecs: Codecs advertised by the peer in the handshake, None if the peer doesn't support compression
+
+    Returns:
+        The codec or None if there is no common codec
+    """
+    if not remote_codecs:
+        return None
+
+    return next((c for c in _codecs if c.name in local_codecs and c.name in remote_codecs), None)
+
+
+def decompress(codec_id: int, data: BytesAlike, max_size: int) -> bytes:
+    """Decompress a payload or a chunk of a stream, the output is capped at max_size bytes
+
+    Raises:
+        CommError: If the codec is not supported, the data is corrupted or the output exceeds max_size
+    """
+
+    codec = _codecs_by_id.get(codec_id)
+    if not codec:
+        raise CommError(CommError.BAD_DATA, f"Unsupported compression codec {codec_id}")
+
+    try:
+        return codec.decompress(data, max_size)
+    except CommError:
+        raise
+    except Exception as ex:
+        raise CommError(CommError.BAD_DATA, f"Error decompressing {codec.name} data: {ex}")
+
+
+class PayloadCompressor:
+    """Compress the payloads according to the compression configuration
+
+    A streamed payload is checked once with should_compress, then each chunk is compressed separately
+    so the payload is never copied as a whole.
+
+    Args:
+        codecs: Names of the codecs to advertise in the handshake
+        threshold: Payloads smaller than this are never compressed
+        adaptive: Estimate the ratio with a sample first and skip compression if it's not effective
+        max_ratio: Maximum compressed/original size ratio to send the payload compressed in adaptive mode
+    """
+
+    def __init__(self, codecs: List[str], threshold: int, adaptive: bool, max_ratio: float):
+        unknown = set(codecs) - set(available_codecs())
+        if unknown:
+            log.warning(f"Compression codecs {unknown} are not available, ignored")
+
+        self.codecs = [c for c in available_codecs() if c in codecs]
+        self.threshold = threshold
+        self.adaptive = adaptive
+        self.max_ratio = max_ratio
+
+    def should_compress(self, codec: Codec, payload: BytesAlike) -> bool:
+        """Check if the payload is worth compressing, by its size and in adaptive mode, the ratio of a sample"""
+
+        size = len(payload)
+        if size < self.threshold:
+            return False
+
+        if self.adaptive and size > 4 * SAMPLE_SIZE:
+            # A sample from the middle, the beginning is usually the serialization overhead
+            start = (size - SAMPLE_SIZE) // 2
+            sample = memoryview(payload)[start : start + SAMPLE_SIZE]
+            if len(codec.compress(sample)) > SAMPLE_SIZE * self.max_ratio:
+                return False
+
+        return True
+
+    def compress(self, codec: Codec, data: BytesAlike) -> Optional[bytes]:
+        """Compress a payload or a chunk of a payload checked by should_compress
+
+        Returns:
+            The compressed data or None if the data should be sent uncompressed
+        """
+
+        size = len(data)
+        max_size = size * self.max_ratio if self.adaptive else size
+        compressed = codec.compress(data)
+        if len(compressed) >= max_size:
+            return None
+
+        return compressed
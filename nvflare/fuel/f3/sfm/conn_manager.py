@@ -20,26 +20,31 @@ from typing import Dict, List, Optional
 
 import msgpack
 
+from nvflare.fuel.f3.comm_config import CommConfigurator
 from nvflare.fuel.f3.comm_error import CommError
 from nvflare.fuel.f3.connection import BytesAlike, Connection, ConnState, FrameReceiver
 from nvflare.fuel.f3.drivers.connector_info import ConnectorInfo, Mode
 from nvflare.fuel.f3.drivers.driver import ConnMonitor, Driver
 from nvflare.fuel.f3.drivers.driver_params import DriverCap, DriverParams
-from nvflare.fuel.f3.drivers.net_utils import ssl_required
+from nvflare.fuel.f3.drivers.net_utils import MAX_FRAME_SIZE, ssl_required
 from nvflare.fuel.f3.endpoint import Endpoint, EndpointMonitor, EndpointState
 from nvflare.fuel.f3.message import Headers, Message, MessageReceiver
-from nvflare.fuel.f3.sfm.constants import HandshakeKeys, Types
+from nvflare.fuel.f3.metrics_exporter import register_gauge, unregister_gauge
+from nvflare.fuel.f3.sfm.compression import PayloadCompressor, available_codecs, decompress, negotiate_codec
+from nvflare.fuel.f3.sfm.constants import Flags, HandshakeKeys, StreamKeys, Types
 from nvflare.fuel.f3.sfm.prefix import PREFIX_LEN, Prefix
+from nvflare.fuel.f3.sfm.receive_scheduler import ReceiveScheduler
 from nvflare.fuel.f3.sfm.sfm_conn import SfmConnection
-from nvflare.fuel.f3.sfm.sfm_endpoint import SfmEndpoint
+from nvflare.fuel.f3.sfm.sfm_endpoint import MAX_CONN_PER_ENDPOINT, SfmEndpoint
+from nvflare.fuel.f3.sfm.stream import StreamAssembler
 from nvflare.fuel.f3.stats_pool import StatsPoolManager
 
-FRAME_THREAD_POOL_SIZE = 100
 CONN_THREAD_POOL_SIZE = 16
 INIT_WAIT = 1
 MAX_WAIT = 60
 SILENT_RECONNECT_TIME = 5
 SELF_ADDR = "0.0.0.0:0"
+FRAME_QUEUE_GAUGE = "sfm_frame_queue_depth"
 
 log = logging.getLogger(__name__)
 
@@ -78,9 +83,30 @@ class ConnManager(ConnMonitor):
         # App/receiver mapping
         self.receivers: Dict[int, MessageReceiver] = {}
 
+        comm_configurator = CommConfigurator()
+        self.stream_chunk_size = comm_configurator.get_stream_chunk_size()
+        self.stream_window = comm_configurator.get_stream_window()
+        self.stream_ack_timeout = comm_configurator.get_stream_ack_timeout()
+        self.connections_per_endpoint = max(
+            1, min(comm_configurator.get_connections_per_endpoint(), MAX_CONN_PER_ENDPOINT)
+        )
+        self.bulk_threshold = comm_configurator.get_bulk_message_threshold()
+        self.max_message_size = comm_configurator.get_max_message_size()
+
+        if comm_configurator.compression_enabled():
+            codecs = comm_configurator.get_compression_codecs()
+            self.compressor = PayloadCompressor(
+                [c.strip() for c in codecs.split(",")] if codecs else available_codecs(),
+                comm_configurator.get_compression_threshold(),
+                comm_configurator.compression_adaptive(),
+                comm_configurator.get_compression_max_ratio(),
+            )
+        else:
+            self.compressor = None
+
         self.started = False
-        self.conn_mgr_executor = ThreadPoolExecutor(CONN_THREAD_POOL_SIZE, "conn_mgr")
-        self.frame_mgr_executor = ThreadPoolExecutor(FRAME_THREAD_POOL_SIZE, "frame_mgr")
+        # Each active connection occupies a thread for its lifetime
+        self.conn_mgr_executor = ThreadPoolExecutor(CONN_THREAD_POOL_SIZE * self.connections_per_endpoint, "conn_mgr")
         self.lock = threading.Lock()
         self.null_conn = NullConnection()
         stats = StatsPoolManager.get_pool("sfm_send_frame")
@@ -90,6 +116,21 @@ class ConnManager(ConnMonitor):
             )
         self.send_frame_stats = stats
 
+        wait_stats = StatsPoolManager.get_pool("sfm_frame_queue_wait")
+        if not wait_stats:
+            wait_stats = StatsPoolManager.add_time_hist_pool(
+                "sfm_frame_queue_wait", "SFM received frame queue wait time in secs", scope=local_endpoint.name
+            )
+
+        # Received frames are processed in per-connection queues
+        self.frame_scheduler = ReceiveScheduler(
+            comm_configurator.get_frame_workers(),
+            comm_configurator.get_frame_queue_depth(),
+            comm_configurator.get_frame_workers_per_connection(),
+            comm_configurator.get_frame_backpressure_timeout(),
+            wait_stats,
+        )
+
     def add_connector(self, driver: Driver, params: dict, mode: Mode) -> str:
 
         # Validate parameters
@@ -133,6 +174,7 @@ class ConnManager(ConnMonitor):
                 if not connector.started:
                     self.start_connector(connector)
 
+        register_gauge(FRAME_QUEUE_GAUGE, "SFM received frames waiting per connection", self.frame_scheduler.get_depths)
         self.started = True
 
     def stop(self):
@@ -143,8 +185,9 @@ class ConnManager(ConnMonitor):
                 connector.stopping = True
                 connector.driver.shutdown()
 
+        unregister_gauge(FRAME_QUEUE_GAUGE, self.frame_scheduler.get_depths)
         self.conn_mgr_executor.shutdown(True)
-        self.frame_mgr_executor.shutdown(True)
+        self.frame_scheduler.shutdown(True)
 
     def find_endpoint(self, name: str) -> Optional[Endpoint]:
 
@@ -206,16 +249,31 @@ class ConnManager(ConnMonitor):
 
         stream_id = sfm_endpoint.next_stream_id()
 
-        # When multiple connections, round-robin by stream ID
-        sfm_conn = sfm_endpoint.get_connection(stream_id)
+        # When multiple connections, small messages go to the priority connection,
+        # large ones are round-robin by stream ID over the bulk connections
+        sfm_conn = sfm_endpoint.get_connection(stream_id, len(payload) if payload else 0)
         if not sfm_conn:
             log.error("Logic error, ready endpoint has no connections")
             raise CommError(CommError.ERROR, f"Endpoint {endpoint.name} has no connection")
 
-        # TODO: If multiple connections, should retry a diff connection on errors
-        start = time.perf_counter()
-
-        sfm_conn.send_data(app_id, stream_id, headers, payload)
+        failed_conns = []
+        while True:
+            start = time.perf_counter()
+            try:
+                sfm_conn.send_data(app_id, stream_id, headers, payload)
+                break
+            except Exception as ex:
+                # If multiple connections, retry a different connection
+                failed_conns.append(sfm_conn)
+                next_conn = sfm_endpoint.get_failover_connection(failed_conns)
+                if not next_conn:
+                    raise
+
+                log.warning(
+                    f"Sending to {endpoint.name} failed on {sfm_conn.get_name()}: {ex}, "
+                    f"retrying on {next_conn.get_name()}"
+                )
+                sfm_conn = next_conn
 
         self.send_frame_stats.record_value(
             category=sfm_conn.conn.connector.driver.get_name(), value=time.perf_counter() - start
@@ -240,7 +298,12 @@ class ConnManager(ConnMonitor):
 
         log.info(f"Connector {connector} is starting")
 
-        self.conn_mgr_executor.submit(self.start_connector_task, connector)
+        if connector.mode == Mode.ACTIVE:
+            # Each task maintains one connection to the peer
+            for _ in range(self.connections_per_endpoint):
+                self.conn_mgr_executor.submit(self.start_connector_task, connector)
+        else:
+            self.conn_mgr_executor.submit(self.start_connector_task, connector)
 
     @staticmethod
     def start_connector_task(connector: ConnectorInfo):
@@ -308,36 +371,28 @@ class ConnManager(ConnMonitor):
             log.error(f"Error handling state change: {ex}")
             log.debug(traceback.format_exc())
 
-    def process_frame_task(self, sfm_conn: SfmConnection, frame: BytesAlike):
+    def process_frame_task(self, sfm_conn: SfmConnection, prefix: Prefix, headers: Optional[dict], frame: BytesAlike):
 
         try:
-            prefix = Prefix.from_bytes(frame)
             log.debug(f"Received frame: {prefix} on {sfm_conn.conn}")
 
-            if prefix.header_len == 0:
-                headers = None
-            else:
-                headers = msgpack.unpackb(frame[PREFIX_LEN : PREFIX_LEN + prefix.header_len])
-
             if prefix.type in (Types.HELLO, Types.READY):
                 if prefix.type == Types.HELLO:
-                    sfm_conn.send_handshake(Types.READY)
+                    sfm_conn.send_handshake(Types.READY, self.connections_per_endpoint)
 
                 data = self.get_dict_payload(prefix, frame)
                 self.update_endpoint(sfm_conn, data)
 
             elif prefix.type == Types.DATA:
                 if prefix.length > PREFIX_LEN + prefix.header_len:
-                    payload = frame[PREFIX_LEN + prefix.header_len :]
+                    # Payload is a view of the received frame, no copy
+                    payload = memoryview(frame)[PREFIX_LEN + prefix.header_len :]
+                    if prefix.flags & Flags.COMPRESSED:
+                        payload = decompress(prefix.reserved, payload, MAX_FRAME_SIZE)
                 else:
                     payload = None
 
-                message = Message(headers, payload)
-                receiver = self.receivers.get(prefix.app_id)
-                if receiver:
-                    receiver.process_message(sfm_conn.sfm_endpoint.endpoint, sfm_conn.conn, prefix.app_id, message)
-                else:
-                    log.debug(f"No receiver registered for App ID {prefix.app_id}, message ignored")
+                self.dispatch_message(sfm_conn, prefix.app_id, Message(headers, payload))
 
             else:
                 log.error(f"Received unsupported frame type {prefix.type} on {sfm_conn.get_name()}")
@@ -345,8 +400,110 @@ class ConnManager(ConnMonitor):
             log.error(f"Error processing frame: {ex}")
             log.debug(traceback.format_exc())
 
+    def dispatch_message(self, sfm_conn: SfmConnection, app_id: int, message: Message):
+
+        receiver = self.receivers.get(app_id)
+        if receiver:
+            if not receiver.accepts_buffers and message.payload is not None and not isinstance(message.payload, bytes):
+                message.payload = bytes(message.payload)
+            receiver.process_message(sfm_conn.sfm_endpoint.endpoint, sfm_conn.conn, app_id, message)
+        else:
+            log.debug(f"No receiver registered for App ID {app_id}, message ignored")
+
+    def dispatch_message_task(self, sfm_conn: SfmConnection, app_id: int, message: Message):
+
+        try:
+            self.dispatch_message(sfm_conn, app_id, message)
+        except Exception as ex:
+            log.error(f"Error processing streamed message: {ex}")
+            log.debug(traceback.format_exc())
+
     def process_frame(self, sfm_conn: SfmConnection, frame: BytesAlike):
-        self.frame_mgr_executor.submit(self.process_frame_task, sfm_conn, frame)
+
+        prefix = Prefix.from_bytes(frame)
+        if prefix.type in (Types.FRAG, Types.ACK) or (prefix.flags & Flags.STREAM):
+            # Stream frames are handled by the reader thread so fragments are assembled in order
+            try:
+                self.process_stream_frame(sfm_conn, prefix, frame)
+            except Exception as ex:
+                log.error(f"Error processing stream frame {prefix} on {sfm_conn.get_name()}: {ex}")
+                log.debug(traceback.format_exc())
+        else:
+            if prefix.header_len == 0:
+                headers = None
+            else:
+                headers = msgpack.unpackb(frame[PREFIX_LEN : PREFIX_LEN + prefix.header_len])
+
+            if prefix.type == Types.DATA and self.is_reply(prefix.app_id, headers):
+                self.frame_scheduler.run_now(
+                    self.get_category(sfm_conn), self.process_frame_task, sfm_conn, prefix, headers, frame
+                )
+            else:
+                self.frame_scheduler.submit(
+                    sfm_conn.get_name(),
+                    self.get_category(sfm_conn),
+                    self.process_frame_task,
+                    sfm_conn,
+                    prefix,
+                    headers,
+                    frame,
+                )
+
+    def is_reply(self, app_id: int, headers: Optional[dict]) -> bool:
+        """Replies are not queued behind the requests of the connection, a request callback may be waiting for them"""
+
+        receiver = self.receivers.get(app_id)
+        return bool(receiver and headers and receiver.is_reply(headers))
+
+    def process_stream_frame(self, sfm_conn: SfmConnection, prefix: Prefix, frame: BytesAlike):
+
+        log.debug(f"Received stream frame: {prefix} on {sfm_conn.conn}")
+
+        if prefix.type == Types.ACK:
+            sfm_conn.ack_received(prefix.stream_id)
+            return
+
+        try:
+            if prefix.type == Types.DATA:
+                headers = msgpack.unpackb(frame[PREFIX_LEN : PREFIX_LEN + prefix.header_len])
+                size = headers.pop(StreamKeys.SIZE, None)
+                if size is None:
+                    raise CommError(CommError.BAD_DATA, f"Stream {prefix.stream_id} has no size header")
+                assembler = StreamAssembler(prefix.stream_id, headers, size, self.max_message_size)
+                sfm_conn.assemblers[prefix.stream_id] = assembler
+            else:
+                assembler = sfm_conn.assemblers.get(prefix.stream_id)
+                if not assembler:
+                    raise CommError(CommError.BAD_DATA, f"Fragment received for unknown stream {prefix.stream_id}")
+
+            fragment = memoryview(frame)[PREFIX_LEN + prefix.header_len :]
+            if prefix.flags & Flags.COMPRESSED:
+                # Chunks are compressed separately, the output can't exceed the rest of the stream
+                fragment = decompress(prefix.reserved, fragment, assembler.get_remaining())
+            assembler.add_fragment(fragment)
+        except Exception:
+            sfm_conn.assemblers.pop(prefix.stream_id, None)
+            raise
+
+        if prefix.flags & Flags.ACK:
+            sfm_conn.send_ack(prefix.stream_id)
+
+        if assembler.is_complete():
+            sfm_conn.assemblers.pop(prefix.stream_id, None)
+            message = Message(assembler.headers, assembler.buffer)
+            if self.is_reply(prefix.app_id, assembler.headers):
+                self.frame_scheduler.run_now(
+                    self.get_category(sfm_conn), self.dispatch_message_task, sfm_conn, prefix.app_id, message
+                )
+            else:
+                self.frame_scheduler.submit(
+                    sfm_conn.get_name(),
+                    self.get_category(sfm_conn),
+                    self.dispatch_message_task,
+                    sfm_conn,
+                    prefix.app_id,
+                    message,
+                )
 
     def update_endpoint(self, sfm_conn: SfmConnection, data: dict):
 
@@ -359,6 +516,15 @@ class ConnManager(ConnMonitor):
                 CommError.BAD_DATA, f"Duplicate endpoint name {endpoint_name} for connection {sfm_conn.get_name()}"
             )
 
+        # Accept as many connections as either side opens
+        max_connections = max(self.connections_per_endpoint, data.pop(HandshakeKeys.CONNECTIONS, 1))
+
+        remote_codecs = data.pop(HandshakeKeys.CODECS, None)
+        if self.compressor:
+            sfm_conn.codec = negotiate_codec(self.compressor.codecs, remote_codecs)
+            if sfm_conn.codec:
+                log.debug(f"Connection {sfm_conn.get_name()} uses compression codec {sfm_conn.codec.name}")
+
         endpoint = Endpoint(endpoint_name, data)
         endpoint.state = EndpointState.READY
         conn_props = sfm_conn.conn.get_conn_properties()
@@ -371,8 +537,9 @@ class ConnManager(ConnMonitor):
             sfm_endpoint.endpoint = endpoint
         else:
             old_state = EndpointState.IDLE
-            sfm_endpoint = SfmEndpoint(endpoint)
+            sfm_endpoint = SfmEndpoint(endpoint, bulk_threshold=self.bulk_threshold)
 
+        sfm_endpoint.set_max_connections(max_connections)
         sfm_endpoint.add_connection(sfm_conn)
         sfm_conn.sfm_endpoint = sfm_endpoint
         self.sfm_endpoints[endpoint_name] = sfm_endpoint
@@ -389,6 +556,10 @@ class ConnManager(ConnMonitor):
         for monitor in self.monitors:
             monitor.state_change(endpoint)
 
+    @staticmethod
+    def get_category(sfm_conn: SfmConnection) -> str:
+        return sfm_conn.conn.connector.driver.get_name()
+
     @staticmethod
     def get_dict_payload(prefix, frame):
         mv = memoryview(frame)
@@ -396,17 +567,27 @@ class ConnManager(ConnMonitor):
 
     def handle_new_connection(self, connection: Connection):
 
-        sfm_conn = SfmConnection(connection, self.local_endpoint)
+        sfm_conn = SfmConnection(
+            connection,
+            self.local_endpoint,
+            self.stream_chunk_size,
+            self.stream_window,
+            self.stream_ack_timeout,
+            self.compressor,
+        )
         with self.lock:
             self.sfm_conns[sfm_conn.get_name()] = sfm_conn
 
         connection.register_frame_receiver(SfmFrameReceiver(self, sfm_conn))
 
         if connection.connector.mode == Mode.ACTIVE:
-            sfm_conn.send_handshake(Types.HELLO)
+            sfm_conn.send_handshake(Types.HELLO, self.connections_per_endpoint)
 
     def close_connection(self, connection: Connection):
 
+        # Frames already received are still processed
+        self.frame_scheduler.remove(connection.name)
+
         with self.lock:
             name = connection.name
             if name not in self.sfm_conns:
@@ -431,7 +612,9 @@ class ConnManager(ConnMonitor):
         """Send message to itself"""
 
         # Call receiver in a different thread to avoid deadlock
-        self.frame_mgr_executor.submit(self.loopback_message_task, endpoint, app_id, headers, payload)
+        self.frame_scheduler.submit(
+            self.null_conn.name, "loopback", self.loopback_message_task, endpoint, app_id, headers, payload
+        )
 
     def loopback_message_task(self, endpoint: Endpoint, app_id: int, headers: Headers, payload: BytesAlike):
 
@@ -458,6 +641,9 @@ class SfmFrameReceiver(FrameReceiver):
             log.error(f"Error processing frame: {ex}")
             log.debug(traceback.format_exc())
 
+    def is_busy(self) -> bool:
+        return self.conn_manager.frame_scheduler.is_full(self.conn.get_name())
+
 
 class NullConnection(Connection):
     """A mock connection used for loopback messages"""
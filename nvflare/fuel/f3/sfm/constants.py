@@ -26,6 +26,15 @@ class Types:
 class HandshakeKeys:
     ENDPOINT_NAME = "endpoint_name"
     TIMESTAMP = "timestamp"
+    # Number of connections the sender opens to each endpoint
+    CONNECTIONS = "connections"
+    # Compression codecs supported by the sender
+    CODECS = "codecs"
+
+
+class StreamKeys:
+    # Reserved header in the first frame of a stream, total payload size of the stream
+    SIZE = "_SFM_STREAM_SIZE_"
 
 
 class Flags:
@@ -39,3 +48,7 @@ class Flags:
     RESP = 0x1000
     # PUB/SUB message, topic is in the header
     PUB_SUB = 0x0800
+    # First frame of a streamed message, remaining payload follows in FRAG frames
+    STREAM = 0x0400
+    # Payload is compressed, the codec ID is in the reserved byte of the prefix
+    COMPRESSED = 0x0200
@@ -32,7 +32,7 @@ class Prefix:
         1. length(4): Total length of the frame.
         2. header_len(2): Length of the encoded headers
         3. type(1): Frame type (DATA, HELLO etc)
-        4. reserved(1): Not used, 0
+        4. reserved(1): Codec ID if the payload is compressed, otherwise 0
         5. flags(2): Attribute of the frame (OOB, ACK etc).
         6. app_id(2): Application ID to support multiple apps
         7. stream_id(2): Stream ID to connect all fragments of a stream
@@ -0,0 +1,193 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from nvflare.fuel.f3.drivers.aio_context import in_event_loop
+from nvflare.fuel.utils.stats_utils import HistPool
+
+# Number of tasks a worker runs from one queue before yielding to other queues
+BATCH_SIZE = 8
+
+log = logging.getLogger(__name__)
+
+
+class _TaskQueue:
+    def __init__(self, key: str, lock: threading.Lock):
+        self.key = key
+        self.tasks = deque()
+        self.running = 0
+        self.closed = False
+        self.not_full = threading.Condition(lock)
+
+
+class ReceiveScheduler:
+    """Scheduler for processing received frames and messages
+
+    Each key (normally a connection) has its own queue. Tasks of one queue are started in the order they
+    are submitted and at most workers_per_queue of them run at the same time, so one busy peer can't take
+    all the workers of the shared pool. With workers_per_queue of 1, the tasks of a queue are processed serially.
+    Running more than one task of a queue at a time doesn't keep the order of the messages of a connection.
+
+    A worker runs up to BATCH_SIZE tasks of a queue then yields to the other queues.
+
+    When a queue is full, the submitter (the reader of the connection) is blocked until there is room, so
+    the peer is slowed down by the transport. Tasks are never dropped, a warning is logged each time the
+    submitter has been blocked for the backpressure timeout. The readers running in an event loop are never
+    blocked, they check is_full and pause reading instead, so their queue exceeds the depth by at most one task.
+
+    Tasks which must not wait behind the tasks of their queue (e.g. replies that a running task may be waiting
+    for) are started with run_now.
+
+    Args:
+        max_workers: Size of the shared thread pool
+        max_queue_depth: Maximum number of tasks waiting in each queue
+        workers_per_queue: Maximum number of tasks of a queue to run concurrently
+        backpressure_timeout: Time in seconds a submitter is blocked on a full queue before a warning is logged
+        wait_stats: Optional histogram pool to record the time tasks wait in queue
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue_depth: int,
+        workers_per_queue: int,
+        backpressure_timeout: float,
+        wait_stats: Optional[HistPool] = None,
+    ):
+        if max_workers < 1 or max_queue_depth < 1 or workers_per_queue < 1:
+            raise ValueError("max_workers, max_queue_depth and workers_per_queue must be positive")
+
+        self.max_queue_depth = max_queue_depth
+        self.workers_per_queue = workers_per_queue
+        self.backpressure_timeout = backpressure_timeout
+        self.wait_stats = wait_stats
+        self.executor = ThreadPoolExecutor(max_workers, "frame_mgr")
+        self.lock = threading.Lock()
+        self.queues: Dict[str, _TaskQueue] = {}
+        self.stopped = False
+
+    def submit(self, key: str, category: str, fn: Callable, *args):
+        """Queue a task
+
+        Args:
+            key: Key of the queue, tasks with the same key are processed in order
+            category: Category of the wait-time stats
+            fn: The task function
+            *args: Arguments of the task function
+        """
+
+        with self.lock:
+            queue = self.queues.get(key)
+            if not queue:
+                queue = _TaskQueue(key, self.lock)
+                self.queues[key] = queue
+
+            if len(queue.tasks) >= self.max_queue_depth and not in_event_loop():
+                start = time.time()
+                while len(queue.tasks) >= self.max_queue_depth and not queue.closed and not self.stopped:
+                    if not queue.not_full.wait(self.backpressure_timeout):
+                        log.warning(f"Queue {key} is still full after {time.time() - start:.1f} seconds, waiting")
+
+            queue.tasks.append((time.perf_counter(), category, fn, args))
+            if queue.running < self.workers_per_queue:
+                queue.running += 1
+                self.executor.submit(self._run, queue)
+
+    def run_now(self, category: str, fn: Callable, *args):
+        """Run a task on the shared pool without queueing it behind the tasks of any key
+
+        Args:
+            category: Category of the wait-time stats
+            fn: The task function
+            *args: Arguments of the task function
+        """
+
+        self.executor.submit(self._run_task, "", time.perf_counter(), category, fn, args)
+
+    def remove(self, key: str):
+        """Remove the queue once its tasks are processed, blocked submitters are released"""
+
+        with self.lock:
+            queue = self.queues.get(key)
+            if not queue:
+                return
+
+            queue.closed = True
+            queue.not_full.notify_all()
+            if not queue.running:
+                self.queues.pop(key, None)
+
+    def is_full(self, key: str) -> bool:
+        with self.lock:
+            queue = self.queues.get(key)
+            return queue is not None and len(queue.tasks) >= self.max_queue_depth
+
+    def get_depth(self, key: str) -> int:
+        with self.lock:
+            queue = self.queues.get(key)
+            return len(queue.tasks) if queue else 0
+
+    def get_depths(self) -> Dict[str, int]:
+        """Get the number of tasks waiting in each queue"""
+        with self.lock:
+            return {key: len(queue.tasks) for key, queue in self.queues.items()}
+
+    def shutdown(self, wait: bool = True):
+        with self.lock:
+            self.stopped = True
+            for queue in self.queues.values():
+                queue.not_full.notify_all()
+
+        self.executor.shutdown(wait)
+
+    def _run(self, queue: _TaskQueue):
+
+        while True:
+            for _ in range(BATCH_SIZE):
+                with self.lock:
+                    if not queue.tasks:
+                        queue.running -= 1
+                        if queue.closed and not queue.running:
+                            self.queues.pop(queue.key, None)
+                        return
+
+                    queued_time, category, fn, args = queue.tasks.popleft()
+                    queue.not_full.notify()
+
+                self._run_task(queue.key, queued_time, category, fn, args)
+
+            # Go to the back of the pool so other queues get their turn
+            try:
+                self.executor.submit(self._run, queue)
+                return
+            except RuntimeError:
+                # The pool is shutting down, the remaining tasks are processed by this worker
+                pass
+
+    def _run_task(self, key: str, queued_time: float, category: str, fn: Callable, args):
+
+        if self.wait_stats:
+            self.wait_stats.record_value(category, time.perf_counter() - queued_time)
+
+        try:
+            fn(*args)
+        except Exception as ex:
+            log.error(f"Error running task from queue {key}: {ex}")
+            log.debug(traceback.format_exc())
@@ -15,15 +15,20 @@
 import logging
 import threading
 import time
-from typing import Optional
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
 
 import msgpack
 
+from nvflare.fuel.f3.comm_config import DEFAULT_STREAM_ACK_TIMEOUT, DEFAULT_STREAM_CHUNK_SIZE, DEFAULT_STREAM_WINDOW
+from nvflare.fuel.f3.comm_error import CommError
 from nvflare.fuel.f3.connection import BytesAlike, Connection
 from nvflare.fuel.f3.endpoint import Endpoint
 from nvflare.fuel.f3.message import Headers
-from nvflare.fuel.f3.sfm.constants import HandshakeKeys, Types
+from nvflare.fuel.f3.sfm.compression import Codec, PayloadCompressor
+from nvflare.fuel.f3.sfm.constants import Flags, HandshakeKeys, StreamKeys, Types
 from nvflare.fuel.f3.sfm.prefix import PREFIX_LEN, Prefix
+from nvflare.fuel.f3.sfm.stream import StreamAssembler
 
 log = logging.getLogger(__name__)
 
@@ -55,15 +60,51 @@ class SfmConnection:
         |                                                        |
         +--------------------------------------------------------+
 
+    Payloads larger than the stream chunk size are streamed. The first chunk is sent in a DATA frame
+    with STREAM flag, the headers carry the total size of the payload. The remaining chunks are sent in
+    FRAG frames with the same stream_id. Every chunk requests an ACK and the sender only keeps
+    a window of un-acknowledged chunks in flight.
+
+    ACKs are sent by the reader of the connection, so they never wait for a sender holding the connection.
+    If the connection is busy, the ACK is queued and sent by the sender once its frame is written.
+
+    If both sides advertise compression codecs in the handshake, payloads are compressed with the most preferred
+    common codec. Compressed frames have the COMPRESSED flag and the codec ID in the reserved byte. Each chunk
+    of a streamed payload is compressed separately, the stream size header is the uncompressed size.
+
     """
 
-    def __init__(self, conn: Connection, local_endpoint: Endpoint):
+    def __init__(
+        self,
+        conn: Connection,
+        local_endpoint: Endpoint,
+        stream_chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+        stream_window: int = DEFAULT_STREAM_WINDOW,
+        stream_ack_timeout: float = DEFAULT_STREAM_ACK_TIMEOUT,
+        compressor: Optional[PayloadCompressor] = None,
+    ):
         self.conn = conn
         self.local_endpoint = local_endpoint
         self.sfm_endpoint = None
         self.last_activity = 0
         self.sequence = 0
         self.lock = threading.Lock()
+        # Only one thread can write a frame to the driver connection at a time
+        self.send_lock = threading.Lock()
+        self.pending_acks: Deque[bytes] = deque()
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_window = stream_window
+        self.stream_ack_timeout = stream_ack_timeout
+        self.compressor = compressor
+
+        # Negotiated in the handshake, no compression until the handshake is received
+        self.codec: Optional[Codec] = None
+
+        # Flow-control windows of outgoing streams, key is stream_id
+        self.stream_windows: Dict[int, threading.Semaphore] = {}
+
+        # Assemblers of incoming streams, key is stream_id. Only accessed by the reader of the connection
+        self.assemblers: Dict[int, StreamAssembler] = {}
 
     def get_name(self) -> str:
         return self.conn.name
@@ -78,10 +119,17 @@ class SfmConnection:
             self.sequence = (self.sequence + 1) & 0xFFFF
             return self.sequence
 
-    def send_handshake(self, frame_type: int):
+    def send_handshake(self, frame_type: int, connections: int = 1):
         """Send HELLO/READY frame"""
 
-        data = {HandshakeKeys.ENDPOINT_NAME: self.local_endpoint.name, HandshakeKeys.TIMESTAMP: time.time()}
+        data = {
+            HandshakeKeys.ENDPOINT_NAME: self.local_endpoint.name,
+            HandshakeKeys.TIMESTAMP: time.time(),
+            HandshakeKeys.CONNECTIONS: connections,
+        }
+
+        if self.compressor and self.compressor.codecs:
+            data[HandshakeKeys.CODECS] = self.compressor.codecs
 
         if self.local_endpoint.properties:
             data.update(self.local_endpoint.properties)
@@ -91,9 +139,117 @@ class SfmConnection:
     def send_data(self, app_id: int, stream_id: int, headers: Headers, payload: BytesAlike):
         """Send user data"""
 
-        prefix = Prefix(0, 0, Types.DATA, 0, 0, app_id, stream_id, 0)
+        codec = self.codec
+        if codec and payload and not self.compressor.should_compress(codec, payload):
+            codec = None
+
+        if payload and len(payload) > self.stream_chunk_size:
+            self.send_stream(app_id, stream_id, headers, payload, codec)
+            return
+
+        payload, flags, codec_id = self.compress(codec, payload, 0)
+        prefix = Prefix(0, 0, Types.DATA, codec_id, flags, app_id, stream_id, 0)
         self.send_frame(prefix, headers, payload)
 
+    def compress(self, codec: Optional[Codec], data: BytesAlike, flags: int) -> Tuple[BytesAlike, int, int]:
+        """Compress the payload or a chunk of a stream if it's worth it
+
+        Returns:
+            A tuple of the data to send, the frame flags and the codec ID
+        """
+
+        if codec and data:
+            compressed = self.compressor.compress(codec, data)
+            if compressed is not None:
+                return compressed, flags | Flags.COMPRESSED, codec.codec_id
+
+        return data, flags, 0
+
+    def send_stream(
+        self, app_id: int, stream_id: int, headers: Headers, payload: BytesAlike, codec: Optional[Codec] = None
+    ):
+        """Send user data as a stream of chunks
+
+        The connection is only locked for one chunk at a time so other messages can be interleaved
+        with the stream. At most stream_window chunks are sent before an ACK is received.
+        If a codec is given, each chunk is compressed separately and sent uncompressed if it doesn't shrink.
+
+        Raises:
+            CommError: If the receiver doesn't acknowledge the chunks in time
+        """
+
+        size = len(payload)
+        stream_headers = dict(headers) if headers else {}
+        stream_headers[StreamKeys.SIZE] = size
+
+        window = threading.Semaphore(self.stream_window)
+        with self.lock:
+            self.stream_windows[stream_id] = window
+
+        try:
+            view = memoryview(payload)
+            frame_type = Types.DATA
+            flags = Flags.STREAM | Flags.ACK
+            frame_headers = stream_headers
+            offset = 0
+            while offset < size:
+                if not window.acquire(timeout=self.stream_ack_timeout):
+                    raise CommError(
+                        CommError.TIMEOUT, f"Stream {stream_id} on {self.get_name()} timed out waiting for ACK"
+                    )
+
+                chunk = view[offset : offset + self.stream_chunk_size]
+                data, chunk_flags, codec_id = self.compress(codec, chunk, flags)
+                prefix = Prefix(0, 0, frame_type, codec_id, chunk_flags, app_id, stream_id, 0)
+                self.send_frame(prefix, frame_headers, data)
+                offset += len(chunk)
+
+                frame_type = Types.FRAG
+                flags = Flags.ACK
+                frame_headers = None
+        finally:
+            with self.lock:
+                self.stream_windows.pop(stream_id, None)
+
+    def send_ack(self, stream_id: int):
+        """Acknowledge a received chunk of a stream
+
+        Called by the reader, it never blocks on the senders of the connection. Otherwise, two peers streaming
+        to each other could deadlock with both readers waiting for the senders blocked on a full socket.
+        """
+
+        prefix = Prefix(PREFIX_LEN, 0, Types.ACK, 0, 0, 0, stream_id, self.next_sequence())
+        frame = bytearray(PREFIX_LEN)
+        prefix.to_buffer(frame, 0)
+        self.pending_acks.append(bytes(frame))
+        self.flush_acks()
+
+    def flush_acks(self):
+        """Send the queued ACKs if the connection is not busy, the busy sender flushes them when it's done"""
+
+        while self.pending_acks:
+            if not self.send_lock.acquire(blocking=False):
+                return
+
+            try:
+                while self.pending_acks:
+                    self.conn.send_control_frame(self.pending_acks.popleft())
+            except Exception as ex:
+                # Not raised to the sender flushing the ACKs, its own frame is sent
+                log.error(f"Error sending ACK on {self.get_name()}: {ex}")
+                self.pending_acks.clear()
+            finally:
+                self.send_lock.release()
+
+    def ack_received(self, stream_id: int):
+        """Open the flow-control window of the stream for one more chunk"""
+
+        window = self.stream_windows.get(stream_id)
+        if window:
+            window.release()
+        else:
+            log.debug(f"ACK received for unknown stream {stream_id} on {self.get_name()}")
+
     def send_dict(self, frame_type: int, stream_id: int, data: dict):
         """Send a dict as payload"""
 
@@ -116,23 +272,26 @@ class SfmConnection:
         prefix.header_len = header_len
         prefix.sequence = self.next_sequence()
 
-        buffer: bytearray = bytearray(length)
-
-        offset = 0
-        prefix.to_buffer(buffer, offset)
-        offset += PREFIX_LEN
+        # Only prefix and headers are copied, the payload is handed to the driver as a separate buffer
+        head: bytearray = bytearray(PREFIX_LEN + header_len)
+        prefix.to_buffer(head, 0)
 
         if headers_bytes:
-            buffer[offset:] = headers_bytes
-            offset += header_len
-
-        if payload:
-            buffer[offset:] = payload
+            head[PREFIX_LEN:] = headers_bytes
 
         log.debug(f"Sending frame: {prefix} on {self.conn}")
+        self.conn.reserve_send(length)
+
         # Only one thread can send data on a connection. Otherwise, the frames may interleave.
-        with self.lock:
-            self.conn.send_frame(buffer)
+        try:
+            with self.send_lock:
+                if payload:
+                    self.conn.send_frame_parts([head, payload])
+                else:
+                    self.conn.send_frame(head)
+        finally:
+            # ACKs queued while this frame was written
+            self.flush_acks()
 
     @staticmethod
     def headers_to_bytes(headers: Optional[dict]) -> Optional[bytes]:
@@ -20,30 +20,42 @@ from nvflare.fuel.f3.sfm.sfm_conn import SfmConnection
 
 # Hard-coded stream ID to be used by packets before handshake
 RESERVED_STREAM_ID = 16
-MAX_CONN_PER_ENDPOINT = 1
+# Upper limit of the connections to one endpoint, regardless of the configuration of both sides
+MAX_CONN_PER_ENDPOINT = 16
 
 log = logging.getLogger(__name__)
 
 
 class SfmEndpoint:
-    """An endpoint wrapper to keep SFM internal data"""
+    """An endpoint wrapper to keep SFM internal data
 
-    def __init__(self, endpoint: Endpoint):
+    With multiple connections, the first connection is the priority connection. Messages not larger than
+    the bulk threshold (heartbeats, task requests etc.) are sent on it so they are not queued behind large
+    payloads. Larger messages are spread over the other (bulk) connections.
+    """
+
+    def __init__(self, endpoint: Endpoint, max_connections: int = 1, bulk_threshold: int = 0):
         self.endpoint = endpoint
         self.stream_id: int = RESERVED_STREAM_ID
         self.lock = threading.Lock()
         self.connections: List[SfmConnection] = []
+        self.max_connections = 1
+        self.set_max_connections(max_connections)
+        self.bulk_threshold = bulk_threshold
+
+    def set_max_connections(self, max_connections: int):
+        self.max_connections = max(1, min(max_connections, MAX_CONN_PER_ENDPOINT))
 
     def add_connection(self, sfm_conn: SfmConnection):
 
         with self.lock:
-            while len(self.connections) >= MAX_CONN_PER_ENDPOINT:
+            while len(self.connections) >= self.max_connections:
                 first_conn = self.connections[0]
                 first_conn.conn.close()
                 self.connections.pop(0)
                 log.info(
                     f"Connection {first_conn.get_name()} is evicted for {sfm_conn.get_name()} "
-                    f"from endpoint {self.endpoint.name} for exceeding limit {MAX_CONN_PER_ENDPOINT}"
+                    f"from endpoint {self.endpoint.name} for exceeding limit {self.max_connections}"
                 )
 
             self.connections.append(sfm_conn)
@@ -68,12 +80,31 @@ class SfmEndpoint:
             else:
                 log.debug(f"Connection {sfm_conn.get_name()} is already removed from endpoint {self.endpoint.name}")
 
-    def get_connection(self, stream_id: int) -> Optional[SfmConnection]:
-        if not self.connections:
+    def get_connection(self, stream_id: int, size: int = 0) -> Optional[SfmConnection]:
+        """Get the connection to send a message on
+
+        Args:
+            stream_id: Stream ID of the message, used to round-robin the bulk connections
+            size: Payload size of the message
+
+        Returns:
+            The connection or None if the endpoint has no connections
+        """
+
+        # A copy so the list doesn't change while selecting
+        connections = list(self.connections)
+        if not connections:
             return None
 
-        index = stream_id % len(self.connections)
-        return self.connections[index]
+        if len(connections) == 1 or size <= self.bulk_threshold:
+            return connections[0]
+
+        return connections[1 + stream_id % (len(connections) - 1)]
+
+    def get_failover_connection(self, failed_conns: List[SfmConnection]) -> Optional[SfmConnection]:
+        """Get a connection not in the failed list, priority connection first"""
+
+        return next((conn for conn in self.connections if conn not in failed_conns), None)
 
     def next_stream_id(self) -> int:
         """Get next stream_id for the endpoint
@@ -0,0 +1,54 @@
+# Copyright (c) 2021-2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Optional
+
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.connection import BytesAlike
+from nvflare.fuel.f3.message import Headers
+
+
+class StreamAssembler:
+    """Incremental re-assembler for a message streamed in multiple frames.
+
+    The payload buffer grows as the fragments arrive, the size announced in the first frame is only
+    checked against the received data. A peer announcing a large size without sending the data can't make
+    the receiver allocate it. A size above max_size is rejected.
+    """
+
+    def __init__(self, stream_id: int, headers: Optional[Headers], size: int, max_size: int):
+        if not isinstance(size, int) or size < 0 or size > max_size:
+            raise CommError(CommError.BAD_DATA, f"Stream {stream_id} size {size} is invalid, the max is {max_size}")
+
+        self.stream_id = stream_id
+        self.headers = headers
+        self.size = size
+        self.buffer = bytearray()
+        self.offset = 0
+
+    def add_fragment(self, fragment: BytesAlike):
+        length = len(fragment)
+        if self.offset + length > self.size:
+            raise CommError(
+                CommError.BAD_DATA,
+                f"Stream {self.stream_id} overflow: {self.offset + length} bytes received, expecting {self.size}",
+            )
+
+        self.buffer += fragment
+        self.offset += length
+
+    def get_remaining(self) -> int:
+        return self.size - self.offset
+
+    def is_complete(self) -> bool:
+        return self.offset >= self.size
@@ -14,6 +14,7 @@
 
 import threading
 
+from nvflare.fuel.f3.comm_config import CommConfigurator
 from nvflare.fuel.utils.stats_utils import CounterPool, HistPool, new_message_size_pool, new_time_pool
 
 
@@ -21,6 +22,13 @@ class StatsPoolManager:
 
     lock = threading.Lock()
     pools = {}  # name => pool
+    sample_interval = None  # histogram sampling interval from the comm config
+
+    @classmethod
+    def _get_sample_interval(cls) -> int:
+        if cls.sample_interval is None:
+            cls.sample_interval = max(1, CommConfigurator().get_stats_sample_interval())
+        return cls.sample_interval
 
     @classmethod
     def _check_name(cls, name, scope):
@@ -36,14 +44,14 @@ class StatsPoolManager:
     @classmethod
     def add_time_hist_pool(cls, name: str, description: str, marks=None, scope=None):
         name = cls._check_name(name, scope)
-        p = new_time_pool(name, description, marks)
+        p = new_time_pool(name, description, marks, cls._get_sample_interval())
         cls.pools[name] = p
         return p
 
     @classmethod
     def add_msg_size_pool(cls, name: str, description: str, marks=None, scope=None):
         name = cls._check_name(name, scope)
-        p = new_message_size_pool(name, description, marks)
+        p = new_message_size_pool(name, description, marks, cls._get_sample_interval())
         cls.pools[name] = p
         return p
 
@@ -54,6 +62,15 @@ class StatsPoolManager:
         cls.pools[name] = p
         return p
 
+    @classmethod
+    def get_or_add_time_hist_pool(cls, name: str, description: str, marks=None):
+        """Get the pool shared by all the cells of the process, create it if not yet"""
+        with cls.lock:
+            p = cls.get_pool(name)
+            if not p:
+                p = cls.add_time_hist_pool(name, description, marks)
+            return p
+
     @classmethod
     def get_pool(cls, name: str):
         name = name.lower()
@@ -23,7 +23,15 @@ from typing import List, Optional
 
 from nvflare.fuel.hci.cmd_arg_utils import split_to_args
 from nvflare.fuel.hci.conn import Connection, receive_and_process
-from nvflare.fuel.hci.proto import ConfirmMethod, InternalCommands, ProtoKey, make_error
+from nvflare.fuel.hci.proto import (
+    SUPPORTED_CAPABILITIES,
+    Capability,
+    ConfirmMethod,
+    InternalCommands,
+    MetaKey,
+    ProtoKey,
+    make_error,
+)
 from nvflare.fuel.hci.reg import CommandEntry, CommandModule, CommandRegister
 from nvflare.fuel.hci.table import Table
 from nvflare.fuel.utils.fsm import FSM, State
@@ -115,6 +123,8 @@ class _ServerReplyJsonProcessor(object):
                     reply_processor.process_dict(ctx, item[ProtoKey.DATA])
                 elif it == ProtoKey.TOKEN:
                     reply_processor.process_token(ctx, item[ProtoKey.DATA])
+                elif it == ProtoKey.BINARY:
+                    reply_processor.process_binary(ctx, item[ProtoKey.DATA])
                 elif it == ProtoKey.SHUTDOWN:
                     reply_processor.process_shutdown(ctx, item[ProtoKey.DATA])
                     break
@@ -148,6 +158,16 @@ class _LoginReplyProcessor(ReplyProcessor):
         api = ctx.get_api()
         api.token = token
 
+    def reply_done(self, ctx: CommandContext):
+        # the server replies with the capabilities to use, older servers reply with none
+        api = ctx.get_api()
+        meta = ctx.get_meta()
+        capabilities = meta.get(MetaKey.CAPABILITIES) if isinstance(meta, dict) else None
+        if not isinstance(capabilities, list):
+            capabilities = []
+        api.binary_frames = Capability.BINARY_FRAMES in capabilities
+        api.chunked_transfer = Capability.CHUNKED_TRANSFER in capabilities
+
 
 class _CmdListReplyProcessor(ReplyProcessor):
     """Reply processor to register available commands after getting back a table of commands from the server."""
@@ -406,6 +426,8 @@ class AdminAPI(AdminAPISpec):
         # for login
         self.token = None
         self.login_result = None
+        self.binary_frames = False
+        self.chunked_transfer = False
         if not user_name:
             raise Exception("user_name is required.")
         self.user_name = user_name
@@ -624,6 +646,9 @@ class AdminAPI(AdminAPISpec):
             A dict of status and details
         """
         self.login_result = None
+        # the login is sent in the basic format, the server may not support the binary frames
+        self.binary_frames = False
+        self.chunked_transfer = False
         self.server_execute(f"{InternalCommands.CERT_LOGIN} {username}", _LoginReplyProcessor())
         if self.login_result is None:
             return {
@@ -646,6 +671,9 @@ class AdminAPI(AdminAPISpec):
             A dict of login status and details
         """
         self.login_result = None
+        # the login is sent in the basic format, the server may not support the binary frames
+        self.binary_frames = False
+        self.chunked_transfer = False
         self.server_execute(f"{InternalCommands.PWD_LOGIN} {username} {poc_key}", _LoginReplyProcessor())
         if self.login_result is None:
             return {
@@ -664,11 +692,16 @@ class AdminAPI(AdminAPISpec):
         json_processor = ctx.get_json_processor()
         process_json_func = json_processor.process_server_reply
 
-        conn = Connection(sock, self)
-        conn.append_command(command)
+        conn = Connection(sock, self, framed=self.binary_frames)
+        conn.append_command(command, meta={MetaKey.CAPABILITIES: SUPPORTED_CAPABILITIES})
         if self.token:
             conn.append_token(self.token)
 
+        attachments = ctx.get_attachments()
+        if attachments:
+            for data in attachments:
+                conn.append_binary(data)
+
         conn.close()
         ok = receive_and_process(sock, process_json_func)
         if not ok:
@@ -837,7 +870,15 @@ class AdminAPI(AdminAPISpec):
 
         return self.server_execute(command, cmd_entry=ent)
 
-    def server_execute(self, command, reply_processor=None, cmd_entry=None):
+    def server_execute(self, command, reply_processor=None, cmd_entry=None, attachments: List[bytes] = None):
+        """Executes a command on server side.
+
+        Args:
+            command: the command to be executed
+            reply_processor: processor to process reply from server
+            cmd_entry: the command entry
+            attachments: binary data to send with the command, sent raw if binary frames are negotiated at login
+        """
         if self.in_logout:
             return {ResultKey.STATUS: APIStatus.SUCCESS, ResultKey.DETAILS: "session is logging out"}
 
@@ -845,6 +886,7 @@ class AdminAPI(AdminAPISpec):
         ctx = self._new_command_context(command, args, cmd_entry)
         start = time.time()
         ctx.set_reply_processor(reply_processor)
+        ctx.set_attachments(attachments)
         self._try_command(ctx)
         secs = time.time() - start
         usecs = int(secs * 1000000)
@@ -18,6 +18,7 @@ import enum
 from abc import ABC, abstractmethod
 
 from nvflare.fuel.common.ctx import SimpleContext
+from nvflare.fuel.hci.base64_utils import bytes_to_b64str
 from nvflare.fuel.hci.reg import CommandModule
 from nvflare.fuel.hci.table import Table
 
@@ -32,6 +33,7 @@ class CommandCtxKey(object):
     RESULT = "result"
     JSON_PROCESSOR = "json_processor"
     META = "meta"
+    ATTACHMENTS = "attachments"
 
 
 class CommandContext(SimpleContext):
@@ -83,6 +85,12 @@ class CommandContext(SimpleContext):
     def get_meta(self):
         return self.get_prop(CommandCtxKey.META)
 
+    def set_attachments(self, attachments):
+        self.set_prop(CommandCtxKey.ATTACHMENTS, attachments)
+
+    def get_attachments(self):
+        return self.get_prop(CommandCtxKey.ATTACHMENTS)
+
 
 class ApiPocValue(object):
     ADMIN = "admin"
@@ -126,6 +134,10 @@ class ReplyProcessor:
     def process_token(self, ctx: CommandContext, token: str):
         pass
 
+    def process_binary(self, ctx: CommandContext, data: bytes):
+        # by default the data is processed as the base64-encoded string received in the ASCII format
+        self.process_string(ctx, bytes_to_b64str(data))
+
     def protocol_error(self, ctx: CommandContext, err: str):
         pass
 
@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import os
+import tempfile
+import uuid
 
 import nvflare.fuel.hci.file_transfer_defs as ftd
 from nvflare.fuel.hci.base64_utils import (
@@ -26,7 +28,7 @@ from nvflare.fuel.hci.base64_utils import (
 from nvflare.fuel.hci.cmd_arg_utils import join_args
 from nvflare.fuel.hci.reg import CommandEntry, CommandModule, CommandModuleSpec, CommandSpec
 from nvflare.fuel.hci.table import Table
-from nvflare.fuel.utils.zip_utils import split_path, unzip_all_from_bytes, zip_directory_to_bytes
+from nvflare.fuel.utils.zip_utils import split_path, unzip_all_from_bytes, unzip_all_from_file, zip_directory_to_file
 from nvflare.lighter.utils import load_private_key_file, sign_folders
 from nvflare.security.logging import secure_format_exception, secure_log_traceback
 
@@ -116,9 +118,11 @@ class _DownloadFolderProcessor(ReplyProcessor):
     def __init__(self, download_dir: str):
         self.download_dir = download_dir
         self.data_received = False
+        self.transfer = None
 
     def reply_start(self, ctx: CommandContext, reply_json):
         self.data_received = False
+        self.transfer = None
 
     def reply_done(self, ctx: CommandContext):
         if not self.data_received:
@@ -131,7 +135,12 @@ class _DownloadFolderProcessor(ReplyProcessor):
     def process_string(self, ctx: CommandContext, item: str):
         try:
             self.data_received = True
-            if item.startswith(ftd.DOWNLOAD_URL_MARKER):
+            if item.startswith(ftd.TRANSFER_MARKER):
+                # the data is to be downloaded in chunks
+                transfer_id, size = item[len(ftd.TRANSFER_MARKER) :].split(":")
+                self.transfer = (transfer_id, int(size))
+                ctx.set_command_result({"status": APIStatus.SUCCESS, "details": ""})
+            elif item.startswith(ftd.DOWNLOAD_URL_MARKER):
                 ctx.set_command_result(
                     {
                         "status": APIStatus.SUCCESS,
@@ -157,6 +166,48 @@ class _DownloadFolderProcessor(ReplyProcessor):
             )
 
 
+class _TransferChunkProcessor(ReplyProcessor):
+    """Reply processor for a chunk of a chunked transfer, the received data is written to the file if specified."""
+
+    def __init__(self, file=None):
+        self.file = file
+        self.received = 0
+        self.error = None
+
+    def _set_error(self, ctx: CommandContext, err: str):
+        self.error = err
+        ctx.set_command_result({"status": APIStatus.ERROR_RUNTIME, "details": err})
+
+    def process_error(self, ctx: CommandContext, err: str):
+        self._set_error(ctx, err)
+
+    def protocol_error(self, ctx: CommandContext, err: str):
+        self._set_error(ctx, err)
+
+    def process_string(self, ctx: CommandContext, item: str):
+        if not self.file:
+            return
+        try:
+            self.process_binary(ctx, b64str_to_bytes(item))
+        except Exception as e:
+            secure_log_traceback()
+            self._set_error(ctx, f"exception processing chunk: {secure_format_exception(e)}")
+
+    def process_binary(self, ctx: CommandContext, data: bytes):
+        if not self.file:
+            return
+        try:
+            self.file.write(data)
+            self.received += len(data)
+        except Exception as e:
+            secure_log_traceback()
+            self._set_error(ctx, f"exception processing chunk: {secure_format_exception(e)}")
+
+    def reply_done(self, ctx: CommandContext):
+        if self.file and not self.error and not self.received:
+            self._set_error(ctx, "protocol error - no data received")
+
+
 class FileTransferModule(CommandModule):
     """Command module with commands relevant to file transfer."""
 
@@ -331,12 +382,39 @@ class FileTransferModule(CommandModule):
             private_key = load_private_key_file(client_key_file_path)
             sign_folders(full_path, private_key, api.client_cert)
 
-        # zip the data
-        data = zip_directory_to_bytes(self.upload_dir, folder_name)
-
-        folder_name = split_path(full_path)[1]
-        b64str = bytes_to_b64str(data)
-        parts = [cmd_entry.full_command_name(), folder_name, b64str]
+        # zip the data to a file, it is uploaded in chunks if the server supports it
+        fd, zip_file = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        try:
+            zip_directory_to_file(self.upload_dir, folder_name, zip_file)
+            folder_name = split_path(full_path)[1]
+            if not api.chunked_transfer:
+                # older servers take the whole zip file inline
+                parts = [cmd_entry.full_command_name(), folder_name, binary_file_to_b64str(zip_file)]
+                return api.server_execute(join_args(parts))
+
+            transfer = ftd.TRANSFER_MARKER + uuid.uuid4().hex
+            offset = 0
+            with open(zip_file, "rb") as f:
+                while True:
+                    chunk = f.read(ftd.TRANSFER_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    parts = [cmd_entry.full_command_name(), folder_name, transfer, str(offset)]
+                    attachments = None
+                    if api.binary_frames:
+                        attachments = [chunk]
+                    else:
+                        parts.append(bytes_to_b64str(chunk))
+                    reply_processor = _TransferChunkProcessor()
+                    result = api.server_execute(join_args(parts), reply_processor, attachments=attachments)
+                    if reply_processor.error or result.get("status") != APIStatus.SUCCESS:
+                        return result
+                    offset += len(chunk)
+        finally:
+            os.remove(zip_file)
+
+        parts = [cmd_entry.full_command_name(), folder_name, transfer]
         command = join_args(parts)
         return api.server_execute(command)
 
@@ -347,11 +425,44 @@ class FileTransferModule(CommandModule):
         if len(args) != 2:
             return {"status": APIStatus.ERROR_SYNTAX, "details": "usage: {}".format(cmd_entry.usage)}
         job_id = args[1]
-        parts = [cmd_entry.full_command_name(), job_id]
+        parts = [cmd_entry.full_command_name(), job_id, ftd.TRANSFER_MARKER]
         command = join_args(parts)
         reply_processor = _DownloadFolderProcessor(self.download_dir)
         api = ctx.get_api()
-        return api.server_execute(command, reply_processor)
+        result = api.server_execute(command, reply_processor)
+        if not reply_processor.transfer or result.get("status") != APIStatus.SUCCESS:
+            return result
+
+        # get the zip file in chunks
+        transfer_id, size = reply_processor.transfer
+        fd, zip_file = tempfile.mkstemp(suffix=".zip")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                offset = 0
+                while offset < size:
+                    parts = [cmd_entry.full_command_name(), job_id, ftd.TRANSFER_MARKER + transfer_id, str(offset)]
+                    chunk_processor = _TransferChunkProcessor(f)
+                    chunk_result = api.server_execute(join_args(parts), chunk_processor)
+                    if chunk_processor.error or chunk_result.get("status") != APIStatus.SUCCESS:
+                        return chunk_result
+                    if not chunk_processor.received:
+                        return {
+                            "status": APIStatus.ERROR_PROTOCOL,
+                            "details": f"protocol error - no data received at offset {offset} of {size}",
+                        }
+                    offset += chunk_processor.received
+            unzip_all_from_file(zip_file, self.download_dir)
+        except Exception as e:
+            secure_log_traceback()
+            return {
+                "status": APIStatus.ERROR_RUNTIME,
+                "details": f"exception processing reply: {secure_format_exception(e)}",
+            }
+        finally:
+            os.remove(zip_file)
+
+        result["details"] = "Download to dir {}".format(self.download_dir)
+        return result
 
     def info(self, args, ctx: CommandContext):
         msg = f"Local Upload Source: {self.upload_dir}\n"
@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import List
+import struct
+from typing import List, Optional, Tuple
 
 from nvflare.fuel.common.ctx import BaseContext
 
-from .proto import Buffer, validate_proto
+from .base64_utils import bytes_to_b64str
+from .proto import Buffer, ProtoKey, validate_proto
 from .table import Table
 
 # ASCII Message Format:
@@ -31,6 +33,30 @@ ALL_END = "\x04"  # Marks the end of a complete transmission (End of Transmissio
 
 MAX_MSG_SIZE = 1024
 
+# Binary Frame Format:
+#
+# Used once the admin client and server have negotiated the BINARY_FRAMES capability at login;
+# A transmission starts with FRAME_MAGIC, which can't be the start of an ASCII message;
+# It is followed by frames, each with a 1-byte type and a 4-byte big-endian payload size, then the payload:
+#   JSON - a JSON document, same as a line of the ASCII format but UTF-8 encoded;
+#   BINARY - the raw data of a binary item of the preceding JSON document, one frame per item in order;
+#   END - marks the end of a complete transmission, without payload.
+
+FRAME_MAGIC = b"\x00HCI"
+MAX_FRAME_SIZE = 1024 * 1024 * 1024
+
+# max size of one read from the socket
+_READ_CHUNK_SIZE = 1024 * 1024
+
+_FRAME_HEADER = struct.Struct(">BI")
+
+
+class FrameType(object):
+
+    JSON = 1
+    BINARY = 2
+    END = 3
+
 
 def receive_til_end(sock, end=ALL_END):
     total_data = []
@@ -47,64 +73,154 @@ def receive_til_end(sock, end=ALL_END):
     return result.replace(LINE_END, "")
 
 
-# Returns:
-# seg1 - the text before the end
-# seg2 - the text after the end
-# if end is not found, seg2 is None
-# if end is found, seg2 is a string
-def _split_data(data: str):
-    # first determine whether the data contains ALL_END
-    # anything after ALL_END is dropped
-    all_done = False
-    idx = data.find(ALL_END)
-    if idx >= 0:
-        data = data[:idx]
-        all_done = True
-
-    # find lines separated by LINE_END
-    parts = data.split(LINE_END)
-    return parts, all_done
-
-
 def _process_one_line(line: str, process_json_func):
     """Validate and process one line, which should be a str containing a JSON document."""
     json_data = validate_proto(line)
     process_json_func(json_data)
 
 
-def receive_and_process(sock, process_json_func):
-    """Receives and sends lines to process with process_json_func."""
-    leftover = ""
+def _receive_lines(sock, data: bytes, process_json_func) -> bool:
+    """Receives the rest of an ASCII message, of which data is already received."""
+    line_end = LINE_END.encode("ascii")
+    all_end = ALL_END.encode("ascii")
+    leftover = []
     while True:
-        data = str(sock.recv(MAX_MSG_SIZE), "utf-8")
+        # anything after ALL_END is dropped
+        idx = data.find(all_end)
+        all_done = idx >= 0
+        if all_done:
+            data = data[:idx]
+
+        segs = data.split(line_end)
+        for seg in segs[:-1]:
+            leftover.append(seg)
+            line = b"".join(leftover)
+            leftover = []
+            if len(line) > 0:
+                _process_one_line(line.decode("utf-8"), process_json_func)
+        leftover.append(segs[-1])
+
+        if all_done:
+            line = b"".join(leftover)
+            if len(line) > 0:
+                _process_one_line(line.decode("utf-8"), process_json_func)
+            return True
+
+        data = sock.recv(MAX_MSG_SIZE)
         if len(data) <= 0:
             return False
 
-        segs, all_done = _split_data(data)
-        if all_done:
-            for seg in segs:
-                line = leftover + seg
-                if len(line) > 0:
-                    _process_one_line(line, process_json_func)
-                leftover = ""
+
+class _SockReader(object):
+    def __init__(self, sock, data: bytes):
+        """Reads exact amounts of data from the sock, starting with the data already received.
+
+        Args:
+            sock: the sock to read from
+            data: data already received from the sock
+        """
+        self.sock = sock
+        self.data = data
+
+    def read(self, size: int) -> Optional[bytes]:
+        """Read size bytes, or return None if the connection is closed before that.
+
+        The buffer grows as the data arrives, a peer declaring a big size doesn't get the memory allocated.
+        """
+        n = min(size, len(self.data))
+        buf = bytearray(self.data[:n])
+        self.data = self.data[n:]
+        while len(buf) < size:
+            received = self.sock.recv(min(size - len(buf), _READ_CHUNK_SIZE))
+            if not received:
+                return None
+            buf += received
+        return bytes(buf)
+
+    def read_frame(self) -> Tuple[Optional[int], Optional[bytes]]:
+        """Read a frame, returns its type and payload, or (None, None) if the frame can't be read."""
+        header = self.read(_FRAME_HEADER.size)
+        if header is None:
+            return None, None
+        frame_type, size = _FRAME_HEADER.unpack(header)
+        if size > MAX_FRAME_SIZE:
+            return None, None
+        payload = self.read(size)
+        if payload is None:
+            return None, None
+        return frame_type, payload
+
+
+def _receive_frames(sock, data: bytes, process_json_func) -> bool:
+    """Receives the rest of a framed transmission, of which data is already received.
+
+    The binary items of the JSON documents get their attachments as data.
+    """
+    reader = _SockReader(sock, data)
+    if reader.read(len(FRAME_MAGIC)) != FRAME_MAGIC:
+        return False
+
+    while True:
+        frame_type, payload = reader.read_frame()
+        if frame_type == FrameType.END:
             return True
+        elif frame_type == FrameType.BINARY:
+            # attachment of an invalid document
+            continue
+        elif frame_type != FrameType.JSON:
+            return False
 
-        for i in range(len(segs) - 1):
-            line = leftover + segs[i]
-            if len(line) > 0:
-                _process_one_line(line, process_json_func)
-            leftover = ""
+        json_data = validate_proto(payload.decode("utf-8"))
+        if json_data is not None:
+            for item in json_data[ProtoKey.DATA]:
+                if item[ProtoKey.TYPE] == ProtoKey.BINARY:
+                    frame_type, payload = reader.read_frame()
+                    if frame_type != FrameType.BINARY:
+                        return False
+                    item[ProtoKey.DATA] = payload
+        process_json_func(json_data)
+
+
+def _receive(sock, process_json_func) -> Tuple[bool, bool]:
+    """Receives a complete transmission in either format.
+
+    Returns: whether the transmission is received completely, and whether it is in the binary frame format
+    """
+    data = sock.recv(MAX_MSG_SIZE)
+    if len(data) <= 0:
+        return False, False
+
+    if data[:1] == FRAME_MAGIC[:1]:
+        return _receive_frames(sock, data, process_json_func), True
+    return _receive_lines(sock, data, process_json_func), False
+
+
+def receive_and_process(sock, process_json_func):
+    """Receives and sends JSON documents to process with process_json_func, in either format."""
+    ok, _ = _receive(sock, process_json_func)
+    return ok
+
+
+def receive_request(sock) -> Tuple[Optional[dict], bool]:
+    """Receives a request, which is a single JSON document in either format.
 
-        leftover += segs[len(segs) - 1]
+    Returns: the request, or None if it is invalid; and whether it is in the binary frame format
+    """
+    docs = []
+    ok, framed = _receive(sock, docs.append)
+    if not ok or not docs:
+        return None, framed
+    return docs[0], framed
 
 
 class Connection(BaseContext):
-    def __init__(self, sock, server):
+    def __init__(self, sock, server, framed=False):
         """Object containing connection information and buffer to build and send a line with socket passed in at init.
 
         Args:
             sock: sock for the connection
             server: server for the connection
+            framed: whether to send in the binary frame format instead of the ASCII format
         """
         BaseContext.__init__(self)
         self.sock = sock
@@ -114,13 +230,20 @@ class Connection(BaseContext):
         self.request = None
         self.command = None
         self.args = None
+        self.attachments = []
+        self.framed = framed
+        self.frames_started = False
         self.buffer = Buffer()
 
-    def _send_line(self, line: str, all_end=False):
+    def _send_line(self, line: str, all_end=False, attachments=None):
         """If not ``self.ended``, send line with sock."""
         if self.ended:
             return
 
+        if self.framed:
+            self._send_frames(line, all_end, attachments)
+            return
+
         if all_end:
             end = ALL_END
             self.ended = True
@@ -129,6 +252,32 @@ class Connection(BaseContext):
 
         self.sock.sendall(bytes(line + end, "utf-8"))
 
+    def _send_frames(self, line: str, all_end: bool, attachments):
+        out = bytearray()
+        if not self.frames_started:
+            out += FRAME_MAGIC
+            self.frames_started = True
+
+        if line:
+            payload = line.encode("utf-8")
+            out += _FRAME_HEADER.pack(FrameType.JSON, len(payload))
+            out += payload
+
+        if attachments:
+            for data in attachments:
+                # the attachments are sent as is to avoid copying them
+                out += _FRAME_HEADER.pack(FrameType.BINARY, len(data))
+                self.sock.sendall(out)
+                self.sock.sendall(data)
+                out = bytearray()
+
+        if all_end:
+            out += _FRAME_HEADER.pack(FrameType.END, 0)
+            self.ended = True
+
+        if out:
+            self.sock.sendall(out)
+
     def append_table(self, headers: List[str], name=None) -> Table:
         return self.buffer.append_table(headers, name=name)
 
@@ -152,8 +301,8 @@ class Connection(BaseContext):
         if flush:
             self.flush()
 
-    def append_command(self, cmd: str, flush=False):
-        self.buffer.append_command(cmd)
+    def append_command(self, cmd: str, flush=False, meta: dict = None):
+        self.buffer.append_command(cmd, meta=meta)
         if flush:
             self.flush()
 
@@ -167,6 +316,18 @@ class Connection(BaseContext):
         if flush:
             self.flush()
 
+    def append_binary(self, data: bytes, flush=False, meta: dict = None):
+        """Append binary data.
+
+        In the binary frame format the data is sent raw, otherwise it is sent as a base64-encoded string.
+        """
+        if self.framed:
+            self.buffer.append_binary(data, meta=meta)
+        else:
+            self.buffer.append_string(bytes_to_b64str(data), meta=meta)
+        if flush:
+            self.flush()
+
     def append_any(self, data, flush=False, meta: dict = None):
         if data is None:
             return
@@ -175,6 +336,8 @@ class Connection(BaseContext):
             self.append_string(data, flush, meta=meta)
         elif isinstance(data, dict):
             self.append_dict(data, flush, meta)
+        elif isinstance(data, bytes):
+            self.append_binary(data, flush, meta)
         else:
             self.append_error("unsupported data type {}".format(type(data)))
 
@@ -183,8 +346,9 @@ class Connection(BaseContext):
         if line is None or len(line) <= 0:
             return
 
+        attachments = self.buffer.attachments
         self.buffer.reset()
-        self._send_line(line, all_end=False)
+        self._send_line(line, all_end=False, attachments=attachments)
 
     def close(self):
         self.flush()
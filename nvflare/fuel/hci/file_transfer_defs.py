@@ -28,3 +28,8 @@ SERVER_CMD_INFO = "_info"
 DOWNLOAD_URL_MARKER = "Download_URL:"
 UPLOAD_FOLDER_FQN = "file_transfer.upload_folder"
 DOWNLOAD_FOLDER_FQN = "file_transfer.download_folder"
+
+# Big zip files of jobs are transferred in chunks with repeated submit_job/download_job commands.
+# The transfer is identified with the marker followed by the transfer id.
+TRANSFER_MARKER = "Transfer:"
+TRANSFER_CHUNK_SIZE = 1024 * 1024
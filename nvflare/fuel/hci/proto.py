@@ -35,6 +35,7 @@ class ProtoKey(object):
     SHUTDOWN = "shutdown"
     COMMAND = "command"
     TOKEN = "token"
+    BINARY = "binary"
 
 
 class MetaKey(object):
@@ -54,6 +55,7 @@ class MetaKey(object):
     JOB_NAME = "job_name"
     SUBMIT_TIME = "submit_time"
     DURATION = "duration"
+    CAPABILITIES = "capabilities"
 
 
 class MetaStatusValue(object):
@@ -84,6 +86,16 @@ class InternalCommands(object):
     LIST_SESSIONS = "list_sessions"
 
 
+class Capability(object):
+
+    BINARY_FRAMES = "binary_frames"
+    CHUNKED_TRANSFER = "chunked_transfer"
+
+
+# capabilities of this version, the admin client and server use the ones both support, as negotiated at login
+SUPPORTED_CAPABILITIES = [Capability.BINARY_FRAMES, Capability.CHUNKED_TRANSFER]
+
+
 class ConfirmMethod(object):
 
     AUTH = "auth"
@@ -97,6 +109,7 @@ class Buffer(object):
         """Buffer to append to for :class:`nvflare.fuel.hci.conn.Connection`."""
         self.meta = {}
         self.data = []
+        self.attachments = []
         self.output = {ProtoKey.TIME: f"{format(datetime.now())}", ProtoKey.DATA: self.data, ProtoKey.META: self.meta}
 
     def append_table(self, headers: List[str], name=None) -> Table:
@@ -129,8 +142,10 @@ class Buffer(object):
             meta = make_meta(MetaStatusValue.ERROR, data)
         self.meta.update(meta)
 
-    def append_command(self, cmd: str):
+    def append_command(self, cmd: str, meta: dict = None):
         self.data.append({ProtoKey.TYPE: ProtoKey.COMMAND, ProtoKey.DATA: cmd})
+        if meta:
+            self.meta.update(meta)
 
     def append_token(self, token: str):
         self.data.append({ProtoKey.TYPE: ProtoKey.TOKEN, ProtoKey.DATA: token})
@@ -138,6 +153,16 @@ class Buffer(object):
     def append_shutdown(self, msg: str):
         self.data.append({ProtoKey.TYPE: ProtoKey.SHUTDOWN, ProtoKey.DATA: msg})
 
+    def append_binary(self, data: bytes, meta: dict = None):
+        """Append binary data, which is only supported by the binary frame format.
+
+        The item has no data in the JSON document, the data is sent as an attachment in a frame of its own.
+        """
+        self.data.append({ProtoKey.TYPE: ProtoKey.BINARY})
+        self.attachments.append(data)
+        if meta:
+            self.meta.update(meta)
+
     def encode(self):
         if len(self.data) <= 0:
             return None
@@ -147,6 +172,7 @@ class Buffer(object):
     def reset(self):
         self.data = []
         self.meta = {}
+        self.attachments = []
         self.output = {ProtoKey.TIME: f"{format(datetime.now())}", ProtoKey.DATA: self.data, ProtoKey.META: self.meta}
 
 
@@ -173,6 +199,7 @@ def validate_proto(line: str):
         ProtoKey.TOKEN,
         ProtoKey.SHUTDOWN,
         ProtoKey.DICT,
+        ProtoKey.BINARY,
     ]
     types_with_data = [
         ProtoKey.STRING,
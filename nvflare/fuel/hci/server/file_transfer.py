@@ -12,10 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 import os
+import re
 import shutil
 import tempfile
-from typing import List
+import threading
+import time
+import uuid
+from typing import List, Optional, Union
 
 import nvflare.fuel.hci.file_transfer_defs as ftd
 from nvflare.fuel.hci.base64_utils import (
@@ -26,12 +31,197 @@ from nvflare.fuel.hci.base64_utils import (
     text_file_to_b64str,
 )
 from nvflare.fuel.hci.conn import Connection
+from nvflare.fuel.hci.proto import MetaStatusValue, make_meta
 from nvflare.fuel.hci.reg import CommandModule, CommandModuleSpec, CommandSpec
 from nvflare.fuel.hci.server.constants import ConnProps
 from nvflare.fuel.utils.zip_utils import unzip_all_from_bytes
 from nvflare.private.fed.server.cmd_utils import CommandUtil
 from nvflare.security.logging import secure_format_exception, secure_log_traceback
 
+# the files of chunked transfers are kept in this subdir of the upload/download dir
+_TRANSFER_DIR = ".transfers"
+_TRANSFER_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# files of transfers not used for this long are removed, the admin clients send their chunk requests back to back
+TRANSFER_IDLE_TIMEOUT = 600.0
+
+# how often the files of abandoned transfers are looked for
+TRANSFER_CHECK_INTERVAL = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+def new_transfer_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_transfer_file(base_dir: str, transfer_id: str) -> Optional[str]:
+    """Get the path of the file of a chunked transfer.
+
+    Args:
+        base_dir: the upload or download dir
+        transfer_id: ID of the transfer, chosen by the side sending the chunks
+
+    Returns: path of the file, or None if the transfer ID is invalid
+    """
+    if not _TRANSFER_ID_PATTERN.match(transfer_id):
+        return None
+    transfer_dir = os.path.join(base_dir, _TRANSFER_DIR)
+    os.makedirs(transfer_dir, exist_ok=True)
+    return os.path.join(transfer_dir, transfer_id)
+
+
+def remove_transfer(file_path: str):
+    """Remove the file of a transfer which is finished or failed."""
+    try:
+        os.remove(file_path)
+    except OSError:
+        # not created yet or removed by another command
+        pass
+
+
+def remove_expired_transfers(base_dir: str, idle_timeout: float = TRANSFER_IDLE_TIMEOUT):
+    """Remove the files of the transfers which were abandoned by the admin clients.
+
+    Args:
+        base_dir: the upload or download dir
+        idle_timeout: files not used for this long are removed
+    """
+    transfer_dir = os.path.join(base_dir, _TRANSFER_DIR)
+    if not os.path.isdir(transfer_dir):
+        return
+    expiry = time.time() - idle_timeout
+    for name in os.listdir(transfer_dir):
+        path = os.path.join(transfer_dir, name)
+        try:
+            if os.path.getmtime(path) < expiry:
+                os.remove(path)
+        except OSError:
+            # removed by another command
+            pass
+
+
+def receive_chunk(conn: Connection, file_path: str, offset: str, data: Union[str, bytes]) -> bool:
+    """Append a chunk received from the admin client to the file of a transfer.
+
+    Chunks must be sent in order, a chunk not at the end of the received data is rejected.
+    The file is removed if the chunk can't be received, the admin client doesn't resume failed transfers.
+
+    Args:
+        conn: the command connection
+        file_path: the file of the transfer
+        offset: offset of the chunk in the file
+        data: data of the chunk, base64-encoded if it's a str
+
+    Returns: whether the chunk is received. If not, an error is appended to the conn.
+    """
+    try:
+        offset = int(offset)
+    except ValueError:
+        conn.append_error(f"invalid chunk offset {offset}", meta=make_meta(MetaStatusValue.SYNTAX_ERROR, "offset"))
+        return False
+
+    if offset == 0:
+        size = 0
+    else:
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+
+    if offset != size:
+        remove_transfer(file_path)
+        err = f"chunk at offset {offset} is out of order, {size} bytes received"
+        conn.append_error(err, meta=make_meta(MetaStatusValue.SYNTAX_ERROR, err))
+        return False
+
+    try:
+        with open(file_path, "wb" if offset == 0 else "ab") as f:
+            f.write(b64str_to_bytes(data) if isinstance(data, str) else data)
+    except Exception as e:
+        remove_transfer(file_path)
+        err = f"failed to receive chunk: {secure_format_exception(e)}"
+        conn.append_error(err, meta=make_meta(MetaStatusValue.ERROR, err))
+        return False
+    conn.append_success("", meta=make_meta(MetaStatusValue.OK))
+    return True
+
+
+def send_chunk(conn: Connection, file_path: str, offset: str, chunk_size: int = ftd.TRANSFER_CHUNK_SIZE) -> bool:
+    """Send a chunk of the file of a transfer to the admin client.
+
+    The file is removed once its last chunk is sent, or if the chunk can't be read.
+
+    Args:
+        conn: the command connection
+        file_path: the file of the transfer
+        offset: offset of the chunk in the file
+        chunk_size: max size of the chunk
+
+    Returns: whether the chunk is sent. If not, an error is appended to the conn.
+    """
+    try:
+        offset = int(offset)
+    except ValueError:
+        conn.append_error(f"invalid chunk offset {offset}", meta=make_meta(MetaStatusValue.SYNTAX_ERROR, "offset"))
+        return False
+
+    if not os.path.isfile(file_path):
+        conn.append_error("no such transfer", meta=make_meta(MetaStatusValue.ERROR, "no such transfer"))
+        return False
+
+    try:
+        size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(chunk_size)
+    except Exception as e:
+        remove_transfer(file_path)
+        err = f"failed to read chunk: {secure_format_exception(e)}"
+        conn.append_error(err, meta=make_meta(MetaStatusValue.ERROR, err))
+        return False
+
+    if offset + len(data) >= size:
+        remove_transfer(file_path)
+    else:
+        # the transfer is in use, it doesn't expire
+        os.utime(file_path)
+    conn.append_binary(data, meta=make_meta(MetaStatusValue.OK))
+    return True
+
+
+class TransferCleaner:
+    def __init__(
+        self,
+        base_dirs: List[str],
+        check_interval: float = TRANSFER_CHECK_INTERVAL,
+        idle_timeout: float = TRANSFER_IDLE_TIMEOUT,
+    ):
+        """Periodically removes the files of the transfers abandoned by the admin clients.
+
+        Args:
+            base_dirs: the upload and download dirs
+            check_interval: how often the files are checked
+            idle_timeout: files not used for this long are removed
+        """
+        self.base_dirs = base_dirs
+        self.check_interval = check_interval
+        self.idle_timeout = idle_timeout
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="transfer_cleaner", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.check_interval):
+            for base_dir in self.base_dirs:
+                try:
+                    remove_expired_transfers(base_dir, self.idle_timeout)
+                except Exception as e:
+                    logger.warning(f"failed to remove expired transfers in {base_dir}: {secure_format_exception(e)}")
+
 
 class FileTransferModule(CommandModule, CommandUtil):
     def __init__(self, upload_dir: str, download_dir: str):
@@ -17,8 +17,8 @@ import socketserver
 import ssl
 import threading
 
-from nvflare.fuel.hci.conn import Connection, receive_til_end
-from nvflare.fuel.hci.proto import validate_proto
+from nvflare.fuel.hci.conn import Connection, receive_request
+from nvflare.fuel.hci.proto import ProtoKey
 from nvflare.fuel.hci.security import IdentityKey, get_identity_info
 from nvflare.security.logging import secure_log_traceback
 
@@ -56,9 +56,9 @@ class _MsgHandler(socketserver.BaseRequestHandler):
             if not valid:
                 conn.append_error("authentication error")
             else:
-                req = receive_til_end(self.request).strip()
+                # the reply is sent in the format of the request
+                req_json, conn.framed = receive_request(self.request)
                 command = None
-                req_json = validate_proto(req)
                 conn.request = req_json
                 if req_json is not None:
                     data = req_json["data"]
@@ -68,6 +68,7 @@ class _MsgHandler(socketserver.BaseRequestHandler):
                             command = item["data"]
                             break
 
+                    conn.attachments = [item[ProtoKey.DATA] for item in data if item["type"] == ProtoKey.BINARY]
                     if command is None:
                         conn.append_error("protocol violation")
                     else:
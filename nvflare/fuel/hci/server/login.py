@@ -16,7 +16,7 @@ from abc import ABC, abstractmethod
 from typing import List
 
 from nvflare.fuel.hci.conn import Connection
-from nvflare.fuel.hci.proto import CredentialType, InternalCommands
+from nvflare.fuel.hci.proto import SUPPORTED_CAPABILITIES, CredentialType, InternalCommands, MetaKey, ProtoKey
 from nvflare.fuel.hci.reg import CommandModule, CommandModuleSpec, CommandSpec
 from nvflare.fuel.hci.security import IdentityKey, verify_password
 from nvflare.fuel.hci.server.constants import ConnProps
@@ -120,9 +120,21 @@ class LoginModule(CommandModule, CommandFilter):
             ],
         )
 
+    @staticmethod
+    def _accept_capabilities(conn: Connection) -> dict:
+        """Get the reply meta with the capabilities requested by the admin client and supported by the server.
+
+        Older clients request no capabilities, so they keep using the basic protocol.
+        """
+        meta = conn.request.get(ProtoKey.META) if conn.request else None
+        requested = meta.get(MetaKey.CAPABILITIES) if isinstance(meta, dict) else None
+        if not isinstance(requested, list):
+            return {}
+        return {MetaKey.CAPABILITIES: [c for c in requested if c in SUPPORTED_CAPABILITIES]}
+
     def handle_login(self, conn: Connection, args: List[str]):
         if not self.authenticator:
-            conn.append_string("OK")
+            conn.append_string("OK", meta=self._accept_capabilities(conn))
             return
 
         if len(args) != 3:
@@ -138,12 +150,12 @@ class LoginModule(CommandModule, CommandFilter):
             return
 
         session = self.session_mgr.create_session(user_name=user_name, user_org="global", user_role="super")
-        conn.append_string("OK")
+        conn.append_string("OK", meta=self._accept_capabilities(conn))
         conn.append_token(session.token)
 
     def handle_cert_login(self, conn: Connection, args: List[str]):
         if not self.authenticator:
-            conn.append_string("OK")
+            conn.append_string("OK", meta=self._accept_capabilities(conn))
             return
 
         if len(args) != 2:
@@ -167,7 +179,7 @@ class LoginModule(CommandModule, CommandFilter):
             user_org=identity.get(IdentityKey.ORG, ""),
             user_role=identity.get(IdentityKey.ROLE, ""),
         )
-        conn.append_string("OK")
+        conn.append_string("OK", meta=self._accept_capabilities(conn))
         conn.append_token(session.token)
 
     def handle_logout(self, conn: Connection, args: List[str]):
@@ -12,16 +12,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import importlib
 import inspect
+import json
 import logging
+import os
 import pkgutil
+import sys
+import tempfile
+import threading
 from typing import Dict, List, Optional
 
+from nvflare.fuel.utils.config_service import ConfigService
 from nvflare.security.logging import secure_format_exception
 
 DEPRECATED_PACKAGES = ["nvflare.app_common.pt", "nvflare.app_common.homomorphic_encryption"]
 
+# dir of the class index files, set to empty to disable them
+CLASS_INDEX_DIR_VAR = "class_index_dir"
+DEFAULT_CLASS_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "nvflare")
+
 
 def get_class(class_path):
     module_name, class_name = class_path.rsplit(".", 1)
@@ -72,6 +83,11 @@ class _ModuleScanResult:
 
 
 class ModuleScanner:
+
+    # class tables of the process, by the scanned packages and modules
+    _class_tables: Dict[str, Dict[str, str]] = {}
+    _tables_lock = threading.Lock()
+
     def __init__(self, base_pkgs: List[str], module_names: List[str], exclude_libs=True):
         """Loads specified modules from base packages and then constructs a class to module name mapping.
 
@@ -86,7 +102,87 @@ class ModuleScanner:
 
         self._logger = logging.getLogger(self.__class__.__name__)
         self._class_table: Dict[str, str] = {}
-        self._create_classes_table()
+        self._load_classes_table()
+
+    def _load_classes_table(self):
+        """Loads the class table without importing the modules, unless it's not indexed yet.
+
+        The table is kept for the process, and in an index file which is rebuilt once the scanned packages or
+        the installed libs change. The modules are only imported by the scan, to find their classes.
+        """
+        key = json.dumps([self.base_pkgs, self.module_names, self.exclude_libs])
+        with ModuleScanner._tables_lock:
+            table = ModuleScanner._class_tables.get(key)
+            if table is None:
+                index_file = self._get_index_file(key)
+                fingerprint = self._get_fingerprint() if index_file else None
+                table = self._read_index(index_file, fingerprint)
+                if table is None:
+                    self._create_classes_table()
+                    table = self._class_table
+                    self._write_index(index_file, fingerprint, table)
+                ModuleScanner._class_tables[key] = table
+        self._class_table = table
+
+    @staticmethod
+    def _get_index_file(key: str) -> Optional[str]:
+        index_dir = ConfigService.get_str_var(CLASS_INDEX_DIR_VAR, default=DEFAULT_CLASS_INDEX_DIR)
+        if not index_dir:
+            return None
+        name = hashlib.sha256(f"{sys.executable}:{key}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(index_dir, f"class_index_{name}.json")
+
+    def _get_fingerprint(self) -> str:
+        """Gets a fingerprint of the sources of the scanned packages and of the installed libs.
+
+        A module may fail to import until a lib it needs is installed, so the installed libs are part of it.
+        """
+        h = hashlib.sha256(sys.version.encode("utf-8"))
+        for base in self.base_pkgs:
+            package = importlib.import_module(base)
+            for path in package.__path__:
+                for root, dirs, files in os.walk(path):
+                    dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+                    for name in sorted(files):
+                        file_path = os.path.join(root, name)
+                        st = os.stat(file_path)
+                        h.update(f"{os.path.relpath(file_path, path)}:{st.st_mtime_ns}:{st.st_size};".encode())
+        for path in sys.path:
+            if os.path.basename(path) in ("site-packages", "dist-packages") and os.path.isdir(path):
+                h.update(f"{path}:{os.stat(path).st_mtime_ns};".encode())
+        return h.hexdigest()
+
+    def _read_index(self, index_file: Optional[str], fingerprint: Optional[str]) -> Optional[Dict[str, str]]:
+        if not index_file or not os.path.isfile(index_file):
+            return None
+        try:
+            with open(index_file) as f:
+                index = json.load(f)
+            if index.get("fingerprint") != fingerprint or not isinstance(index.get("classes"), dict):
+                return None
+            return index["classes"]
+        except (OSError, ValueError) as e:
+            self._logger.debug(f"failed to read class index {index_file}: {secure_format_exception(e)}")
+            return None
+
+    def _write_index(self, index_file: Optional[str], fingerprint: Optional[str], table: Dict[str, str]):
+        if not index_file:
+            return
+        try:
+            index_dir = os.path.dirname(index_file)
+            os.makedirs(index_dir, exist_ok=True)
+
+            # write to a temp file first, other processes may be reading the index
+            fd, tmp_file = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"fingerprint": fingerprint, "classes": table}, f)
+                os.replace(tmp_file, index_file)
+            finally:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+        except OSError as e:
+            self._logger.debug(f"failed to write class index {index_file}: {secure_format_exception(e)}")
 
     def _create_classes_table(self):
         scan_result_table = {}
@@ -15,15 +15,17 @@ import importlib
 import inspect
 import logging
 import os
+import struct
 from enum import Enum
 from os.path import dirname, join
-from typing import Any, BinaryIO, Dict, Type, TypeVar, Union
+from typing import Any, BinaryIO, Dict, List, Optional, Type, TypeVar, Union
 
 import msgpack
 
 from nvflare.fuel.utils.fobs.decomposer import DataClassDecomposer, Decomposer, EnumTypeDecomposer
 
 __all__ = [
+    "OobBuffer",
     "register",
     "register_data_classes",
     "register_enum_types",
@@ -43,12 +45,40 @@ MAX_CONTENT_LEN = 128
 MSGPACK_TYPES = (None, bool, int, float, str, bytes, bytearray, memoryview, list, dict)
 T = TypeVar("T")
 
+# Out-of-band format. 0xC1 is never used by MessagePack so it can't be confused with in-band data.
+#
+#   +--------+---------+-------------+----------+----------------------+------+---------+-----+
+#   | marker | version | num_buffers | body_len | buffer lengths table | body | buffers | ... |
+#   |  (1)   |   (1)   |     (4)     |   (8)    |   num_buffers * 8    |      | 8-byte aligned  |
+#   +--------+---------+-------------+----------+----------------------+------+---------+-----+
+#
+OOB_MARKER = 0xC1
+OOB_VERSION = 1
+OOB_HEADER = struct.Struct(">BBIQ")
+OOB_EXT_CODE = 1
+OOB_INDEX = struct.Struct(">I")
+OOB_ALIGNMENT = 8
+STREAM_READ_SIZE = 1024 * 1024
+
 log = logging.getLogger(__name__)
 _decomposers: Dict[str, Decomposer] = {}
 _decomposers_registered = False
 _enum_auto_register = True
 
 
+class OobBuffer:
+    """Out-of-band buffer, similar to pickle.PickleBuffer.
+
+    A decomposer can return an OobBuffer for large binary data, like the memory of an array.
+    The data is not copied into the MessagePack body. It's referenced by index and written
+    only once into the serialized result. When deserialized, the decomposer receives a
+    memoryview of the serialized data instead of a copy.
+    """
+
+    def __init__(self, data):
+        self.view = memoryview(data).cast("B")
+
+
 def _get_type_name(cls: Type) -> str:
     module = cls.__module__
     if module == "builtins":
@@ -155,11 +185,17 @@ def num_decomposers() -> int:
     return len(_decomposers)
 
 
-def _fobs_packer(obj: Any) -> dict:
+def _fobs_packer(obj: Any, buffers: Optional[List[memoryview]] = None) -> Any:
 
     if type(obj) in MSGPACK_TYPES:
         return obj
 
+    if type(obj) is OobBuffer:
+        if buffers is None:
+            return obj.view
+        buffers.append(obj.view)
+        return msgpack.ExtType(OOB_EXT_CODE, OOB_INDEX.pack(len(buffers) - 1))
+
     type_name = _get_type_name(obj.__class__)
     if type_name not in _decomposers:
         if _enum_auto_register and isinstance(obj, Enum):
@@ -171,6 +207,57 @@ def _fobs_packer(obj: Any) -> dict:
     return {FOBS_TYPE: type_name, FOBS_DATA: decomposed}
 
 
+def _oob_ext_hook(code: int, data: bytes, buffers: List[memoryview]) -> Any:
+    if code != OOB_EXT_CODE:
+        return msgpack.ExtType(code, data)
+
+    (index,) = OOB_INDEX.unpack(data)
+    return buffers[index]
+
+
+def _padding(length: int) -> int:
+    return -length % OOB_ALIGNMENT
+
+
+def _oob_parts(body: bytes, buffers: List[memoryview]) -> List[Any]:
+    """Get all the parts of the out-of-band format in order. The buffers are not copied"""
+    parts = [OOB_HEADER.pack(OOB_MARKER, OOB_VERSION, len(buffers), len(body))]
+    parts.append(struct.pack(f">{len(buffers)}Q", *[len(b) for b in buffers]))
+    parts.append(body)
+    offset = sum(len(p) for p in parts)
+    for buffer in buffers:
+        pad = _padding(offset)
+        if pad:
+            parts.append(bytes(pad))
+        parts.append(buffer)
+        offset += pad + len(buffer)
+
+    return parts
+
+
+def _split_oob(view: memoryview) -> (memoryview, List[memoryview]):
+    """Split data in out-of-band format into body and buffers, all are views of the data"""
+    _, version, num_buffers, body_len = OOB_HEADER.unpack_from(view, 0)
+    if version != OOB_VERSION:
+        raise ValueError(f"Unsupported FOBS out-of-band format version {version}")
+
+    offset = OOB_HEADER.size
+    lengths = struct.unpack_from(f">{num_buffers}Q", view, offset)
+    offset += num_buffers * 8
+    body = view[offset : offset + body_len]
+    offset += body_len
+
+    buffers = []
+    for length in lengths:
+        offset += _padding(offset)
+        if offset + length > len(view):
+            raise ValueError("Truncated FOBS out-of-band buffers")
+        buffers.append(view[offset : offset + length])
+        offset += length
+
+    return body, buffers
+
+
 def _load_class(type_name: str):
     parts = type_name.split(".")
     if len(parts) == 1:
@@ -203,40 +290,65 @@ def _fobs_unpacker(obj: Any) -> Any:
     return decomposer.recompose(obj[FOBS_DATA])
 
 
+def _pack(obj: Any, buffers: List[memoryview], **kwargs) -> bytes:
+    _register_decomposers()
+    try:
+        return msgpack.packb(obj, default=lambda o: _fobs_packer(o, buffers), strict_types=True, **kwargs)
+    except ValueError as ex:
+        content = str(obj)
+        if len(content) > MAX_CONTENT_LEN:
+            content = content[:MAX_CONTENT_LEN] + " ..."
+        raise ValueError(f"Object {type(obj)} is not serializable: {ex}: {content}")
+
+
 def serialize(obj: Any, **kwargs) -> bytes:
     """Serialize object into bytes.
 
+    If any decomposer returns out-of-band buffers, the result is in the out-of-band
+    format, otherwise it's plain MessagePack data.
+
     Args:
         obj: Object to be serialized
         kwargs: Arguments passed to msgpack.packb
     Returns:
         Serialized data
     """
-    _register_decomposers()
-    try:
-        return msgpack.packb(obj, default=_fobs_packer, strict_types=True, **kwargs)
-    except ValueError as ex:
-        content = str(obj)
-        if len(content) > MAX_CONTENT_LEN:
-            content = content[:MAX_CONTENT_LEN] + " ..."
-        raise ValueError(f"Object {type(obj)} is not serializable: {ex}: {content}")
+    buffers = []
+    body = _pack(obj, buffers, **kwargs)
+    if not buffers:
+        return body
+
+    # Buffers are copied only once into the result
+    return b"".join(_oob_parts(body, buffers))
 
 
 def serialize_stream(obj: Any, stream: BinaryIO, **kwargs):
     """Serialize object and write the data to a stream.
 
+    Only the MessagePack body is built in memory. The out-of-band buffers are written to the
+    stream directly from the memory of the objects, so the serialized data is never held in
+    memory as a whole.
+
     Args:
         obj: Object to be serialized
         stream: Stream to write the result to
         kwargs: Arguments passed to msgpack.packb
     """
-    data = serialize(obj, **kwargs)
-    stream.write(data)
+    buffers = []
+    body = _pack(obj, buffers, **kwargs)
+    if not buffers:
+        stream.write(body)
+        return
+
+    for part in _oob_parts(body, buffers):
+        stream.write(part)
 
 
 def deserialize(data: bytes, **kwargs) -> Any:
     """Deserialize bytes into an object.
 
+    Out-of-band buffers are passed to decomposers as memoryview of the data without copying.
+
     Args:
         data: Serialized data
         kwargs: Arguments passed to msgpack.unpackb
@@ -244,20 +356,91 @@ def deserialize(data: bytes, **kwargs) -> Any:
         Deserialized object
     """
     _register_decomposers()
-    return msgpack.unpackb(data, object_hook=_fobs_unpacker, **kwargs)
+    view = memoryview(data)
+    if len(view) == 0 or view[0] != OOB_MARKER:
+        return msgpack.unpackb(data, object_hook=_fobs_unpacker, **kwargs)
+
+    body, buffers = _split_oob(view)
+    return msgpack.unpackb(
+        body, object_hook=_fobs_unpacker, ext_hook=lambda code, d: _oob_ext_hook(code, d, buffers), **kwargs
+    )
+
+
+def _read_into(stream: BinaryIO, buffer: bytearray):
+    """Fill the buffer from the stream, using readinto if the stream supports it"""
+    view = memoryview(buffer)
+    readinto = getattr(stream, "readinto", None)
+    while view:
+        if readinto:
+            n = readinto(view)
+        else:
+            chunk = stream.read(len(view))
+            n = len(chunk) if chunk else 0
+            view[:n] = chunk
+        if not n:
+            raise EOFError(f"Stream ended with {len(view)} bytes missing")
+        view = view[n:]
+
+
+def _read_exactly(stream: BinaryIO, length: int) -> bytearray:
+    buffer = bytearray(length)
+    _read_into(stream, buffer)
+    return buffer
+
+
+def _deserialize_plain_stream(first: bytes, stream: BinaryIO, **kwargs) -> Any:
+    unpacker = msgpack.Unpacker(object_hook=_fobs_unpacker, max_buffer_size=0, **kwargs)
+    unpacker.feed(first)
+    while True:
+        try:
+            return unpacker.unpack()
+        except msgpack.OutOfData:
+            chunk = stream.read(STREAM_READ_SIZE)
+            if not chunk:
+                raise EOFError("Stream ended before the object is complete")
+            unpacker.feed(chunk)
 
 
 def deserialize_stream(stream: BinaryIO, **kwargs) -> Any:
     """Deserialize bytes from stream into an object.
 
+    The data is read incrementally. Each out-of-band buffer is read directly into its own
+    buffer, which is passed to the decomposer without copying.
+
     Args:
         stream: Stream to write serialized data to
-        kwargs: Arguments passed to msgpack.unpackb
+        kwargs: Arguments passed to msgpack.Unpacker
     Returns:
         Deserialized object
     """
-    data = stream.read()
-    return deserialize(data, **kwargs)
+    _register_decomposers()
+    first = stream.read(1)
+    if not first:
+        raise EOFError("Stream is empty")
+
+    if first[0] != OOB_MARKER:
+        return _deserialize_plain_stream(first, stream, **kwargs)
+
+    header = first + _read_exactly(stream, OOB_HEADER.size - 1)
+    _, version, num_buffers, body_len = OOB_HEADER.unpack(header)
+    if version != OOB_VERSION:
+        raise ValueError(f"Unsupported FOBS out-of-band format version {version}")
+
+    lengths = struct.unpack(f">{num_buffers}Q", _read_exactly(stream, num_buffers * 8))
+    body = _read_exactly(stream, body_len)
+    offset = len(header) + num_buffers * 8 + body_len
+
+    buffers = []
+    for length in lengths:
+        pad = _padding(offset)
+        if pad:
+            _read_exactly(stream, pad)
+        buffers.append(memoryview(_read_exactly(stream, length)))
+        offset += pad + length
+
+    return msgpack.unpackb(
+        body, object_hook=_fobs_unpacker, ext_hook=lambda code, d: _oob_ext_hook(code, d, buffers), **kwargs
+    )
 
 
 def reset():
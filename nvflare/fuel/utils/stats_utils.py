@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import bisect
 import sys
 import threading
+import weakref
 from typing import List, Tuple, Union
 
 _KEY_MAX = "max"
@@ -27,6 +29,9 @@ _KEY_MARKS = "marks"
 _KEY_COUNTER_NAMES = "counter_names"
 _KEY_CAT_DATA = "cat_data"
 
+# The shards of the finished threads are folded each time this many shards are added
+_SHARD_PRUNE_INTERVAL = 64
+
 
 class StatsMode:
 
@@ -49,14 +54,22 @@ class _Bin:
         self.min = None
         self.max = None
 
-    def record_value(self, value: float):
-        self.count += 1
-        self.total += value
+    def record_value(self, value: float, weight: int = 1):
+        self.count += weight
+        self.total += value * weight
         if self.min is None or self.min > value:
             self.min = value
         if self.max is None or self.max < value:
             self.max = value
 
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or self.min > other.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or self.max < other.max):
+            self.max = other.max
+
     def get_content(self, mode=StatsMode.COUNT, total=0.0):
         if self.count == 0:
             return ""
@@ -91,7 +104,7 @@ class _Bin:
         m = d.get(_KEY_MIN)
         b.min = m if m else None
         x = d.get(_KEY_MAX)
-        b.min = x if x else None
+        b.max = x if x else None
         return b
 
 
@@ -111,13 +124,103 @@ class StatsPool:
         pass
 
 
-class HistPool(StatsPool):
-    def __init__(self, name: str, description: str, marks: Union[List[float], Tuple], unit: str):
+class _Shard:
+    """Stats recorded by one thread, updated without lock"""
+
+    def __init__(self):
+        self.thread = weakref.ref(threading.current_thread())
+        self.data = {}  # category name => bins or counters
+        self.skipped = 0
+
+    def is_alive(self) -> bool:
+        t = self.thread()
+        return t is not None and t.is_alive()
+
+
+class _ShardedPool(StatsPool):
+    """Pool recording the stats in per-thread shards, the shards are merged when the stats are read.
+
+    Recording takes no lock, the shards of the threads that are gone are folded into the merged data.
+    They are folded when the stats are read and every _SHARD_PRUNE_INTERVAL new shards, so pools that
+    are rarely read don't keep the shards of all the short-lived threads.
+    """
+
+    def __init__(self, name: str, description: str):
         StatsPool.__init__(self, name, description)
         self.update_lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._new_shards = 0
+        self._merged = {}  # data of the finished threads and the data loaded from dict
+
+    def _get_shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            self._local.shard = shard
+            with self.update_lock:
+                self._shards.append(shard)
+                self._new_shards += 1
+                if self._new_shards >= _SHARD_PRUNE_INTERVAL:
+                    self._fold_dead_shards()
+        return shard
+
+    def _new_data(self):
+        pass
+
+    def _merge_data(self, target, source):
+        pass
+
+    def _collect(self) -> dict:
+        """Merge the shards, must be called with the update lock"""
+        self._fold_dead_shards()
+        result = {}
+        self._merge_shard(result, self._merged)
+        for shard in self._shards:
+            self._merge_shard(result, shard)
+        return result
+
+    def _fold_dead_shards(self):
+        """Fold the shards of the finished threads into the merged data, must be called with the update lock"""
+        live_shards = []
+        for shard in self._shards:
+            if shard.is_alive():
+                live_shards.append(shard)
+            else:
+                self._merge_shard(self._merged, shard)
+        self._shards = live_shards
+        self._new_shards = 0
+
+    def _merge_shard(self, target: dict, shard):
+        data = shard.data if isinstance(shard, _Shard) else shard
+        # the owner thread may add categories while merging
+        for cat, source in list(data.items()):
+            current = target.get(cat)
+            if current is None:
+                current = self._new_data()
+                target[cat] = current
+            self._merge_data(current, source)
+
+
+class HistPool(_ShardedPool):
+    def __init__(
+        self, name: str, description: str, marks: Union[List[float], Tuple], unit: str, sample_interval: int = 1
+    ):
+        """A pool of histograms of the recorded values by category
+
+        Args:
+            name: name of the pool
+            description: description of the pool
+            marks: increasing bin boundaries
+            unit: unit of the values
+            sample_interval: record one of every sample_interval values in each thread, weighted to keep the counts
+        """
+        _ShardedPool.__init__(self, name, description)
         self.unit = unit
         self.marks = marks
-        self.cat_bins = {}  # category name => list of bins
+        if sample_interval < 1:
+            raise ValueError(f"sample_interval must be at least 1 but got {sample_interval}")
+        self.sample_interval = sample_interval
 
         if not marks:
             raise ValueError("marks not specified")
@@ -139,77 +242,97 @@ class HistPool(StatsPool):
         self.ranges.append((marks[-1], m))
         self.range_names.append(f">={marks[-1]}")
 
-    def record_value(self, category: str, value: float):
+    @property
+    def cat_bins(self) -> dict:
+        """Merged bins: category name => list of bins"""
         with self.update_lock:
-            bins = self.cat_bins.get(category)
-            if bins is None:
-                bins = [None for _ in range(len(self.ranges))]
-                self.cat_bins[category] = bins
+            return self._collect()
 
-            for i in range(len(self.ranges)):
-                r = self.ranges[i]
-                if r[0] <= value < r[1]:
-                    b = bins[i]
-                    if not b:
-                        b = _Bin()
-                        bins[i] = b
-                    b.record_value(value)
+    def record_value(self, category: str, value: float):
+        shard = self._get_shard()
+        if self.sample_interval > 1:
+            shard.skipped += 1
+            if shard.skipped < self.sample_interval:
+                return
+            shard.skipped = 0
+
+        bins = shard.data.get(category)
+        if bins is None:
+            bins = [None for _ in range(len(self.ranges))]
+            shard.data[category] = bins
+
+        # the range index: [..., M1) is 0, [M1, M2) is 1 ... [Mn, ...) is n
+        i = bisect.bisect_right(self.marks, value)
+        b = bins[i]
+        if not b:
+            b = _Bin()
+            bins[i] = b
+        b.record_value(value, self.sample_interval)
+
+    def _new_data(self):
+        return [None for _ in range(len(self.ranges))]
+
+    def _merge_data(self, target, source):
+        for i, b in enumerate(source):
+            if b:
+                if not target[i]:
+                    target[i] = _Bin()
+                target[i].merge(b)
 
     def get_table(self, mode=StatsMode.COUNT):
-        with self.update_lock:
-            headers = ["category"]
-            has_values = [False for _ in range(len(self.ranges))]
-
-            # determine bins that have values in any category
-            for _, bins in self.cat_bins.items():
-                for i in range(len(self.ranges)):
-                    if bins[i]:
-                        has_values[i] = True
+        cat_bins = self.cat_bins
+        headers = ["category"]
+        has_values = [False for _ in range(len(self.ranges))]
 
+        # determine bins that have values in any category
+        for _, bins in cat_bins.items():
             for i in range(len(self.ranges)):
-                if has_values[i]:
-                    headers.append(self.range_names[i])
-
-            rows = []
-            for cat_name in sorted(self.cat_bins.keys()):
-                bins = self.cat_bins[cat_name]
-                total_count = 0
-                if mode == StatsMode.PERCENT:
-                    for b in bins:
-                        if b:
-                            total_count += b.count
-
-                r = [cat_name]
-                for i in range(len(bins)):
-                    if not has_values[i]:
-                        continue
-
-                    b = bins[i]
-                    if not b:
-                        r.append("")
-                    else:
-                        r.append(b.get_content(mode, total_count))
-                rows.append(r)
-            return headers, rows
+                if bins[i]:
+                    has_values[i] = True
+
+        for i in range(len(self.ranges)):
+            if has_values[i]:
+                headers.append(self.range_names[i])
+
+        rows = []
+        for cat_name in sorted(cat_bins.keys()):
+            bins = cat_bins[cat_name]
+            total_count = 0
+            if mode == StatsMode.PERCENT:
+                for b in bins:
+                    if b:
+                        total_count += b.count
+
+            r = [cat_name]
+            for i in range(len(bins)):
+                if not has_values[i]:
+                    continue
+
+                b = bins[i]
+                if not b:
+                    r.append("")
+                else:
+                    r.append(b.get_content(mode, total_count))
+            rows.append(r)
+        return headers, rows
 
     def to_dict(self):
-        with self.update_lock:
-            cat_bins = {}
-            for cat, bins in self.cat_bins.items():
-                exp_bins = []
-                for b in bins:
-                    if not b:
-                        exp_bins.append("")
-                    else:
-                        exp_bins.append(b.to_dict())
-                cat_bins[cat] = exp_bins
-            return {
-                _KEY_NAME: self.name,
-                _KEY_DESC: self.description,
-                _KEY_MARKS: list(self.marks),
-                _KEY_UNIT: self.unit,
-                _KEY_CAT_DATA: cat_bins,
-            }
+        cat_bins = {}
+        for cat, bins in self.cat_bins.items():
+            exp_bins = []
+            for b in bins:
+                if not b:
+                    exp_bins.append("")
+                else:
+                    exp_bins.append(b.to_dict())
+            cat_bins[cat] = exp_bins
+        return {
+            _KEY_NAME: self.name,
+            _KEY_DESC: self.description,
+            _KEY_MARKS: list(self.marks),
+            _KEY_UNIT: self.unit,
+            _KEY_CAT_DATA: cat_bins,
+        }
 
     @staticmethod
     def from_dict(d: dict):
@@ -231,86 +354,99 @@ class HistPool(StatsPool):
                 else:
                     assert isinstance(b, dict)
                     in_bins.append(_Bin.from_dict(b))
-            p.cat_bins[cat] = in_bins
+            p._merged[cat] = in_bins
         return p
 
 
-class CounterPool(StatsPool):
+class CounterPool(_ShardedPool):
     def __init__(self, name: str, description: str, counter_names: List[str], dynamic_counter_name=True):
         if not counter_names and not dynamic_counter_name:
             raise ValueError("counter_names cannot be empty")
-        StatsPool.__init__(self, name, description)
-        self.counter_names = counter_names
-        self.cat_counters = {}  # dict of cat_name => counter dict (counter_name => int)
+        _ShardedPool.__init__(self, name, description)
+        self.counter_names = counter_names if counter_names else []
+        self._known_names = set(self.counter_names)
         self.dynamic_counter_name = dynamic_counter_name
-        self.update_lock = threading.Lock()
 
-    def increment(self, category: str, counter_name: str, amount=1):
+    @property
+    def cat_counters(self) -> dict:
+        """Merged counters: category name => counter dict (counter_name => int)"""
         with self.update_lock:
-            if counter_name not in self.counter_names:
-                if self.dynamic_counter_name:
+            return self._collect()
+
+    def increment(self, category: str, counter_name: str, amount=1):
+        if counter_name not in self._known_names:
+            with self.update_lock:
+                if counter_name not in self._known_names:
+                    if not self.dynamic_counter_name:
+                        raise ValueError(f"'{counter_name}' is not defined in pool '{self.name}'")
                     self.counter_names.append(counter_name)
-                else:
-                    raise ValueError(f"'{counter_name}' is not defined in pool '{self.name}'")
+                    self._known_names.add(counter_name)
+
+        shard = self._get_shard()
+        counters = shard.data.get(category)
+        if counters is None:
+            counters = {}
+            shard.data[category] = counters
+        counters[counter_name] = counters.get(counter_name, 0) + amount
 
-            counters = self.cat_counters.get(category)
-            if not counters:
-                counters = {}
-                self.cat_counters[category] = counters
-            c = counters.get(counter_name, 0)
-            c += amount
-            counters[counter_name] = c
+    def _new_data(self):
+        return {}
+
+    def _merge_data(self, target, source):
+        for cn, v in list(source.items()):
+            target[cn] = target.get(cn, 0) + v
 
     def get_table(self, mode=""):
-        with self.update_lock:
-            headers = ["category"]
-            eff_counter_names = []
-            for cn in self.counter_names:
-                for _, counters in self.cat_counters.items():
-                    v = counters.get(cn, 0)
-                    if v > 0:
-                        eff_counter_names.append(cn)
-                        break
-
-            headers.extend(eff_counter_names)
-            rows = []
-            for cat_name in sorted(self.cat_counters.keys()):
-                counters = self.cat_counters[cat_name]
-                r = [cat_name]
-                for cn in eff_counter_names:
-                    value = counters.get(cn, 0)
-                    r.append(str(value))
-                rows.append(r)
-            return headers, rows
+        cat_counters = self.cat_counters
+        headers = ["category"]
+        eff_counter_names = []
+        for cn in list(self.counter_names):
+            for _, counters in cat_counters.items():
+                v = counters.get(cn, 0)
+                if v > 0:
+                    eff_counter_names.append(cn)
+                    break
+
+        headers.extend(eff_counter_names)
+        rows = []
+        for cat_name in sorted(cat_counters.keys()):
+            counters = cat_counters[cat_name]
+            r = [cat_name]
+            for cn in eff_counter_names:
+                value = counters.get(cn, 0)
+                r.append(str(value))
+            rows.append(r)
+        return headers, rows
 
     def to_dict(self):
-        with self.update_lock:
-            return {
-                _KEY_NAME: self.name,
-                _KEY_DESC: self.description,
-                _KEY_COUNTER_NAMES: list(self.counter_names),
-                _KEY_CAT_DATA: self.cat_counters,
-            }
+        return {
+            _KEY_NAME: self.name,
+            _KEY_DESC: self.description,
+            _KEY_COUNTER_NAMES: list(self.counter_names),
+            _KEY_CAT_DATA: self.cat_counters,
+        }
 
     @staticmethod
     def from_dict(d: dict):
         p = CounterPool(
             name=d.get(_KEY_NAME, ""), description=d.get(_KEY_DESC, ""), counter_names=d.get(_KEY_COUNTER_NAMES)
         )
-        p.cat_counters = d.get(_KEY_CAT_DATA)
+        cat_counters = d.get(_KEY_CAT_DATA)
+        if cat_counters:
+            p._merged.update(cat_counters)
         return p
 
 
-def new_time_pool(name: str, description="", marks=None) -> HistPool:
+def new_time_pool(name: str, description="", marks=None, sample_interval=1) -> HistPool:
     if not marks:
         marks = (0.0001, 0.0005, 0.001, 0.002, 0.004, 0.008, 0.01, 0.02, 0.04, 0.08, 0.1, 0.2, 0.4, 0.8, 1.0, 2.0)
-    return HistPool(name=name, description=description, marks=marks, unit="second")
+    return HistPool(name=name, description=description, marks=marks, unit="second", sample_interval=sample_interval)
 
 
-def new_message_size_pool(name: str, description="", marks=None) -> HistPool:
+def new_message_size_pool(name: str, description="", marks=None, sample_interval=1) -> HistPool:
     if not marks:
         marks = (0.01, 0.1, 1, 10, 50, 100, 200, 500, 800, 1000)
-    return HistPool(name=name, description=description, marks=marks, unit="MB")
+    return HistPool(name=name, description=description, marks=marks, unit="MB", sample_interval=sample_interval)
 
 
 VALID_HIST_MODES = [StatsMode.COUNT, StatsMode.PERCENT, StatsMode.AVERAGE, StatsMode.MAX, StatsMode.MIN]
@@ -119,6 +119,17 @@ def zip_directory_to_bytes(root_dir: str, folder_name: str) -> bytes:
     return bio.getvalue()
 
 
+def zip_directory_to_file(root_dir: str, folder_name: str, output_file: str):
+    """Compresses a directory into a zip file.
+
+    Args:
+        root_dir: root path that contains the folder to be zipped
+        folder_name: path to the folder to be zipped, relative to root_dir
+        output_file: path of the zip file to be created
+    """
+    _zip_directory(root_dir, folder_name, output_file)
+
+
 def ls_zip_from_bytes(zip_data: bytes):
     """Returns info of a zip.
 
@@ -165,3 +176,30 @@ def unzip_all_from_bytes(zip_data: bytes, output_dir_name: str):
 
     with ZipFile(io.BytesIO(zip_data), "r") as z:
         z.extractall(output_dir_name)
+
+
+def ls_zip_from_file(zip_file: str):
+    """Returns info of a zip file.
+
+    Args:
+        zip_file: path of the zip file
+    """
+    with ZipFile(zip_file, "r") as z:
+        return z.infolist()
+
+
+def unzip_all_from_file(zip_file: str, output_dir_name: str):
+    """Extracts all files of a zip file to the specified output directory.
+
+    Args:
+        zip_file: path of the zip file
+        output_dir_name: the output directory for extracted content
+    """
+    if not os.path.exists(output_dir_name):
+        raise FileNotFoundError(f'output directory "{output_dir_name}" does not exist')
+
+    if not os.path.isdir(output_dir_name):
+        raise NotADirectoryError(f'"{output_dir_name}" is not a valid directory')
+
+    with ZipFile(zip_file, "r") as z:
+        z.extractall(output_dir_name)
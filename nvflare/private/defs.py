@@ -144,6 +144,7 @@ class CellChannel:
     CLIENT_SUB_WORKER_COMMAND = "client_sub_worker_command"
     MULTI_PROCESS_EXECUTOR = "multi_process_executor"
     SIMULATOR_RUNNER = "simulator_runner"
+    SWARM = "swarm"
 
 
 class CellChannelTopic:
@@ -157,6 +158,7 @@ class CellChannelTopic:
     FIRE_EVENT = "fire_event"
 
     SIMULATOR_WORKER_INIT = "simulator_worker_init"
+    GET_CHUNK = "get_chunk"
 
 
 ERROR_MSG_PREFIX = "NVFLARE_ERROR"
@@ -174,6 +176,11 @@ class CellMessageHeaderKeys:
     JOB_IDS = "job_ids"
     MESSAGE = "message"
     ABORT_JOBS = "abort_jobs"
+    TASK_HEADERS = "task_headers"
+    TASK_MANIFEST = "task_manifest"
+    CHUNK_DIGEST = "chunk_digest"
+    LONG_POLL_TIMEOUT = "long_poll_timeout"
+    NO_WAIT = "no_wait"
 
 
 def new_cell_message(headers: dict, payload=None):
@@ -158,6 +158,8 @@ def create_admin_agent(
         A FedAdminAgent.
     """
     client_engine = ClientEngine(federated_client, federated_client.token, args, rank)
+    client_engine.client_executor.start_process_pool()
+    mpm.add_cleanup_cb(client_engine.client_executor.stop_process_pool)
     admin_agent = FedAdminAgent(
         client_name="admin_agent",
         cell=federated_client.cell,
@@ -19,7 +19,9 @@ import time
 
 import psutil
 
+from nvflare.fuel.f3.mpm import MainProcessMonitor as mpm
 from nvflare.fuel.hci.security import hash_password
+from nvflare.fuel.hci.server.file_transfer import TransferCleaner
 from nvflare.private.defs import SSLConstants
 from nvflare.private.fed.runner import Runner
 from nvflare.private.fed.server.admin import FedAdminServer
@@ -74,13 +76,14 @@ def create_admin_server(fl_server: FederatedServer, server_conf=None, args=None,
     root_cert = server_conf[SSLConstants.ROOT_CERT] if secure_train else None
     server_cert = server_conf[SSLConstants.CERT] if secure_train else None
     server_key = server_conf[SSLConstants.PRIVATE_KEY] if secure_train else None
+    admin_storage_dir = os.path.join(args.workspace, server_conf.get("admin_storage", "tmp"))
     admin_server = FedAdminServer(
         cell=fl_server.cell,
         fed_admin_interface=fl_server.engine,
         users=users,
         cmd_modules=fl_server.cmd_modules,
-        file_upload_dir=os.path.join(args.workspace, server_conf.get("admin_storage", "tmp")),
-        file_download_dir=os.path.join(args.workspace, server_conf.get("admin_storage", "tmp")),
+        file_upload_dir=admin_storage_dir,
+        file_download_dir=admin_storage_dir,
         host=server_conf.get("admin_host", "localhost"),
         port=server_conf.get("admin_port", 5005),
         ca_cert_file_name=root_cert,
@@ -89,4 +92,9 @@ def create_admin_server(fl_server: FederatedServer, server_conf=None, args=None,
         accepted_client_cns=None,
         download_job_url=server_conf.get("download_job_url", "http://"),
     )
+
+    # the chunked transfers abandoned by the admin clients are removed in the background
+    transfer_cleaner = TransferCleaner([admin_storage_dir])
+    transfer_cleaner.start()
+    mpm.add_cleanup_cb(transfer_cleaner.stop)
     return admin_server
@@ -0,0 +1,59 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Provides the process of a WarmProcessPool, which is started ahead of its job."""
+
+import importlib
+import json
+import logging
+import os
+import runpy
+import sys
+
+
+def main():
+    """Imports the job module and the preload modules, then waits for the job and runs the module as __main__.
+
+    Usage: python -m nvflare.private.fed.app.warm_process <job module> [<preload module> ...]
+
+    The job is a JSON line with the args and env of the job process, read from stdin. The process exits
+    without running anything when stdin is closed, which is also the case when its parent exits.
+    """
+    module = sys.argv[1]
+    importlib.import_module(module)
+    for name in sys.argv[2:]:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logging.getLogger("warm_process").warning(f"can't preload module {name}: {e}")
+
+    # only the imports of the job module are kept, it runs again as __main__
+    sys.modules.pop(module, None)
+
+    line = sys.stdin.readline()
+    if not line:
+        return
+    job = json.loads(line)
+
+    # same env as if the process is started for the job, including the paths added to PYTHONPATH
+    os.environ.clear()
+    os.environ.update(job["env"])
+    python_path = os.environ.get("PYTHONPATH", "").split(os.pathsep)
+    sys.path[1:1] = [p for p in python_path if p and p not in sys.path]
+
+    sys.argv = [module] + job["args"]
+    runpy.run_module(module, run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -206,6 +206,7 @@ class ClientEngine(ClientEngineInternalSpec):
         self.logger.info("Client shutdown...")
         touch_file = os.path.join(self.args.workspace, "shutdown.fl")
         self.fire_event(EventType.SYSTEM_END, self.new_context())
+        self.client_executor.stop_process_pool()
 
         thread = threading.Thread(target=shutdown_client, args=(self.client, touch_file))
         thread.start()
@@ -216,6 +217,7 @@ class ClientEngine(ClientEngineInternalSpec):
         self.logger.info("Client shutdown...")
         touch_file = os.path.join(self.args.workspace, "restart.fl")
         self.fire_event(EventType.SYSTEM_END, self.new_context())
+        self.client_executor.stop_process_pool()
         thread = threading.Thread(target=shutdown_client, args=(self.client, touch_file))
         thread.start()
 
@@ -27,10 +27,13 @@ from nvflare.fuel.f3.cellnet.cell import FQCN
 from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey, ReturnCode
 from nvflare.fuel.utils import fobs
 from nvflare.private.defs import CellChannel, new_cell_message
+from nvflare.private.fed.utils.process_pool import create_warm_process_pool
 from nvflare.security.logging import secure_format_exception, secure_log_traceback
 
 from .client_status import ClientStatus, get_status_message
 
+_WORKER_PROCESS_MODULE = "nvflare.private.fed.app.client.worker_process"
+
 
 class ClientExecutor(ABC):
     @abstractmethod
@@ -134,6 +137,18 @@ class ProcessExecutor(ClientExecutor):
         self.startup = startup
         self.run_processes = {}
         self.lock = threading.Lock()
+        self.process_pool = None
+
+    def start_process_pool(self):
+        """Start the pool of warm worker processes if configured, only the parent client process starts jobs."""
+        if not self.process_pool:
+            self.process_pool = create_warm_process_pool(_WORKER_PROCESS_MODULE)
+
+    def stop_process_pool(self):
+        """Stop the pool of warm worker processes."""
+        if self.process_pool:
+            self.process_pool.stop()
+            self.process_pool = None
 
     def start_app(
         self,
@@ -168,7 +183,7 @@ class ProcessExecutor(ClientExecutor):
         for t in args.set:
             command_options += " " + t
         command = (
-            f"{sys.executable} -m nvflare.private.fed.app.client.worker_process -m "
+            f"{sys.executable} -m {_WORKER_PROCESS_MODULE} -m "
             + args.workspace
             + " -w "
             + self.startup
@@ -187,8 +202,11 @@ class ProcessExecutor(ClientExecutor):
             + " -s fed_client.json "
             " --set" + command_options + " print_conf=True"
         )
-        # use os.setsid to create new process group ID
-        process = subprocess.Popen(shlex.split(command, True), preexec_fn=os.setsid, env=new_env)
+        if self.process_pool:
+            process = self.process_pool.launch(shlex.split(command, True), new_env)
+        else:
+            # use os.setsid to create new process group ID
+            process = subprocess.Popen(shlex.split(command, True), preexec_fn=os.setsid, env=new_env)
 
         self.logger.info("Worker child process ID: {}".format(process.pid))
 
@@ -23,15 +23,29 @@ from nvflare.apis.fl_constant import ReturnCode as ShareableRC
 from nvflare.apis.fl_constant import ServerCommandKey, ServerCommandNames
 from nvflare.apis.fl_context import FLContext
 from nvflare.apis.fl_exception import FLCommunicationError
-from nvflare.apis.shareable import Shareable
+from nvflare.apis.shareable import ReservedHeaderKey, Shareable
 from nvflare.apis.utils.fl_context_utils import get_serializable_data
 from nvflare.fuel.f3.cellnet.cell import FQCN, Cell
 from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey, ReturnCode
 from nvflare.fuel.utils import fobs
-from nvflare.private.defs import CellChannel, CellChannelTopic, CellMessageHeaderKeys, SpecialTaskName, new_cell_message
+from nvflare.fuel.utils.config_service import ConfigService
+from nvflare.private.defs import (
+    CellChannel,
+    CellChannelTopic,
+    CellMessageHeaderKeys,
+    SpecialTaskName,
+    TaskConstant,
+    new_cell_message,
+)
 from nvflare.private.fed.client.client_engine_internal_spec import ClientEngineInternalSpec
+from nvflare.private.fed.utils.swarm import DEFAULT_CHUNK_TIMEOUT, SwarmDownloader
 from nvflare.security.logging import secure_format_exception
 
+_CONFIG_VAR_SWARM_CHUNK_TIMEOUT = "swarm_chunk_timeout"
+
+# max time the server may hold a task request until a task is available, 0 to disable long polling
+_CONFIG_VAR_TASK_LONG_POLL_TIMEOUT = "task_long_poll_timeout"
+
 
 def _get_client_ip():
     """Return localhost IP.
@@ -85,6 +99,7 @@ class Communicator:
         self.compression = compression
         self.client_register_interval = client_register_interval
         self.timeout = timeout
+        self.swarm_downloader = None
 
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -179,21 +194,46 @@ class Communicator:
         )
         job_id = str(shared_fl_ctx.get_prop(FLContextKey.CURRENT_RUN))
 
+        # the simulator runs the clients one after another, they can't wait for tasks at the server
+        timeout = self.timeout
+        if not fl_ctx.get_prop(FLContextKey.SIMULATE_MODE, False):
+            long_poll_timeout = ConfigService.get_float_var(name=_CONFIG_VAR_TASK_LONG_POLL_TIMEOUT, default=20.0)
+            if long_poll_timeout > 0:
+                task_message.set_header(CellMessageHeaderKeys.LONG_POLL_TIMEOUT, long_poll_timeout)
+                timeout += long_poll_timeout
+
         fqcn = FQCN.join([FQCN.ROOT_SERVER, job_id])
         task = self.cell.send_request(
             target=fqcn,
             channel=CellChannel.SERVER_COMMAND,
             topic=ServerCommandNames.GET_TASK,
             request=task_message,
-            timeout=self.timeout,
+            timeout=timeout,
             optional=True,
         )
         end_time = time.time()
         return_code = task.get_header(MessageHeaderKey.RETURN_CODE)
 
+        if return_code == ReturnCode.OK and task.get_header(CellMessageHeaderKeys.TASK_MANIFEST):
+            # the task content is published in chunks, download them from the peers and the server
+            try:
+                task.payload = self._swarm_download(fobs.loads(task.payload), fqcn)
+            except Exception as ex:
+                self.logger.warning(
+                    f"Failed to download task from {project_name} server: {secure_format_exception(ex)}"
+                )
+                return_code = ReturnCode.COMM_ERROR
+
         if return_code == ReturnCode.OK:
             size = len(task.payload)
             task.payload = fobs.loads(task.payload)
+            task_headers = task.get_header(CellMessageHeaderKeys.TASK_HEADERS)
+            if task_headers is not None:
+                # the task content is shared by all clients, the headers are sent separately
+                task.payload[ReservedHeaderKey.HEADERS] = fobs.loads(task_headers)
+            if task.get_header(CellMessageHeaderKeys.NO_WAIT):
+                # the request was held at the server until no task came, ask again right away
+                task.payload.set_header(TaskConstant.WAIT_TIME, 0.0)
             task_name = task.payload.get_header(ServerCommandKey.TASK_NAME)
             fl_ctx.set_prop(FLContextKey.SSID, ssid)
             if task_name not in [SpecialTaskName.END_RUN, SpecialTaskName.TRY_AGAIN]:
@@ -211,6 +251,14 @@ class Communicator:
 
         return task
 
+    def _swarm_download(self, manifest: dict, server: str) -> bytes:
+        if not self.swarm_downloader:
+            chunk_timeout = ConfigService.get_float_var(
+                name=_CONFIG_VAR_SWARM_CHUNK_TIMEOUT, default=DEFAULT_CHUNK_TIMEOUT
+            )
+            self.swarm_downloader = SwarmDownloader(self.cell, chunk_timeout=chunk_timeout)
+        return self.swarm_downloader.download(manifest, server)
+
     def submit_update(
         self, servers, project_name, token, ssid, fl_ctx: FLContext, client_name, shareable, execute_task_name
     ):
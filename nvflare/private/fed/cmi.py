@@ -217,8 +217,15 @@ class JobCellMessenger(CellMessageInterface):
 
         cell_msg = self.new_cmi_message(fl_ctx, payload=request)
         if timeout > 0:
+            # one copy of the request is sent for the targets in the same subtree (e.g. the cells of a site)
             cell_replies = cell.broadcast_request(
-                channel=channel, topic=topic, request=cell_msg, targets=target_fqcns, timeout=timeout, optional=optional
+                channel=channel,
+                topic=topic,
+                request=cell_msg,
+                targets=target_fqcns,
+                timeout=timeout,
+                optional=optional,
+                relay=True,
             )
 
             replies = {}
@@ -35,6 +35,7 @@ from nvflare.apis.fl_constant import (
     WorkspaceConstants,
 )
 from nvflare.apis.fl_context import FLContext
+from nvflare.apis.impl.job_def_manager import SimpleJobDefManager
 from nvflare.apis.shareable import Shareable
 from nvflare.apis.workspace import Workspace
 from nvflare.fuel.f3.cellnet.cell import Cell, Message
@@ -327,6 +328,21 @@ class FederatedServer(BaseServer):
             cb=self._listen_command,
         )
 
+        self.cell.set_message_interceptor(self._inspect_message)
+
+    def _inspect_message(self, request: Message):
+        # the task requests of the clients are forwarded to the job cells through here, they keep the
+        # clients alive as well as the heartbeats do
+        if (
+            request.get_header(MessageHeaderKey.CHANNEL) == CellChannel.SERVER_COMMAND
+            and request.get_header(MessageHeaderKey.TOPIC) == ServerCommandNames.GET_TASK
+        ):
+            token = request.get_header(CellMessageHeaderKeys.TOKEN)
+            client = self.client_manager.clients.get(token) if token else None
+            if client:
+                client.last_connect_time = time.time()
+        return None
+
     def _listen_command(self, request: Message) -> Message:
         job_id = request.get_header(CellMessageHeaderKeys.JOB_ID)
         command = request.get_header(MessageHeaderKey.TOPIC)
@@ -390,6 +406,7 @@ class FederatedServer(BaseServer):
 
         self.command_agent = ServerCommandAgent(self.engine, cell)
         self.command_agent.start()
+        mpm.add_cleanup_cb(self.command_agent.shutdown)
 
         return cell
 
@@ -692,6 +709,7 @@ class FederatedServer(BaseServer):
 
         self.engine.cell = self.cell
         self._register_cellnet_cbs()
+        self.engine.start_process_pool()
 
         self.overseer_agent.start(self.overseer_callback)
 
@@ -759,6 +777,11 @@ class FederatedServer(BaseServer):
             self.checking_server_state = False
 
     def _turn_to_hot(self):
+        # the jobs may have been changed by the previous hot server
+        job_manager = self.engine.job_def_manager
+        if isinstance(job_manager, SimpleJobDefManager):
+            job_manager.reset_index()
+
         # Restore Snapshot
         if self.ha_mode:
             with self.snapshot_lock:
@@ -17,23 +17,24 @@ import json
 import logging
 import os
 import shutil
+import tempfile
 from typing import Dict, List
 
 import nvflare.fuel.hci.file_transfer_defs as ftd
 from nvflare.apis.client import Client
 from nvflare.apis.fl_constant import AdminCommandNames, RunProcessKey
-from nvflare.apis.job_def import Job, JobDataKey, JobMetaKey, TopDir
+from nvflare.apis.job_def import Job, JobMetaKey, TopDir
 from nvflare.apis.job_def_manager_spec import JobDefManagerSpec, RunStatus
-from nvflare.apis.utils.job_utils import convert_legacy_zipped_app_to_job
-from nvflare.fuel.hci.base64_utils import b64str_to_bytes, bytes_to_b64str
+from nvflare.apis.utils.job_utils import convert_legacy_zipped_app_file_to_job
+from nvflare.fuel.hci.base64_utils import b64str_to_binary_file, binary_file_to_b64str
 from nvflare.fuel.hci.conn import Connection
 from nvflare.fuel.hci.proto import ConfirmMethod, MetaKey, MetaStatusValue, make_meta
 from nvflare.fuel.hci.reg import CommandModule, CommandModuleSpec, CommandSpec
 from nvflare.fuel.hci.server.authz import PreAuthzReturnCode
 from nvflare.fuel.hci.server.constants import ConnProps
+from nvflare.fuel.hci.server.file_transfer import get_transfer_file, new_transfer_id, receive_chunk, send_chunk
 from nvflare.fuel.utils.argument_utils import SafeArgumentParser
-from nvflare.fuel.utils.obj_utils import get_size
-from nvflare.fuel.utils.zip_utils import ls_zip_from_bytes, unzip_all_from_bytes, zip_directory_to_bytes
+from nvflare.fuel.utils.zip_utils import ls_zip_from_file, unzip_all_from_file, zip_directory_to_file
 from nvflare.private.defs import RequestHeader, TrainingTopic
 from nvflare.private.fed.server.admin import new_message
 from nvflare.private.fed.server.job_meta_validator import JobMetaValidator
@@ -156,7 +157,7 @@ class JobCommandModule(CommandModule, CommandUtil):
                     description="download a specified job",
                     usage=f"{AdminCommandNames.DOWNLOAD_JOB} job_id",
                     handler_func=self.download_job,
-                    authz_func=self.authorize_job,
+                    authz_func=self.authorize_download_job,
                     client_cmd=ftd.DOWNLOAD_FOLDER_FQN,
                 ),
             ],
@@ -311,13 +312,16 @@ class JobCommandModule(CommandModule, CommandUtil):
                     f"job_def_manager in engine is not of type JobDefManagerSpec, but got {type(job_def_manager)}"
                 )
 
+            user_name = conn.get_prop(ConnProps.USER_NAME, "") if parsed_args.u else None
             with engine.new_context() as fl_ctx:
-                jobs = job_def_manager.get_all_jobs(fl_ctx)
+                if user_name:
+                    jobs = job_def_manager.get_jobs_by_submitter(user_name, fl_ctx)
+                else:
+                    jobs = job_def_manager.get_all_jobs(fl_ctx)
             if jobs:
                 id_prefix = parsed_args.job_id
                 name_prefix = parsed_args.n
                 max_jobs_listed = parsed_args.m
-                user_name = conn.get_prop(ConnProps.USER_NAME, "") if parsed_args.u else None
 
                 filtered_jobs = [job for job in jobs if self._job_match(job.meta, id_prefix, name_prefix, user_name)]
                 if not filtered_jobs:
@@ -437,6 +441,7 @@ class JobCommandModule(CommandModule, CommandUtil):
         job = conn.get_prop(self.JOB)
         job_id = conn.get_prop(self.JOB_ID)
         engine = conn.app_ctx
+        content_file = None
         try:
             if not isinstance(engine, ServerEngine):
                 raise TypeError(f"engine is not of type ServerEngine, but got {type(engine)}")
@@ -446,7 +451,9 @@ class JobCommandModule(CommandModule, CommandUtil):
                     f"job_def_manager in engine is not of type JobDefManagerSpec, but got {type(job_def_manager)}"
                 )
             with engine.new_context() as fl_ctx:
-                data_bytes = job_def_manager.get_content(job_id, fl_ctx)
+                content_file = get_transfer_file(conn.get_prop(ConnProps.DOWNLOAD_DIR), new_transfer_id())
+                if not job_def_manager.get_content_to_file(job_id, content_file, fl_ctx):
+                    raise RuntimeError(f"no content of job {job_id}")
 
                 job_meta = {str(k): job.meta[k] for k in job.meta.keys() & CLONED_META_KEYS}
 
@@ -456,7 +463,7 @@ class JobCommandModule(CommandModule, CommandUtil):
                 job_meta[JobMetaKey.SUBMITTER_ROLE.value] = conn.get_prop(ConnProps.USER_ROLE)
                 job_meta[JobMetaKey.CLONED_FROM.value] = job_id
 
-                meta = job_def_manager.create(job_meta, data_bytes, fl_ctx)
+                meta = job_def_manager.create_from_file(job_meta, content_file, fl_ctx)
                 new_job_id = meta.get(JobMetaKey.JOB_ID)
                 conn.append_string("Cloned job {} as: {}".format(job_id, new_job_id))
         except BaseException as e:
@@ -465,6 +472,9 @@ class JobCommandModule(CommandModule, CommandUtil):
                 meta=make_meta(MetaStatusValue.INTERNAL_ERROR, f"exception {type(e)}"),
             )
             return
+        finally:
+            if content_file and os.path.exists(content_file):
+                os.remove(content_file)
         conn.append_success("", meta=make_meta(status=MetaStatusValue.OK, extra={MetaKey.JOB_ID: new_job_id}))
 
     def authorize_list_files(self, conn: Connection, args: List[str]):
@@ -488,6 +498,7 @@ class JobCommandModule(CommandModule, CommandUtil):
             file = args[2]
 
         engine = conn.app_ctx
+        zip_file = None
         try:
             job_def_manager = engine.job_def_manager
             if not isinstance(job_def_manager, JobDefManagerSpec):
@@ -495,20 +506,19 @@ class JobCommandModule(CommandModule, CommandUtil):
                     f"job_def_manager in engine is not of type JobDefManagerSpec, but got {type(job_def_manager)}"
                 )
             with engine.new_context() as fl_ctx:
-                job_data = job_def_manager.get_job_data(job_id, fl_ctx)
+                zip_file = get_transfer_file(conn.get_prop(ConnProps.DOWNLOAD_DIR), new_transfer_id())
                 if file.startswith(TopDir.JOB):
                     file = file[len(TopDir.JOB) :]
                     file = file.lstrip("/")
-                    data_bytes = job_data[JobDataKey.JOB_DATA.value]
-                    ls_info = ls_zip_from_bytes(data_bytes)
+                    found = job_def_manager.get_content_to_file(job_id, zip_file, fl_ctx)
                 elif file.startswith(TopDir.WORKSPACE):
                     file = file[len(TopDir.WORKSPACE) :]
                     file = file.lstrip("/")
-                    workspace_bytes = job_data[JobDataKey.WORKSPACE_DATA.value]
-                    ls_info = ls_zip_from_bytes(workspace_bytes)
+                    found = job_def_manager.get_workspace_to_file(job_id, zip_file, fl_ctx)
                 else:
                     conn.append_error("syntax error: top level directory must be job or workspace")
                     return
+                ls_info = ls_zip_from_file(zip_file) if found else []
                 return_string = "%-46s %19s %12s\n" % ("File Name", "Modified    ", "Size")
                 for zinfo in ls_info:
                     date = "%d-%02d-%02d %02d:%02d:%02d" % zinfo.date_time[:6]
@@ -519,6 +529,9 @@ class JobCommandModule(CommandModule, CommandUtil):
             secure_log_traceback()
             conn.append_error(f"Exception occurred trying to get job from store: {secure_format_exception(e)}")
             return
+        finally:
+            if zip_file and os.path.exists(zip_file):
+                os.remove(zip_file)
         conn.append_success("")
 
     @staticmethod
@@ -569,16 +582,45 @@ class JobCommandModule(CommandModule, CommandUtil):
             job.meta[JobMetaKey.DURATION.value] = str(duration)
 
     def submit_job(self, conn: Connection, args: List[str]):
+        if len(args) < 3:
+            conn.append_error("syntax error: require data", meta=make_meta(MetaStatusValue.SYNTAX_ERROR, "no data"))
+            return
+
         folder_name = args[1]
-        zip_b64str = args[2]
+        upload_dir = conn.get_prop(ConnProps.UPLOAD_DIR)
+        if args[2].startswith(ftd.TRANSFER_MARKER):
+            # the job zip is uploaded in chunks, followed by the submission without data
+            job_file = get_transfer_file(upload_dir, args[2][len(ftd.TRANSFER_MARKER) :])
+            if not job_file:
+                conn.append_error("invalid transfer", meta=make_meta(MetaStatusValue.SYNTAX_ERROR, "invalid transfer"))
+                return
+            if len(args) == 5:
+                receive_chunk(conn, job_file, args[3], args[4])
+                return
+            if len(args) == 4 and conn.attachments:
+                # the chunk is attached as binary data
+                receive_chunk(conn, job_file, args[3], conn.attachments[0])
+                return
+            if not os.path.isfile(job_file):
+                conn.append_error("no data received", meta=make_meta(MetaStatusValue.SYNTAX_ERROR, "no data"))
+                return
+        else:
+            job_file = get_transfer_file(upload_dir, new_transfer_id())
+            b64str_to_binary_file(args[2], job_file)
 
-        data_bytes = convert_legacy_zipped_app_to_job(b64str_to_bytes(zip_b64str))
-        engine = conn.app_ctx
+        try:
+            self._submit_job_file(conn, folder_name, job_file)
+        finally:
+            if os.path.exists(job_file):
+                os.remove(job_file)
 
+    def _submit_job_file(self, conn: Connection, folder_name: str, job_file: str):
+        engine = conn.app_ctx
         try:
+            convert_legacy_zipped_app_file_to_job(job_file)
             with engine.new_context() as fl_ctx:
                 job_validator = JobMetaValidator()
-                valid, error, meta = job_validator.validate(folder_name, data_bytes)
+                valid, error, meta = job_validator.validate(folder_name, job_file)
                 if not valid:
                     conn.append_error(error, meta=make_meta(MetaStatusValue.INVALID_JOB_DEFINITION, error))
                     return
@@ -594,7 +636,7 @@ class JobCommandModule(CommandModule, CommandUtil):
                 meta[JobMetaKey.SUBMITTER_ORG.value] = conn.get_prop(ConnProps.USER_ORG, "")
                 meta[JobMetaKey.SUBMITTER_ROLE.value] = conn.get_prop(ConnProps.USER_ROLE, "")
 
-                meta = job_def_manager.create(meta, data_bytes, fl_ctx)
+                meta = job_def_manager.create_from_file(meta, job_file, fl_ctx)
                 job_id = meta.get(JobMetaKey.JOB_ID)
                 conn.append_string(f"Submitted job: {job_id}")
                 conn.append_success("", meta=make_meta(MetaStatusValue.OK, extra={MetaKey.JOB_ID: job_id}))
@@ -605,29 +647,49 @@ class JobCommandModule(CommandModule, CommandUtil):
             )
             return
 
-    def _unzip_data(self, download_dir, job_data, job_id):
-        job_id_dir = os.path.join(download_dir, job_id)
-        if os.path.exists(job_id_dir):
-            shutil.rmtree(job_id_dir)
+    def authorize_download_job(self, conn: Connection, args: List[str]):
+        # the other args are for the chunked transfer
+        return self.authorize_job(conn=conn, args=args[:2])
+
+    def _unzip_data(self, work_dir, job_id, content_file, workspace_file):
+        job_id_dir = os.path.join(work_dir, job_id)
         os.mkdir(job_id_dir)
 
-        data_bytes = job_data[JobDataKey.JOB_DATA.value]
         job_dir = os.path.join(job_id_dir, "job")
         os.mkdir(job_dir)
-        unzip_all_from_bytes(data_bytes, job_dir)
+        unzip_all_from_file(content_file, job_dir)
 
-        workspace_bytes = job_data[JobDataKey.WORKSPACE_DATA.value]
         workspace_dir = os.path.join(job_id_dir, "workspace")
         os.mkdir(workspace_dir)
-        if workspace_bytes is not None:
-            unzip_all_from_bytes(workspace_bytes, workspace_dir)
+        if workspace_file:
+            unzip_all_from_file(workspace_file, workspace_dir)
 
     def download_job(self, conn: Connection, args: List[str]):
+        """Download a job and its workspace.
+
+        The old admin clients get the zip of the job inline. The admin clients which can do chunked transfer
+        send "download_job job_id Transfer:" to get the transfer ID and the size of the zip, then get the zip
+        in chunks with "download_job job_id Transfer:<id> offset".
+        """
         job_id = args[1]
         download_dir = conn.get_prop(ConnProps.DOWNLOAD_DIR)
         download_job_url = conn.get_prop(ConnProps.DOWNLOAD_JOB_URL)
 
+        if len(args) == 4 and args[2].startswith(ftd.TRANSFER_MARKER):
+            zip_file = get_transfer_file(download_dir, args[2][len(ftd.TRANSFER_MARKER) :])
+            if not zip_file:
+                conn.append_error("invalid transfer", meta=make_meta(MetaStatusValue.SYNTAX_ERROR, "invalid transfer"))
+                return
+            send_chunk(conn, zip_file, args[3])
+            return
+        chunked = len(args) == 3 and args[2] == ftd.TRANSFER_MARKER
+
         engine = conn.app_ctx
+        content_file = get_transfer_file(download_dir, new_transfer_id())
+        workspace_file = get_transfer_file(download_dir, new_transfer_id())
+
+        # each download has its own work dir, the same job can be downloaded by several users at the same time
+        work_dir = tempfile.mkdtemp(dir=download_dir)
         try:
             job_def_manager = engine.job_def_manager
             if not isinstance(job_def_manager, JobDefManagerSpec):
@@ -635,28 +697,53 @@ class JobCommandModule(CommandModule, CommandUtil):
                     f"job_def_manager in engine is not of type JobDefManagerSpec, but got {type(job_def_manager)}"
                 )
             with engine.new_context() as fl_ctx:
-                job_data = job_def_manager.get_job_data(job_id, fl_ctx)
-                size = get_size(job_data, seen=None)
-                if size > MAX_DOWNLOAD_JOB_SIZE:
-                    conn.append_string(
-                        ftd.DOWNLOAD_URL_MARKER + download_job_url + job_id,
-                        meta=make_meta(
-                            MetaStatusValue.OK,
-                            extra={MetaKey.JOB_ID: job_id, MetaKey.JOB_DOWNLOAD_URL: download_job_url + job_id},
-                        ),
-                    )
-                    return
+                if not job_def_manager.get_content_to_file(job_id, content_file, fl_ctx):
+                    raise RuntimeError(f"no content of job {job_id}")
+                size = os.path.getsize(content_file)
+                if job_def_manager.get_workspace_to_file(job_id, workspace_file, fl_ctx):
+                    size += os.path.getsize(workspace_file)
+                else:
+                    workspace_file = None
+
+            if size > MAX_DOWNLOAD_JOB_SIZE:
+                shutil.rmtree(work_dir)
+                conn.append_string(
+                    ftd.DOWNLOAD_URL_MARKER + download_job_url + job_id,
+                    meta=make_meta(
+                        MetaStatusValue.OK,
+                        extra={MetaKey.JOB_ID: job_id, MetaKey.JOB_DOWNLOAD_URL: download_job_url + job_id},
+                    ),
+                )
+                return
 
-                self._unzip_data(download_dir, job_data, job_id)
+            self._unzip_data(work_dir, job_id, content_file, workspace_file)
         except Exception as e:
+            shutil.rmtree(work_dir)
             conn.append_error(f"Exception occurred trying to get job from store: {secure_format_exception(e)}")
             return
+        finally:
+            for f in (content_file, workspace_file):
+                if f and os.path.exists(f):
+                    os.remove(f)
+
+        transfer_id = new_transfer_id()
+        zip_file = get_transfer_file(download_dir, transfer_id)
+        keep_file = False
         try:
-            data = zip_directory_to_bytes(download_dir, job_id)
-            b64str = bytes_to_b64str(data)
-            conn.append_string(b64str, meta=make_meta(MetaStatusValue.OK, extra={MetaKey.JOB_ID: job_id}))
+            zip_directory_to_file(work_dir, job_id, zip_file)
+            meta = make_meta(MetaStatusValue.OK, extra={MetaKey.JOB_ID: job_id})
+            if chunked:
+                # the file is removed when its last chunk is sent
+                keep_file = True
+                conn.append_string(f"{ftd.TRANSFER_MARKER}{transfer_id}:{os.path.getsize(zip_file)}", meta=meta)
+            else:
+                conn.append_string(binary_file_to_b64str(zip_file), meta=meta)
         except FileNotFoundError:
             conn.append_error("No record found for job '{}'".format(job_id))
         except BaseException:
             secure_log_traceback()
             conn.append_error("Exception occurred during attempt to zip data to send for job: {}".format(job_id))
+        finally:
+            shutil.rmtree(work_dir)
+            if not keep_file and os.path.exists(zip_file):
+                os.remove(zip_file)
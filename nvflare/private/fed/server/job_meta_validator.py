@@ -16,7 +16,7 @@ import collections
 import json
 import logging
 from io import BytesIO
-from typing import Optional, Set, Tuple
+from typing import Optional, Set, Tuple, Union
 from zipfile import ZipFile
 
 from nvflare.apis.fl_constant import JobConstants
@@ -31,12 +31,12 @@ logger = logging.getLogger(__name__)
 class JobMetaValidator:
     """Job validator"""
 
-    def validate(self, job_name: str, job_data: bytes) -> Tuple[bool, str, dict]:
+    def validate(self, job_name: str, job_data: Union[bytes, str]) -> Tuple[bool, str, dict]:
         """Validate job
 
         Args:
             job_name (str): Job name
-            job_data (bytes): Job ZIP data
+            job_data (Union[bytes, str]): Job ZIP data, or path of the job ZIP file
 
         Returns:
             Tuple[bool, str, dict]: (is_valid, error_message, meta)
@@ -44,7 +44,8 @@ class JobMetaValidator:
 
         meta = {}
         try:
-            with ZipFile(BytesIO(job_data), "r") as zf:
+            zip_source = BytesIO(job_data) if isinstance(job_data, bytes) else job_data
+            with ZipFile(zip_source, "r") as zf:
                 meta = self._validate_meta(job_name, zf)
                 site_list = self._validate_deploy_map(job_name, meta)
                 self._validate_app(job_name, meta, zf)
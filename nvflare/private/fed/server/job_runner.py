@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import json
+import os
 import shutil
 import threading
 import time
@@ -27,7 +28,7 @@ from nvflare.apis.job_def import ALL_SITES, Job, JobMetaKey, RunStatus
 from nvflare.apis.job_scheduler_spec import DispatchInfo
 from nvflare.apis.workspace import Workspace
 from nvflare.fuel.utils.argument_utils import parse_vars
-from nvflare.fuel.utils.zip_utils import zip_directory_to_bytes
+from nvflare.fuel.utils.zip_utils import zip_directory_to_file
 from nvflare.lighter.utils import verify_folder_signature
 from nvflare.private.admin_defs import Message, MsgHeader, ReturnCode
 from nvflare.private.defs import RequestHeader, TrainingTopic
@@ -362,11 +363,17 @@ class JobRunner(FLComponent):
         job_id = fl_ctx.get_prop(FLContextKey.CURRENT_JOB_ID)
         workspace = Workspace(root_dir=self.workspace_root)
         run_dir = workspace.get_run_dir(job_id)
-        workspace_data = zip_directory_to_bytes(run_dir, "")
-        engine = fl_ctx.get_engine()
-        job_manager = engine.get_component(SystemComponents.JOB_MANAGER)
+        # the workspace is zipped to a file next to the run dir, it can be bigger than the memory
+        workspace_file = run_dir.rstrip(os.sep) + ".zip"
+        try:
+            zip_directory_to_file(run_dir, "", workspace_file)
+            engine = fl_ctx.get_engine()
+            job_manager = engine.get_component(SystemComponents.JOB_MANAGER)
 
-        job_manager.save_workspace(job_id, workspace_data, fl_ctx)
+            job_manager.save_workspace_from_file(job_id, workspace_file, fl_ctx)
+        finally:
+            if os.path.exists(workspace_file):
+                os.remove(workspace_file)
         shutil.rmtree(run_dir)
 
     def run(self, fl_ctx: FLContext):
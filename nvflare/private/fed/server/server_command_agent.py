@@ -15,15 +15,26 @@
 import copy
 import logging
 
-from nvflare.apis.fl_constant import FLContextKey, ServerCommandKey
+from nvflare.apis.fl_constant import FLContextKey, ServerCommandKey, ServerCommandNames
 from nvflare.apis.fl_context import FLContext
 from nvflare.apis.utils.fl_context_utils import get_serializable_data
 from nvflare.fuel.f3.cellnet.cell import Cell, MessageHeaderKey, ReturnCode, make_reply
 from nvflare.fuel.f3.message import Message as CellMessage
 from nvflare.fuel.utils import fobs
-from nvflare.private.defs import CellChannel, CellMessageHeaderKeys, new_cell_message
+from nvflare.fuel.utils.config_service import ConfigService
+from nvflare.private.defs import CellChannel, CellMessageHeaderKeys, SpecialTaskName, new_cell_message
+from nvflare.private.fed.utils.swarm import DEFAULT_CHUNK_SIZE, DEFAULT_MIN_PAYLOAD_SIZE, SwarmSeeder
 
 from .server_commands import ServerCommands
+from .task_payload_cache import encode_task_headers
+from .task_poller import TaskPoller
+
+_CONFIG_VAR_SWARM_DOWNLOAD = "swarm_download_enabled"
+_CONFIG_VAR_SWARM_CHUNK_SIZE = "swarm_chunk_size"
+_CONFIG_VAR_SWARM_MIN_PAYLOAD_SIZE = "swarm_min_payload_size"
+
+# max time to hold a task request of a client until a task is available, 0 to answer right away
+_CONFIG_VAR_TASK_LONG_POLL_MAX_TIME = "task_long_poll_max_time"
 
 
 class ServerCommandAgent(object):
@@ -37,6 +48,10 @@ class ServerCommandAgent(object):
         self.asked_to_stop = False
         self.engine = engine
         self.cell = cell
+        self.swarm_seeder = None
+        self.task_poller = None
+        self.long_poll_max_time = 0.0
+        self.task_change_source = None
 
     def start(self):
         self.cell.register_request_cb(
@@ -49,6 +64,18 @@ class ServerCommandAgent(object):
             topic="*",
             cb=self.aux_communicate,
         )
+        if ConfigService.get_bool_var(name=_CONFIG_VAR_SWARM_DOWNLOAD, default=False):
+            self.swarm_seeder = SwarmSeeder(
+                self.cell,
+                chunk_size=ConfigService.get_int_var(name=_CONFIG_VAR_SWARM_CHUNK_SIZE, default=DEFAULT_CHUNK_SIZE),
+                min_payload_size=ConfigService.get_int_var(
+                    name=_CONFIG_VAR_SWARM_MIN_PAYLOAD_SIZE, default=DEFAULT_MIN_PAYLOAD_SIZE
+                ),
+            )
+        self.long_poll_max_time = ConfigService.get_float_var(name=_CONFIG_VAR_TASK_LONG_POLL_MAX_TIME, default=30.0)
+        if self.long_poll_max_time > 0:
+            self.task_poller = TaskPoller(self.cell, self._process_held_request)
+            self.task_poller.start()
         self.logger.info(f"ServerCommandAgent cell register_request_cb: {self.cell.get_fqcn()}")
 
     def execute_command(self, request: CellMessage) -> CellMessage:
@@ -56,6 +83,37 @@ class ServerCommandAgent(object):
         if not isinstance(request, CellMessage):
             raise RuntimeError("request must be CellMessage but got {}".format(type(request)))
 
+        wait_time = 0.0
+        if self.task_poller and request.get_header(MessageHeaderKey.TOPIC) == ServerCommandNames.GET_TASK:
+            wait_time = min(request.get_header(CellMessageHeaderKeys.LONG_POLL_TIMEOUT, 0.0), self.long_poll_max_time)
+
+        reply = self._execute_command(request, can_wait=wait_time > 0)
+        if reply is None:
+            client_name = request.get_header(CellMessageHeaderKeys.CLIENT_NAME)
+            if self.task_poller.hold(request, client_name, wait_time):
+                # the reply is sent by the task poller
+                return None
+            reply = self._execute_command(request, can_wait=False)
+        return reply
+
+    def _process_held_request(self, request: CellMessage, final: bool):
+        reply = self._execute_command(request, can_wait=not final)
+        if reply is not None and final:
+            # the client has waited long enough, it can ask again right away
+            reply.set_header(CellMessageHeaderKeys.NO_WAIT, True)
+        return reply
+
+    def _watch_task_change(self, fl_ctx: FLContext):
+        runner = fl_ctx.get_prop(FLContextKey.RUNNER)
+        if runner and runner is not self.task_change_source:
+            runner.add_task_change_listener(self.task_poller.notify)
+            self.task_change_source = runner
+
+    def _execute_command(self, request: CellMessage, can_wait: bool):
+        """Execute the command of the request.
+
+        Returns: the reply, or None if the request is for a task, no task is available and the client can wait
+        """
         command_name = request.get_header(MessageHeaderKey.TOPIC)
         data = fobs.loads(request.payload)
 
@@ -85,8 +143,14 @@ class ServerCommandAgent(object):
                         make_reply(ReturnCode.AUTHENTICATION_ERROR, error, fobs.dumps(None))
 
                 reply = command.process(data=data, fl_ctx=new_fl_ctx)
+                if can_wait and reply is not None:
+                    self._watch_task_change(new_fl_ctx)
+                    if reply.get_header(ServerCommandKey.TASK_NAME) == SpecialTaskName.TRY_AGAIN:
+                        return None
+
                 if reply is not None:
-                    return_message = new_cell_message({}, fobs.dumps(reply))
+                    origin = request.get_header(MessageHeaderKey.ORIGIN)
+                    return_message = self._make_reply_message(reply, new_fl_ctx, origin)
                     return_message.set_header(MessageHeaderKey.RETURN_CODE, ReturnCode.OK)
                 else:
                     return_message = make_reply(ReturnCode.PROCESS_EXCEPTION, "No process results", fobs.dumps(None))
@@ -94,6 +158,23 @@ class ServerCommandAgent(object):
         else:
             return make_reply(ReturnCode.INVALID_REQUEST, "No server command found", fobs.dumps(None))
 
+    def _make_reply_message(self, reply, fl_ctx: FLContext, origin: str) -> CellMessage:
+        payload = fl_ctx.get_prop(FLContextKey.TASK_PAYLOAD)
+        if payload is not None:
+            # the task content is serialized once and shared by all clients, only the headers are per client
+            task_headers = encode_task_headers(reply)
+            if task_headers is not None:
+                if self.swarm_seeder and origin and self.swarm_seeder.should_publish(payload):
+                    # the clients download the content in chunks from each other and from the server
+                    manifest = self.swarm_seeder.publish(payload, origin)
+                    return new_cell_message(
+                        {CellMessageHeaderKeys.TASK_HEADERS: task_headers, CellMessageHeaderKeys.TASK_MANIFEST: True},
+                        fobs.dumps(manifest),
+                    )
+                return new_cell_message({CellMessageHeaderKeys.TASK_HEADERS: task_headers}, payload)
+
+        return new_cell_message({}, fobs.dumps(reply))
+
     def _get_client(self, token):
         fl_server = self.engine.server
         client_manager = fl_server.client_manager
@@ -129,3 +210,5 @@ class ServerCommandAgent(object):
 
     def shutdown(self):
         self.asked_to_stop = True
+        if self.task_poller:
+            self.task_poller.stop()
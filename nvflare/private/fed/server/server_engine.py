@@ -58,6 +58,7 @@ from nvflare.private.defs import CellChannel, CellMessageHeaderKeys, RequestHead
 from nvflare.private.fed.server.server_json_config import ServerJsonConfigurator
 from nvflare.private.fed.server.server_state import ServerState
 from nvflare.private.fed.utils.fed_utils import security_close
+from nvflare.private.fed.utils.process_pool import create_warm_process_pool
 from nvflare.private.scheduler_constants import ShareableHeader
 from nvflare.security.logging import secure_format_exception
 from nvflare.widgets.info_collector import InfoCollector
@@ -71,6 +72,8 @@ from .run_manager import RunManager
 from .server_engine_internal_spec import EngineInfo, ServerEngineInternalSpec
 from .server_status import ServerStatus
 
+_RUNNER_PROCESS_MODULE = "nvflare.private.fed.app.server.runner_process"
+
 
 class ClientConnection:
     def __init__(self, client):
@@ -124,6 +127,12 @@ class ServerEngine(ServerEngineInternalSpec):
         self.job_def_manager = None
 
         self.kv_list = parse_vars(args.set)
+        self.process_pool = None
+
+    def start_process_pool(self):
+        """Start the pool of warm job processes if configured, only the parent server process starts jobs."""
+        if not self.process_pool:
+            self.process_pool = create_warm_process_pool(_RUNNER_PROCESS_MODULE)
 
     def _get_server_app_folder(self):
         return WorkspaceConstants.APP_PREFIX + "server"
@@ -260,7 +269,7 @@ class ServerEngine(ServerEngineInternalSpec):
 
         command = (
             sys.executable
-            + " -m nvflare.private.fed.app.server.runner_process -m "
+            + f" -m {_RUNNER_PROCESS_MODULE} -m "
             + args.workspace
             + " -s fed_server.json -r "
             + app_root
@@ -283,9 +292,11 @@ class ServerEngine(ServerEngineInternalSpec):
             + " print_conf=True restore_snapshot="
             + str(restore_snapshot)
         )
-        # use os.setsid to create new process group ID
-
-        process = subprocess.Popen(shlex.split(command, True), preexec_fn=os.setsid, env=new_env)
+        if self.process_pool:
+            process = self.process_pool.launch(shlex.split(command, True), new_env)
+        else:
+            # use os.setsid to create new process group ID
+            process = subprocess.Popen(shlex.split(command, True), preexec_fn=os.setsid, env=new_env)
 
         if not job_id:
             job_id = ""
@@ -782,6 +793,8 @@ class ServerEngine(ServerEngineInternalSpec):
 
     def close(self):
         self.executor.shutdown()
+        if self.process_pool:
+            self.process_pool.stop()
 
 
 def server_shutdown(server, touch_file):
@@ -24,11 +24,17 @@ from nvflare.apis.server_engine_spec import ServerEngineSpec
 from nvflare.apis.shareable import ReservedHeaderKey, Shareable, make_reply
 from nvflare.apis.signal import Signal
 from nvflare.apis.utils.fl_context_utils import add_job_audit_event
+from nvflare.fuel.f3.stats_pool import StatsPoolManager
+from nvflare.fuel.utils.config_service import ConfigService
 from nvflare.private.defs import SpecialTaskName, TaskConstant
 from nvflare.private.privacy_manager import Scope
 from nvflare.security.logging import secure_format_exception
 from nvflare.widgets.info_collector import GroupInfoCollector, InfoCollector
 
+from .task_payload_cache import TaskPayloadCache
+
+_CONFIG_VAR_TASK_PAYLOAD_CACHE = "task_payload_cache_enabled"
+
 
 class ServerRunnerConfig(object):
     def __init__(
@@ -90,6 +96,32 @@ class ServerRunner(FLComponent):
         self.current_wf = None
         self.current_wf_index = 0
         self.status = "init"
+        self.task_payload_cache = None
+        if ConfigService.get_bool_var(name=_CONFIG_VAR_TASK_PAYLOAD_CACHE, default=True):
+            self.task_payload_cache = TaskPayloadCache()
+        self.submission_stats = StatsPoolManager.get_or_add_time_hist_pool(
+            "submission_processing", "Time of processing task results by the workflow in secs"
+        )
+        self.task_change_listeners = []
+
+    def add_task_change_listener(self, cb):
+        """Add a callback to be called when clients may get new tasks (task scheduled, workflow changed etc.)
+
+        The callback is called with the names of the clients which may get a task, or None for all clients.
+        It must be fast and must not block.
+
+        Args:
+            cb: the callback
+        """
+        if cb not in self.task_change_listeners:
+            self.task_change_listeners.append(cb)
+
+    def _notify_task_change(self, client_names=None):
+        for cb in self.task_change_listeners:
+            try:
+                cb(client_names)
+            except BaseException as e:
+                self.logger.warning(f"error from task change listener: {secure_format_exception(e)}")
 
     def _execute_run(self):
         while self.current_wf_index < len(self.config.workflows):
@@ -109,6 +141,7 @@ class ServerRunner(FLComponent):
                     with self.wf_lock:
                         # we only set self.current_wf to open for business after successful initialize_run!
                         self.current_wf = wf
+                    self._notify_task_change()
 
                 with self.engine.new_context() as fl_ctx:
                     wf.responder.control_flow(self.abort_signal, fl_ctx)
@@ -127,6 +160,9 @@ class ServerRunner(FLComponent):
                         # the job monitor to join.
                         self.current_wf = None
 
+                    if self.task_payload_cache:
+                        self.task_payload_cache.clear()
+
                     self.log_info(fl_ctx, f"Workflow: {wf.id} finalizing ...")
                     try:
                         wf.responder.finalize_run(fl_ctx)
@@ -148,6 +184,8 @@ class ServerRunner(FLComponent):
             self.log_info(fl_ctx, "Server runner starting ...")
             self.log_debug(fl_ctx, "firing event EventType.START_RUN")
             fl_ctx.set_prop(ReservedKey.RUN_ABORT_SIGNAL, self.abort_signal, private=True, sticky=True)
+            if self.task_payload_cache:
+                fl_ctx.set_prop(FLContextKey.TASK_PAYLOAD_CACHE, self.task_payload_cache, private=True, sticky=True)
             self.fire_event(EventType.START_RUN, fl_ctx)
             self.engine.persist_components(fl_ctx, completed=False)
 
@@ -160,6 +198,7 @@ class ServerRunner(FLComponent):
         finally:
             # use wf_lock to ensure state of current_wf!
             self.status = "done"
+            self._notify_task_change()
             with self.wf_lock:
                 with self.engine.new_context() as fl_ctx:
                     self.fire_event(EventType.ABOUT_TO_END_RUN, fl_ctx)
@@ -199,6 +238,8 @@ class ServerRunner(FLComponent):
             reason = fl_ctx.get_prop(key=FLContextKey.EVENT_DATA, default="")
             self.log_error(fl_ctx, "Aborting current RUN due to FATAL_SYSTEM_ERROR received: {}".format(reason))
             self.abort(fl_ctx)
+        elif event_type == EventType.TASK_SCHEDULED:
+            self._notify_task_change(fl_ctx.get_prop(FLContextKey.EVENT_DATA))
 
     def _task_try_again(self) -> (str, str, Shareable):
         task_data = Shareable()
@@ -247,11 +288,7 @@ class ServerRunner(FLComponent):
             return SpecialTaskName.END_RUN, "", None
 
         try:
-            task_name, task_id, task_data = self._try_to_get_task(
-                # client, fl_ctx, self.config.task_request_timeout, self.config.task_retry_interval
-                client,
-                fl_ctx,
-            )
+            task_name, task_id, task_data = self._try_to_get_task(client, fl_ctx)
             if not task_name or task_name == SpecialTaskName.TRY_AGAIN:
                 return self._task_try_again()
 
@@ -294,6 +331,13 @@ class ServerRunner(FLComponent):
             audit_event_id = add_job_audit_event(fl_ctx=fl_ctx, msg=f'sent task to client "{client.name}"')
             task_data.set_header(ReservedHeaderKey.AUDIT_EVENT_ID, audit_event_id)
             task_data.set_header(TaskConstant.WAIT_TIME, self.config.task_request_interval)
+
+            # without filters the task content is the same for all clients, serialize it only once
+            task = fl_ctx.get_prop(FLContextKey.TASK_OBJECT)
+            if self.task_payload_cache and task is not None and not filter_list:
+                payload = self.task_payload_cache.get_payload(task, task_data)
+                fl_ctx.set_prop(FLContextKey.TASK_PAYLOAD, payload, private=True, sticky=False)
+
             return task_name, task_id, task_data
         except BaseException as e:
             self.log_exception(
@@ -302,45 +346,40 @@ class ServerRunner(FLComponent):
             )
             return self._task_try_again()
 
-    def _try_to_get_task(self, client, fl_ctx, timeout=None, retry_interval=0.005):
-        start = time.time()
-        while True:
-            with self.wf_lock:
-                if self.current_wf is None:
-                    self.log_info(fl_ctx, "no current workflow - asked client to try again later")
-                    return "", "", None
-
-                task_name, task_id, task_data = self.current_wf.responder.process_task_request(client, fl_ctx)
-
-                if task_name and task_name != SpecialTaskName.TRY_AGAIN:
-                    if task_data:
-                        if not isinstance(task_data, Shareable):
-                            self.log_error(
-                                fl_ctx,
-                                "bad task data generated by workflow {}: must be Shareable but got {}".format(
-                                    self.current_wf.id, type(task_data)
-                                ),
-                            )
-                            return "", "", None
-                    else:
-                        task_data = Shareable()
+    def _try_to_get_task(self, client, fl_ctx):
+        # Clients waiting for a task are held by the ServerCommandAgent and retried when the tasks change,
+        # so there is no need to wait for a task here.
+        with self.wf_lock:
+            if self.current_wf is None:
+                self.log_info(fl_ctx, "no current workflow - asked client to try again later")
+                return "", "", None
 
-                    task_data.set_header(ReservedHeaderKey.TASK_ID, task_id)
-                    task_data.set_header(ReservedHeaderKey.TASK_NAME, task_name)
-                    task_data.add_cookie(ReservedHeaderKey.WORKFLOW, self.current_wf.id)
+            task_name, task_id, task_data = self.current_wf.responder.process_task_request(client, fl_ctx)
 
-                    fl_ctx.set_prop(FLContextKey.TASK_NAME, value=task_name, private=True, sticky=False)
-                    fl_ctx.set_prop(FLContextKey.TASK_ID, value=task_id, private=True, sticky=False)
-                    fl_ctx.set_prop(FLContextKey.TASK_DATA, value=task_data, private=True, sticky=False)
+            if task_name and task_name != SpecialTaskName.TRY_AGAIN:
+                if task_data:
+                    if not isinstance(task_data, Shareable):
+                        self.log_error(
+                            fl_ctx,
+                            "bad task data generated by workflow {}: must be Shareable but got {}".format(
+                                self.current_wf.id, type(task_data)
+                            ),
+                        )
+                        return "", "", None
+                else:
+                    task_data = Shareable()
 
-                    self.log_info(fl_ctx, f"assigned task to client {client.name}: name={task_name}, id={task_id}")
+                task_data.set_header(ReservedHeaderKey.TASK_ID, task_id)
+                task_data.set_header(ReservedHeaderKey.TASK_NAME, task_name)
+                task_data.add_cookie(ReservedHeaderKey.WORKFLOW, self.current_wf.id)
 
-                    return task_name, task_id, task_data
+                fl_ctx.set_prop(FLContextKey.TASK_NAME, value=task_name, private=True, sticky=False)
+                fl_ctx.set_prop(FLContextKey.TASK_ID, value=task_id, private=True, sticky=False)
+                fl_ctx.set_prop(FLContextKey.TASK_DATA, value=task_data, private=True, sticky=False)
 
-            if timeout is None or time.time() - start > timeout:
-                break
+                self.log_info(fl_ctx, f"assigned task to client {client.name}: name={task_name}, id={task_id}")
 
-            time.sleep(retry_interval)
+                return task_name, task_id, task_data
 
         # ask client to retry
         return "", "", None
@@ -456,9 +495,11 @@ class ServerRunner(FLComponent):
                 self.log_debug(fl_ctx, "firing event EventType.BEFORE_PROCESS_SUBMISSION")
                 self.fire_event(EventType.BEFORE_PROCESS_SUBMISSION, fl_ctx)
 
+                start = time.perf_counter()
                 self.current_wf.responder.process_submission(
                     client=client, task_name=task_name, task_id=task_id, result=result, fl_ctx=fl_ctx
                 )
+                self.submission_stats.record_value(task_name, time.perf_counter() - start)
                 self.log_info(fl_ctx, "finished processing client result by {}".format(self.current_wf.id))
 
                 self.log_debug(fl_ctx, "firing event EventType.AFTER_PROCESS_SUBMISSION")
@@ -472,6 +513,7 @@ class ServerRunner(FLComponent):
     def abort(self, fl_ctx: FLContext):
         self.status = "done"
         self.abort_signal.trigger(value=True)
+        self._notify_task_change()
         self.log_info(fl_ctx, "asked to abort - triggered abort_signal to stop the RUN")
 
     def get_persist_state(self, fl_ctx: FLContext) -> dict:
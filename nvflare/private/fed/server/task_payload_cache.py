@@ -0,0 +1,109 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+
+from nvflare.apis.controller_spec import Task
+from nvflare.apis.shareable import ReservedHeaderKey, Shareable
+from nvflare.fuel.utils import fobs
+
+# Task headers are sent in the cell message headers, they must stay well below the 64KB SFM header limit
+MAX_TASK_HEADERS_SIZE = 32 * 1024
+
+
+class _CacheEntry:
+    def __init__(self, data_version: int, values: list):
+        self.data_version = data_version
+        self.values = values
+        self.lock = threading.Lock()
+        self.payload = None
+
+    def matches(self, data_version: int, values: list) -> bool:
+        return (
+            data_version == self.data_version
+            and len(values) == len(self.values)
+            and all(k1 == k2 and v1 is v2 for (k1, v1), (k2, v2) in zip(values, self.values))
+        )
+
+
+class TaskPayloadCache:
+    """Cache of the serialized task data content, shared by all the clients receiving the same task.
+
+    The content (everything except the headers) of the task data is serialized once per task and data version.
+    The data version of the task is changed when the task data is replaced, and by Task.data_changed when
+    it is modified in place. Content values replaced in the task data of a client are detected by identity.
+    Checking the version doesn't touch the data, so a cache hit costs nothing per client.
+
+    The per-client headers (task id, cookies, peer context etc.) are serialized separately for each reply.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _content(task_data: Shareable) -> list:
+        return [(k, v) for k, v in task_data.items() if k != ReservedHeaderKey.HEADERS]
+
+    def get_payload(self, task: Task, task_data: Shareable) -> bytes:
+        """Get the serialized content of the task data, serialize it if not cached yet.
+
+        Args:
+            task: the task the data belongs to
+            task_data: the task data sent to one client
+
+        Returns: the serialized task data without headers
+        """
+        values = self._content(task_data)
+        with self.lock:
+            entry = self.entries.get(task)
+            if entry is None or not entry.matches(task.data_version, values):
+                entry = _CacheEntry(task.data_version, values)
+                self.entries[task] = entry
+
+        # Serialize outside the cache lock so other tasks are not blocked,
+        # clients of the same task wait for the first one to finish
+        with entry.lock:
+            if entry.payload is None:
+                body = Shareable()
+                body.update(values)
+                entry.payload = fobs.dumps(body)
+            return entry.payload
+
+    def evict(self, task: Task):
+        """Remove the cached payload of the task. Called when the task is finished.
+
+        Args:
+            task: the task to remove
+        """
+        with self.lock:
+            self.entries.pop(task, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def size(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+
+def encode_task_headers(task_data: Shareable):
+    """Serialize the headers of the task data for a task reply with a shared payload.
+
+    Returns: the serialized headers or None if they are too large to be sent in the message headers
+    """
+    headers = fobs.dumps(task_data.get(ReservedHeaderKey.HEADERS, {}))
+    if len(headers) > MAX_TASK_HEADERS_SIZE:
+        return None
+    return headers
@@ -0,0 +1,189 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from nvflare.fuel.f3.cellnet.cell import Cell
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey
+from nvflare.fuel.f3.message import Message as CellMessage
+from nvflare.security.logging import secure_format_exception
+
+# the held requests are retried at least this often, in case the tasks change without notification
+DEFAULT_RECHECK_INTERVAL = 1.0
+
+# number of threads retrying the held requests and sending their replies
+DEFAULT_MAX_WORKERS = 8
+
+
+class _HeldRequest:
+    def __init__(self, request: CellMessage, origin: str, client_name: str, req_id: str, deadline: float):
+        self.request = request
+        self.origin = origin
+        self.client_name = client_name
+        self.req_id = req_id
+        self.deadline = deadline
+        self.next_check = 0.0
+        self.woken = False
+        self.busy = False
+
+
+class TaskPoller:
+    """Holds the task requests of clients which got no task, until a task is available or their wait time passes.
+
+    The requests are not held in the receiving thread. The request callback returns no reply and the reply
+    is sent later with Cell.send_reply, so holding a request doesn't take a thread of the cell.
+    The poller thread only picks the requests to retry, they are retried and answered by a pool of workers.
+
+    Args:
+        cell: the cell receiving the requests
+        process_cb: called with (request, final) to process a held request. It returns the reply, or None if
+            the client should keep waiting. A reply must be returned when final is True.
+        recheck_interval: max time between the retries of a held request
+        max_workers: number of threads retrying the held requests
+    """
+
+    def __init__(
+        self,
+        cell: Cell,
+        process_cb: Callable[[CellMessage, bool], Optional[CellMessage]],
+        recheck_interval: float = DEFAULT_RECHECK_INTERVAL,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.cell = cell
+        self.process_cb = process_cb
+        self.recheck_interval = recheck_interval
+        self.held = {}  # origin => _HeldRequest
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.asked_to_stop = False
+        self.thread = None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task_poller")
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="task_poller", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.asked_to_stop = True
+        self.changed.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.executor.shutdown(wait=False)
+
+    def notify(self, client_names: Optional[List[str]] = None):
+        """Called when the tasks change, the held requests of the clients are retried.
+
+        Args:
+            client_names: names of the clients which may get a task, None for all clients
+        """
+        names = None if client_names is None else set(client_names)
+        with self.lock:
+            for h in self.held.values():
+                if names is None or h.client_name in names:
+                    h.woken = True
+        self.changed.set()
+
+    def hold(self, request: CellMessage, client_name: str, wait_time: float) -> bool:
+        """Hold a request until it gets a task or the wait time passes.
+
+        The wait time is measured with the clock of this process, the time headers of the request are set
+        with the clock of the client and are not used.
+
+        Args:
+            request: the task request
+            client_name: name of the client asking for a task
+            wait_time: max time to hold the request
+
+        Returns: whether the request is held, the request must be answered directly if not
+        """
+        origin = request.get_header(MessageHeaderKey.ORIGIN)
+        req_id = request.get_header(MessageHeaderKey.REQ_ID)
+        if self.asked_to_stop or not origin or not req_id or wait_time <= 0:
+            return False
+
+        now = time.time()
+        h = _HeldRequest(request, origin, client_name, req_id, now + wait_time)
+        h.next_check = now + self.recheck_interval
+        with self.lock:
+            # a client has one outstanding task request, the previous one is abandoned
+            self.held[origin] = h
+        self.changed.set()
+        return True
+
+    def _run(self):
+        while not self.asked_to_stop:
+            now = time.time()
+            wake_time = now + self.recheck_interval
+            ready = []
+            with self.lock:
+                for h in self.held.values():
+                    if h.busy:
+                        continue
+                    if h.woken or now >= h.deadline or now >= h.next_check:
+                        h.woken = False
+                        h.busy = True
+                        h.next_check = now + self.recheck_interval
+                        ready.append(h)
+                    else:
+                        wake_time = min(wake_time, h.deadline, h.next_check)
+
+            for h in ready:
+                self.executor.submit(self._retry, h)
+
+            self.changed.wait(max(0.0, wake_time - time.time()))
+            # cleared before the next scan, the woken flags keep the changes made in between
+            self.changed.clear()
+
+    def _retry(self, h: _HeldRequest):
+        try:
+            final = time.time() >= h.deadline
+            reply = self.process_cb(h.request, final)
+        except Exception as ex:
+            self.logger.error(f"error processing held task request from {h.origin}: {secure_format_exception(ex)}")
+            self._remove(h)
+            return
+
+        if reply is None and not final:
+            with self.lock:
+                h.busy = False
+                recheck = h.woken or time.time() >= h.deadline
+            if recheck:
+                self.changed.set()
+            return
+
+        if not self._remove(h):
+            # replaced by a newer request from the same client
+            return
+
+        if reply is not None:
+            reply.add_headers(
+                {
+                    MessageHeaderKey.CHANNEL: h.request.get_header(MessageHeaderKey.CHANNEL),
+                    MessageHeaderKey.TOPIC: h.request.get_header(MessageHeaderKey.TOPIC),
+                }
+            )
+            err = self.cell.send_reply(reply, to_cell=h.origin, for_req_ids=[h.req_id], optional=True)
+            if err:
+                self.logger.warning(f"failed to send task to {h.origin}: {err}")
+
+    def _remove(self, h: _HeldRequest) -> bool:
+        with self.lock:
+            if self.held.get(h.origin) is h:
+                self.held.pop(h.origin)
+                return True
+            return False
@@ -0,0 +1,197 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from nvflare.fuel.utils.config_service import ConfigService
+
+# number of idle processes kept for the job processes, 0 to start them cold
+WARM_POOL_SIZE_VAR = "warm_pool_size"
+
+# max number of idle processes, while jobs are started often
+WARM_POOL_MAX_SIZE_VAR = "warm_pool_max_size"
+
+# comma separated modules to import in the idle processes, besides the job module
+WARM_POOL_PRELOAD_VAR = "warm_pool_preload"
+
+# the pool keeps an idle process for each job started within this time, up to its max size
+DEMAND_WINDOW = 60.0
+
+# how often the idle processes are checked, in case some exited
+_RECHECK_INTERVAL = 5.0
+
+_WARM_PROCESS_MODULE = "nvflare.private.fed.app.warm_process"
+
+
+class WarmProcessPool:
+    """Keeps processes started ahead of the jobs, with the job module and the preload modules imported.
+
+    A job process started with "python -m <module>" is handed to an idle process, which runs the module
+    as __main__ with the args and env of the job, so the interpreter startup and the imports are not paid
+    for by the job. A process runs a single job, since the job process keeps the state of its job until it
+    exits, and the pool replaces it right away. Jobs are started cold when there is no idle process.
+    The modules are imported before the env of the job is set, so they must not read it at import time.
+
+    The pool keeps size idle processes, and more while jobs are started often: one for each job started
+    in the last DEMAND_WINDOW seconds, up to max_size.
+
+    Args:
+        module: module of the job processes
+        size: min number of idle processes
+        max_size: max number of idle processes
+        preload_modules: other modules to import in the idle processes, e.g. torch
+    """
+
+    def __init__(self, module: str, size: int, max_size: int = 0, preload_modules: Optional[List[str]] = None):
+        if size <= 0:
+            raise ValueError(f"size must be > 0 but got {size}")
+
+        self.module = module
+        self.size = size
+        self.max_size = max(size, max_size)
+        self.preload_modules = preload_modules or []
+        self.idle = deque()
+        self.launch_times = deque()
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.asked_to_stop = False
+        self.thread = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="warm_process_pool", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.asked_to_stop = True
+        self.changed.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        with self.lock:
+            idle = list(self.idle)
+            self.idle.clear()
+        for p in idle:
+            self._stop_process(p)
+
+    def launch(self, command: List[str], env: dict) -> subprocess.Popen:
+        """Launch a job process, in an idle process if the command runs the module of the pool.
+
+        Args:
+            command: the command line split into args
+            env: env of the job process
+
+        Returns: the Popen of the job process, in a new process group
+        """
+        process = None
+        if command[:3] == [sys.executable, "-m", self.module]:
+            with self.lock:
+                self.launch_times.append(time.time())
+            process = self._hand_over(command[3:], env)
+
+        if process is None:
+            process = subprocess.Popen(command, preexec_fn=os.setsid, env=env)
+        else:
+            self.logger.debug(f"job process {process.pid} started warm")
+        self.changed.set()
+        return process
+
+    def _hand_over(self, args: List[str], env: dict) -> Optional[subprocess.Popen]:
+        job = json.dumps({"args": args, "env": env}) + "\n"
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                p = self.idle.popleft()
+            if p.poll() is not None:
+                continue
+            try:
+                p.stdin.write(job.encode("utf-8"))
+                p.stdin.close()
+                return p
+            except OSError as e:
+                self.logger.debug(f"idle process {p.pid} is gone: {e}")
+                self._stop_process(p)
+
+    def _target_size(self) -> int:
+        expiry = time.time() - DEMAND_WINDOW
+        while self.launch_times and self.launch_times[0] < expiry:
+            self.launch_times.popleft()
+        return min(self.max_size, max(self.size, len(self.launch_times)))
+
+    def _run(self):
+        while not self.asked_to_stop:
+            with self.lock:
+                self.idle = deque(p for p in self.idle if p.poll() is None)
+                missing = self._target_size() - len(self.idle)
+                extra = [self.idle.pop() for _ in range(-missing)]
+
+            for p in extra:
+                self._stop_process(p)
+
+            for _ in range(missing):
+                if self.asked_to_stop:
+                    break
+                try:
+                    p = self._start_process()
+                except OSError as e:
+                    self.logger.error(f"failed to start warm process: {e}")
+                    break
+                with self.lock:
+                    self.idle.append(p)
+
+            self.changed.wait(_RECHECK_INTERVAL)
+            self.changed.clear()
+
+    def _start_process(self) -> subprocess.Popen:
+        command = [sys.executable, "-m", _WARM_PROCESS_MODULE, self.module] + self.preload_modules
+        return subprocess.Popen(command, stdin=subprocess.PIPE, preexec_fn=os.setsid, env=os.environ.copy())
+
+    @staticmethod
+    def _stop_process(p: subprocess.Popen):
+        # an idle process exits once its stdin is closed
+        try:
+            p.stdin.close()
+        except OSError:
+            pass
+        try:
+            p.wait(timeout=5.0)
+        except subprocess.TimeoutExpired:
+            p.kill()
+
+
+def create_warm_process_pool(module: str) -> Optional[WarmProcessPool]:
+    """Create and start a pool for the job processes of the module, if configured with the warm_pool vars.
+
+    Args:
+        module: module of the job processes
+
+    Returns: the started pool, or None if the job processes are to be started cold
+    """
+    size = ConfigService.get_int_var(WARM_POOL_SIZE_VAR, default=0)
+    if not size or size <= 0:
+        return None
+
+    max_size = ConfigService.get_int_var(WARM_POOL_MAX_SIZE_VAR, default=size)
+    preload = ConfigService.get_str_var(WARM_POOL_PRELOAD_VAR, default="")
+    preload_modules = [m.strip() for m in preload.split(",") if m.strip()]
+    pool = WarmProcessPool(module, size, max_size, preload_modules)
+    pool.start()
+    return pool
@@ -0,0 +1,293 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Swarm download of large task payloads.
+
+The server splits the task payload into content-addressed chunks and sends the clients a manifest (the SHA-256
+digest of every chunk and a list of peers which received the same manifest) instead of the payload. Each client
+fetches the chunks from its peers and falls back to the server for the chunks the peers don't have yet. Every
+chunk is verified against its digest so a peer can't alter the payload. Clients serve the chunks they have to
+other clients as soon as they are downloaded.
+
+Clients start at different chunks, so concurrent clients seed different parts of the payload from the server and
+later clients get most chunks from their peers. The peer traffic only bypasses the server when ad-hoc connections
+between the client cells are allowed (allow_adhoc_conns in the comm config), otherwise it's relayed by the server.
+"""
+import hashlib
+import logging
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from nvflare.fuel.f3.cellnet.cell import Cell
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey, ReturnCode
+from nvflare.fuel.f3.cellnet.utils import make_reply
+from nvflare.fuel.f3.message import Message as CellMessage
+from nvflare.private.defs import CellChannel, CellChannelTopic, CellMessageHeaderKeys, new_cell_message
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_MIN_PAYLOAD_SIZE = 16 * 1024 * 1024
+DEFAULT_MAX_PEERS = 8
+DEFAULT_CHUNK_TIMEOUT = 30.0
+
+# Payloads kept in a chunk store, older ones are evicted
+MAX_STORED_PAYLOADS = 2
+
+# Peers tried for a chunk before falling back to the server
+MAX_PEER_ATTEMPTS = 2
+
+
+class ManifestKey:
+
+    ID = "id"
+    SIZE = "size"
+    CHUNK_SIZE = "chunk_size"
+    DIGESTS = "digests"
+    PEERS = "peers"
+
+
+def chunk_digest(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class _StoredPayload:
+    def __init__(self, buffer, chunk_size: int, digests: List[str], complete: bool):
+        self.buffer = memoryview(buffer)
+        self.chunk_size = chunk_size
+        self.digests = digests
+        self.available = set(range(len(digests))) if complete else set()
+        self.peers = []
+
+    def get_chunk(self, index: int):
+        start = index * self.chunk_size
+        return self.buffer[start : start + self.chunk_size]
+
+
+class ChunkStore:
+    """Chunks of the recent payloads, served to other cells by digest"""
+
+    def __init__(self, max_payloads: int = MAX_STORED_PAYLOADS):
+        self.max_payloads = max_payloads
+        self.payloads = OrderedDict()  # payload id => _StoredPayload
+        self.chunks = {}  # digest => (payload id, chunk index)
+        self.lock = threading.Lock()
+
+    def add(self, payload_id: str, buffer, chunk_size: int, digests: List[str], complete: bool) -> _StoredPayload:
+        with self.lock:
+            stored = self.payloads.get(payload_id)
+            if stored:
+                self.payloads.move_to_end(payload_id)
+                return stored
+
+            stored = _StoredPayload(buffer, chunk_size, digests, complete)
+            self.payloads[payload_id] = stored
+            for i, digest in enumerate(digests):
+                self.chunks[digest] = (payload_id, i)
+
+            while len(self.payloads) > self.max_payloads:
+                old_id, _ = self.payloads.popitem(last=False)
+                self.chunks = {d: loc for d, loc in self.chunks.items() if loc[0] != old_id}
+            return stored
+
+    def get(self, payload_id: str) -> Optional[_StoredPayload]:
+        with self.lock:
+            return self.payloads.get(payload_id)
+
+    def set_available(self, payload_id: str, index: int):
+        with self.lock:
+            stored = self.payloads.get(payload_id)
+            if stored:
+                stored.available.add(index)
+
+    def get_chunk(self, digest: str):
+        with self.lock:
+            loc = self.chunks.get(digest)
+            if not loc:
+                return None
+            payload_id, index = loc
+            stored = self.payloads.get(payload_id)
+            if not stored or index not in stored.available:
+                return None
+            return stored.get_chunk(index)
+
+    def handle_request(self, request: CellMessage) -> CellMessage:
+        digest = request.get_header(CellMessageHeaderKeys.CHUNK_DIGEST)
+        chunk = self.get_chunk(digest)
+        if chunk is None:
+            return make_reply(ReturnCode.INVALID_REQUEST, f"chunk {digest} not available")
+        return new_cell_message({MessageHeaderKey.RETURN_CODE: ReturnCode.OK}, chunk)
+
+
+class SwarmSeeder:
+    """Server side of the swarm download, publishes the payloads and serves their chunks.
+
+    Args:
+        cell: the server job cell
+        chunk_size: size of the chunks
+        min_payload_size: payloads smaller than this are sent directly
+        max_peers: maximum number of peers in a manifest
+    """
+
+    def __init__(
+        self,
+        cell: Cell,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_payload_size: int = DEFAULT_MIN_PAYLOAD_SIZE,
+        max_peers: int = DEFAULT_MAX_PEERS,
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive but got {chunk_size}")
+
+        self.cell = cell
+        self.chunk_size = chunk_size
+        self.min_payload_size = min_payload_size
+        self.max_peers = max_peers
+        self.store = ChunkStore()
+        self.payload_ids = {}  # id of the payload object => payload id
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        cell.register_request_cb(
+            channel=CellChannel.SWARM, topic=CellChannelTopic.GET_CHUNK, cb=self.store.handle_request
+        )
+
+    def should_publish(self, payload) -> bool:
+        return payload is not None and len(payload) >= self.min_payload_size
+
+    def publish(self, payload: bytes, receiver: str) -> dict:
+        """Get the manifest of a payload for a receiver, the payload is split into chunks the first time.
+
+        Args:
+            payload: the payload, the same object is published for all the receivers of a task
+            receiver: FQCN of the receiving cell, it's offered as a peer to the next receivers
+
+        Returns: the manifest
+        """
+        with self.lock:
+            payload_id = self.payload_ids.get(id(payload))
+            stored = self.store.get(payload_id) if payload_id else None
+            if not stored:
+                view = memoryview(payload)
+                digests = [chunk_digest(view[i : i + self.chunk_size]) for i in range(0, len(view), self.chunk_size)]
+                payload_id = chunk_digest("".join(digests).encode())
+                stored = self.store.add(payload_id, payload, self.chunk_size, digests, complete=True)
+                self.payload_ids = {k: v for k, v in self.payload_ids.items() if self.store.get(v)}
+                self.payload_ids[id(payload)] = payload_id
+                self.logger.info(f"published payload {payload_id} ({len(payload)} bytes) in {len(digests)} chunks")
+
+            candidates = [p for p in stored.peers if p != receiver]
+            peers = random.sample(candidates, min(self.max_peers, len(candidates)))
+            if receiver not in stored.peers:
+                stored.peers.append(receiver)
+
+        return {
+            ManifestKey.ID: payload_id,
+            ManifestKey.SIZE: len(payload),
+            ManifestKey.CHUNK_SIZE: stored.chunk_size,
+            ManifestKey.DIGESTS: stored.digests,
+            ManifestKey.PEERS: peers,
+        }
+
+
+class SwarmDownloader:
+    """Client side of the swarm download, gets the chunks from the peers or the server and serves them to the peers.
+
+    Args:
+        cell: the client job cell
+        chunk_timeout: timeout of each chunk request
+        max_workers: number of chunks downloaded concurrently
+    """
+
+    def __init__(self, cell: Cell, chunk_timeout: float = DEFAULT_CHUNK_TIMEOUT, max_workers: int = 4):
+        self.cell = cell
+        self.chunk_timeout = chunk_timeout
+        self.max_workers = max_workers
+        self.store = ChunkStore()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        cell.register_request_cb(
+            channel=CellChannel.SWARM, topic=CellChannelTopic.GET_CHUNK, cb=self.store.handle_request
+        )
+
+    def download(self, manifest: dict, server: str) -> bytes:
+        """Download the payload of a manifest.
+
+        Args:
+            manifest: the manifest received from the server
+            server: FQCN of the server cell which published the manifest
+
+        Returns: the payload
+
+        Raises:
+            RuntimeError: if a chunk can't be downloaded from the server
+        """
+        payload_id = manifest[ManifestKey.ID]
+        size = manifest[ManifestKey.SIZE]
+        chunk_size = manifest[ManifestKey.CHUNK_SIZE]
+        digests = manifest[ManifestKey.DIGESTS]
+        peers = list(manifest.get(ManifestKey.PEERS, []))
+        random.shuffle(peers)
+
+        stored = self.store.add(payload_id, bytearray(size), chunk_size, digests, complete=False)
+        stats = {"peer": 0, "server": 0}
+
+        # Start at a random chunk so concurrent clients seed different chunks from the server
+        start = random.randrange(len(digests)) if digests else 0
+        order = [(start + i) % len(digests) for i in range(len(digests))]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="swarm") as executor:
+            for index, source in executor.map(
+                lambda i: self._download_chunk(stored, i, peers, server),
+                [i for i in order if i not in stored.available],
+            ):
+                self.store.set_available(payload_id, index)
+                stats[source] += 1
+
+        self.logger.info(
+            f"downloaded payload {payload_id} ({size} bytes): {stats['peer']} chunks from peers, "
+            f"{stats['server']} chunks from server"
+        )
+        return bytes(stored.buffer)
+
+    def _download_chunk(self, stored: _StoredPayload, index: int, peers: List[str], server: str):
+        digest = stored.digests[index]
+        sources = [peers[(index + i) % len(peers)] for i in range(min(MAX_PEER_ATTEMPTS, len(peers)))]
+        sources.append(server)
+        for source in sources:
+            chunk = self._request_chunk(source, digest)
+            if chunk is None:
+                continue
+
+            start = index * stored.chunk_size
+            stored.buffer[start : start + len(chunk)] = chunk
+            return index, "server" if source == server else "peer"
+
+        raise RuntimeError(f"failed to download chunk {digest} from {server}")
+
+    def _request_chunk(self, source: str, digest: str):
+        reply = self.cell.send_request(
+            channel=CellChannel.SWARM,
+            topic=CellChannelTopic.GET_CHUNK,
+            target=source,
+            request=new_cell_message({CellMessageHeaderKeys.CHUNK_DIGEST: digest}),
+            timeout=self.chunk_timeout,
+            optional=True,
+        )
+        rc = reply.get_header(MessageHeaderKey.RETURN_CODE, ReturnCode.OK)
+        if rc != ReturnCode.OK or reply.payload is None:
+            self.logger.debug(f"chunk {digest} not received from {source}: {rc}")
+            return None
+
+        if chunk_digest(reply.payload) != digest:
+            self.logger.warning(f"chunk {digest} from {source} doesn't match its digest")
+            return None
+        return reply.payload
@@ -0,0 +1,107 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from nvflare.apis.dxo import DXO, DataKind, from_shareable
+from nvflare.apis.fl_context import FLContext
+from nvflare.apis.utils.decomposers import flare_decomposers
+from nvflare.app_common.aggregators.weighted_aggregation_helper import WeightedAggregationHelper
+from nvflare.app_common.decomposers import common_decomposers
+from nvflare.app_common.filters import ModelDequantizer, ModelQuantizer
+from nvflare.app_common.utils.quantization_utils import QuantizationType
+from nvflare.fuel.hci.table import Table
+from nvflare.fuel.utils import fobs
+
+
+def _make_updates(num_clients: int, num_layers: int, layer_size: int):
+    rng = np.random.default_rng(0)
+    return [
+        {f"layer{i}": rng.normal(0.0, 0.01, layer_size).astype(np.float32) for i in range(num_layers)}
+        for _ in range(num_clients)
+    ]
+
+
+def _aggregate(updates):
+    helper = WeightedAggregationHelper()
+    for i, update in enumerate(updates):
+        helper.add(update, 1.0, f"site-{i}", 0)
+    return helper.get_result()
+
+
+def _transport(update: dict, quantization_type):
+    """Send one update through the filters and the serializer, return the received data and the bytes on wire"""
+    fl_ctx = FLContext()
+    shareable = DXO(data_kind=DataKind.WEIGHT_DIFF, data=dict(update)).to_shareable()
+    if quantization_type:
+        shareable = ModelQuantizer(quantization_type=quantization_type).process(shareable, fl_ctx)
+    buffer = fobs.dumps(shareable)
+    shareable = fobs.loads(buffer)
+    if quantization_type:
+        shareable = ModelDequantizer().process(shareable, fl_ctx)
+    return from_shareable(shareable).data, len(buffer)
+
+
+def main():
+    """
+    Benchmark of the model quantization filters: bytes on wire per update and error of the aggregated model.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", "-c", type=int, help="number of clients", default=8)
+    parser.add_argument("--layers", "-l", type=int, help="number of layers", default=10)
+    parser.add_argument("--layer_size", "-s", type=int, help="number of elements per layer", default=1000000)
+    args = parser.parse_args()
+
+    flare_decomposers.register()
+    common_decomposers.register()
+
+    updates = _make_updates(args.clients, args.layers, args.layer_size)
+    reference = _aggregate(updates)
+
+    table = Table(["quantization", "bytes per update", "ratio", "max abs error", "rel L2 error", "secs"])
+    baseline_size = None
+    for quantization_type in [None] + QuantizationType.ALL:
+        start = time.perf_counter()
+        received = []
+        size = 0
+        for update in updates:
+            data, size = _transport(update, quantization_type)
+            received.append(data)
+        duration = time.perf_counter() - start
+
+        result = _aggregate(received)
+        diff = np.concatenate([(result[k] - reference[k]).reshape(-1) for k in reference])
+        ref = np.concatenate([v.reshape(-1) for v in reference.values()])
+        if baseline_size is None:
+            baseline_size = size
+
+        table.add_row(
+            [
+                quantization_type or "none",
+                str(size),
+                f"{baseline_size / size:.2f}",
+                f"{np.abs(diff).max():.3e}",
+                f"{np.linalg.norm(diff) / np.linalg.norm(ref):.3e}",
+                f"{duration:.3f}",
+            ]
+        )
+
+    table.write(sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -997,6 +997,36 @@ class TestBasic(TestController):
         launch_thread.join()
         self.teardown_system(controller, fl_ctx)
 
+    @pytest.mark.parametrize("method", ["broadcast_and_wait", "send_and_wait", "relay_and_wait"])
+    def test_wait_ends_on_submission(self, method):
+        controller, fl_ctx, clients = self.setup_system()
+        client = clients[0]
+        # the task must exit on the submission, not on the periodic check
+        controller._task_check_period = 10.0
+        time.sleep(0.2)
+        task = create_task("__test_task")
+        launch_thread = threading.Thread(
+            target=launch_task,
+            kwargs={
+                "controller": controller,
+                "task": task,
+                "method": method,
+                "fl_ctx": fl_ctx,
+                "kwargs": {"targets": [client]},
+            },
+        )
+        get_ready(launch_thread)
+
+        _, client_task_id, _ = controller.process_task_request(client, fl_ctx)
+        controller.process_submission(
+            client=client, task_name="__test_task", task_id=client_task_id, fl_ctx=fl_ctx, result=Shareable()
+        )
+        launch_thread.join(timeout=2.0)
+        assert not launch_thread.is_alive()
+        assert task.completion_status == TaskCompletionStatus.OK
+        assert controller.get_num_standing_tasks() == 0
+        self.teardown_system(controller, fl_ctx)
+
     @pytest.mark.parametrize("method", TestController.ALL_APIS)
     @pytest.mark.parametrize("timeout", [1, 2])
     def test_task_timeout(self, method, timeout):
@@ -20,9 +20,11 @@ from unittest import mock
 
 from nvflare.apis.fl_context import FLContext
 from nvflare.apis.impl.job_def_manager import SimpleJobDefManager
-from nvflare.apis.job_def import JobDataKey, JobMetaKey
+from nvflare.apis.job_def import JobDataKey, JobMetaKey, RunStatus
+from nvflare.apis.utils.job_utils import convert_legacy_zipped_app_file_to_job
 from nvflare.app_common.storages.filesystem_storage import FilesystemStorage
-from nvflare.fuel.utils.zip_utils import zip_directory_to_bytes
+from nvflare.fuel.utils import fobs
+from nvflare.fuel.utils.zip_utils import zip_directory_to_bytes, zip_directory_to_file
 from nvflare.private.fed.server.job_meta_validator import JobMetaValidator
 
 
@@ -45,11 +47,13 @@ class TestJobManager(unittest.TestCase):
             content = self.job_manager.get_content(meta.get(JobMetaKey.JOB_ID), self.fl_ctx)
             assert content == data
 
-    def _create_job(self):
+    def _create_job(self, submitter=None):
         data = zip_directory_to_bytes(self.data_folder, "valid_job")
         folder_name = "valid_job"
         job_validator = JobMetaValidator()
         valid, error, meta = job_validator.validate(folder_name, data)
+        if submitter:
+            meta[JobMetaKey.SUBMITTER_NAME.value] = submitter
         meta = self.job_manager.create(meta, data, self.fl_ctx)
         return data, meta
 
@@ -62,3 +66,82 @@ class TestJobManager(unittest.TestCase):
             self.job_manager.save_workspace(job_id, data, self.fl_ctx)
             result = self.job_manager.get_job_data(job_id, self.fl_ctx)
             assert result.get(JobDataKey.WORKSPACE_DATA.value) == data
+
+    def test_file_content(self):
+        with mock.patch("nvflare.apis.impl.job_def_manager.SimpleJobDefManager._get_job_store") as mock_store:
+            mock_store.return_value = FilesystemStorage()
+
+            content_file = os.path.join(self.uri_root, "content.zip")
+            zip_directory_to_file(self.data_folder, "valid_job", content_file)
+            convert_legacy_zipped_app_file_to_job(content_file)
+            with open(content_file, "rb") as f:
+                data = f.read()
+            _, _, meta = JobMetaValidator().validate("valid_job", content_file)
+            meta = self.job_manager.create_from_file(meta, content_file, self.fl_ctx)
+            job_id = meta.get(JobMetaKey.JOB_ID)
+            assert self.job_manager.get_content(job_id, self.fl_ctx) == data
+
+            out_file = os.path.join(self.uri_root, "out.zip")
+            assert not self.job_manager.get_workspace_to_file(job_id, out_file, self.fl_ctx)
+            self.job_manager.save_workspace_from_file(job_id, content_file, self.fl_ctx)
+            assert self.job_manager.get_workspace_to_file(job_id, out_file, self.fl_ctx)
+            with open(out_file, "rb") as f:
+                assert f.read() == data
+
+            job = self.job_manager.get_job(job_id, self.fl_ctx)
+            assert set(self.job_manager.get_apps(job, self.fl_ctx)) == set(job.get_deployment())
+
+            self.job_manager.delete(job_id, self.fl_ctx)
+            assert self.job_manager.get_content(job_id, self.fl_ctx) is None
+
+    def test_legacy_job_data(self):
+        with mock.patch("nvflare.apis.impl.job_def_manager.SimpleJobDefManager._get_job_store") as mock_store:
+            store = FilesystemStorage()
+            mock_store.return_value = store
+
+            # Jobs stored by older versions have the content and workspace in one object
+            data, meta = self._create_job()
+            job_id = meta.get(JobMetaKey.JOB_ID)
+            legacy_data = {JobDataKey.JOB_DATA.value: data, JobDataKey.WORKSPACE_DATA.value: None}
+            store.update_data(self.job_manager.job_uri(job_id), fobs.dumps(legacy_data))
+
+            assert self.job_manager.get_content(job_id, self.fl_ctx) == data
+            assert self.job_manager.get_job_data(job_id, self.fl_ctx) == legacy_data
+
+            self.job_manager.save_workspace(job_id, b"workspace", self.fl_ctx)
+            result = self.job_manager.get_job_data(job_id, self.fl_ctx)
+            assert result[JobDataKey.JOB_DATA.value] == data
+            assert result[JobDataKey.WORKSPACE_DATA.value] == b"workspace"
+
+    def test_job_index(self):
+        with mock.patch("nvflare.apis.impl.job_def_manager.SimpleJobDefManager._get_job_store") as mock_store:
+            mock_store.return_value = FilesystemStorage()
+
+            _, meta1 = self._create_job(submitter="user1")
+            _, meta2 = self._create_job(submitter="user2")
+            jid1 = meta1.get(JobMetaKey.JOB_ID)
+            jid2 = meta2.get(JobMetaKey.JOB_ID)
+            assert {job.job_id for job in self.job_manager.get_all_jobs(self.fl_ctx)} == {jid1, jid2}
+
+            self.job_manager.set_status(jid1, RunStatus.RUNNING, self.fl_ctx)
+            assert [job.job_id for job in self.job_manager.get_jobs_by_status(RunStatus.RUNNING, self.fl_ctx)] == [jid1]
+            assert [j.job_id for j in self.job_manager.get_jobs_by_status(RunStatus.SUBMITTED, self.fl_ctx)] == [jid2]
+            assert [job.job_id for job in self.job_manager.get_jobs_by_submitter("user2", self.fl_ctx)] == [jid2]
+
+            self.job_manager.set_approval(jid1, "reviewer", True, "", self.fl_ctx)
+            waiting = self.job_manager.get_jobs_waiting_for_review("reviewer", self.fl_ctx)
+            assert [job.job_id for job in waiting] == [jid2]
+
+            # The jobs returned are copies
+            job = self.job_manager.get_job(jid2, self.fl_ctx)
+            job.meta[JobMetaKey.STATUS.value] = RunStatus.RUNNING.value
+            assert self.job_manager.get_job(jid2, self.fl_ctx).meta[JobMetaKey.STATUS] == RunStatus.SUBMITTED
+
+            # A new manager loads the index from the store
+            job_manager = SimpleJobDefManager(uri_root=self.uri_root)
+            assert [j.job_id for j in job_manager.get_jobs_by_status(RunStatus.RUNNING, self.fl_ctx)] == [jid1]
+
+            self.job_manager.delete(jid1, self.fl_ctx)
+            assert self.job_manager.get_job(jid1, self.fl_ctx) is None
+            assert not self.job_manager.get_jobs_by_status(RunStatus.RUNNING, self.fl_ctx)
+            assert not self.job_manager.get_jobs_by_submitter("user1", self.fl_ctx)
@@ -19,8 +19,13 @@ from pathlib import Path
 
 import pytest
 
-from nvflare.apis.utils.job_utils import convert_legacy_zipped_app_to_job
-from nvflare.fuel.utils.zip_utils import unzip_all_from_bytes, zip_directory_to_bytes
+from nvflare.apis.utils.job_utils import convert_legacy_zipped_app_file_to_job, convert_legacy_zipped_app_to_job
+from nvflare.fuel.utils.zip_utils import (
+    unzip_all_from_bytes,
+    unzip_all_from_file,
+    zip_directory_to_bytes,
+    zip_directory_to_file,
+)
 
 
 def create_fake_app(app_root: Path):
@@ -122,3 +127,18 @@ class TestJobUtils:
             assert i[2] == j[2]
 
         shutil.rmtree(output_tmp_dir)
+
+    def test_convert_legacy_zip_app_file(self, create_fake_app_dir):
+        tmp_dir, app_name, tmp_dir_with_job = create_fake_app_dir
+        zip_file = os.path.join(tempfile.mkdtemp(), "app.zip")
+        zip_directory_to_file(root_dir=tmp_dir, folder_name=app_name, output_file=zip_file)
+        convert_legacy_zipped_app_file_to_job(zip_file)
+
+        output_tmp_dir = tempfile.mkdtemp()
+        unzip_all_from_file(zip_file, output_dir_name=output_tmp_dir)
+        for i, j in zip(os.walk(tmp_dir_with_job), os.walk(output_tmp_dir)):
+            assert i[1] == j[1]
+            assert i[2] == j[2]
+
+        shutil.rmtree(output_tmp_dir)
+        shutil.rmtree(os.path.dirname(zip_file))
@@ -0,0 +1,132 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import weakref
+
+import numpy as np
+import pytest
+
+from nvflare.app_common.aggregators import weighted_aggregation_helper
+from nvflare.app_common.aggregators.weighted_aggregation_helper import WeightedAggregationHelper
+
+
+def _expected(contributions, weights):
+    total = sum(c * w for c, w in zip(contributions, weights))
+    return total / sum(weights)
+
+
+class TestWeightedAggregationHelper:
+    @pytest.mark.parametrize("dtype", [np.float32, np.float64, np.int64])
+    def test_weighted_mean(self, dtype):
+        contributions = [np.arange(12, dtype=dtype).reshape(3, 4) * (i + 1) for i in range(3)]
+        weights = [1.0, 2.0, 3.0]
+        helper = WeightedAggregationHelper()
+        for i, (c, w) in enumerate(zip(contributions, weights)):
+            helper.add({"layer": c}, w, f"site-{i}", 1)
+
+        result = helper.get_result()["layer"]
+        expected = _expected(contributions, weights)
+        assert result.dtype == expected.dtype
+        assert result.shape == (3, 4)
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+    def test_contributions_unchanged(self):
+        contribution = np.ones(10, dtype=np.float32)
+        helper = WeightedAggregationHelper()
+        helper.add({"layer": contribution}, 2.0, "site-1", 1)
+        helper.add({"layer": contribution}, 2.0, "site-2", 1)
+        helper.get_result()
+        np.testing.assert_array_equal(contribution, np.ones(10, dtype=np.float32))
+
+    def test_accumulator_dtype(self, monkeypatch):
+        monkeypatch.setattr(weighted_aggregation_helper, "ACCUMULATE_CHUNK_SIZE", 7)
+        contributions = [np.random.random(50).astype(np.float32) for _ in range(4)]
+        weights = [1.0, 0.5, 2.0, 3.0]
+        helper = WeightedAggregationHelper(accumulator_dtype="float64")
+        for i, (c, w) in enumerate(zip(contributions, weights)):
+            helper.add({"layer": c}, w, f"site-{i}", 1)
+        assert helper.total["layer"].dtype == np.float64
+
+        result = helper.get_result()["layer"]
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, _expected(contributions, weights), rtol=1e-6)
+
+    def test_not_weigh_by_local_iter(self):
+        helper = WeightedAggregationHelper(weigh_by_local_iter=False)
+        helper.add({"layer": np.full(3, 2.0), "scalar": 2.0}, 2.0, "site-1", 1)
+        helper.add({"layer": np.full(3, 4.0), "scalar": 4.0}, 2.0, "site-2", 1)
+        result = helper.get_result()
+        np.testing.assert_allclose(result["layer"], np.full(3, 1.5))
+        assert result["scalar"] == 1.5
+
+    def test_exclude_vars(self):
+        helper = WeightedAggregationHelper(exclude_vars="bias")
+        helper.add({"weight": np.ones(2), "bias": np.ones(2)}, 1.0, "site-1", 1)
+        assert list(helper.get_result().keys()) == ["weight"]
+        assert helper.get_len() == 0
+
+    def test_concurrent_add(self):
+        n_clients = 16
+        layers = {f"layer{i}": np.full((100, 10), float(i)) for i in range(20)}
+        helper = WeightedAggregationHelper(num_lock_stripes=4)
+        threads = [
+            threading.Thread(target=helper.add, args=(layers, float(i + 1), f"site-{i}", 1)) for i in range(n_clients)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert helper.get_len() == n_clients
+        result = helper.get_result()
+        for k, v in layers.items():
+            np.testing.assert_allclose(result[k], v)
+
+    @pytest.mark.parametrize("release", [True, False])
+    def test_parallel_fold(self, release):
+        layers = [np.random.random((64, 8)) for _ in range(10)]
+        contributions = [{f"layer{i}": layer * (c + 1) for i, layer in enumerate(layers)} for c in range(3)]
+        weights = [1.0, 2.0, 3.0]
+        helper = WeightedAggregationHelper(num_workers=4, release_contributions=release)
+        for i, (c, w) in enumerate(zip(contributions, weights)):
+            helper.add(c, w, f"site-{i}", 1)
+            assert len(c) == (0 if release else len(layers))
+
+        result = helper.get_result()
+        for i, layer in enumerate(layers):
+            np.testing.assert_allclose(result[f"layer{i}"], _expected([layer, layer * 2, layer * 3], weights))
+
+    def test_release_frees_buffer(self):
+        # arrays decoded from a received message are views on the message buffer
+        buffer = np.ones(30, dtype=np.float32)
+        ref = weakref.ref(buffer)
+        contribution = {"weight": buffer[:10], "bias": buffer[10:20], "bn": buffer[20:]}
+        del buffer
+        helper = WeightedAggregationHelper(exclude_vars="bn", num_workers=2, release_contributions=True)
+        helper.add(contribution, 1.0, "site-1", 1)
+        assert ref() is None
+        np.testing.assert_array_equal(contribution["bn"], np.ones(10, dtype=np.float32))
+        np.testing.assert_array_equal(helper.get_result()["weight"], np.ones(10, dtype=np.float32))
+
+        helper.shutdown()
+        assert helper.executor is None
+        helper.add({"weight": np.ones(10), "bias": np.ones(10)}, 1.0, "site-1", 2)
+        assert helper.get_len() == 1
+
+    def test_invalid_args(self):
+        with pytest.raises(ValueError):
+            WeightedAggregationHelper(num_lock_stripes=0)
+        with pytest.raises(ValueError):
+            WeightedAggregationHelper(num_workers=-1)
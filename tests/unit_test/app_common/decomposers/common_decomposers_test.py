@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from io import BytesIO
 from typing import Any
 
 import numpy as np
@@ -67,6 +68,27 @@ class TestCommonDecomposers:
 
         assert (new_npa == npa).all()
 
+    def test_np_array_zero_copy(self):
+
+        npa = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+        data = bytearray(fobs.dumps(npa))
+        new_npa = fobs.loads(data)
+
+        assert (new_npa == npa).all()
+        assert new_npa.flags.writeable
+        assert np.shares_memory(new_npa, np.frombuffer(data, dtype=np.uint8))
+
+    def test_np_array_legacy_format(self):
+
+        npa = np.array([[1.5, 2.5], [3.5, 4.5]])
+        stream = BytesIO()
+        np.save(stream, npa, allow_pickle=False)
+
+        new_npa = common_decomposers.NumpyArrayDecomposer().recompose(stream.getvalue())
+
+        assert (new_npa == npa).all()
+
     def test_ctx_prop_req(self):
 
         cpr = _CtxPropReq("data_type", True, False, True)
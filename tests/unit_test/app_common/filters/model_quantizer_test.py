@@ -0,0 +1,118 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nvflare.apis.dxo import DXO, DataKind, from_shareable
+from nvflare.apis.fl_context import FLContext
+from nvflare.app_common.filters import ModelDequantizer, ModelQuantizer
+from nvflare.app_common.utils.quantization_utils import QuantizationKey, dequantize, quantize
+
+# quantization type, bytes per element, max error relative to the value range
+TEST_CASES = [
+    ("float16", 2, 1e-3),
+    ("bfloat16", 2, 1e-2),
+    ("int8", 1, 1 / 255),
+    ("int4", 0.5, 1 / 15),
+]
+
+
+class TestModelQuantizer:
+    @pytest.mark.parametrize("quantization_type,element_size,tolerance", TEST_CASES)
+    def test_round_trip(self, quantization_type, element_size, tolerance):
+        weights = {
+            "conv": np.random.uniform(-2.0, 3.0, (8, 3, 3)).astype(np.float32),
+            "bias": np.random.uniform(-1.0, 1.0, 7).astype(np.float32),
+            "steps": np.array([10, 20]),
+        }
+        dxo = DXO(data_kind=DataKind.WEIGHT_DIFF, data={k: v.copy() for k, v in weights.items()})
+        fl_ctx = FLContext()
+
+        shareable = ModelQuantizer(quantization_type=quantization_type).process(dxo.to_shareable(), fl_ctx)
+        quantized = from_shareable(shareable)
+        assert quantized.data["conv"].nbytes == int(weights["conv"].size * element_size)
+        assert set(quantized.get_meta_prop(QuantizationKey.META).keys()) == {"conv", "bias"}
+        np.testing.assert_array_equal(quantized.data["steps"], weights["steps"])
+
+        result = from_shareable(ModelDequantizer().process(shareable, fl_ctx))
+        assert result.get_meta_prop(QuantizationKey.META) is None
+        for k, v in weights.items():
+            assert result.data[k].dtype == v.dtype
+            assert result.data[k].shape == v.shape
+            value_range = max(v.max(), 0) - min(v.min(), 0)
+            assert np.abs(result.data[k] - v).max() <= tolerance * value_range + 1e-6
+
+    @pytest.mark.parametrize("quantization_type", ["int8", "int4"])
+    def test_constant_array(self, quantization_type):
+        for value in (0.0, 1.5, -2.0):
+            array = np.full((3, 5), value, dtype=np.float32)
+            data, params = quantize(array, quantization_type)
+            np.testing.assert_allclose(dequantize(data, params), array, atol=1e-6)
+
+    def test_bfloat16_special_values(self):
+        array = np.array([np.nan, np.inf, -np.inf, 0.0, 1.0], dtype=np.float32)
+        result = dequantize(*quantize(array, "bfloat16"))
+        assert np.isnan(result[0])
+        np.testing.assert_array_equal(result[1:], array[1:])
+
+    @pytest.mark.parametrize("quantization_type", ["int8", "int4"])
+    @pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+    def test_non_finite_passthrough(self, quantization_type, value):
+        bad = np.array([1.0, value, -1.0], dtype=np.float32)
+        with pytest.raises(ValueError):
+            quantize(bad, quantization_type)
+
+        good = np.array([1.0, 2.0], dtype=np.float32)
+        dxo = DXO(data_kind=DataKind.WEIGHTS, data={"bad": bad.copy(), "good": good.copy()})
+        fl_ctx = FLContext()
+        shareable = ModelQuantizer(quantization_type=quantization_type).process(dxo.to_shareable(), fl_ctx)
+        assert set(from_shareable(shareable).get_meta_prop(QuantizationKey.META).keys()) == {"good"}
+
+        result = from_shareable(ModelDequantizer().process(shareable, fl_ctx))
+        np.testing.assert_array_equal(result.data["bad"], bad)
+        np.testing.assert_allclose(result.data["good"], good, atol=2.0 / 15)
+
+    def test_input_not_changed(self):
+        weights = {"w": np.array([1.0, -2.0, 3.0], dtype=np.float32)}
+        dxo = DXO(data_kind=DataKind.WEIGHTS, data=weights)
+        fl_ctx = FLContext()
+        shareable = ModelQuantizer(quantization_type="int8").process(dxo.to_shareable(), fl_ctx)
+        assert weights["w"].dtype == np.float32
+        assert dxo.get_meta_prop(QuantizationKey.META) is None
+
+        quantized = from_shareable(shareable)
+        ModelDequantizer().process(shareable, fl_ctx)
+        assert quantized.data["w"].dtype == np.uint8
+        assert quantized.get_meta_prop(QuantizationKey.META)
+
+    def test_float16_out_of_range(self):
+        big = np.array([1.0, 1e6], dtype=np.float32)
+        with pytest.raises(ValueError):
+            quantize(big, "float16")
+
+        dxo = DXO(data_kind=DataKind.WEIGHTS, data={"big": big, "small": np.array([0.5], dtype=np.float32)})
+        shareable = ModelQuantizer(quantization_type="float16").process(dxo.to_shareable(), FLContext())
+        result = from_shareable(shareable)
+        assert set(result.get_meta_prop(QuantizationKey.META).keys()) == {"small"}
+        np.testing.assert_array_equal(result.data["big"], big)
+
+    def test_not_quantized(self):
+        dxo = DXO(data_kind=DataKind.WEIGHTS, data={"a": np.array([1.0])})
+        shareable = ModelDequantizer().process(dxo.to_shareable(), FLContext())
+        np.testing.assert_array_equal(from_shareable(shareable).data["a"], np.array([1.0]))
+
+    def test_invalid_type(self):
+        with pytest.raises(ValueError):
+            ModelQuantizer(quantization_type="int2")
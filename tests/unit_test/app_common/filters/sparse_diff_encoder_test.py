@@ -0,0 +1,92 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nvflare.apis.dxo import DXO, DataKind, MetaKey, from_shareable
+from nvflare.apis.fl_context import FLContext
+from nvflare.app_common.aggregators.dxo_aggregator import DXOAggregator
+from nvflare.app_common.app_constant import AppConstants
+from nvflare.app_common.filters import SparseDiffDecoder, SparseDiffEncoder
+from nvflare.app_common.utils.sparse_utils import SparseKey
+
+
+def _encode(encoder: SparseDiffEncoder, data: dict) -> DXO:
+    dxo = DXO(data_kind=DataKind.WEIGHT_DIFF, data=data)
+    return from_shareable(encoder.process(dxo.to_shareable(), FLContext()))
+
+
+class TestSparseDiffEncoder:
+    def test_top_k(self):
+        diff = np.zeros((10, 10), dtype=np.float32)
+        diff[1, 2] = 5.0
+        diff[7, 3] = -4.0
+        diff[0, 0] = 0.001
+        dxo = _encode(SparseDiffEncoder(top_k_fraction=0.02, value_dtype="float32"), {"layer": diff.copy()})
+
+        sparse = dxo.data["layer"]
+        assert sparse[SparseKey.INDICES].dtype == np.int32
+        np.testing.assert_array_equal(sparse[SparseKey.INDICES], [12, 73])
+        np.testing.assert_array_equal(sparse[SparseKey.VALUES], [5.0, -4.0])
+
+        dense = from_shareable(SparseDiffDecoder().process(dxo.to_shareable(), FLContext()))
+        assert dense.get_meta_prop(SparseKey.META) is None
+        expected = diff.copy()
+        expected[0, 0] = 0.0
+        np.testing.assert_array_equal(dense.data["layer"], expected)
+
+    def test_threshold(self):
+        diff = np.array([0.1, -2.0, 0.5, 3.0, -0.4] * 10, dtype=np.float32)
+        dxo = _encode(SparseDiffEncoder(threshold=1.0), {"layer": diff})
+        assert dxo.data["layer"][SparseKey.VALUES].dtype == np.float16
+        assert len(dxo.data["layer"][SparseKey.INDICES]) == 20
+
+    def test_error_feedback(self):
+        encoder = SparseDiffEncoder(top_k_fraction=0.25, value_dtype="float32")
+        diff = np.array([4.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 3.0], dtype=np.float32)
+        first = _encode(encoder, {"layer": diff.copy()})
+        np.testing.assert_array_equal(first.data["layer"][SparseKey.INDICES], [0, 7])
+
+        # the entries not sent in the first round are added to the second round
+        second = _encode(encoder, {"layer": np.array([0.0, 0.5, 2.0, 0.0, 0.0, 0.0, 0.0, 0.0], dtype=np.float32)})
+        np.testing.assert_array_equal(second.data["layer"][SparseKey.INDICES], [1, 2])
+        np.testing.assert_array_equal(second.data["layer"][SparseKey.VALUES], [1.5, 3.0])
+
+    def test_dense_not_worth_it(self):
+        diff = np.ones(4, dtype=np.float16)
+        dxo = _encode(SparseDiffEncoder(top_k_fraction=1.0), {"layer": diff, "count": 3})
+        assert dxo.get_meta_prop(SparseKey.META) is None
+        np.testing.assert_array_equal(dxo.data["layer"], diff)
+
+    def test_aggregate_sparse(self):
+        encoder = SparseDiffEncoder(top_k_fraction=0.5, value_dtype="float32", error_feedback=False)
+        aggregator = DXOAggregator(expected_data_kind=DataKind.WEIGHT_DIFF)
+        fl_ctx = FLContext()
+        fl_ctx.set_prop(AppConstants.CURRENT_ROUND, 0)
+
+        diffs = [np.array([1.0, 0.0, 2.0, 0.0], dtype=np.float32), np.array([0.0, 4.0, 0.0, 6.0], dtype=np.float32)]
+        for i, diff in enumerate(diffs):
+            dxo = _encode(encoder, {"layer": diff})
+            dxo.set_meta_prop(MetaKey.NUM_STEPS_CURRENT_ROUND, 1)
+            assert aggregator.accept(dxo, f"site-{i}", 0, fl_ctx)
+
+        result = aggregator.aggregate(fl_ctx)
+        assert result.data["layer"].dtype == np.float32
+        np.testing.assert_allclose(result.data["layer"], (diffs[0] + diffs[1]) / 2)
+
+    @pytest.mark.parametrize("kwargs", [{"top_k_fraction": 0.0}, {"top_k_fraction": 1.5}, {"threshold": -1.0}])
+    def test_invalid_args(self, kwargs):
+        with pytest.raises(ValueError):
+            SparseDiffEncoder(**kwargs)
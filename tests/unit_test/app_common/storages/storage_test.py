@@ -279,6 +279,40 @@ class TestStorage:
 
         storage.delete_object(uri)
 
+    @pytest.mark.parametrize(
+        "uri",
+        ["/test_dir/test_object"],
+    )
+    def test_data_file_read_update(self, storage, uri):
+        data = random_data()
+        meta = random_meta()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "data")
+            with open(file_path, "wb") as f:
+                f.write(data)
+
+            # create_object_from_file(), open_data()
+            storage.create_object_from_file(uri, file_path, meta, overwrite_existing=True)
+            assert storage.get_meta(uri) == meta
+            with storage.open_data(uri) as f:
+                assert f.read() == data
+
+            # update_data_from_file(), get_data_to_file()
+            data2 = random_data()
+            with open(file_path, "wb") as f:
+                f.write(data2)
+            storage.update_data_from_file(uri, file_path)
+            out_path = os.path.join(tmp_dir, "out")
+            storage.get_data_to_file(uri, out_path)
+            with open(out_path, "rb") as f:
+                assert f.read() == data2
+
+            storage.delete_object(uri)
+            with pytest.raises(StorageException):
+                storage.open_data(uri)
+            with pytest.raises(StorageException):
+                storage.update_data_from_file(uri, file_path)
+
     @pytest.mark.parametrize(
         "uri",
         ["/test_dir/test_object"],
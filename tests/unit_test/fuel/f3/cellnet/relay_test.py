@@ -0,0 +1,109 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+
+from nvflare.fuel.f3.cellnet.cell import _CHANNEL, _TOPIC_RELAY, Cell
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey, ReturnCode
+from nvflare.fuel.f3.cellnet.utils import new_message
+from nvflare.fuel.utils.network_utils import get_open_ports
+
+CHANNEL = "test"
+TOPIC = "echo"
+CELL_NAMES = ["server", "site-1", "site-1.j1", "site-1.j2", "site-2"]
+
+
+def _echo(request):
+    return new_message(headers={"key": request.get_header("key")}, payload=request.payload)
+
+
+@pytest.fixture(scope="module")
+def cells():
+    root_url = f"tcp://localhost:{get_open_ports(1)[0]}"
+    cells = {}
+    try:
+        for name in CELL_NAMES:
+            cell = Cell(name, root_url, secure=False, credentials={})
+            cell.register_request_cb(CHANNEL, TOPIC, _echo)
+            cell.start()
+            cells[name] = cell
+        yield cells
+    finally:
+        for cell in cells.values():
+            cell.stop()
+        for name in CELL_NAMES:
+            Cell.ALL_CELLS.pop(name, None)
+
+
+class TestRelay:
+    def test_relay_broadcast(self, cells, monkeypatch):
+        server = cells["server"]
+        sent = []
+        send_to_endpoint = server._send_to_endpoint
+
+        def spy(endpoint, message):
+            sent.append((endpoint.name, message.get_header(MessageHeaderKey.TOPIC)))
+            return send_to_endpoint(endpoint, message)
+
+        monkeypatch.setattr(server, "_send_to_endpoint", spy)
+
+        targets = ["site-1", "site-1.j1", "site-1.j2", "site-1.j3"]
+        replies = server.broadcast_request(
+            CHANNEL, TOPIC, targets, new_message(headers={"key": "value"}, payload=b"model"), timeout=5.0, relay=True
+        )
+
+        # One copy is sent to the site for all its cells
+        assert sent == [("site-1", "relay")]
+        assert set(replies.keys()) == set(targets)
+        for t in targets[:3]:
+            reply = replies[t]
+            assert reply.get_header(MessageHeaderKey.RETURN_CODE) == ReturnCode.OK
+            assert reply.get_header("key") == "value"
+            assert reply.payload == b"model"
+
+        assert replies["site-1.j3"].get_header(MessageHeaderKey.RETURN_CODE) == ReturnCode.TARGET_UNREACHABLE
+
+    def test_single_target_not_relayed(self, cells):
+        server = cells["server"]
+        replies = server.broadcast_request(
+            CHANNEL, TOPIC, ["site-1.j1", "server"], new_message(payload={"round": 1}), timeout=5.0, relay=True
+        )
+        for reply in replies.values():
+            assert reply.get_header(MessageHeaderKey.RETURN_CODE) == ReturnCode.OK
+            assert reply.payload == {"round": 1}
+
+    @pytest.mark.parametrize(
+        "sender,targets,rc",
+        [
+            # Not the parent cell or the server
+            ("site-2", ["site-1.j1", "site-1.j2"], ReturnCode.UNAUTHENTICATED),
+            # Targets outside the subtree of the relay
+            ("server", ["site-1.j1", "site-2"], ReturnCode.INVALID_REQUEST),
+        ],
+    )
+    def test_relay_rejected(self, cells, sender, targets, rc):
+        called = []
+        cells["site-2"].register_request_cb(CHANNEL, "record", lambda request: called.append(1))
+        cells["site-1.j1"].register_request_cb(CHANNEL, "record", lambda request: called.append(1))
+
+        request = new_message(
+            headers={
+                MessageHeaderKey.RELAY_CHANNEL: CHANNEL,
+                MessageHeaderKey.RELAY_TOPIC: "record",
+                MessageHeaderKey.RELAY_TARGETS: targets,
+            },
+            payload=b"data",
+        )
+        reply = cells[sender].send_request(_CHANNEL, _TOPIC_RELAY, "site-1", request, timeout=5.0)
+        assert reply.get_header(MessageHeaderKey.RETURN_CODE) == rc
+        assert not called
@@ -0,0 +1,121 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import time
+
+import pytest
+
+from nvflare.fuel.f3.cellnet.cell import Cell
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey, ReturnCode
+from nvflare.fuel.f3.cellnet.tracer import MessageTracer, SpanKey, TraceStage, to_chrome_trace
+from nvflare.fuel.f3.cellnet.utils import new_message
+from nvflare.fuel.utils.network_utils import get_open_ports
+
+CHANNEL = "test"
+TOPIC = "echo"
+CELL_NAMES = ["site-7", "site-7.j1"]
+
+
+def _echo(request):
+    return new_message(payload=request.payload)
+
+
+@pytest.fixture(scope="module")
+def cells():
+    root_url = f"tcp://localhost:{get_open_ports(1)[0]}"
+    cells = {}
+    try:
+        for name in CELL_NAMES:
+            cell = Cell(name, root_url, secure=False, credentials={})
+            cell.register_request_cb(CHANNEL, TOPIC, _echo)
+            cell.start()
+            cells[name] = cell
+        yield cells
+    finally:
+        for cell in cells.values():
+            cell.stop()
+        for name in CELL_NAMES:
+            Cell.ALL_CELLS.pop(name, None)
+
+
+class TestMessageTracer:
+    def test_sampling(self):
+        tracer = MessageTracer("site-1", sample_rate=0.0, max_spans=2)
+        message = new_message(headers={MessageHeaderKey.TRACE_ID: "old"})
+        tracer.sample(message)
+        assert message.get_header(MessageHeaderKey.TRACE_ID) is None
+
+        # Untraced messages are not recorded
+        tracer.record(message, TraceStage.ENCODE, time.perf_counter())
+        assert not tracer.get_spans()
+
+        tracer.sample_rate = 1.0
+        tracer.sample(message)
+        assert message.get_header(MessageHeaderKey.TRACE_ID)
+        for stage in (TraceStage.ENCODE, TraceStage.SEND, TraceStage.HANDLER):
+            tracer.record(message, stage, time.perf_counter())
+        assert [s[SpanKey.STAGE] for s in tracer.get_spans()] == [TraceStage.SEND, TraceStage.HANDLER]
+
+        with pytest.raises(ValueError):
+            MessageTracer("site-1", sample_rate=2.0, max_spans=10)
+
+    def test_chrome_trace(self):
+        spans = [
+            {
+                SpanKey.TRACE_ID: trace_id,
+                SpanKey.STAGE: TraceStage.HANDLER,
+                SpanKey.CELL: cell,
+                SpanKey.CHANNEL: "task",
+                SpanKey.TOPIC: "get_task",
+                SpanKey.MSG_TYPE: "req",
+                SpanKey.START: start,
+                SpanKey.DURATION: 0.5,
+            }
+            for trace_id, cell, start in [("t1", "server", 2.0), ("t1", "site-1", 1.0), ("t2", "server", 3.0)]
+        ]
+        events = to_chrome_trace(spans)["traceEvents"]
+        assert [e["ph"] for e in events] == ["M", "X", "M", "X", "X"]
+        assert events[0]["args"]["name"] == "site-1"
+        assert events[1]["ts"] == 1e6
+        assert events[1]["dur"] == 5e5
+        assert events[1]["cat"] == "task:get_task"
+        assert [(e["pid"], e["tid"]) for e in events if e["ph"] == "X"] == [(1, 1), (2, 1), (2, 2)]
+        json.dumps(events)
+
+
+class TestCellTracing:
+    def test_request_traced(self, cells):
+        parent = cells["site-7"]
+        child = cells["site-7.j1"]
+        parent.tracer.sample_rate = 1.0
+        try:
+            reply = parent.send_request(CHANNEL, TOPIC, "site-7.j1", new_message(payload={"round": 1}), timeout=5.0)
+        finally:
+            parent.tracer.sample_rate = 0.0
+
+        assert reply.get_header(MessageHeaderKey.RETURN_CODE) == ReturnCode.OK
+        trace_id = reply.get_header(MessageHeaderKey.TRACE_ID)
+        assert trace_id
+
+        parent_stages = [s[SpanKey.STAGE] for s in parent.tracer.get_spans() if s[SpanKey.TRACE_ID] == trace_id]
+        child_stages = [s[SpanKey.STAGE] for s in child.tracer.get_spans() if s[SpanKey.TRACE_ID] == trace_id]
+        assert TraceStage.ENCODE in parent_stages
+        assert TraceStage.DECODE in parent_stages
+        assert parent_stages[-1] == TraceStage.REQUEST
+        for stage in (TraceStage.TRANSFER, TraceStage.DECODE, TraceStage.HANDLER, TraceStage.ENCODE):
+            assert stage in child_stages
+
+        # Not sampled
+        reply = parent.send_request(CHANNEL, TOPIC, "site-7.j1", new_message(payload={"round": 2}), timeout=5.0)
+        assert reply.get_header(MessageHeaderKey.TRACE_ID) is None
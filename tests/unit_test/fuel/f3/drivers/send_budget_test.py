@@ -0,0 +1,96 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import pytest
+
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.drivers.send_budget import SendBudget
+from nvflare.fuel.utils.stats_utils import new_message_size_pool
+
+
+class TestSendBudget:
+    def test_watermarks(self):
+        budget = SendBudget("peer", 100, 50, 5.0)
+        budget.acquire(60)
+        budget.acquire(40)
+        assert budget.get_queued() == 100
+
+        states = []
+
+        def release():
+            time.sleep(0.1)
+            budget.release(20)
+            time.sleep(0.1)
+            # Still above the low watermark
+            states.append(budget.congested)
+            budget.release(30)
+
+        start = time.time()
+        threading.Thread(target=release).start()
+        budget.acquire(10)
+        assert time.time() - start >= 0.2
+        assert states == [True]
+        assert budget.get_queued() == 60
+        assert not budget.congested
+
+    def test_large_frame(self):
+        budget = SendBudget("peer", 100, 50, 0)
+        budget.acquire(1000)
+        with pytest.raises(CommError) as e:
+            budget.acquire(1)
+        assert e.value.code == CommError.TIMEOUT
+
+        budget.release(1000)
+        budget.acquire(1)
+
+    def test_timeout(self):
+        budget = SendBudget("peer", 100, 50, 0.2)
+        budget.acquire(100)
+        start = time.time()
+        with pytest.raises(CommError):
+            budget.acquire(10)
+        assert time.time() - start >= 0.2
+
+    def test_close(self):
+        budget = SendBudget("peer", 100, 50, 10.0)
+        budget.acquire(100)
+        threading.Timer(0.2, budget.close).start()
+        with pytest.raises(CommError) as e:
+            budget.acquire(10)
+        assert e.value.code == CommError.CLOSED
+
+    def test_event_loop_not_blocked(self):
+        budget = SendBudget("peer", 100, 50, 10.0)
+        budget.acquire(100)
+
+        async def send_ack():
+            budget.acquire(16)
+
+        start = time.time()
+        asyncio.run(send_ack())
+        assert time.time() - start < 1.0
+        assert budget.get_queued() == 116
+
+    def test_stats(self):
+        stats = new_message_size_pool("queue")
+        budget = SendBudget("peer", 100, 50, 1.0, stats)
+        budget.acquire(10)
+        assert stats.cat_bins["peer"]
+
+    def test_invalid_watermarks(self):
+        with pytest.raises(ValueError):
+            SendBudget("peer", 50, 100, 1.0)
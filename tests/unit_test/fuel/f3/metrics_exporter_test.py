@@ -0,0 +1,129 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import urllib.request
+
+import pytest
+
+from nvflare.fuel.f3.comm_config import CommConfigurator
+from nvflare.fuel.f3.metrics_exporter import (
+    CONTENT_TYPE,
+    MetricsExporter,
+    collect_gauges,
+    format_openmetrics,
+    register_gauge,
+    start_metrics_exporter,
+    stop_metrics_exporter,
+    unregister_gauge,
+)
+from nvflare.fuel.f3.stats_pool import StatsPoolManager
+from nvflare.fuel.utils.network_utils import get_open_ports
+
+
+@pytest.fixture(scope="module")
+def pools():
+    hist = StatsPoolManager.add_time_hist_pool("exporter_test_time", "test time", marks=(0.1, 1.0))
+    hist.record_value("encode", 0.05)
+    hist.record_value("encode", 0.5)
+    hist.record_value("encode", 5.0)
+    scoped = StatsPoolManager.add_time_hist_pool("exporter_test_time", "test time", marks=(0.1, 1.0), scope="cell.a")
+    scoped.record_value("decode", 0.5)
+    counter = StatsPoolManager.add_counter_pool("exporter_test_counter", "test counter", counter_names=["sent"])
+    counter.increment("channel:topic", "sent", 3)
+    yield
+    StatsPoolManager.delete_pool(hist.name)
+    StatsPoolManager.delete_pool(scoped.name)
+    StatsPoolManager.delete_pool(counter.name)
+
+
+def _queue_depths():
+    return {"site-1": 2}
+
+
+class TestMetricsExporter:
+    def test_format(self, pools):
+        register_gauge("exporter_test_queue", "test queue", _queue_depths)
+        other_depths = lambda: {"site-1": 1, "site-2": 4}  # noqa: E731
+        register_gauge("exporter_test_queue", "test queue", other_depths)
+        try:
+            lines = format_openmetrics().splitlines()
+        finally:
+            unregister_gauge("exporter_test_queue", _queue_depths)
+
+        assert lines[-1] == "# EOF"
+        assert "# TYPE nvflare_exporter_test_time histogram" in lines
+        assert 'nvflare_exporter_test_time_bucket{category="encode",le="0.1"} 1' in lines
+        assert 'nvflare_exporter_test_time_bucket{category="encode",le="1.0"} 2' in lines
+        assert 'nvflare_exporter_test_time_bucket{category="encode",le="+Inf"} 3' in lines
+        assert 'nvflare_exporter_test_time_count{category="encode"} 3' in lines
+        assert 'nvflare_exporter_test_time_sum{category="encode"} 5.55' in lines
+        assert 'nvflare_exporter_test_time_count{category="decode",scope="cell.a"} 1' in lines
+        assert lines.count("# TYPE nvflare_exporter_test_time histogram") == 1
+
+        assert "# TYPE nvflare_exporter_test_counter counter" in lines
+        assert 'nvflare_exporter_test_counter_total{category="channel:topic",counter="sent"} 3' in lines
+
+        assert "# TYPE nvflare_exporter_test_queue gauge" in lines
+        assert 'nvflare_exporter_test_queue{key="site-1"} 3' in lines
+        assert 'nvflare_exporter_test_queue{key="site-2"} 4' in lines
+
+        # The remaining provider is kept
+        assert collect_gauges()["exporter_test_queue"]["values"] == {"site-1": 1, "site-2": 4}
+        unregister_gauge("exporter_test_queue", other_depths)
+        assert "exporter_test_queue" not in collect_gauges()
+
+    def test_http(self, pools):
+        exporter = MetricsExporter("127.0.0.1", get_open_ports(1)[0], "", 60.0)
+        exporter.start()
+        try:
+            port = exporter.get_port()
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+                assert resp.headers["Content-Type"] == CONTENT_TYPE
+                body = resp.read().decode("utf-8")
+            assert "nvflare_exporter_test_counter_total" in body
+            assert body.endswith("# EOF\n")
+        finally:
+            exporter.stop()
+
+    def test_snapshot(self, pools, tmp_path):
+        snapshot_file = os.path.join(tmp_path, "metrics.json")
+        exporter = MetricsExporter("127.0.0.1", 0, snapshot_file, 60.0)
+        exporter.start()
+        exporter.stop()
+
+        # A snapshot is written on shutdown
+        with open(snapshot_file) as f:
+            snapshot = json.load(f)
+        assert "exporter_test_counter" in snapshot["pools"]
+        assert not os.path.exists(snapshot_file + ".tmp")
+
+    def test_shared_exporter(self, pools, tmp_path, monkeypatch):
+        snapshot_file = os.path.join(tmp_path, "metrics_{fqcn}.json")
+        monkeypatch.setattr(CommConfigurator, "get_metrics_port", lambda self: 0)
+        monkeypatch.setattr(CommConfigurator, "get_metrics_snapshot_file", lambda self: snapshot_file)
+        first = start_metrics_exporter("server")
+        second = start_metrics_exporter("server.job")
+        assert first is second
+
+        # The exporter keeps running until the last cell using it stops
+        stop_metrics_exporter(first)
+        assert not first.stopped.is_set()
+        stop_metrics_exporter(second)
+        assert first.stopped.is_set()
+        assert os.path.exists(os.path.join(tmp_path, "metrics_server.json"))
+
+        third = start_metrics_exporter("server")
+        assert third is not first
+        stop_metrics_exporter(third)
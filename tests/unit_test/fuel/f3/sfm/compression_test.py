@@ -0,0 +1,150 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import queue
+import time
+
+import pytest
+
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.communicator import Communicator
+from nvflare.fuel.f3.connection import Connection
+from nvflare.fuel.f3.drivers.connector_info import Mode
+from nvflare.fuel.f3.endpoint import Endpoint
+from nvflare.fuel.f3.message import Message, MessageReceiver
+from nvflare.fuel.f3.sfm.compression import (
+    SAMPLE_SIZE,
+    PayloadCompressor,
+    ZlibCodec,
+    _codecs,
+    available_codecs,
+    decompress,
+    negotiate_codec,
+)
+from nvflare.fuel.f3.sfm.constants import Flags
+
+APP_ID = 123
+NODE_A = "Compress A"
+NODE_B = "Compress B"
+CHUNK_SIZE = 1000
+
+JSON_PAYLOAD = json.dumps([{"split": i, "feature": i % 7, "gain": 0.5} for i in range(2000)]).encode()
+
+
+class Receiver(MessageReceiver):
+    def __init__(self):
+        self.messages = queue.Queue()
+
+    def process_message(self, endpoint: Endpoint, connection: Connection, app_id: int, message: Message):
+        self.messages.put(message)
+
+
+class TestCompression:
+    def test_negotiate(self):
+        assert "zlib" in available_codecs()
+        assert negotiate_codec(["zlib"], ["zstd", "zlib"]).name == "zlib"
+        assert negotiate_codec(["zlib"], ["zstd"]) is None
+        assert negotiate_codec(["zlib"], None) is None
+
+    def test_compress(self):
+        codec = ZlibCodec()
+        compressor = PayloadCompressor(["zlib"], threshold=100, adaptive=False, max_ratio=0.9)
+        assert not compressor.should_compress(codec, b"x" * 99)
+
+        assert compressor.should_compress(codec, JSON_PAYLOAD)
+        compressed = compressor.compress(codec, JSON_PAYLOAD)
+        assert len(compressed) < len(JSON_PAYLOAD)
+        assert decompress(codec.codec_id, compressed, len(JSON_PAYLOAD)) == JSON_PAYLOAD
+
+        with pytest.raises(CommError):
+            decompress(99, compressed, len(JSON_PAYLOAD))
+
+    @pytest.mark.parametrize("codec_name", available_codecs())
+    def test_decompress_limit(self, codec_name):
+        codec = next(c for c in _codecs if c.name == codec_name)
+        compressed = codec.compress(b"\0" * 1024 * 1024)
+        assert len(decompress(codec.codec_id, compressed, 1024 * 1024)) == 1024 * 1024
+
+        # Small input expanding beyond the limit is rejected without decompressing all of it
+        with pytest.raises(CommError):
+            decompress(codec.codec_id, compressed, 1024 * 1024 - 1)
+
+        with pytest.raises(CommError):
+            decompress(codec.codec_id, compressed[: len(compressed) // 2], 1024 * 1024)
+
+    def test_adaptive(self):
+        codec = ZlibCodec()
+        compressor = PayloadCompressor(["zlib"], threshold=100, adaptive=True, max_ratio=0.9)
+
+        # Random data, like quantized weights, doesn't compress
+        assert compressor.compress(codec, os.urandom(1000)) is None
+        assert not compressor.should_compress(codec, os.urandom(SAMPLE_SIZE * 5))
+        assert compressor.should_compress(codec, JSON_PAYLOAD * 50)
+        assert compressor.compress(codec, JSON_PAYLOAD * 50) is not None
+
+    def test_unknown_codec(self):
+        compressor = PayloadCompressor(["zlib", "unknown"], threshold=100, adaptive=True, max_ratio=0.9)
+        assert compressor.codecs == ["zlib"]
+
+    @pytest.mark.parametrize("scheme, port_range", [("tcp", "6000-7000"), ("atcp", "7000-8000")])
+    @pytest.mark.parametrize("compression_b", [True, False])
+    def test_compressed_messages(self, scheme, port_range, compression_b):
+        comm_a = Communicator(Endpoint(NODE_A))
+        comm_b = Communicator(Endpoint(NODE_B))
+        comm_a.conn_manager.stream_chunk_size = CHUNK_SIZE
+        comm_b.conn_manager.stream_chunk_size = CHUNK_SIZE
+        # Compression is opt-in
+        assert comm_a.conn_manager.compressor is None
+        comm_a.conn_manager.compressor = PayloadCompressor(["zlib"], threshold=100, adaptive=True, max_ratio=0.9)
+        if compression_b:
+            comm_b.conn_manager.compressor = PayloadCompressor(["zlib"], threshold=100, adaptive=True, max_ratio=0.9)
+
+        receiver = Receiver()
+        comm_b.register_message_receiver(APP_ID, receiver)
+
+        _, url = comm_a.start_listener(scheme, {"ports": port_range})
+        comm_a.start()
+        comm_b.add_connector(url, Mode.ACTIVE)
+        comm_b.start()
+
+        try:
+            start = time.time()
+            while not comm_a.conn_manager.get_connections(NODE_B) and time.time() - start < 10:
+                time.sleep(0.1)
+
+            sfm_conn = comm_a.conn_manager.get_connections(NODE_B)[0]
+            assert (sfm_conn.codec is not None) == compression_b
+
+            flags = []
+            send_frame = sfm_conn.send_frame
+
+            def spy(prefix, headers, payload):
+                flags.append(prefix.flags & Flags.COMPRESSED)
+                send_frame(prefix, headers, payload)
+
+            sfm_conn.send_frame = spy
+
+            # Small, compressed below the stream chunk size and streamed
+            for payload in (b"small", JSON_PAYLOAD[:3000], JSON_PAYLOAD):
+                comm_a.send(Endpoint(NODE_B), APP_ID, Message({"key": "value"}, payload))
+                message = receiver.messages.get(timeout=10)
+                assert message.headers == {"key": "value"}
+                assert message.payload == payload
+                # Each chunk of a stream is compressed separately
+                assert all(bool(f) == (compression_b and payload != b"small") for f in flags)
+                flags.clear()
+        finally:
+            comm_b.stop()
+            comm_a.stop()
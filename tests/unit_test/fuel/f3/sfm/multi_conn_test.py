@@ -0,0 +1,179 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import queue
+import time
+
+import pytest
+
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.communicator import Communicator
+from nvflare.fuel.f3.connection import Connection
+from nvflare.fuel.f3.drivers.connector_info import Mode
+from nvflare.fuel.f3.endpoint import Endpoint
+from nvflare.fuel.f3.message import Message, MessageReceiver
+from nvflare.fuel.f3.sfm.sfm_endpoint import MAX_CONN_PER_ENDPOINT, SfmEndpoint
+
+APP_ID = 123
+NODE_A = "Multi A"
+NODE_B = "Multi B"
+NUM_CONNS = 3
+BULK_THRESHOLD = 100
+
+
+class FakeConn:
+    def __init__(self, name):
+        self.name = name
+        self.conn = self
+        self.closed = False
+
+    def get_name(self):
+        return self.name
+
+    def close(self):
+        self.closed = True
+
+
+class Receiver(MessageReceiver):
+    def __init__(self):
+        self.messages = queue.Queue()
+
+    def process_message(self, endpoint: Endpoint, connection: Connection, app_id: int, message: Message):
+        self.messages.put((connection.name, message))
+
+
+def _wait_for_connections(comm: Communicator, name: str, count: int):
+    start = time.time()
+    while time.time() - start < 10:
+        connections = comm.conn_manager.get_connections(name)
+        if connections and len(connections) == count:
+            return connections
+        time.sleep(0.1)
+    raise TimeoutError(f"Endpoint {name} doesn't have {count} connections")
+
+
+class TestMultiConnections:
+    def test_routing(self):
+        sfm_endpoint = SfmEndpoint(Endpoint(NODE_A), max_connections=NUM_CONNS, bulk_threshold=BULK_THRESHOLD)
+        assert sfm_endpoint.get_connection(1, 10) is None
+
+        conns = [FakeConn(f"conn{i}") for i in range(NUM_CONNS)]
+        for conn in conns:
+            sfm_endpoint.add_connection(conn)
+
+        assert sfm_endpoint.get_connection(1, BULK_THRESHOLD) is conns[0]
+        bulk = {sfm_endpoint.get_connection(i, BULK_THRESHOLD + 1) for i in range(10)}
+        assert bulk == set(conns[1:])
+        assert sfm_endpoint.get_failover_connection([conns[0]]) is conns[1]
+        assert sfm_endpoint.get_failover_connection(conns) is None
+
+    def test_eviction(self):
+        sfm_endpoint = SfmEndpoint(Endpoint(NODE_A), max_connections=2)
+        conns = [FakeConn(f"conn{i}") for i in range(3)]
+        for conn in conns:
+            sfm_endpoint.add_connection(conn)
+
+        assert sfm_endpoint.connections == conns[1:]
+        assert conns[0].closed
+
+        sfm_endpoint.set_max_connections(MAX_CONN_PER_ENDPOINT + 1)
+        assert sfm_endpoint.max_connections == MAX_CONN_PER_ENDPOINT
+
+    @pytest.mark.parametrize("scheme, port_range", [("tcp", "6000-7000"), ("atcp", "7000-8000")])
+    def test_priority_and_failover(self, scheme, port_range):
+        comm_a = Communicator(Endpoint(NODE_A))
+        comm_b = Communicator(Endpoint(NODE_B))
+        # Only the active side is configured, the passive side accepts as many connections as announced
+        comm_b.conn_manager.connections_per_endpoint = NUM_CONNS
+        comm_b.conn_manager.bulk_threshold = BULK_THRESHOLD
+
+        receiver = Receiver()
+        comm_a.register_message_receiver(APP_ID, receiver)
+
+        _, url = comm_a.start_listener(scheme, {"ports": port_range})
+        comm_a.start()
+        comm_b.add_connector(url, Mode.ACTIVE)
+        comm_b.start()
+
+        try:
+            _wait_for_connections(comm_a, NODE_B, NUM_CONNS)
+            connections = _wait_for_connections(comm_b, NODE_A, NUM_CONNS)
+
+            # Connection names are local to each side, the receiving connections are compared
+            priority_names = set()
+            for _ in range(3):
+                comm_b.send(Endpoint(NODE_A), APP_ID, Message({}, b"small"))
+                conn_name, message = receiver.messages.get(timeout=10)
+                assert message.payload == b"small"
+                priority_names.add(conn_name)
+            assert len(priority_names) == 1
+
+            bulk_names = set()
+            for _ in range(4):
+                comm_b.send(Endpoint(NODE_A), APP_ID, Message({}, b"x" * (BULK_THRESHOLD + 1)))
+                conn_name, _ = receiver.messages.get(timeout=10)
+                bulk_names.add(conn_name)
+            assert len(bulk_names) == NUM_CONNS - 1
+            assert not bulk_names & priority_names
+
+            def fail(*args, **kwargs):
+                raise CommError(CommError.ERROR, "send failed")
+
+            connections[0].send_data = fail
+            comm_b.send(Endpoint(NODE_A), APP_ID, Message({}, b"small"))
+            conn_name, message = receiver.messages.get(timeout=10)
+            assert conn_name in bulk_names
+            assert message.payload == b"small"
+        finally:
+            comm_b.stop()
+            comm_a.stop()
+
+    def test_async_send_error(self):
+        comm_a = Communicator(Endpoint(NODE_A))
+        comm_b = Communicator(Endpoint(NODE_B))
+        comm_b.conn_manager.connections_per_endpoint = 2
+
+        receiver = Receiver()
+        comm_a.register_message_receiver(APP_ID, receiver)
+
+        _, url = comm_a.start_listener("atcp", {"ports": "8000-9000"})
+        comm_a.start()
+        comm_b.add_connector(url, Mode.ACTIVE)
+        comm_b.start()
+
+        try:
+            _wait_for_connections(comm_a, NODE_B, 2)
+            connections = _wait_for_connections(comm_b, NODE_A, 2)
+            aio_conn = connections[0].conn
+
+            def fail(*args, **kwargs):
+                raise ConnectionResetError("connection reset")
+
+            # The write fails in the event loop after send returns, the connection is closed
+            aio_conn.writer.writelines = fail
+            comm_b.send(Endpoint(NODE_A), APP_ID, Message({}, b"small"))
+            start = time.time()
+            while not aio_conn.closing and time.time() - start < 10:
+                time.sleep(0.1)
+            assert aio_conn.closing
+
+            with pytest.raises(CommError) as e:
+                aio_conn.send_frame(b"frame")
+            assert e.value.code == CommError.CLOSED
+
+            comm_b.send(Endpoint(NODE_A), APP_ID, Message({}, b"small"))
+            _, message = receiver.messages.get(timeout=10)
+            assert message.payload == b"small"
+        finally:
+            comm_b.stop()
+            comm_a.stop()
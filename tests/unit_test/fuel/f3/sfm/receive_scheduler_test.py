@@ -0,0 +1,123 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+
+import pytest
+
+from nvflare.fuel.f3.sfm.receive_scheduler import ReceiveScheduler
+from nvflare.fuel.utils.stats_utils import new_time_pool
+
+
+class TestReceiveScheduler:
+    def test_serial_order(self):
+        scheduler = ReceiveScheduler(4, 100, 1, 1.0)
+        results = {"a": [], "b": []}
+        for i in range(50):
+            for key in results:
+                scheduler.submit(key, "test", results[key].append, i)
+        for key in results:
+            scheduler.remove(key)
+        scheduler.shutdown(True)
+
+        assert results["a"] == list(range(50))
+        assert results["b"] == list(range(50))
+        assert not scheduler.queues
+
+    def test_workers_per_queue(self):
+        scheduler = ReceiveScheduler(8, 100, 2, 1.0)
+        release = threading.Event()
+        lock = threading.Lock()
+        running = {"busy": 0, "max": 0}
+        other_done = threading.Event()
+
+        def slow():
+            with lock:
+                running["busy"] += 1
+                running["max"] = max(running["max"], running["busy"])
+            release.wait(5)
+            with lock:
+                running["busy"] -= 1
+
+        for _ in range(6):
+            scheduler.submit("busy", "test", slow)
+
+        # The busy peer can't block the other queues
+        scheduler.submit("other", "test", other_done.set)
+        assert other_done.wait(5)
+        deadline = time.time() + 5
+        while running["max"] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert running["max"] == 2
+
+        release.set()
+        scheduler.shutdown(True)
+        assert running["busy"] == 0
+
+    def test_backpressure(self):
+        wait_stats = new_time_pool("wait")
+        scheduler = ReceiveScheduler(1, 2, 1, 0.2, wait_stats)
+        release = threading.Event()
+        scheduler.submit("a", "test", release.wait, 5)
+        time.sleep(0.1)
+        scheduler.submit("a", "test", time.sleep, 0)
+        scheduler.submit("a", "test", time.sleep, 0)
+        assert scheduler.get_depth("a") == 2
+        assert scheduler.is_full("a")
+
+        # The submitter is blocked past the timeout, the task is queued once there is room
+        done = threading.Event()
+        threading.Timer(0.5, release.set).start()
+        start = time.time()
+        scheduler.submit("a", "test", done.set)
+        assert time.time() - start >= 0.4
+        assert done.wait(5)
+
+        scheduler.shutdown(True)
+        assert wait_stats.cat_bins["test"]
+
+    def test_run_now(self):
+        scheduler = ReceiveScheduler(2, 1, 1, 1.0)
+        release = threading.Event()
+        scheduler.submit("a", "test", release.wait, 5)
+        time.sleep(0.1)
+        scheduler.submit("a", "test", time.sleep, 0)
+
+        # Not queued behind the blocked task of the key
+        done = threading.Event()
+        scheduler.run_now("test", done.set)
+        assert done.wait(5)
+
+        release.set()
+        scheduler.shutdown(True)
+
+    def test_remove_releases_submitter(self):
+        scheduler = ReceiveScheduler(1, 1, 1, 10.0)
+        release = threading.Event()
+        scheduler.submit("a", "test", release.wait, 5)
+        time.sleep(0.1)
+        scheduler.submit("a", "test", time.sleep, 0)
+
+        threading.Timer(0.2, scheduler.remove, ("a",)).start()
+        start = time.time()
+        scheduler.submit("a", "test", time.sleep, 0)
+        assert time.time() - start < 5
+
+        release.set()
+        scheduler.shutdown(True)
+        assert not scheduler.queues
+
+    def test_invalid_args(self):
+        with pytest.raises(ValueError):
+            ReceiveScheduler(0, 1, 1, 1.0)
@@ -0,0 +1,222 @@
+# Copyright (c) 2021-2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from nvflare.fuel.f3.comm_error import CommError
+from nvflare.fuel.f3.communicator import Communicator
+from nvflare.fuel.f3.connection import Connection, FrameReceiver
+from nvflare.fuel.f3.drivers.connector_info import Mode
+from nvflare.fuel.f3.endpoint import Endpoint, EndpointMonitor, EndpointState
+from nvflare.fuel.f3.message import Message, MessageReceiver
+from nvflare.fuel.f3.sfm.constants import Types
+from nvflare.fuel.f3.sfm.prefix import Prefix
+from nvflare.fuel.f3.sfm.sfm_conn import SfmConnection
+from nvflare.fuel.f3.sfm.stream import StreamAssembler
+
+APP_ID = 123
+NODE_A = "Stream A"
+NODE_B = "Stream B"
+CHUNK_SIZE = 1000
+
+
+class Monitor(EndpointMonitor):
+    def __init__(self):
+        self.ready = threading.Event()
+
+    def state_change(self, endpoint: Endpoint):
+        if endpoint.state == EndpointState.READY:
+            self.ready.set()
+
+
+class Receiver(MessageReceiver):
+    def __init__(self):
+        self.message = None
+        self.received = threading.Event()
+
+    def process_message(self, endpoint: Endpoint, connection: Connection, app_id: int, message: Message):
+        self.message = message
+        self.received.set()
+
+
+class BlockingConnection(Connection):
+    """Connection with the data frames blocked until unblocked, like a full socket or a full send queue"""
+
+    def __init__(self, congested: bool = False):
+        super().__init__(None)
+        self.congested = congested
+        self.unblocked = threading.Event()
+        self.frames = []
+
+    def get_conn_properties(self) -> dict:
+        return {}
+
+    def close(self):
+        pass
+
+    def reserve_send(self, size: int):
+        if self.congested:
+            self.unblocked.wait(10)
+
+    def send_frame(self, frame):
+        self.unblocked.wait(10)
+        self.frames.append(Prefix.from_bytes(frame).type)
+
+    def send_control_frame(self, frame):
+        self.frames.append(Prefix.from_bytes(frame).type)
+
+
+class TestStream:
+    def test_assembler(self):
+        assembler = StreamAssembler(1, {"a": 1}, 10, 100)
+        assembler.add_fragment(b"01234")
+        assert not assembler.is_complete()
+        assembler.add_fragment(memoryview(b"56789"))
+        assert assembler.is_complete()
+        assert assembler.buffer == b"0123456789"
+
+        with pytest.raises(CommError):
+            assembler.add_fragment(b"x")
+
+    def test_assembler_size(self):
+        with pytest.raises(CommError):
+            StreamAssembler(1, None, 101, 100)
+
+        # The announced size is not allocated before the data arrives
+        assembler = StreamAssembler(1, None, 2 * 1024 * 1024 * 1024, 4 * 1024 * 1024 * 1024)
+        assembler.add_fragment(b"0123")
+        assert len(assembler.buffer) == 4
+
+    def test_pause_while_busy(self):
+        class BusyReceiver(FrameReceiver):
+            def __init__(self):
+                self.checks = 0
+
+            def process_frame(self, frame):
+                pass
+
+            def is_busy(self) -> bool:
+                self.checks += 1
+                return self.checks < 3
+
+        conn = BlockingConnection()
+        receiver = BusyReceiver()
+        conn.register_frame_receiver(receiver)
+        asyncio.run(conn.pause_while_busy())
+        assert receiver.checks == 3
+
+    def test_ack_not_blocked_by_budget(self):
+        conn = BlockingConnection(congested=True)
+        sfm_conn = SfmConnection(conn, Endpoint(NODE_A))
+        sender = threading.Thread(target=sfm_conn.send_data, args=(APP_ID, 1, None, b"data"), daemon=True)
+        sender.start()
+        time.sleep(0.1)
+
+        # The sender waiting for the budget doesn't hold the connection
+        assert not sfm_conn.send_lock.locked()
+        sfm_conn.send_ack(2)
+        assert conn.frames == [Types.ACK]
+        conn.unblocked.set()
+        sender.join(10)
+        assert conn.frames == [Types.ACK, Types.DATA]
+
+    def test_ack_not_blocked(self):
+        conn = BlockingConnection()
+        sfm_conn = SfmConnection(conn, Endpoint(NODE_A))
+        sender = threading.Thread(target=sfm_conn.send_data, args=(APP_ID, 1, None, b"data"), daemon=True)
+        sender.start()
+        while not sfm_conn.send_lock.locked():
+            pass
+
+        # The ACK is queued while the connection is busy and sent after the data frame
+        sfm_conn.send_ack(2)
+        assert not conn.frames
+        conn.unblocked.set()
+        sender.join(10)
+        assert conn.frames == [Types.DATA, Types.ACK]
+
+        sfm_conn.send_ack(3)
+        assert conn.frames == [Types.DATA, Types.ACK, Types.ACK]
+
+    @pytest.mark.parametrize("scheme, port_range", [("tcp", "6000-7000"), ("atcp", "7000-8000")])
+    def test_stream_message(self, scheme, port_range):
+        comm_a = Communicator(Endpoint(NODE_A))
+        comm_b = Communicator(Endpoint(NODE_B))
+        for comm in (comm_a, comm_b):
+            comm.conn_manager.stream_chunk_size = CHUNK_SIZE
+            comm.conn_manager.stream_window = 2
+
+        monitor = Monitor()
+        comm_b.register_monitor(monitor)
+        receiver = Receiver()
+        comm_a.register_message_receiver(APP_ID, receiver)
+
+        _, url = comm_a.start_listener(scheme, {"ports": port_range})
+        comm_a.start()
+        comm_b.add_connector(url, Mode.ACTIVE)
+        comm_b.start()
+
+        try:
+            assert monitor.ready.wait(10)
+
+            payload = os.urandom(CHUNK_SIZE * 10 + 123)
+            comm_b.send(Endpoint(NODE_A), APP_ID, Message({"key": "value"}, payload))
+
+            assert receiver.received.wait(10)
+            assert receiver.message.headers == {"key": "value"}
+            assert receiver.message.payload == payload
+        finally:
+            comm_b.stop()
+            comm_a.stop()
+
+    def test_reply_not_queued(self):
+        class RequestReceiver(MessageReceiver):
+            def __init__(self):
+                self.replied = threading.Event()
+                self.request_done = threading.Event()
+
+            def process_message(self, endpoint: Endpoint, connection: Connection, app_id: int, message: Message):
+                if message.headers.get("type") == "reply":
+                    self.replied.set()
+                elif self.replied.wait(10):
+                    # The request callback waits for a reply on the same connection
+                    self.request_done.set()
+
+            def is_reply(self, headers: dict) -> bool:
+                return headers.get("type") == "reply"
+
+        comm_a = Communicator(Endpoint(NODE_A))
+        comm_b = Communicator(Endpoint(NODE_B))
+        monitor = Monitor()
+        comm_b.register_monitor(monitor)
+        receiver = RequestReceiver()
+        comm_a.register_message_receiver(APP_ID, receiver)
+
+        _, url = comm_a.start_listener("tcp", {"ports": "8000-9000"})
+        comm_a.start()
+        comm_b.add_connector(url, Mode.ACTIVE)
+        comm_b.start()
+
+        try:
+            assert monitor.ready.wait(10)
+            comm_b.send(Endpoint(NODE_A), APP_ID, Message({"type": "request"}, b"request"))
+            comm_b.send(Endpoint(NODE_A), APP_ID, Message({"type": "reply"}, b"reply"))
+            assert receiver.request_done.wait(5)
+        finally:
+            comm_b.stop()
+            comm_a.stop()
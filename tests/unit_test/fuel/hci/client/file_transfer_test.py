@@ -0,0 +1,94 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import os
+import zipfile
+
+import pytest
+
+import nvflare.fuel.hci.file_transfer_defs as ftd
+from nvflare.fuel.hci.base64_utils import b64str_to_bytes
+from nvflare.fuel.hci.client.api_spec import ApiPocValue, CommandContext
+from nvflare.fuel.hci.client.api_status import APIStatus
+from nvflare.fuel.hci.client.file_transfer import FileTransferModule
+from nvflare.fuel.hci.reg import CommandEntry
+
+
+class _Scope:
+    name = "job_mgmt"
+
+
+class _Api:
+    def __init__(self, chunked_transfer: bool, chunk_size: int = None):
+        self.poc_key = ApiPocValue.ADMIN
+        self.binary_frames = False
+        self.chunked_transfer = chunked_transfer
+        self.chunk_size = chunk_size
+        self.commands = []
+
+    def server_execute(self, command, reply_processor=None, attachments=None):
+        self.commands.append(command)
+        if reply_processor and self.chunk_size is not None:
+            ctx = CommandContext()
+            if len(command.split()) == 3:
+                reply_processor.process_string(ctx, f"{ftd.TRANSFER_MARKER}t1:100")
+            else:
+                reply_processor.process_binary(ctx, b"x" * self.chunk_size)
+        return {"status": APIStatus.SUCCESS}
+
+
+def _context(api, args):
+    ctx = CommandContext()
+    ctx.set_api(api)
+    ctx.set_command_entry(
+        CommandEntry(_Scope(), "submit_job", "", "submit_job job_folder", None, None, True, None, None)
+    )
+    ctx.set_command_args(args)
+    return ctx
+
+
+@pytest.fixture
+def module(tmp_path):
+    upload_dir = tmp_path / "upload"
+    os.makedirs(upload_dir / "job")
+    (upload_dir / "job" / "meta.json").write_text("{}")
+    download_dir = tmp_path / "download"
+    os.makedirs(download_dir)
+    return FileTransferModule(str(upload_dir), str(download_dir))
+
+
+class TestFileTransferModule:
+    def test_upload_inline(self, module):
+        # Older servers don't support chunked transfers
+        api = _Api(chunked_transfer=False)
+        args = ["submit_job", "job"]
+        assert module.upload_folder(args, _context(api, args))["status"] == APIStatus.SUCCESS
+        assert len(api.commands) == 1
+        cmd, folder, data = api.commands[0].split()
+        assert folder == "job"
+        assert "job/meta.json" in zipfile.ZipFile(io.BytesIO(b64str_to_bytes(data))).namelist()
+
+    def test_upload_chunked(self, module):
+        api = _Api(chunked_transfer=True)
+        args = ["submit_job", "job"]
+        assert module.upload_folder(args, _context(api, args))["status"] == APIStatus.SUCCESS
+        assert api.commands[0].split()[2].startswith(ftd.TRANSFER_MARKER)
+        assert len(api.commands[-1].split()) == 3
+
+    def test_download_empty_chunk(self, module):
+        api = _Api(chunked_transfer=True, chunk_size=0)
+        args = ["download_job", "j1"]
+        result = module.download_folder(args, _context(api, args))
+        assert result["status"] == APIStatus.ERROR_PROTOCOL
+        assert len(api.commands) == 2
@@ -0,0 +1,126 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import socket
+import struct
+import threading
+import tracemalloc
+
+import pytest
+
+from nvflare.fuel.hci.base64_utils import b64str_to_bytes
+from nvflare.fuel.hci.conn import FRAME_MAGIC, MAX_FRAME_SIZE, Connection, receive_and_process, receive_request
+from nvflare.fuel.hci.proto import ProtoKey
+
+
+def _send(sock, framed, build_func):
+    def _run():
+        conn = Connection(sock, None, framed=framed)
+        build_func(conn)
+        conn.close()
+
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    return t
+
+
+def _items(docs):
+    return [item for doc in docs for item in doc[ProtoKey.DATA]]
+
+
+@pytest.fixture
+def socks():
+    a, b = socket.socketpair()
+    yield a, b
+    a.close()
+    b.close()
+
+
+class TestConnection:
+    @pytest.mark.parametrize("framed", [True, False])
+    def test_send_receive(self, socks, framed):
+        data = os.urandom(3 * 1024 * 1024)
+
+        def _build(conn):
+            conn.append_string("héllo")
+            table = conn.append_table(["name", "size"])
+            table.add_row(["a", "1"])
+            conn.flush()
+            conn.append_binary(data, meta={"status": "ok"})
+            conn.append_binary(b"")
+
+        t = _send(socks[0], framed, _build)
+        docs = []
+        assert receive_and_process(socks[1], docs.append)
+        t.join()
+
+        assert len(docs) == 2
+        items = _items(docs)
+        assert items[0] == {ProtoKey.TYPE: ProtoKey.STRING, ProtoKey.DATA: "héllo"}
+        assert items[1][ProtoKey.ROWS] == [["NAME", "SIZE"], ["a", "1"]]
+        assert docs[1][ProtoKey.META] == {"status": "ok"}
+        if framed:
+            assert [i[ProtoKey.TYPE] for i in items[2:]] == [ProtoKey.BINARY, ProtoKey.BINARY]
+            assert items[2][ProtoKey.DATA] == data
+            assert items[3][ProtoKey.DATA] == b""
+        else:
+            # Binary data is base64-encoded in the ASCII format
+            assert [i[ProtoKey.TYPE] for i in items[2:]] == [ProtoKey.STRING, ProtoKey.STRING]
+            assert b64str_to_bytes(items[2][ProtoKey.DATA]) == data
+
+    @pytest.mark.parametrize("framed", [True, False])
+    def test_receive_request(self, socks, framed):
+        def _build(conn):
+            conn.append_command("submit_job a", meta={"capabilities": ["binary_frames"]})
+            conn.append_token("t1")
+            conn.append_binary(b"\x00\x01\x02")
+
+        t = _send(socks[0], framed, _build)
+        request, request_framed = receive_request(socks[1])
+        t.join()
+
+        assert request_framed == framed
+        assert request[ProtoKey.META] == {"capabilities": ["binary_frames"]}
+        items = request[ProtoKey.DATA]
+        assert items[0] == {ProtoKey.TYPE: ProtoKey.COMMAND, ProtoKey.DATA: "submit_job a"}
+        assert items[1] == {ProtoKey.TYPE: ProtoKey.TOKEN, ProtoKey.DATA: "t1"}
+        if framed:
+            assert items[2] == {ProtoKey.TYPE: ProtoKey.BINARY, ProtoKey.DATA: b"\x00\x01\x02"}
+
+    def test_incomplete_frames(self, socks):
+        # Binary item without its attachment
+        doc = b'{"data": [{"type": "binary"}]}'
+        socks[0].sendall(FRAME_MAGIC + struct.pack(">BI", 1, len(doc)) + doc)
+        socks[0].shutdown(socket.SHUT_WR)
+        assert not receive_and_process(socks[1], lambda x: None)
+
+    def test_bad_magic(self, socks):
+        socks[0].sendall(b"\x00XYZ\x03\x00\x00\x00\x00")
+        socks[0].shutdown(socket.SHUT_WR)
+        request, framed = receive_request(socks[1])
+        assert request is None
+        assert framed
+
+    def test_declared_size_not_allocated(self, socks):
+        # The peer declares the max frame size but closes after a few bytes
+        socks[0].sendall(FRAME_MAGIC + struct.pack(">BI", 1, MAX_FRAME_SIZE) + b"{}")
+        socks[0].shutdown(socket.SHUT_WR)
+        tracemalloc.start()
+        try:
+            request, _ = receive_request(socks[1])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert request is None
+        assert peak < 16 * 1024 * 1024
@@ -0,0 +1,88 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import tempfile
+import time
+
+from nvflare.fuel.hci.base64_utils import b64str_to_bytes, bytes_to_b64str
+from nvflare.fuel.hci.conn import Connection
+from nvflare.fuel.hci.proto import ProtoKey
+from nvflare.fuel.hci.server.file_transfer import (
+    TransferCleaner,
+    get_transfer_file,
+    new_transfer_id,
+    receive_chunk,
+    send_chunk,
+)
+
+
+def _reply(conn: Connection):
+    item = conn.buffer.data[-1]
+    return item[ProtoKey.TYPE], item[ProtoKey.DATA]
+
+
+class TestChunkedTransfer:
+    def test_transfer_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            assert get_transfer_file(tmp_dir, "../../etc/passwd") is None
+            file_path = get_transfer_file(tmp_dir, new_transfer_id())
+            assert os.path.dirname(os.path.dirname(file_path)) == tmp_dir
+
+    def test_upload_download(self):
+        data = os.urandom(2500)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = get_transfer_file(tmp_dir, new_transfer_id())
+            conn = Connection(None, None)
+            for offset in range(0, len(data), 1000):
+                assert receive_chunk(conn, file_path, str(offset), bytes_to_b64str(data[offset : offset + 1000]))
+
+            # Chunks out of order are rejected and end the transfer
+            other_path = get_transfer_file(tmp_dir, new_transfer_id())
+            assert receive_chunk(conn, other_path, "0", data[:1000])
+            assert not receive_chunk(conn, other_path, "10", data[:10])
+            assert _reply(conn)[0] == ProtoKey.ERROR
+            assert not os.path.exists(other_path)
+
+            received = b""
+            while len(received) < len(data):
+                assert send_chunk(conn, file_path, str(len(received)), chunk_size=1000)
+                item_type, b64str = _reply(conn)
+                assert item_type == ProtoKey.STRING
+                received += b64str_to_bytes(b64str)
+            assert received == data
+
+            # The file is removed after the last chunk
+            assert not os.path.exists(file_path)
+            assert not send_chunk(conn, file_path, "0")
+
+    def test_cleaner(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            idle_path = get_transfer_file(tmp_dir, new_transfer_id())
+            active_path = get_transfer_file(tmp_dir, new_transfer_id())
+            for path in (idle_path, active_path):
+                with open(path, "wb") as f:
+                    f.write(b"x" * 10)
+            old = time.time() - 120.0
+            os.utime(idle_path, (old, old))
+
+            cleaner = TransferCleaner([tmp_dir], check_interval=0.05, idle_timeout=60.0)
+            cleaner.start()
+            try:
+                deadline = time.time() + 5.0
+                while os.path.exists(idle_path) and time.time() < deadline:
+                    time.sleep(0.05)
+                assert not os.path.exists(idle_path)
+                assert os.path.exists(active_path)
+            finally:
+                cleaner.stop()
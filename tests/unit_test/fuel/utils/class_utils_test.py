@@ -0,0 +1,67 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import pytest
+
+from nvflare.fuel.utils.class_utils import CLASS_INDEX_DIR_VAR, ModuleScanner
+from nvflare.fuel.utils.config_service import ConfigService
+
+BASE_PKGS = ["nvflare"]
+MODULE_NAMES = ["apis"]
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(ConfigService._var_values, CLASS_INDEX_DIR_VAR, str(tmp_path))
+    monkeypatch.setattr(ModuleScanner, "_class_tables", {})
+    return tmp_path
+
+
+def _scan_not_expected(self):
+    raise AssertionError("modules are scanned")
+
+
+class TestModuleScanner:
+    def test_index(self, index_dir, monkeypatch):
+        scanner = ModuleScanner(BASE_PKGS, MODULE_NAMES)
+        assert scanner.get_module_name("FLContext") == "nvflare.apis.fl_context"
+        assert len(os.listdir(index_dir)) == 1
+
+        # Same process
+        monkeypatch.setattr(ModuleScanner, "_create_classes_table", _scan_not_expected)
+        assert ModuleScanner(BASE_PKGS, MODULE_NAMES)._class_table is scanner._class_table
+
+        # New process
+        monkeypatch.setattr(ModuleScanner, "_class_tables", {})
+        assert ModuleScanner(BASE_PKGS, MODULE_NAMES)._class_table == scanner._class_table
+
+    def test_index_invalidated(self, index_dir, monkeypatch):
+        ModuleScanner(BASE_PKGS, MODULE_NAMES)
+        monkeypatch.setattr(ModuleScanner, "_class_tables", {})
+        monkeypatch.setattr(ModuleScanner, "_get_fingerprint", lambda self: "changed")
+        scanned = []
+        create_classes_table = ModuleScanner._create_classes_table
+        monkeypatch.setattr(
+            ModuleScanner, "_create_classes_table", lambda self: scanned.append(1) or create_classes_table(self)
+        )
+        scanner = ModuleScanner(BASE_PKGS, MODULE_NAMES)
+        assert scanned
+        assert scanner.get_module_name("FLContext") == "nvflare.apis.fl_context"
+
+    def test_index_disabled(self, index_dir, monkeypatch):
+        monkeypatch.setitem(ConfigService._var_values, CLASS_INDEX_DIR_VAR, "")
+        scanner = ModuleScanner(BASE_PKGS, MODULE_NAMES)
+        assert scanner.get_module_name("FLContext") == "nvflare.apis.fl_context"
+        assert not os.listdir(index_dir)
@@ -14,6 +14,7 @@
 
 import queue
 from datetime import datetime
+from io import BytesIO
 from typing import Any
 
 import pytest
@@ -54,6 +55,46 @@ class TestFobs:
             unsupported_class = queue.Queue()
             fobs.dumps(unsupported_class)
 
+    def test_oob_buffers(self):
+        fobs.register(ExampleBufferDecomposer)
+        data = bytearray(b"0123456789")
+        buf = fobs.dumps({"a": ExampleBuffer(data), "b": [ExampleBuffer(b"xyz"), TestFobs.NUMBER]})
+        new_data = fobs.loads(buf)
+        assert bytes(new_data["a"].data) == data
+        assert bytes(new_data["b"][0].data) == b"xyz"
+        assert new_data["b"][1] == TestFobs.NUMBER
+
+        # Buffers are views of the serialized data
+        assert isinstance(new_data["a"].data, memoryview)
+
+    def test_stream(self):
+        stream = BytesIO()
+        fobs.dump(TestFobs.test_data, stream)
+        stream.seek(0)
+        data = fobs.load(stream)
+        assert data["number"] == TestFobs.NUMBER
+        assert data["set"] == TestFobs.test_data["set"]
+
+    def test_oob_stream(self):
+        fobs.register(ExampleBufferDecomposer)
+        stream = BytesIO()
+        fobs.dump([ExampleBuffer(b"abc"), ExampleBuffer(b"0123456789"), TestFobs.NUMBER], stream)
+
+        # The streamed data is identical to the serialized bytes
+        assert stream.getvalue() == fobs.dumps([ExampleBuffer(b"abc"), ExampleBuffer(b"0123456789"), TestFobs.NUMBER])
+
+        stream.seek(0)
+        data = fobs.load(stream)
+        assert bytes(data[0].data) == b"abc"
+        assert bytes(data[1].data) == b"0123456789"
+        assert data[2] == TestFobs.NUMBER
+
+    def test_truncated_stream(self):
+        fobs.register(ExampleBufferDecomposer)
+        data = fobs.dumps(ExampleBuffer(b"0123456789"))
+        with pytest.raises(EOFError):
+            fobs.load(BytesIO(data[:-1]))
+
     def test_decomposers(self):
         test_class = ExampleClass(TestFobs.NUMBER)
         fobs.register(ExampleClassDecomposer)
@@ -76,3 +117,19 @@ class ExampleClassDecomposer(Decomposer):
 
     def recompose(self, data: Any) -> ExampleClass:
         return ExampleClass(data)
+
+
+class ExampleBuffer:
+    def __init__(self, data):
+        self.data = data
+
+
+class ExampleBufferDecomposer(Decomposer):
+    def supported_type(self):
+        return ExampleBuffer
+
+    def decompose(self, target: ExampleBuffer) -> Any:
+        return fobs.OobBuffer(target.data)
+
+    def recompose(self, data: Any) -> ExampleBuffer:
+        return ExampleBuffer(data)
@@ -0,0 +1,124 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+
+import pytest
+
+from nvflare.fuel.utils.stats_utils import _SHARD_PRUNE_INTERVAL, CounterPool, HistPool, StatsMode
+
+
+def _run_threads(fn, num_threads=4):
+    threads = [threading.Thread(target=fn) for _ in range(num_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+class TestHistPool:
+    def test_ranges(self):
+        pool = HistPool("hist", "test", marks=(1, 2, 4), unit="second")
+        for v in (0.5, 1, 1.5, 2, 3.9, 4, 100):
+            pool.record_value("cat", v)
+
+        bins = pool.cat_bins["cat"]
+        assert [b.count for b in bins] == [1, 2, 2, 2]
+        assert bins[3].min == 4
+        assert bins[3].max == 100
+
+        headers, rows = pool.get_table(StatsMode.COUNT)
+        assert headers == ["category", "<1", "1-2", "2-4", ">=4"]
+        assert rows == [["cat", "1", "2", "2", "2"]]
+
+    def test_threads_merged(self):
+        pool = HistPool("hist", "test", marks=(1, 2), unit="second")
+        barrier = threading.Barrier(4)
+
+        def record():
+            barrier.wait()
+            for i in range(1000):
+                pool.record_value("cat", i % 3)
+
+        _run_threads(record)
+        bins = pool.cat_bins["cat"]
+        assert sum(b.count for b in bins) == 4000
+        assert bins[0].total == 0
+        assert bins[2].total == 4 * 333 * 2
+
+        # The shards of the finished threads are folded
+        assert not pool._shards
+        pool.record_value("other", 1.5)
+        assert pool.cat_bins["other"][1].count == 1
+        assert sum(b.count for b in pool.cat_bins["cat"]) == 4000
+
+    def test_dead_shards_pruned(self):
+        pool = HistPool("hist", "test", marks=(1, 2), unit="second")
+        for _ in range(200):
+            _run_threads(lambda: pool.record_value("cat", 1.5), num_threads=1)
+
+        # Folded while recording, the pool is not read
+        assert len(pool._shards) <= _SHARD_PRUNE_INTERVAL
+        assert pool.cat_bins["cat"][1].count == 200
+
+    def test_sampling(self):
+        pool = HistPool("hist", "test", marks=(1, 2), unit="second", sample_interval=10)
+        for _ in range(1000):
+            pool.record_value("cat", 1.5)
+        b = pool.cat_bins["cat"][1]
+        assert b.count == 1000
+        assert b.total == 1500
+
+        with pytest.raises(ValueError):
+            HistPool("hist", "test", marks=(1, 2), unit="second", sample_interval=0)
+
+    def test_dict(self):
+        pool = HistPool("hist", "test", marks=(1, 2), unit="MB")
+        pool.record_value("cat", 0.5)
+        pool.record_value("cat", 5)
+
+        loaded = HistPool.from_dict(pool.to_dict())
+        assert loaded.to_dict() == pool.to_dict()
+        assert loaded.cat_bins["cat"][2].max == 5
+        loaded.record_value("cat", 6)
+        assert loaded.cat_bins["cat"][2].count == 2
+
+
+class TestCounterPool:
+    def test_threads_merged(self):
+        pool = CounterPool("counter", "test", counter_names=["sent"])
+
+        def increment():
+            for i in range(1000):
+                pool.increment("cat", "sent")
+                pool.increment("cat", "failed", amount=2)
+
+        _run_threads(increment)
+        assert pool.cat_counters == {"cat": {"sent": 4000, "failed": 8000}}
+        assert pool.counter_names == ["sent", "failed"]
+
+        headers, rows = pool.get_table()
+        assert headers == ["category", "sent", "failed"]
+        assert rows == [["cat", "4000", "8000"]]
+
+    def test_static_names(self):
+        pool = CounterPool("counter", "test", counter_names=["sent"], dynamic_counter_name=False)
+        with pytest.raises(ValueError):
+            pool.increment("cat", "failed")
+
+    def test_dict(self):
+        pool = CounterPool("counter", "test", counter_names=["sent"])
+        pool.increment("cat", "sent", 3)
+        loaded = CounterPool.from_dict(pool.to_dict())
+        loaded.increment("cat", "sent")
+        assert loaded.cat_counters == {"cat": {"sent": 4}}
@@ -0,0 +1,122 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from nvflare.apis.controller_spec import Task
+from nvflare.apis.shareable import ReservedHeaderKey, Shareable, make_copy
+from nvflare.apis.utils.decomposers import flare_decomposers
+from nvflare.app_common.decomposers import common_decomposers
+from nvflare.fuel.utils import fobs
+from nvflare.private.fed.server.task_payload_cache import MAX_TASK_HEADERS_SIZE, TaskPayloadCache, encode_task_headers
+
+
+def _client_data(task: Task, client_name: str) -> Shareable:
+    data = make_copy(task.data)
+    data.set_header(ReservedHeaderKey.TASK_ID, client_name)
+    data.add_cookie("cookie", client_name)
+    return data
+
+
+class TestTaskPayloadCache:
+    @classmethod
+    def setup_class(cls):
+        flare_decomposers.register()
+        common_decomposers.register()
+
+    def test_shared_payload(self):
+        data = Shareable()
+        data["weights"] = list(range(100))
+        task = Task(name="train", data=data)
+        cache = TaskPayloadCache()
+
+        payload1 = cache.get_payload(task, _client_data(task, "site-1"))
+        payload2 = cache.get_payload(task, _client_data(task, "site-2"))
+        assert payload1 is payload2
+        assert cache.size() == 1
+
+        body = fobs.loads(payload1)
+        assert body["weights"] == data["weights"]
+        assert body.get_header(ReservedHeaderKey.TASK_ID) is None
+
+    def test_headers_round_trip(self):
+        task = Task(name="train", data=Shareable())
+        cache = TaskPayloadCache()
+        client_data = _client_data(task, "site-1")
+
+        payload = cache.get_payload(task, client_data)
+        result = fobs.loads(payload)
+        result[ReservedHeaderKey.HEADERS] = fobs.loads(encode_task_headers(client_data))
+        assert result.get_header(ReservedHeaderKey.TASK_ID) == "site-1"
+        assert result.get_cookie_jar() == {"cookie": "site-1"}
+
+    def test_new_version(self):
+        data = Shareable()
+        data["weights"] = [1, 2, 3]
+        task = Task(name="train", data=data)
+        cache = TaskPayloadCache()
+
+        payload1 = cache.get_payload(task, _client_data(task, "site-1"))
+        data["weights"] = [4, 5, 6]
+        payload2 = cache.get_payload(task, _client_data(task, "site-2"))
+        assert payload1 is not payload2
+        assert fobs.loads(payload2)["weights"] == [4, 5, 6]
+        assert cache.size() == 1
+
+    def test_modified_in_place(self):
+        data = Shareable()
+        data["weights"] = {"layer": np.zeros(10, dtype=np.float32)}
+        task = Task(name="train", data=data)
+        cache = TaskPayloadCache()
+
+        payload1 = cache.get_payload(task, _client_data(task, "site-1"))
+        assert cache.get_payload(task, _client_data(task, "site-2")) is payload1
+
+        # e.g. by a BEFORE_TRAIN_TASK handler
+        data["weights"]["layer"][3] = 1.0
+        task.data_changed()
+        payload2 = cache.get_payload(task, _client_data(task, "site-3"))
+        assert payload2 is not payload1
+        assert fobs.loads(payload2)["weights"]["layer"][3] == 1.0
+
+    def test_data_replaced(self):
+        task = Task(name="train", data=Shareable())
+        cache = TaskPayloadCache()
+        payload1 = cache.get_payload(task, _client_data(task, "site-1"))
+
+        # e.g. by a before_task_sent_cb
+        data = Shareable()
+        data["weights"] = [1, 2, 3]
+        task.data = data
+        payload2 = cache.get_payload(task, _client_data(task, "site-2"))
+        assert payload2 is not payload1
+        assert fobs.loads(payload2)["weights"] == [1, 2, 3]
+
+    def test_evict(self):
+        task1 = Task(name="train", data=Shareable())
+        task2 = Task(name="validate", data=Shareable())
+        cache = TaskPayloadCache()
+        cache.get_payload(task1, _client_data(task1, "site-1"))
+        cache.get_payload(task2, _client_data(task2, "site-1"))
+        assert cache.size() == 2
+
+        cache.evict(task1)
+        assert cache.size() == 1
+        cache.clear()
+        assert cache.size() == 0
+
+    def test_large_headers(self):
+        data = Shareable()
+        data.set_header("big", "x" * MAX_TASK_HEADERS_SIZE)
+        assert encode_task_headers(data) is None
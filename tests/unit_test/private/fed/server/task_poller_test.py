@@ -0,0 +1,141 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+import time
+
+import pytest
+
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey
+from nvflare.fuel.f3.cellnet.utils import new_message
+from nvflare.private.fed.server.task_poller import TaskPoller
+
+
+class _Cell:
+    def __init__(self):
+        self.replies = []
+        self.sent = threading.Event()
+
+    def send_reply(self, reply, to_cell, for_req_ids, optional=False):
+        self.replies.append((reply, to_cell, for_req_ids))
+        self.sent.set()
+        return ""
+
+
+class _Tasks:
+    def __init__(self):
+        self.task = None
+        self.finals = []
+
+    def process(self, request, final):
+        if self.task:
+            return new_message(payload=self.task)
+        if final:
+            self.finals.append(request.get_header(MessageHeaderKey.REQ_ID))
+            return new_message(payload="try_again")
+        return None
+
+
+def _request(origin, req_id):
+    return new_message(
+        headers={
+            MessageHeaderKey.ORIGIN: origin,
+            MessageHeaderKey.REQ_ID: req_id,
+            MessageHeaderKey.CHANNEL: "server_command",
+            MessageHeaderKey.TOPIC: "get_task",
+        }
+    )
+
+
+@pytest.fixture
+def poller():
+    cell = _Cell()
+    tasks = _Tasks()
+    poller = TaskPoller(cell, tasks.process, recheck_interval=30.0)
+    poller.start()
+    yield poller, cell, tasks
+    poller.stop()
+
+
+class TestTaskPoller:
+    def test_notify(self, poller):
+        poller, cell, tasks = poller
+        assert poller.hold(_request("site-1", "r1"), "site-1", 30.0)
+        assert not cell.sent.wait(0.2)
+
+        tasks.task = "train"
+        poller.notify()
+        assert cell.sent.wait(5.0)
+        reply, to_cell, req_ids = cell.replies[0]
+        assert reply.payload == "train"
+        assert to_cell == "site-1"
+        assert req_ids == ["r1"]
+        assert reply.get_header(MessageHeaderKey.TOPIC) == "get_task"
+        assert not poller.held
+
+    def test_deadline(self, poller):
+        poller, cell, tasks = poller
+        start = time.time()
+        assert poller.hold(_request("site-1", "r1"), "site-1", 0.3)
+        assert cell.sent.wait(5.0)
+        assert time.time() - start >= 0.3
+        assert cell.replies[0][0].payload == "try_again"
+        assert tasks.finals == ["r1"]
+
+    def test_replaced(self, poller):
+        poller, cell, tasks = poller
+        assert poller.hold(_request("site-1", "r1"), "site-1", 30.0)
+        assert poller.hold(_request("site-1", "r2"), "site-1", 30.0)
+        assert poller.hold(_request("site-2", "r3"), "site-2", 30.0)
+
+        tasks.task = "train"
+        poller.notify()
+        deadline = time.time() + 5.0
+        while len(cell.replies) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        assert sorted(r[2][0] for r in cell.replies) == ["r2", "r3"]
+
+    def test_not_held(self, poller):
+        poller, cell, tasks = poller
+        assert not poller.hold(new_message(), "site-1", 30.0)
+        assert not poller.hold(_request("site-1", "r1"), "site-1", 0.0)
+        assert not poller.held
+
+    def test_client_clock_ignored(self, poller):
+        poller, cell, tasks = poller
+        # The clock of the client is behind, its wait time is measured on the server
+        request = _request("site-1", "r1")
+        request.set_header(MessageHeaderKey.WAIT_UNTIL, time.time() - 60.0)
+        assert poller.hold(request, "site-1", 30.0)
+        assert not cell.sent.wait(0.2)
+
+    def test_notify_clients(self, poller):
+        poller, cell, tasks = poller
+        assert poller.hold(_request("site-1.job", "r1"), "site-1", 30.0)
+        assert poller.hold(_request("site-2.job", "r2"), "site-2", 30.0)
+
+        processed = []
+        process = tasks.process
+
+        def _process(request, final):
+            processed.append(request.get_header(MessageHeaderKey.REQ_ID))
+            return process(request, final)
+
+        poller.process_cb = _process
+        tasks.task = "train"
+        poller.notify(["site-2"])
+        assert cell.sent.wait(5.0)
+        time.sleep(0.2)
+        assert processed == ["r2"]
+        assert [r[2] for r in cell.replies] == [["r2"]]
+        assert list(poller.held.keys()) == ["site-1.job"]
@@ -0,0 +1,96 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from nvflare.private.fed.utils.process_pool import WarmProcessPool
+
+JOB_MODULE = "warm_pool_job"
+
+# the job writes what it got as a warm process, to the file in its args
+JOB_SOURCE = """
+import json
+import os
+import sys
+
+if __name__ == "__main__":
+    with open(sys.argv[1], "w") as f:
+        json.dump({"argv": sys.argv[1:], "pid": os.getpid(), "env": os.environ.get("JOB_VAR"), "path": sys.path}, f)
+"""
+
+
+def _wait_idle(pool, count):
+    deadline = time.time() + 30.0
+    while time.time() < deadline:
+        with pool.lock:
+            if len(pool.idle) >= count:
+                return list(pool.idle)
+        time.sleep(0.05)
+    raise AssertionError("no idle processes")
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    with open(os.path.join(tmp_path, JOB_MODULE + ".py"), "w") as f:
+        f.write(JOB_SOURCE)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    pool = WarmProcessPool(JOB_MODULE, size=1, max_size=2)
+    pool.start()
+    yield pool
+    pool.stop()
+
+
+class TestWarmProcessPool:
+    def test_launch(self, pool, tmp_path):
+        idle = _wait_idle(pool, 1)
+        out_file = os.path.join(tmp_path, "out.json")
+        env = dict(os.environ, JOB_VAR="job1", PYTHONPATH=str(tmp_path) + os.pathsep + "/custom")
+        process = pool.launch([sys.executable, "-m", JOB_MODULE, out_file, "-n", "1"], env)
+        assert process is idle[0]
+        assert process.wait(timeout=30.0) == 0
+
+        with open(out_file) as f:
+            result = json.load(f)
+        assert result["argv"] == [out_file, "-n", "1"]
+        assert result["pid"] == process.pid
+        assert result["env"] == "job1"
+        assert "/custom" in result["path"]
+
+        # The used process is replaced
+        assert process not in _wait_idle(pool, 1)
+
+    def test_demand(self, pool, tmp_path):
+        _wait_idle(pool, 1)
+        for i in range(2):
+            out_file = os.path.join(tmp_path, f"out{i}.json")
+            pool.launch([sys.executable, "-m", JOB_MODULE, out_file], dict(os.environ)).wait(timeout=30.0)
+
+        # An idle process is kept for each recent job, up to the max size
+        assert len(_wait_idle(pool, 2)) == 2
+
+    def test_launch_cold(self, pool, tmp_path):
+        idle = _wait_idle(pool, 1)
+        process = pool.launch([sys.executable, "-c", "pass"], dict(os.environ))
+        assert process not in idle
+        assert process.wait(timeout=30.0) == 0
+
+    def test_stop(self, pool):
+        idle = _wait_idle(pool, 1)
+        pool.stop()
+        assert idle[0].poll() == 0
+        assert not pool.idle
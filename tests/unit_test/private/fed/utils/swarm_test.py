@@ -0,0 +1,133 @@
+# Copyright (c) 2023, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import pytest
+
+from nvflare.fuel.f3.cellnet.defs import MessageHeaderKey, ReturnCode
+from nvflare.fuel.f3.cellnet.utils import make_reply
+from nvflare.private.defs import CellMessageHeaderKeys, new_cell_message
+from nvflare.private.fed.utils.swarm import ManifestKey, SwarmDownloader, SwarmSeeder
+
+SERVER = "server.job"
+CHUNK_SIZE = 1000
+PAYLOAD = os.urandom(CHUNK_SIZE * 10 + 123)
+
+
+def _chunk_request(digest):
+    return new_cell_message({CellMessageHeaderKeys.CHUNK_DIGEST: digest})
+
+
+class _Net:
+    def __init__(self):
+        self.cells = {}
+        self.requests = []
+
+
+class _Cell:
+    """Cell delivering the requests directly to the callbacks of the other cells"""
+
+    def __init__(self, net: _Net, fqcn: str):
+        self.net = net
+        self.fqcn = fqcn
+        self.cb = None
+        net.cells[fqcn] = self
+
+    def register_request_cb(self, channel, topic, cb):
+        self.cb = cb
+
+    def send_request(self, channel, topic, target, request, timeout=None, optional=False):
+        self.net.requests.append((self.fqcn, target))
+        cell = self.net.cells.get(target)
+        if not cell or not cell.cb:
+            return make_reply(ReturnCode.TARGET_UNREACHABLE)
+
+        reply = cell.cb(request)
+        reply.payload = bytes(reply.payload) if reply.payload is not None else None
+        return reply
+
+
+class TestSwarm:
+    def test_download(self):
+        net = _Net()
+        seeder = SwarmSeeder(_Cell(net, SERVER), chunk_size=CHUNK_SIZE, min_payload_size=100)
+        assert seeder.should_publish(PAYLOAD)
+        assert not seeder.should_publish(b"small")
+
+        manifest1 = seeder.publish(PAYLOAD, "site-1.job")
+        assert manifest1[ManifestKey.PEERS] == []
+        assert len(manifest1[ManifestKey.DIGESTS]) == 11
+
+        site1 = SwarmDownloader(_Cell(net, "site-1.job"))
+        assert site1.download(manifest1, SERVER) == PAYLOAD
+        assert all(target == SERVER for _, target in net.requests)
+
+        # The second client gets every chunk from the first one
+        manifest2 = seeder.publish(PAYLOAD, "site-2.job")
+        assert manifest2[ManifestKey.ID] == manifest1[ManifestKey.ID]
+        assert manifest2[ManifestKey.PEERS] == ["site-1.job"]
+
+        net.requests.clear()
+        site2 = SwarmDownloader(_Cell(net, "site-2.job"))
+        assert site2.download(manifest2, SERVER) == PAYLOAD
+        assert len(net.requests) == 11
+        assert all(target == "site-1.job" for _, target in net.requests)
+
+    def test_fallback_to_server(self):
+        net = _Net()
+        seeder = SwarmSeeder(_Cell(net, SERVER), chunk_size=CHUNK_SIZE, min_payload_size=100)
+        seeder.publish(PAYLOAD, "site-1.job")
+
+        # The peer never received the payload and another one is gone
+        SwarmDownloader(_Cell(net, "site-1.job"))
+        manifest = seeder.publish(PAYLOAD, "site-3.job")
+        manifest[ManifestKey.PEERS].append("site-2.job")
+
+        site3 = SwarmDownloader(_Cell(net, "site-3.job"))
+        assert site3.download(manifest, SERVER) == PAYLOAD
+        assert len([target for _, target in net.requests if target == SERVER]) == 11
+
+    def test_bad_chunk_rejected(self):
+        net = _Net()
+        seeder = SwarmSeeder(_Cell(net, SERVER), chunk_size=CHUNK_SIZE, min_payload_size=100)
+        seeder.publish(PAYLOAD, "site-1.job")
+        manifest = seeder.publish(PAYLOAD, "site-2.job")
+
+        # A peer serving altered data
+        bad_peer = _Cell(net, "site-1.job")
+        bad_peer.register_request_cb(None, None, lambda request: make_reply(ReturnCode.OK, body=b"x" * CHUNK_SIZE))
+
+        site2 = SwarmDownloader(_Cell(net, "site-2.job"))
+        assert site2.download(manifest, SERVER) == PAYLOAD
+
+        # The server lost the payload
+        seeder.store.payloads.clear()
+        seeder.store.chunks.clear()
+        manifest[ManifestKey.ID] = "other"
+        site3 = SwarmDownloader(_Cell(net, "site-3.job"))
+        with pytest.raises(RuntimeError):
+            site3.download(manifest, SERVER)
+
+    def test_chunk_request(self):
+        net = _Net()
+        seeder = SwarmSeeder(_Cell(net, SERVER), chunk_size=CHUNK_SIZE, min_payload_size=100)
+        manifest = seeder.publish(PAYLOAD, "site-1.job")
+
+        reply = _Cell(net, "site-1.job").send_request(None, None, SERVER, _chunk_request("unknown"))
+        assert reply.get_header(MessageHeaderKey.RETURN_CODE) == ReturnCode.INVALID_REQUEST
+
+        reply = _Cell(net, "site-1.job").send_request(
+            None, None, SERVER, _chunk_request(manifest[ManifestKey.DIGESTS][-1])
+        )
+        assert reply.payload == PAYLOAD[CHUNK_SIZE * 10 :]